@@ -0,0 +1,371 @@
+"""
+Offline Classifier Benchmark
+
+Records real Gemini responses once into a fixture file, then replays them
+through RSIPClassifier with a local stand-in for the Gemini model, so
+throughput and quality regressions can be measured without network access or
+quota. The stand-in adds configurable latency and injects 429s and truncated
+responses.
+
+Usage:
+    python src/benchmark_classifier.py record [--sample N] [--variants default strict]
+    python src/benchmark_classifier.py replay [--fixtures PATH] [--batch-size N] [--error-rate F]
+
+Record options:
+    --sample N           Approved items to record (default: 50)
+    --variants V ...     Prompt variants to record (default: default)
+    --output PATH        Fixture file to write (default: benchmarks/fixtures/recorded.jsonl)
+
+Replay options:
+    --fixtures PATH      Fixture file (default: benchmarks/fixtures/synthetic_seed.jsonl)
+    --batch-size N       Items per Gemini call (default: classifier.batch_size)
+    --latency-ms F       Base latency per call (default: 800)
+    --item-latency-ms F  Extra latency per item in a call (default: 150)
+    --jitter F           Relative latency jitter (default: 0.2)
+    --error-rate F       Share of calls failing with 429 (default: 0.0)
+    --malformed-rate F   Share of responses cut off mid-JSON (default: 0.0)
+    --retry-delay F      Base retry delay in seconds (default: 0.05)
+    --with-gates         Keep pre-classification rules and the local model enabled
+    --seed N             Random seed (default: 7)
+    --report PATH        Also write the report as JSON
+
+Each fixture line holds one item, the prompt variant and version it was
+recorded with, Gemini's parsed response, token counts and, when available,
+the labels stored in the database (used for label agreement).
+"""
+import asyncio
+import argparse
+import json
+import random
+import re
+import statistics
+import time
+from collections import defaultdict
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List
+import structlog
+from google.api_core import exceptions as google_exceptions
+
+from config import Config, get_config
+from processors.ai_classifier import RSIPClassifier
+from processors.prompts import PROMPT_VARIANTS, estimate_tokens
+
+logger = structlog.get_logger()
+
+FIXTURE_DIR = Path(__file__).parent.parent / "benchmarks" / "fixtures"
+ITEM_FIELDS = ("title", "description", "source_name", "media_type")
+LABEL_FIELDS = ("content_type", "application_category", "educational_value")
+
+TITLE_LINE = re.compile(r"^Title: (.*)$", re.MULTILINE)
+
+
+class RecordingModel:
+    """Wraps a Gemini model and keeps each prompt with its response"""
+
+    def __init__(self, model):
+        self.model = model
+        self.calls: Dict[str, Dict[str, Any]] = {}
+
+    async def generate_content_async(self, prompt: str, **kwargs):
+        started = time.perf_counter()
+        response = await self.model.generate_content_async(prompt, **kwargs)
+        usage = getattr(response, "usage_metadata", None)
+        self.calls[prompt] = {
+            "text": response.text,
+            "latency_seconds": round(time.perf_counter() - started, 3),
+            "input_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+            "output_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+        }
+        return response
+
+
+class ReplayModel:
+    """
+    Local stand-in for a Gemini model.
+
+    Finds the recorded response for each item in a prompt (by its rendered
+    title) and answers single or batch prompts in the shape RSIPClassifier
+    expects, after a simulated latency. Some calls can fail with 429s or
+    return truncated JSON.
+    """
+
+    def __init__(
+        self,
+        responses: Dict[str, Dict[str, Any]],
+        system_instruction: str,
+        rng: random.Random,
+        latency: float,
+        item_latency: float,
+        jitter: float,
+        error_rate: float,
+        malformed_rate: float
+    ):
+        self.responses = responses
+        self.instruction_tokens = estimate_tokens(system_instruction)
+        self.rng = rng
+        self.latency = latency
+        self.item_latency = item_latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.stats = {"calls": 0, "injected_429": 0, "injected_malformed": 0}
+
+    async def generate_content_async(self, prompt: str, **kwargs):
+        self.stats["calls"] += 1
+        titles = TITLE_LINE.findall(prompt)
+
+        delay = self.latency + self.item_latency * len(titles)
+        await asyncio.sleep(max(0.0, delay * (1 + self.rng.uniform(-self.jitter, self.jitter))))
+
+        if self.rng.random() < self.error_rate:
+            self.stats["injected_429"] += 1
+            raise google_exceptions.ResourceExhausted("Injected 429 (benchmark)")
+
+        results = [self.responses.get(title, {"content_type": "unknown"}) for title in titles]
+        if "\n[0]\n" in prompt:
+            text = json.dumps([{"index": index, **result} for index, result in enumerate(results)])
+        else:
+            text = json.dumps(results[0] if results else {})
+
+        if self.rng.random() < self.malformed_rate:
+            self.stats["injected_malformed"] += 1
+            text = text[:len(text) // 2]
+
+        return SimpleNamespace(text=text, usage_metadata=SimpleNamespace(
+            prompt_token_count=self.instruction_tokens + estimate_tokens(prompt),
+            candidates_token_count=estimate_tokens(text),
+            cached_content_token_count=0,
+        ))
+
+
+def load_fixtures(path: Path) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentile(values: List[float], share: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(share * (len(ordered) - 1))))]
+
+
+async def record(config: Config, args: argparse.Namespace):
+    """Classify sample items with live Gemini and write fixture lines"""
+    from storage.supabase_client import SupabaseClient
+
+    # Every item must reach Gemini, one call per item
+    config.classifier.cache_enabled = False
+    config.pre_classification.enabled = False
+    config.classifier.local_model_enabled = False
+
+    db = SupabaseClient(config)
+    items = await db.get_items_for_reclassification(limit=args.sample)
+    if not items:
+        logger.error("No items available to record")
+        return
+
+    classifier = RSIPClassifier(config)
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    lines = 0
+    with open(output, "w", encoding="utf-8") as f:
+        for variant in args.variants:
+            prompts, model = classifier._prompt(variant)
+            recorder = RecordingModel(model)
+            classifier._prompts[variant] = (prompts, recorder)
+
+            await classifier.classify_batch(items, batch_size=1, variant=variant)
+
+            for item in items:
+                call = recorder.calls.get(prompts.single(item))
+                if call is None:
+                    continue
+                response = classifier._parse_response(call.pop("text"))
+                if not response:
+                    continue
+                f.write(json.dumps({
+                    "item": {field: item.get(field) for field in ITEM_FIELDS},
+                    "labels": {field: item[field] for field in LABEL_FIELDS if item.get(field) is not None},
+                    "variant": variant,
+                    "prompt_version": prompts.version,
+                    "model": classifier.model_name,
+                    "response": response,
+                    **call,
+                }, ensure_ascii=False) + "\n")
+                lines += 1
+
+    logger.info("Fixtures recorded", path=str(output), lines=lines, variants=args.variants)
+
+
+async def replay_variant(
+    config: Config,
+    variant: str,
+    records: List[Dict[str, Any]],
+    args: argparse.Namespace
+) -> Dict[str, Any]:
+    """Run one prompt variant's fixtures through the classifier with the stand-in model"""
+    classifier = RSIPClassifier(config)
+    prompts, _ = classifier._prompt(variant)
+
+    responses = {prompts.item_fields(r["item"])["title"]: r["response"] for r in records}
+    stand_in = ReplayModel(
+        responses,
+        prompts.system_instruction,
+        random.Random(args.seed),
+        latency=args.latency_ms / 1000,
+        item_latency=args.item_latency_ms / 1000,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        malformed_rate=args.malformed_rate,
+    )
+    classifier._prompts[variant] = (prompts, stand_in)
+
+    items = [r["item"] for r in records]
+    batch_size = args.batch_size or config.classifier.batch_size
+    latencies: List[float] = []
+
+    async def timed(chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        started = time.perf_counter()
+        results = await classifier.classify_batch(chunk, batch_size=batch_size, variant=variant)
+        latencies.append(time.perf_counter() - started)
+        return results
+
+    started = time.perf_counter()
+    chunks = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+    results = [r for chunk_results in await asyncio.gather(*(timed(c) for c in chunks)) for r in chunk_results]
+    elapsed = time.perf_counter() - started
+
+    usage = classifier.get_usage_report()
+    classified = sum(u["items"] for u in usage.values()) or 1
+    validation = classifier.get_validation_report()
+
+    # Agreement with stored labels where recorded, otherwise with the recorded response
+    agree = defaultdict(int)
+    compared = defaultdict(int)
+    for record_, result in zip(records, results):
+        if result.get("classification_failed"):
+            continue
+        reference = {**record_["response"], **record_.get("labels", {})}
+        for field in LABEL_FIELDS:
+            if reference.get(field) is not None:
+                compared[field] += 1
+                agree[field] += str(result.get(field)) == str(reference[field])
+
+    versions = {r.get("prompt_version") for r in records}
+    return {
+        "variant": variant,
+        "prompt_version": prompts.version,
+        "fixture_versions": sorted(v for v in versions if v),
+        "stale_fixtures": any(v != prompts.version for v in versions),
+        "items": len(items),
+        "batch_size": batch_size,
+        "items_per_second": round(len(items) / elapsed, 2) if elapsed else 0.0,
+        "latency_p50_seconds": round(percentile(latencies, 0.5), 3),
+        "latency_p95_seconds": round(percentile(latencies, 0.95), 3),
+        "latency_mean_seconds": round(statistics.fmean(latencies), 3) if latencies else 0.0,
+        "input_tokens_per_item": round(
+            sum(u["input_tokens_per_item"] * u["items"] for u in usage.values()) / classified, 1
+        ),
+        "output_tokens_per_item": round(
+            sum(u["output_tokens_per_item"] * u["items"] for u in usage.values()) / classified, 1
+        ),
+        "parse_failure_rate": round(
+            validation["parse_failures"] / validation["responses"], 3
+        ) if validation["responses"] else 0.0,
+        "failed_items": sum(1 for r in results if r.get("classification_failed")),
+        "label_agreement": {
+            field: round(agree[field] / compared[field], 3) for field in LABEL_FIELDS if compared[field]
+        },
+        "stand_in": stand_in.stats,
+        "requests": classifier.get_rate_report(),
+    }
+
+
+async def replay(config: Config, args: argparse.Namespace):
+    """Replay fixtures per prompt variant and print the benchmark report"""
+    records = load_fixtures(Path(args.fixtures))
+    if not records:
+        logger.error("No fixtures to replay", path=args.fixtures)
+        return
+
+    # Measure the Gemini path itself: no result cache, fast retries
+    config.classifier.cache_enabled = False
+    config.classifier.context_cache_enabled = False
+    config.rate_limits.retry_delay_seconds = args.retry_delay
+    config.rate_limits.max_retry_delay_seconds = max(args.retry_delay * 8, args.retry_delay)
+    if not args.with_gates:
+        config.pre_classification.enabled = False
+        config.classifier.local_model_enabled = False
+
+    by_variant: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for record_ in records:
+        by_variant[record_.get("variant", "default")].append(record_)
+
+    reports = []
+    for variant, variant_records in sorted(by_variant.items()):
+        if variant not in PROMPT_VARIANTS:
+            logger.warning("Skipping fixtures for unknown prompt variant", variant=variant)
+            continue
+        reports.append(await replay_variant(config, variant, variant_records, args))
+
+    print("\n" + "="*100)
+    print("CLASSIFIER BENCHMARK (offline replay)")
+    print("="*100)
+    print(f"Fixtures: {args.fixtures}   latency {args.latency_ms:.0f}ms + {args.item_latency_ms:.0f}ms/item, "
+          f"429 rate {args.error_rate:.0%}, malformed rate {args.malformed_rate:.0%}")
+    print(f"{'variant':<17} {'version':<26} {'items':>5} {'batch':>5} {'items/s':>8} {'p50 s':>7} {'p95 s':>7} "
+          f"{'in tok':>7} {'out tok':>7} {'parse fail':>10} {'failed':>6}")
+    print("-"*100)
+    for r in reports:
+        version = r["prompt_version"] + (" *" if r["stale_fixtures"] else "")
+        print(f"{r['variant']:<17} {version:<26} {r['items']:>5} {r['batch_size']:>5} {r['items_per_second']:>8.2f} "
+              f"{r['latency_p50_seconds']:>7.3f} {r['latency_p95_seconds']:>7.3f} "
+              f"{r['input_tokens_per_item']:>7.1f} {r['output_tokens_per_item']:>7.1f} "
+              f"{r['parse_failure_rate']:>10.1%} {r['failed_items']:>6}")
+        agreement = ", ".join(f"{k} {v:.0%}" for k, v in r["label_agreement"].items())
+        print(f"{'':<17} label agreement: {agreement or 'n/a'}")
+    if any(r["stale_fixtures"] for r in reports):
+        print("\n* fixtures were recorded with a different prompt version; re-record to compare like for like")
+
+    if args.report:
+        Path(args.report).write_text(json.dumps(reports, indent=2))
+        print(f"\nReport written to: {args.report}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Offline classifier benchmark')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help='Record live Gemini responses into fixtures')
+    record_parser.add_argument('--sample', type=int, default=50, help='Items to record')
+    record_parser.add_argument('--variants', nargs='+', default=['default'], choices=sorted(PROMPT_VARIANTS),
+                               help='Prompt variants to record')
+    record_parser.add_argument('--output', default=str(FIXTURE_DIR / 'recorded.jsonl'), help='Fixture file')
+
+    replay_parser = commands.add_parser('replay', help='Replay fixtures through a local Gemini stand-in')
+    replay_parser.add_argument('--fixtures', default=str(FIXTURE_DIR / 'synthetic_seed.jsonl'), help='Fixture file')
+    replay_parser.add_argument('--batch-size', type=int, default=None, help='Items per Gemini call')
+    replay_parser.add_argument('--latency-ms', type=float, default=800, help='Base latency per call')
+    replay_parser.add_argument('--item-latency-ms', type=float, default=150, help='Extra latency per item')
+    replay_parser.add_argument('--jitter', type=float, default=0.2, help='Relative latency jitter')
+    replay_parser.add_argument('--error-rate', type=float, default=0.0, help='Share of calls failing with 429')
+    replay_parser.add_argument('--malformed-rate', type=float, default=0.0, help='Share of truncated responses')
+    replay_parser.add_argument('--retry-delay', type=float, default=0.05, help='Base retry delay (seconds)')
+    replay_parser.add_argument('--with-gates', action='store_true', help='Keep rules and local model enabled')
+    replay_parser.add_argument('--seed', type=int, default=7, help='Random seed')
+    replay_parser.add_argument('--report', default=None, help='Write the report as JSON')
+
+    args = parser.parse_args()
+    config = get_config()
+
+    if args.command == 'record':
+        await record(config, args)
+    else:
+        await replay(config, args)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -34,6 +34,82 @@ class RateLimitConfig:
     requests_per_second: float = 1.0
     retry_delay_seconds: int = 5
     max_retries: int = 3
+    max_retry_delay_seconds: int = 60
+    gemini_initial_concurrency: int = 2
+    gemini_max_concurrency: int = 16
+    gemini_latency_target_seconds: float = 30.0
+    gemini_request_timeout_seconds: float = 120.0
+    circuit_breaker_threshold: int = 5
+    circuit_breaker_cooldown_seconds: int = 30
+
+
+@dataclass
+class ClassifierConfig:
+    """AI classifier configuration"""
+    model: str = "gemini-2.0-flash"
+    batch_size: int = 1
+    cache_enabled: bool = True
+    cache_path: str = "cache/classifications.sqlite3"  # Relative to the crawler directory
+    local_model_enabled: bool = False
+    local_model_path: str = "models/local_classifier.json"  # Relative to the crawler directory
+    local_model_threshold: float = 0.9
+    title_token_budget: int = 64
+    description_token_budget: int = 300
+    context_cache_enabled: bool = False
+    context_cache_ttl_minutes: int = 60
+    structured_output: bool = True
+
+
+@dataclass
+class UsageConfig:
+    """API prices and per-run budgets for the usage ledger"""
+    # provider -> {"units" | "input_tokens" | "cached_tokens" | "output_tokens": USD each}
+    prices: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    # provider -> {usage field: maximum per run}
+    run_budgets: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    max_cost_per_added_item_usd: float = 0.0  # 0 = no limit
+
+
+@dataclass
+class MetricsConfig:
+    """Pipeline metrics export"""
+    prometheus_textfile: str = ""  # Written when the run ends; empty = off
+    prometheus_port: int = 0       # Serves /metrics during the run; 0 = off
+
+
+@dataclass
+class TracingConfig:
+    """Per-item trace spans"""
+    enabled: bool = False
+    sample_rate: float = 0.05          # Share of items traced
+    export_path: str = "traces/{run_id}.json"  # Relative to the crawler directory
+    format: str = "otlp"               # "otlp" (OTLP/JSON) or "chrome" (trace events)
+    max_spans: int = 200000
+
+
+@dataclass
+class StorageConfig:
+    """Gallery database write settings"""
+    upsert_chunk_size: int = 200  # Rows per upsert request
+    on_conflict: str = "ignore"   # "ignore" keeps existing rows, "merge" refreshes them
+    db_pool_size: int = 8         # Threads running database requests concurrently
+    flush_interval_seconds: float = 5.0  # Write-behind buffer flushes at least this often
+    spool_path: str = "spool/gallery_items.jsonl"  # Relative to the crawler directory
+    spool_max_attempts: int = 5   # Replays before a spooled item is set aside as rejected
+    scan_page_size: int = 500     # Rows per page when batch jobs stream the gallery
+    bulk_load_batch_size: int = 5000  # Rows per COPY and merge in direct Postgres bulk loads
+
+
+@dataclass
+class PreClassificationConfig:
+    """Rule-based pre-classification gate configuration"""
+    enabled: bool = False
+    reject_threshold: float = -4.0
+    tag_threshold: float = -2.0  # Title rule assignments apply only at or below this score
+    keywords: Dict[str, float] = field(default_factory=dict)
+    source_reputation: Dict[str, float] = field(default_factory=dict)
+    media_type: Dict[str, float] = field(default_factory=dict)
+    title_rules: List[Dict[str, Any]] = field(default_factory=list)
 
 
 @dataclass
@@ -87,6 +163,8 @@ class Config:
         # Supabase
         self.supabase_url = os.getenv("SUPABASE_URL", "https://wbtrtckvwtlxfnadrvzo.supabase.co")
         self.supabase_service_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
+        # Direct Postgres connection, only for bulk loads (storage/bulk_loader.py)
+        self.database_url = os.getenv("DATABASE_URL", "")
 
         # YouTube
         self.youtube_api_key = os.getenv("YOUTUBE_API_KEY", "")
@@ -118,6 +196,12 @@ class Config:
         # Parse configurations
         self._parse_crawler_config()
         self._parse_rate_limits()
+        self._parse_classifier_config()
+        self._parse_usage_config()
+        self._parse_metrics_config()
+        self._parse_tracing_config()
+        self._parse_storage_config()
+        self._parse_pre_classification_config()
         self._parse_youtube_config()
         self._parse_news_sources()
         self._parse_company_websites()
@@ -146,6 +230,95 @@ class Config:
             requests_per_second=rate_cfg.get("requests_per_second", 1.0),
             retry_delay_seconds=rate_cfg.get("retry_delay_seconds", 5),
             max_retries=rate_cfg.get("max_retries", 3),
+            max_retry_delay_seconds=rate_cfg.get("max_retry_delay_seconds", 60),
+            gemini_initial_concurrency=rate_cfg.get("gemini_initial_concurrency", 2),
+            gemini_max_concurrency=rate_cfg.get("gemini_max_concurrency", 16),
+            gemini_latency_target_seconds=rate_cfg.get("gemini_latency_target_seconds", 30.0),
+            gemini_request_timeout_seconds=rate_cfg.get("gemini_request_timeout_seconds", 120.0),
+            circuit_breaker_threshold=rate_cfg.get("circuit_breaker_threshold", 5),
+            circuit_breaker_cooldown_seconds=rate_cfg.get("circuit_breaker_cooldown_seconds", 30),
+        )
+
+    def _parse_classifier_config(self):
+        """Parse AI classifier configuration"""
+        classifier_cfg = self._sources.get("classifier", {})
+        self.classifier = ClassifierConfig(
+            model=classifier_cfg.get("model", "gemini-2.0-flash"),
+            batch_size=classifier_cfg.get("batch_size", 1),
+            cache_enabled=classifier_cfg.get("cache_enabled", True),
+            cache_path=str(Path(__file__).parent.parent / classifier_cfg.get(
+                "cache_path", ClassifierConfig.cache_path
+            )),
+            local_model_enabled=classifier_cfg.get("local_model_enabled", False),
+            local_model_path=str(Path(__file__).parent.parent / classifier_cfg.get(
+                "local_model_path", ClassifierConfig.local_model_path
+            )),
+            local_model_threshold=classifier_cfg.get("local_model_threshold", 0.9),
+            title_token_budget=classifier_cfg.get("title_token_budget", 64),
+            description_token_budget=classifier_cfg.get("description_token_budget", 300),
+            context_cache_enabled=classifier_cfg.get("context_cache_enabled", False),
+            context_cache_ttl_minutes=classifier_cfg.get("context_cache_ttl_minutes", 60),
+            structured_output=classifier_cfg.get("structured_output", True),
+        )
+
+    def _parse_usage_config(self):
+        """Parse API usage prices and budgets"""
+        usage_cfg = self._sources.get("usage", {})
+        self.usage = UsageConfig(
+            prices=usage_cfg.get("prices", {}),
+            run_budgets=usage_cfg.get("run_budgets", {}),
+            max_cost_per_added_item_usd=usage_cfg.get("max_cost_per_added_item_usd", 0.0),
+        )
+
+    def _parse_metrics_config(self):
+        """Parse pipeline metrics export configuration"""
+        metrics_cfg = self._sources.get("metrics", {})
+        textfile = metrics_cfg.get("prometheus_textfile", "")
+        self.metrics = MetricsConfig(
+            prometheus_textfile=str(Path(__file__).parent.parent / textfile) if textfile else "",
+            prometheus_port=metrics_cfg.get("prometheus_port", 0),
+        )
+
+    def _parse_tracing_config(self):
+        """Parse per-item tracing configuration"""
+        tracing_cfg = self._sources.get("tracing", {})
+        self.tracing = TracingConfig(
+            enabled=tracing_cfg.get("enabled", False),
+            sample_rate=tracing_cfg.get("sample_rate", 0.05),
+            export_path=str(Path(__file__).parent.parent / tracing_cfg.get(
+                "export_path", TracingConfig.export_path
+            )),
+            format=tracing_cfg.get("format", "otlp"),
+            max_spans=tracing_cfg.get("max_spans", 200000),
+        )
+
+    def _parse_storage_config(self):
+        """Parse gallery database write configuration"""
+        storage_cfg = self._sources.get("storage", {})
+        self.storage = StorageConfig(
+            upsert_chunk_size=storage_cfg.get("upsert_chunk_size", 200),
+            on_conflict=storage_cfg.get("on_conflict", "ignore"),
+            db_pool_size=storage_cfg.get("db_pool_size", 8),
+            flush_interval_seconds=storage_cfg.get("flush_interval_seconds", 5.0),
+            spool_path=str(Path(__file__).parent.parent / storage_cfg.get(
+                "spool_path", StorageConfig.spool_path
+            )),
+            spool_max_attempts=storage_cfg.get("spool_max_attempts", 5),
+            scan_page_size=storage_cfg.get("scan_page_size", 500),
+            bulk_load_batch_size=storage_cfg.get("bulk_load_batch_size", 5000),
+        )
+
+    def _parse_pre_classification_config(self):
+        """Parse rule-based pre-classification gate configuration"""
+        gate_cfg = self._sources.get("pre_classification", {})
+        self.pre_classification = PreClassificationConfig(
+            enabled=gate_cfg.get("enabled", False),
+            reject_threshold=gate_cfg.get("reject_threshold", -4.0),
+            tag_threshold=gate_cfg.get("tag_threshold", -2.0),
+            keywords=gate_cfg.get("keywords", {}),
+            source_reputation=gate_cfg.get("source_reputation", {}),
+            media_type=gate_cfg.get("media_type", {}),
+            title_rules=gate_cfg.get("title_rules", []),
         )
 
     def _parse_youtube_config(self):
@@ -1,92 +1,41 @@
 """
 Crawl LinkedIn Videos and Images
 Searches for robotics video and image content on LinkedIn via SerpAPI
+
+Usage:
+    python src/crawl_linkedin_media.py [--profile]
+
+--profile writes a profiling report (see processors/profiling.py).
 """
 import os
 import json
-import asyncio
 from datetime import datetime
+from typing import List
 from dotenv import load_dotenv
 from supabase import create_client
-import google.generativeai as genai
 
+from config import get_config
 from crawlers.social_crawler import crawl_linkedin_media, SocialContent
+from processors import profiling
+from processors.ai_classifier import RSIPClassifier
 
 load_dotenv()
 
 # Initialize clients
 supabase = create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_ROLE_KEY'))
-genai.configure(api_key=os.getenv('GOOGLE_AI_API_KEY'))
-model = genai.GenerativeModel('gemini-2.0-flash')
-
-CLASSIFICATION_PROMPT = """Classify this robotics content from LinkedIn.
-
-Title: {title}
-Description: {description}
-Media Type: {media_type}
-Author: {author}
-
-Classify according to RSIP taxonomy:
-
-1. application_category: industrial_automation | service_robotics | surveillance_security
-2. content_type: real_application | pilot_poc | case_study | tech_demo | product_announcement | tutorial
-3. educational_value: 1-5 (5=detailed case study with metrics, 1=pure marketing)
-4. task_types: Array of relevant tasks like transportation, inspection, manipulation, palletizing, welding, assembly, delivery_service, human_interaction, cleaning, perimeter_patrol, bin_picking, kitting, etc.
-5. scene_type: warehouse | manufacturing | retail | hospital | office | hotel | outdoor | laboratory
-6. ai_summary: One sentence summary of what this content shows
-
-IMPORTANT CLASSIFICATION RULES:
-- LinkedIn content is often promotional - be strict about content_type
-- product_announcement: New product reveals, feature announcements
-- tech_demo: Capability demonstrations, trade shows, lab footage
-- real_application: ONLY if clearly showing actual customer deployment
-- case_study: Must show results, metrics, or detailed implementation
-- Videos showing robot capabilities without customer context = tech_demo
-- Images of robots at trade shows or labs = tech_demo
-
-Respond with JSON only:
-{{
-  "application_category": "...",
-  "content_type": "...",
-  "educational_value": 1-5,
-  "task_types": ["...", "..."],
-  "scene_type": "...",
-  "ai_summary": "..."
-}}
-"""
-
 
-async def classify_content(item: SocialContent) -> dict:
-    """Classify LinkedIn content using Gemini."""
-    prompt = CLASSIFICATION_PROMPT.format(
-        title=item.title,
-        description=item.description[:500] if item.description else '',
-        media_type=item.media_type,
-        author=item.author or 'Unknown'
-    )
 
-    try:
-        response = model.generate_content(prompt)
-        text = response.text.strip()
-
-        # Extract JSON
-        if '```json' in text:
-            text = text.split('```json')[1].split('```')[0]
-        elif '```' in text:
-            text = text.split('```')[1].split('```')[0]
-
-        result = json.loads(text.strip())
-        return result
-    except Exception as e:
-        print(f"  Classification error: {e}")
-        return {
-            'application_category': 'industrial_automation',
-            'content_type': 'tech_demo',
-            'educational_value': 2,
-            'task_types': [],
-            'scene_type': None,
-            'ai_summary': item.description[:200] if item.description else item.title
+async def classify_contents(classifier: RSIPClassifier, items: List[SocialContent]) -> List[dict]:
+    """Classify LinkedIn content with the shared classifier (linkedin prompt variant)."""
+    return await classifier.classify_batch([
+        {
+            'title': item.title,
+            'description': item.description or '',
+            'source_name': f"LinkedIn - {item.author or 'Unknown'}",
+            'media_type': item.media_type,
         }
+        for item in items
+    ], variant='linkedin')
 
 
 def check_exists(url: str) -> bool:
@@ -110,14 +59,16 @@ async def store_content(item: SocialContent, classification: dict) -> bool:
         'media_type': item.media_type,  # 'video' or 'image'
         'thumbnail_url': item.thumbnail_url,
         'published_at': item.published_at,
-        'application_category': classification.get('application_category', 'industrial_automation'),
-        'content_type': classification.get('content_type', 'tech_demo'),
-        'educational_value': classification.get('educational_value', 2),
-        'task_types': classification.get('task_types', []),
-        'scene_type': classification.get('scene_type'),
-        'ai_summary': classification.get('ai_summary'),
+        'application_category': classification['application_category'],
+        'content_type': classification['content_type'],
+        'deployment_maturity': classification['deployment_maturity'],
+        'educational_value': classification['educational_value'],
+        'task_types': classification['task_types'],
+        'specific_tasks': classification['specific_tasks'],
+        'scene_type': classification['scene_type'],
+        'ai_summary': classification.get('summary'),
         'ai_classification': classification,
-        'ai_confidence': 0.7,
+        'ai_confidence': classification['confidence'],
         'status': 'approved',  # Auto-approve for now
     }
 
@@ -141,17 +92,21 @@ async def main():
         return
 
     # Crawl LinkedIn videos and images
-    results = await crawl_linkedin_media(
-        serpapi_key,
-        max_videos=100,
-        max_images=100
-    )
+    with profiling.stage("crawl"):
+        results = await crawl_linkedin_media(
+            serpapi_key,
+            max_videos=100,
+            max_images=100
+        )
+
+    classifier = RSIPClassifier(get_config())
 
     stats = {
         'total_found': 0,
         'classified': 0,
         'stored': 0,
         'duplicates': 0,
+        'failed': 0,
         'by_type': {'videos': {'found': 0, 'stored': 0}, 'images': {'found': 0, 'stored': 0}}
     }
 
@@ -163,12 +118,27 @@ async def main():
         stats['total_found'] += len(items)
         stats['by_type'][media_type]['found'] = len(items)
 
-        for i, item in enumerate(items):
-            print(f"\n[{i+1}/{len(items)}] {item.title[:50]}...")
+        # Skip known URLs before spending classification calls on them
+        new_items = []
+        for item in items:
+            if check_exists(item.url):
+                print(f"  Skipping duplicate: {item.title[:40]}...")
+                stats['duplicates'] += 1
+            else:
+                new_items.append(item)
+
+        classifications = await classify_contents(classifier, new_items)
+
+        for i, (item, classification) in enumerate(zip(new_items, classifications)):
+            print(f"\n[{i+1}/{len(new_items)}] {item.title[:50]}...")
             print(f"  URL: {item.url[:60]}...")
 
-            # Classify
-            classification = await classify_content(item)
+            if classification.get('classification_failed'):
+                # Leave it for the next run rather than storing placeholder values
+                print("  Classification failed, skipping")
+                stats['failed'] += 1
+                continue
+
             stats['classified'] += 1
             print(f"  Type: {classification.get('content_type')} | Category: {classification.get('application_category')}")
             print(f"  Educational Value: {classification.get('educational_value')}/5")
@@ -181,9 +151,6 @@ async def main():
             else:
                 stats['duplicates'] += 1
 
-            # Rate limiting - be gentle with SerpAPI
-            await asyncio.sleep(0.5)
-
     # Print summary
     print("\n" + "="*60)
     print("CRAWL COMPLETE")
@@ -193,6 +160,9 @@ async def main():
     print(f"Classified: {stats['classified']}")
     print(f"Stored: {stats['stored']}")
     print(f"Duplicates skipped: {stats['duplicates']}")
+    print(f"Classification failed: {stats['failed']}")
+    print(f"Classification cache: {classifier.get_cache_report()}")
+    print(f"Gemini requests: {classifier.get_rate_report()}")
     print("\nBy media type:")
     for media_type, data in stats['by_type'].items():
         print(f"  {media_type}: {data['stored']}/{data['found']} stored")
@@ -208,4 +178,4 @@ async def main():
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    profiling.run(main, "crawl_linkedin_media")
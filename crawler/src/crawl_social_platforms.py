@@ -1,99 +1,47 @@
 """
 Crawl Social Platforms - X/Twitter, Facebook, Instagram
 Searches for robotics video and image content via SerpAPI
+
+Usage:
+    python src/crawl_social_platforms.py [--profile]
+
+--profile writes a profiling report (see processors/profiling.py).
 """
 import os
 import json
-import asyncio
 from datetime import datetime
+from typing import List
 from dotenv import load_dotenv
 from supabase import create_client
-import google.generativeai as genai
 
+from config import get_config
 from crawlers.social_crawler import crawl_all_social_platforms, SocialContent
+from processors import profiling
+from processors.ai_classifier import RSIPClassifier
 
 load_dotenv()
 
 # Initialize clients
 supabase = create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_ROLE_KEY'))
-genai.configure(api_key=os.getenv('GOOGLE_AI_API_KEY'))
-model = genai.GenerativeModel('gemini-2.0-flash')
-
-CLASSIFICATION_PROMPT = """Classify this robotics content from {platform}.
-
-Title: {title}
-Description: {description}
-Media Type: {media_type}
-Author: {author}
-
-Classify according to RSIP taxonomy:
-
-1. application_category: industrial_automation | service_robotics | surveillance_security
-2. content_type: real_application | pilot_poc | case_study | tech_demo | product_announcement | tutorial
-3. educational_value: 1-5 (5=detailed case study with metrics, 1=pure marketing/entertainment)
-4. task_types: Array of relevant tasks like transportation, inspection, manipulation, palletizing, welding, assembly, delivery_service, human_interaction, cleaning, perimeter_patrol, bin_picking, kitting, etc.
-5. scene_type: warehouse | manufacturing | retail | hospital | office | hotel | outdoor | laboratory
-6. ai_summary: One sentence summary of what this content shows
-
-IMPORTANT CLASSIFICATION RULES:
-- Social media content is often promotional - be strict about content_type
-- product_announcement: New product reveals, feature announcements
-- tech_demo: Capability demonstrations, trade shows, lab footage, viral videos
-- real_application: ONLY if clearly showing actual customer deployment
-- case_study: Must show results, metrics, or detailed implementation
-- Videos of robots dancing, doing stunts = tech_demo (educational_value: 1-2)
-- Factory/warehouse deployment footage with context = real_application
-
-Respond with JSON only:
-{{
-  "application_category": "...",
-  "content_type": "...",
-  "educational_value": 1-5,
-  "task_types": ["...", "..."],
-  "scene_type": "...",
-  "ai_summary": "..."
-}}
-"""
-
-
-async def classify_content(item: SocialContent) -> dict:
-    """Classify social content using Gemini."""
-    platform_name = {
-        'twitter': 'X/Twitter',
-        'facebook': 'Facebook',
-        'instagram': 'Instagram'
-    }.get(item.platform, item.platform)
-
-    prompt = CLASSIFICATION_PROMPT.format(
-        platform=platform_name,
-        title=item.title,
-        description=item.description[:500] if item.description else '',
-        media_type=item.media_type,
-        author=item.author or 'Unknown'
-    )
-
-    try:
-        response = model.generate_content(prompt)
-        text = response.text.strip()
-
-        # Extract JSON
-        if '```json' in text:
-            text = text.split('```json')[1].split('```')[0]
-        elif '```' in text:
-            text = text.split('```')[1].split('```')[0]
 
-        result = json.loads(text.strip())
-        return result
-    except Exception as e:
-        print(f"  Classification error: {e}")
-        return {
-            'application_category': 'industrial_automation',
-            'content_type': 'tech_demo',
-            'educational_value': 2,
-            'task_types': [],
-            'scene_type': None,
-            'ai_summary': item.description[:200] if item.description else item.title
+PLATFORM_NAMES = {
+    'twitter': 'X/Twitter',
+    'facebook': 'Facebook',
+    'instagram': 'Instagram'
+}
+
+
+async def classify_contents(classifier: RSIPClassifier, items: List[SocialContent]) -> List[dict]:
+    """Classify social content with the shared classifier (social_platforms prompt variant)."""
+    return await classifier.classify_batch([
+        {
+            'title': item.title,
+            'description': item.description or '',
+            'source_name': f"{PLATFORM_NAMES.get(item.platform, item.platform)} - {item.author or 'Unknown'}",
+            'media_type': item.media_type,
         }
+        for item in items
+    ], variant='social_platforms')
 
 
 def check_exists(url: str) -> bool:
@@ -128,29 +76,25 @@ async def store_content(item: SocialContent, classification: dict) -> bool:
     if source_type == 'twitter':
         source_type = 'twitter'  # Keep as twitter for DB consistency
 
-    source_name_map = {
-        'twitter': 'X/Twitter',
-        'facebook': 'Facebook',
-        'instagram': 'Instagram'
-    }
-
     record = {
         'title': item.title[:500],
         'description': item.description[:2000] if item.description else None,
         'source_url': url,
-        'source_name': f"{source_name_map.get(item.platform, item.platform)} - {item.author}" if item.author else source_name_map.get(item.platform, item.platform),
+        'source_name': f"{PLATFORM_NAMES.get(item.platform, item.platform)} - {item.author}" if item.author else PLATFORM_NAMES.get(item.platform, item.platform),
         'source_type': source_type,
         'media_type': item.media_type,
         'thumbnail_url': item.thumbnail_url,
         'published_at': item.published_at,
-        'application_category': classification.get('application_category', 'industrial_automation'),
-        'content_type': classification.get('content_type', 'tech_demo'),
-        'educational_value': classification.get('educational_value', 2),
-        'task_types': classification.get('task_types', []),
-        'scene_type': classification.get('scene_type'),
-        'ai_summary': classification.get('ai_summary'),
+        'application_category': classification['application_category'],
+        'content_type': classification['content_type'],
+        'deployment_maturity': classification['deployment_maturity'],
+        'educational_value': classification['educational_value'],
+        'task_types': classification['task_types'],
+        'specific_tasks': classification['specific_tasks'],
+        'scene_type': classification['scene_type'],
+        'ai_summary': classification.get('summary'),
         'ai_classification': classification,
-        'ai_confidence': 0.7,
+        'ai_confidence': classification['confidence'],
         'status': 'approved',
     }
 
@@ -174,16 +118,20 @@ async def main():
         return
 
     # Crawl all platforms
-    results = await crawl_all_social_platforms(
-        serpapi_key,
-        max_per_platform=100
-    )
+    with profiling.stage("crawl"):
+        results = await crawl_all_social_platforms(
+            serpapi_key,
+            max_per_platform=100
+        )
+
+    classifier = RSIPClassifier(get_config())
 
     stats = {
         'total_found': 0,
         'classified': 0,
         'stored': 0,
         'duplicates': 0,
+        'failed': 0,
         'errors': 0,
         'by_platform': {}
     }
@@ -196,14 +144,30 @@ async def main():
         stats['total_found'] += len(items)
         stats['by_platform'][platform] = {'found': len(items), 'stored': 0, 'duplicates': 0}
 
-        for i, item in enumerate(items):
-            print(f"\n[{i+1}/{len(items)}] {item.title[:50]}...")
+        # Skip known URLs before spending classification calls on them
+        new_items = []
+        for item in items:
+            if check_exists(item.url):
+                print(f"  Skipping duplicate: {item.title[:40]}...")
+                stats['duplicates'] += 1
+                stats['by_platform'][platform]['duplicates'] += 1
+            else:
+                new_items.append(item)
+
+        classifications = await classify_contents(classifier, new_items)
+
+        for i, (item, classification) in enumerate(zip(new_items, classifications)):
+            print(f"\n[{i+1}/{len(new_items)}] {item.title[:50]}...")
             print(f"  URL: {item.url[:60]}...")
             print(f"  Media: {item.media_type}")
 
-            # Classify
+            if classification.get('classification_failed'):
+                # Leave it for the next run rather than storing placeholder values
+                print("  Classification failed, skipping")
+                stats['failed'] += 1
+                continue
+
             try:
-                classification = await classify_content(item)
                 stats['classified'] += 1
                 print(f"  Type: {classification.get('content_type')} | Category: {classification.get('application_category')}")
                 print(f"  Educational Value: {classification.get('educational_value')}/5")
@@ -221,9 +185,6 @@ async def main():
                 print(f"  ✗ Error: {e}")
                 stats['errors'] += 1
 
-            # Rate limiting
-            await asyncio.sleep(0.5)
-
     # Print summary
     print("\n" + "="*60)
     print("CRAWL COMPLETE")
@@ -233,7 +194,10 @@ async def main():
     print(f"Classified: {stats['classified']}")
     print(f"Stored: {stats['stored']}")
     print(f"Duplicates skipped: {stats['duplicates']}")
+    print(f"Classification failed: {stats['failed']}")
     print(f"Errors: {stats['errors']}")
+    print(f"Classification cache: {classifier.get_cache_report()}")
+    print(f"Gemini requests: {classifier.get_rate_report()}")
     print("\nBy platform:")
     for platform, data in stats['by_platform'].items():
         print(f"  {platform}: {data['stored']}/{data['found']} stored ({data['duplicates']} duplicates)")
@@ -249,4 +213,4 @@ async def main():
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    profiling.run(main, "crawl_social_platforms")
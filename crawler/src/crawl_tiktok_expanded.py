@@ -1,5 +1,10 @@
 """
 Expanded TikTok Crawler - More comprehensive search
+
+Usage:
+    python src/crawl_tiktok_expanded.py [--profile]
+
+--profile writes a profiling report (see processors/profiling.py).
 """
 import os
 import json
@@ -8,48 +13,18 @@ import httpx
 from datetime import datetime
 from dotenv import load_dotenv
 from supabase import create_client
-import google.generativeai as genai
+
+from config import get_config
+from processors import profiling
+from processors.ai_classifier import RSIPClassifier
 
 load_dotenv()
 
 # Initialize clients
 supabase = create_client(os.getenv('SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_ROLE_KEY'))
-genai.configure(api_key=os.getenv('GOOGLE_AI_API_KEY'))
-model = genai.GenerativeModel('gemini-2.0-flash')
 
 SERPAPI_KEY = os.getenv('SERPAPI_KEY')
 
-CLASSIFICATION_PROMPT = """Classify this TikTok robotics video.
-
-Title: {title}
-Description: {description}
-
-Classify according to RSIP taxonomy:
-
-1. application_category: industrial_automation | service_robotics | surveillance_security
-2. content_type: real_application | pilot_poc | case_study | tech_demo | product_announcement | tutorial
-3. educational_value: 1-5 (5=detailed case study, 1=entertainment only)
-4. task_types: Array like transportation, inspection, manipulation, palletizing, welding, assembly, delivery_service, human_interaction, cleaning, perimeter_patrol
-5. scene_type: warehouse | manufacturing | retail | hospital | office | hotel | outdoor | laboratory
-6. ai_summary: One sentence summary
-
-IMPORTANT for TikTok:
-- Most TikTok videos are tech_demo or tutorial
-- Dancing/entertainment robots = tech_demo, educational_value: 1-2
-- Factory tours showing real operations = real_application
-- Product showcases = product_announcement
-
-Respond with JSON only:
-{{
-  "application_category": "...",
-  "content_type": "...",
-  "educational_value": 1-5,
-  "task_types": ["..."],
-  "scene_type": "...",
-  "ai_summary": "..."
-}}
-"""
-
 
 async def search_tiktok_comprehensive():
     """Search TikTok with many queries."""
@@ -135,35 +110,6 @@ async def search_tiktok_comprehensive():
     return all_results
 
 
-async def classify_content(title: str, description: str) -> dict:
-    """Classify content using Gemini."""
-    prompt = CLASSIFICATION_PROMPT.format(
-        title=title,
-        description=description[:500] if description else ''
-    )
-
-    try:
-        response = model.generate_content(prompt)
-        text = response.text.strip()
-
-        if '```json' in text:
-            text = text.split('```json')[1].split('```')[0]
-        elif '```' in text:
-            text = text.split('```')[1].split('```')[0]
-
-        return json.loads(text.strip())
-    except Exception as e:
-        print(f'  Classification error: {e}')
-        return {
-            'application_category': 'industrial_automation',
-            'content_type': 'tech_demo',
-            'educational_value': 2,
-            'task_types': [],
-            'scene_type': None,
-            'ai_summary': title
-        }
-
-
 def check_exists(url: str) -> bool:
     """Check if URL already exists."""
     result = supabase.table('application_gallery').select('id').eq('source_url', url).execute()
@@ -188,23 +134,42 @@ async def main():
     print("="*60)
 
     # Search
-    results = await search_tiktok_comprehensive()
-
-    stats = {'found': len(results), 'stored': 0, 'skipped': 0, 'errors': 0}
+    with profiling.stage("crawl"):
+        results = await search_tiktok_comprehensive()
 
-    print(f"\nProcessing {len(results)} videos...")
+    classifier = RSIPClassifier(get_config())
 
-    for i, item in enumerate(results):
-        print(f"\n[{i+1}/{len(results)}] {item['title'][:50]}...")
+    stats = {'found': len(results), 'stored': 0, 'skipped': 0, 'failed': 0, 'errors': 0}
 
-        # Check duplicate
+    # Skip known URLs before spending classification calls on them
+    new_results = []
+    for item in results:
         if check_exists(item['url']):
-            print("  Skipped (duplicate)")
             stats['skipped'] += 1
+        else:
+            new_results.append(item)
+
+    print(f"\nProcessing {len(new_results)} new videos ({stats['skipped']} duplicates skipped)...")
+
+    classifications = await classifier.classify_batch([
+        {
+            'title': item['title'],
+            'description': item['snippet'] or '',
+            'source_name': f"TikTok - {extract_author(item['url'])}",
+            'media_type': 'video',
+        }
+        for item in new_results
+    ], variant='tiktok')
+
+    for i, (item, classification) in enumerate(zip(new_results, classifications)):
+        print(f"\n[{i+1}/{len(new_results)}] {item['title'][:50]}...")
+
+        if classification.get('classification_failed'):
+            # Leave it for the next run rather than storing placeholder values
+            print("  Classification failed, skipping")
+            stats['failed'] += 1
             continue
 
-        # Classify
-        classification = await classify_content(item['title'], item['snippet'])
         print(f"  Type: {classification.get('content_type')} | Category: {classification.get('application_category')}")
 
         # Store
@@ -217,14 +182,16 @@ async def main():
             'source_type': 'tiktok',
             'media_type': 'video',
             'thumbnail_url': item.get('thumbnail'),
-            'application_category': classification.get('application_category', 'industrial_automation'),
-            'content_type': classification.get('content_type', 'tech_demo'),
-            'educational_value': classification.get('educational_value', 2),
-            'task_types': classification.get('task_types', []),
-            'scene_type': classification.get('scene_type'),
-            'ai_summary': classification.get('ai_summary'),
+            'application_category': classification['application_category'],
+            'content_type': classification['content_type'],
+            'deployment_maturity': classification['deployment_maturity'],
+            'educational_value': classification['educational_value'],
+            'task_types': classification['task_types'],
+            'specific_tasks': classification['specific_tasks'],
+            'scene_type': classification['scene_type'],
+            'ai_summary': classification.get('summary'),
             'ai_classification': classification,
-            'ai_confidence': 0.7,
+            'ai_confidence': classification['confidence'],
             'status': 'approved',
         }
 
@@ -236,16 +203,17 @@ async def main():
             print(f"  Error: {e}")
             stats['errors'] += 1
 
-        await asyncio.sleep(0.5)
-
     print("\n" + "="*60)
     print("COMPLETE")
     print("="*60)
     print(f"Found: {stats['found']}")
     print(f"Stored: {stats['stored']}")
     print(f"Skipped (duplicates): {stats['skipped']}")
+    print(f"Classification failed: {stats['failed']}")
     print(f"Errors: {stats['errors']}")
+    print(f"Classification cache: {classifier.get_cache_report()}")
+    print(f"Gemini requests: {classifier.get_rate_report()}")
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    profiling.run(main, "crawl_tiktok_expanded")
@@ -9,6 +9,7 @@ PHASE 2 CRAWLER - Run after YouTube pipeline is verified.
 import asyncio
 import hashlib
 import ssl
+import time
 import certifi
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
@@ -18,6 +19,8 @@ import aiohttp
 from bs4 import BeautifulSoup
 
 from config import Config, get_config
+from processors import tracing
+from processors.usage_ledger import GOOGLE_CSE, UsageLedger
 
 
 logger = structlog.get_logger()
@@ -34,12 +37,13 @@ class GoogleSearchCrawler:
 
     SEARCH_API_URL = "https://www.googleapis.com/customsearch/v1"
 
-    def __init__(self, config: Optional[Config] = None):
+    def __init__(self, config: Optional[Config] = None, ledger: Optional[UsageLedger] = None):
         self.config = config or get_config()
         self.api_key = self.config.google_search_api_key
         self.search_engine_id = self.config.google_search_engine_id
         self.daily_quota_used = 0
         self.daily_quota_limit = self.config.rate_limits.google_search_daily_quota
+        self.ledger = ledger
 
     async def crawl_news(self) -> List[Dict[str, Any]]:
         """
@@ -181,6 +185,9 @@ class GoogleSearchCrawler:
             params["imgSize"] = "large"
             params["imgType"] = "photo"
 
+        started = time.monotonic()
+        queries = 0
+        failed = True
         try:
             # Create SSL context with certifi certificates for macOS compatibility
             ssl_context = ssl.create_default_context(cafile=certifi.where())
@@ -189,17 +196,20 @@ class GoogleSearchCrawler:
             async with aiohttp.ClientSession(connector=connector) as session:
                 url = f"{self.SEARCH_API_URL}?{urlencode(params)}"
 
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as response:
-                    self.daily_quota_used += 1
+                with tracing.span("http.google_cse", search_type=search_type):
+                    async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as response:
+                        self.daily_quota_used += 1
+                        queries = 1
 
-                    if response.status != 200:
-                        error_text = await response.text()
-                        logger.error("Google API error",
-                                   status=response.status,
-                                   error=error_text[:200])
-                        return []
+                        if response.status != 200:
+                            error_text = await response.text()
+                            logger.error("Google API error",
+                                       status=response.status,
+                                       error=error_text[:200])
+                            return []
 
-                    data = await response.json()
+                        data = await response.json()
+                        failed = False
 
                     for result in data.get("items", []):
                         item = self._parse_result(
@@ -215,6 +225,13 @@ class GoogleSearchCrawler:
             logger.error("Google search timeout", query=query[:50])
         except Exception as e:
             logger.error("Google search error", query=query[:50], error=str(e))
+        finally:
+            if self.ledger:
+                source = "google_image" if search_type == "image" else "google_news"
+                self.ledger.record(GOOGLE_CSE, source,
+                                   errors=int(failed),
+                                   units=queries,
+                                   latency_seconds=time.monotonic() - started)
 
         return items
 
@@ -14,6 +14,7 @@ import aiohttp
 from bs4 import BeautifulSoup
 
 from config import Config, get_config
+from processors import tracing
 
 
 logger = structlog.get_logger()
@@ -57,7 +58,8 @@ class NewsCrawler:
 
         try:
             # Parse RSS feed
-            feed = feedparser.parse(source.url)
+            with tracing.span("http.rss", source=source.name):
+                feed = feedparser.parse(source.url)
 
             if feed.bozo:
                 logger.warning("Feed parsing warning",
@@ -8,6 +8,7 @@ import asyncio
 import hashlib
 import json
 import os
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
@@ -16,6 +17,8 @@ import structlog
 import requests
 
 from config import Config, get_config
+from processors import tracing
+from processors.usage_ledger import SERPAPI, UsageLedger
 
 
 logger = structlog.get_logger()
@@ -28,10 +31,11 @@ class SerpAPICrawler:
 
     SERPAPI_URL = "https://serpapi.com/search"
 
-    def __init__(self, config: Optional[Config] = None):
+    def __init__(self, config: Optional[Config] = None, ledger: Optional[UsageLedger] = None):
         self.config = config or get_config()
         self.api_key = self.config.serpapi_key
         self.searches_used = 0
+        self.ledger = ledger
 
         # Setup log directory for raw API responses
         self.log_dir = Path(__file__).parent.parent.parent / "logs" / "serpapi"
@@ -136,9 +140,14 @@ class SerpAPICrawler:
         else:
             params["engine"] = "google"
 
+        started = time.monotonic()
+        searches = 0
+        failed = True
         try:
-            response = requests.get(self.SERPAPI_URL, params=params, timeout=30)
+            with tracing.span("http.serpapi", engine=params["engine"]):
+                response = requests.get(self.SERPAPI_URL, params=params, timeout=30)
             self.searches_used += 1
+            searches = 1
 
             if response.status_code != 200:
                 logger.error("SerpAPI error",
@@ -147,6 +156,7 @@ class SerpAPICrawler:
                 return []
 
             data = response.json()
+            failed = False
 
             # Save raw response for future analysis
             self.raw_results.append({
@@ -169,6 +179,13 @@ class SerpAPICrawler:
 
         except Exception as e:
             logger.error("SerpAPI search error", query=query[:50], error=str(e))
+        finally:
+            if self.ledger:
+                source = "serpapi_image" if search_type == "image" else "serpapi_news"
+                self.ledger.record(SERPAPI, source,
+                                   errors=int(failed),
+                                   units=searches,
+                                   latency_seconds=time.monotonic() - started)
 
         return items
 
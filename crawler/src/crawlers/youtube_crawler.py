@@ -4,6 +4,7 @@ YouTube Crawler for RSIP Application Gallery
 Crawls videos from YouTube channels and search queries.
 """
 import asyncio
+import time
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
 import structlog
@@ -11,6 +12,8 @@ from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
 from config import Config, get_config
+from processors import tracing
+from processors.usage_ledger import YOUTUBE, UsageLedger
 
 
 logger = structlog.get_logger()
@@ -19,13 +22,14 @@ logger = structlog.get_logger()
 class YouTubeCrawler:
     """Crawls YouTube for robotics application videos"""
 
-    def __init__(self, config: Optional[Config] = None):
+    def __init__(self, config: Optional[Config] = None, ledger: Optional[UsageLedger] = None):
         self.config = config or get_config()
         self.youtube = build(
             "youtube", "v3",
             developerKey=self.config.youtube_api_key
         )
         self.quota_used = 0
+        self.ledger = ledger
 
     async def crawl(self) -> List[Dict[str, Any]]:
         """
@@ -80,17 +84,34 @@ class YouTubeCrawler:
 
         return items
 
+    def _execute(self, request, units: int) -> Dict[str, Any]:
+        """Execute a YouTube API request, counting its quota units"""
+        started = time.monotonic()
+        failed = True
+        try:
+            with tracing.span("http.youtube", units=units):
+                response = request.execute()
+            failed = False
+            return response
+        finally:
+            # Failed requests still count against the quota
+            self.quota_used += units
+            if self.ledger:
+                self.ledger.record(YOUTUBE, "youtube",
+                                   errors=int(failed),
+                                   units=units,
+                                   latency_seconds=time.monotonic() - started)
+
     async def _crawl_channel(self, channel) -> List[Dict[str, Any]]:
         """Crawl videos from a specific channel"""
         items = []
 
         try:
             # Get channel uploads playlist
-            channel_response = self.youtube.channels().list(
+            channel_response = self._execute(self.youtube.channels().list(
                 part="contentDetails",
                 id=channel.id
-            ).execute()
-            self.quota_used += 1
+            ), units=1)
 
             if not channel_response.get("items"):
                 return items
@@ -98,12 +119,11 @@ class YouTubeCrawler:
             uploads_playlist_id = channel_response["items"][0]["contentDetails"]["relatedPlaylists"]["uploads"]
 
             # Get videos from uploads playlist
-            playlist_response = self.youtube.playlistItems().list(
+            playlist_response = self._execute(self.youtube.playlistItems().list(
                 part="snippet",
                 playlistId=uploads_playlist_id,
                 maxResults=min(self.config.crawler.max_results_per_source, 50)
-            ).execute()
-            self.quota_used += 1
+            ), units=1)
 
             for playlist_item in playlist_response.get("items", []):
                 video_id = playlist_item["snippet"]["resourceId"]["videoId"]
@@ -138,7 +158,7 @@ class YouTubeCrawler:
         ).isoformat() + "Z"
 
         try:
-            search_response = self.youtube.search().list(
+            search_response = self._execute(self.youtube.search().list(
                 part="snippet",
                 q=query,
                 type="video",
@@ -147,8 +167,7 @@ class YouTubeCrawler:
                 publishedAfter=published_after,
                 maxResults=min(self.config.crawler.max_results_per_source, 25),
                 order="relevance"
-            ).execute()
-            self.quota_used += 100  # Search costs 100 quota units
+            ), units=100)  # Search costs 100 quota units
 
             for search_item in search_response.get("items", []):
                 video_id = search_item["id"]["videoId"]
@@ -172,11 +191,10 @@ class YouTubeCrawler:
     async def _get_video_details(self, video_id: str) -> Optional[Dict[str, Any]]:
         """Get detailed information for a video"""
         try:
-            video_response = self.youtube.videos().list(
+            video_response = self._execute(self.youtube.videos().list(
                 part="snippet,contentDetails,statistics",
                 id=video_id
-            ).execute()
-            self.quota_used += 1
+            ), units=1)
 
             if not video_response.get("items"):
                 return None
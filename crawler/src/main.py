@@ -6,7 +6,7 @@ Crawls content from multiple sources and classifies according to RSIP taxonomy.
 import asyncio
 import uuid
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
 import structlog
 
 from config import get_config, Config
@@ -15,7 +15,11 @@ from crawlers.news_crawler import NewsCrawler
 from crawlers.google_crawler import GoogleSearchCrawler
 from crawlers.serpapi_crawler import SerpAPICrawler
 from processors.ai_classifier import RSIPClassifier
-from storage.supabase_client import SupabaseClient
+from processors import profiling, tracing
+from processors.pipeline_metrics import PipelineMetrics
+from processors.usage_ledger import UsageLedger
+from storage.gallery_writer import GalleryWriter, SPOOLED
+from storage.supabase_client import SupabaseClient, UpsertOutcome, INSERTED
 
 
 # Configure logging - simplified for console output
@@ -55,6 +59,14 @@ class CrawlerOrchestrator:
             "items_skipped": 0,
             "items_failed": 0,
         }
+        # API usage per provider and source, stored with the run
+        self.ledger = UsageLedger(self.run_id, self.config.usage)
+        # Latency, throughput and errors per pipeline stage
+        self.metrics = PipelineMetrics(self.run_id)
+        # Sampled per-item trace spans (tracing.enabled in sources.yaml)
+        self.tracer = tracing.Tracer(self.run_id, self.config.tracing)
+        # Duplicate lookups started as each crawler finishes (see _crawl)
+        self._existing_lookups: List[asyncio.Task] = []
 
     async def run(self, crawler_types: Optional[List[str]] = None):
         """
@@ -70,6 +82,7 @@ class CrawlerOrchestrator:
         logger.info("Starting crawler run",
                    run_id=self.run_id,
                    crawler_types=crawler_types)
+        profiling.annotate(run_id=self.run_id, crawler_types=crawler_types)
 
         # Validate configuration
         errors = self.config.validate()
@@ -79,109 +92,150 @@ class CrawlerOrchestrator:
 
         # Initialize components
         db = SupabaseClient(self.config)
-        classifier = RSIPClassifier(self.config)
+        classifier = RSIPClassifier(self.config, ledger=self.ledger, metrics=self.metrics)
+        writer = GalleryWriter(db, run_id=self.run_id, on_written=self._item_written, metrics=self.metrics)
 
         # Record crawler run start
         await db.start_crawler_run(self.run_id, ",".join(crawler_types))
+        # Items spooled by earlier runs are written while this one crawls
+        replay = asyncio.create_task(writer.replay_spool())
+        if self.config.metrics.prometheus_port:
+            await self.metrics.serve(self.config.metrics.prometheus_port)
+        self.tracer.activate()
 
         try:
             all_items = []
 
             # Run YouTube crawler
             if "youtube" in crawler_types:
-                youtube_crawler = YouTubeCrawler(self.config)
-                youtube_items = await youtube_crawler.crawl()
+                youtube_crawler = YouTubeCrawler(self.config, ledger=self.ledger)
+                youtube_items = await self._crawl(db, "youtube", youtube_crawler.crawl)
                 all_items.extend(youtube_items)
                 logger.info("YouTube crawl complete", items=len(youtube_items))
 
             # Run News crawler (RSS feeds)
             if "news" in crawler_types:
                 news_crawler = NewsCrawler(self.config)
-                news_items = await news_crawler.crawl()
+                news_items = await self._crawl(db, "news", news_crawler.crawl)
                 all_items.extend(news_items)
                 logger.info("News RSS crawl complete", items=len(news_items))
 
             # Run Google Search crawler (Phase 2 - news search)
             if "google" in crawler_types:
-                google_crawler = GoogleSearchCrawler(self.config)
-                google_news_items = await google_crawler.crawl_news()
+                google_crawler = GoogleSearchCrawler(self.config, ledger=self.ledger)
+                google_news_items = await self._crawl(db, "google_news", google_crawler.crawl_news)
                 all_items.extend(google_news_items)
                 logger.info("Google news search complete", items=len(google_news_items))
 
             # Run Google Image Search crawler (Phase 2 - image search)
             if "google_images" in crawler_types:
-                google_crawler = GoogleSearchCrawler(self.config)
-                google_image_items = await google_crawler.crawl_images()
+                google_crawler = GoogleSearchCrawler(self.config, ledger=self.ledger)
+                google_image_items = await self._crawl(db, "google_image", google_crawler.crawl_images)
                 all_items.extend(google_image_items)
                 logger.info("Google image search complete", items=len(google_image_items))
 
             # Run SerpAPI crawler (Phase 2 alternative - news search)
             if "serpapi" in crawler_types:
-                serpapi_crawler = SerpAPICrawler(self.config)
-                serpapi_news_items = await serpapi_crawler.crawl_news()
+                serpapi_crawler = SerpAPICrawler(self.config, ledger=self.ledger)
+                serpapi_news_items = await self._crawl(db, "serpapi_news", serpapi_crawler.crawl_news)
                 all_items.extend(serpapi_news_items)
                 logger.info("SerpAPI news search complete", items=len(serpapi_news_items))
 
             # Run SerpAPI Image crawler (Phase 2 alternative - image search)
             if "serpapi_images" in crawler_types:
-                serpapi_crawler = SerpAPICrawler(self.config)
-                serpapi_image_items = await serpapi_crawler.crawl_images()
+                serpapi_crawler = SerpAPICrawler(self.config, ledger=self.ledger)
+                serpapi_image_items = await self._crawl(db, "serpapi_image", serpapi_crawler.crawl_images)
                 all_items.extend(serpapi_image_items)
                 logger.info("SerpAPI image search complete", items=len(serpapi_image_items))
 
             self.stats["items_found"] = len(all_items)
             logger.info("Total items found", count=len(all_items))
 
-            # Process and classify items
-            for item in all_items:
-                try:
-                    # Check for duplicates
-                    if await db.item_exists(item["source_type"], item["external_id"]):
+            # Skip items that are already in the database (saves classifying them);
+            # the upsert below still catches anything added since
+            new_items = []
+            with profiling.stage("dedup"):
+                existing = set().union(*await asyncio.gather(*self._existing_lookups))
+                for item in all_items:
+                    if (item["source_type"], item["external_id"]) in existing:
                         self.stats["items_skipped"] += 1
-                        continue
+                        self.tracer.finish_item(item, "duplicate")
+                    else:
+                        new_items.append(item)
+
+            # Classify with AI, several items per Gemini call
+            with self.metrics.track("classify", items=len(new_items)), \
+                    tracing.items_span(new_items, "classify"):
+                classifications = await classifier.classify_batch(new_items)
+
+            # Process classified items
+            with profiling.stage("store"):
+                for item, classification in zip(new_items, classifications):
+                    try:
+                        # Classification unavailable (e.g. Gemini throttling) - leave the
+                        # item out of the database so the next run picks it up again
+                        if classification.get("classification_failed"):
+                            self.stats["items_failed"] += 1
+                            self.tracer.finish_item(item, "classification_failed")
+                            logger.warning("Classification unavailable, deferring item",
+                                         title=item.get("title"))
+                            continue
+
+                        # Skip if relevance too low
+                        if classification.get("relevance_score", 0) < self.config.crawler.min_relevance_score:
+                            self.stats["items_skipped"] += 1
+                            self.tracer.finish_item(item, "low_relevance")
+                            logger.debug("Skipping low relevance item",
+                                       title=item.get("title"),
+                                       score=classification.get("relevance_score"))
+                            continue
+
+                        # Merge classification into item
+                        item.update({
+                            "application_category": classification["application_category"],
+                            "task_types": classification.get("task_types", []),
+                            "functional_requirements": classification.get("functional_requirements", []),
+                            "scene_type": classification.get("scene_type"),
+                            "environment_setting": classification.get("environment", {}).get("setting"),
+                            "environment_features": classification.get("environment", {}),
+                            "ai_classification": classification,
+                            "ai_confidence": classification.get("confidence", {}),
+                            "ai_summary": classification.get("summary"),
+                            "crawler_run_id": self.run_id,
+                            "status": "pending",  # All items start as pending
+                        })
+
+                        # Written in the background (see _item_written)
+                        writer.add(item)
+
+                    except Exception as e:
+                        self.stats["items_failed"] += 1
+                        self.metrics.record_error("process_item", e)
+                        self.tracer.finish_item(item, "failed")
+                        logger.error("Failed to process item",
+                                   title=item.get("title"),
+                                   error=str(e))
 
-                    # Classify with AI
-                    classification = await classifier.classify(item)
+                await writer.close()
+                await replay
 
-                    # Skip if relevance too low
-                    if classification.get("relevance_score", 0) < self.config.crawler.min_relevance_score:
-                        self.stats["items_skipped"] += 1
-                        logger.debug("Skipping low relevance item",
-                                   title=item.get("title"),
-                                   score=classification.get("relevance_score"))
-                        continue
-
-                    # Merge classification into item
-                    item.update({
-                        "application_category": classification["application_category"],
-                        "task_types": classification.get("task_types", []),
-                        "functional_requirements": classification.get("functional_requirements", []),
-                        "scene_type": classification.get("scene_type"),
-                        "environment_setting": classification.get("environment", {}).get("setting"),
-                        "environment_features": classification.get("environment", {}),
-                        "ai_classification": classification,
-                        "ai_confidence": classification.get("confidence", {}),
-                        "ai_summary": classification.get("summary"),
-                        "crawler_run_id": self.run_id,
-                        "status": "pending",  # All items start as pending
-                    })
-
-                    # Save to database
-                    await db.insert_gallery_item(item)
-                    self.stats["items_added"] += 1
-
-                except Exception as e:
-                    self.stats["items_failed"] += 1
-                    logger.error("Failed to process item",
-                               title=item.get("title"),
-                               error=str(e))
+            logger.info("Classifier usage", by_batch_size=classifier.get_usage_report())
+            logger.info("Pre-classification gate", **classifier.get_gate_report())
+            logger.info("Local classifier", **classifier.get_local_model_report())
+            logger.info("Classification cache", **classifier.get_cache_report())
+            logger.info("Gemini requests", **classifier.get_rate_report())
+            logger.info("Response validation", **classifier.get_validation_report())
+
+            logger.info("Pipeline stages", **self.metrics.summary())
 
             # Complete crawler run
             await db.complete_crawler_run(
                 self.run_id,
                 status="completed",
-                stats=self.stats
+                stats=self.stats,
+                metrics=self.metrics.summary()
             )
+            await self._record_usage(db)
 
             logger.info("Crawler run complete",
                        run_id=self.run_id,
@@ -189,20 +243,99 @@ class CrawlerOrchestrator:
 
         except Exception as e:
             logger.error("Crawler run failed", error=str(e))
+            # Keep what was already classified: written, or spooled for the next run
+            await writer.close()
+            await replay
             await db.complete_crawler_run(
                 self.run_id,
                 status="failed",
                 stats=self.stats,
-                error=str(e)
+                error=str(e),
+                metrics=self.metrics.summary()
             )
+            await self._record_usage(db)
             raise
 
+        finally:
+            # Lookups a failed run never reached must not outlive it
+            await self._cancel_existing_lookups()
+            if self.config.metrics.prometheus_textfile:
+                self.metrics.write_prometheus(self.config.metrics.prometheus_textfile)
+            await self.metrics.stop()
+            db.close()
+            if self.tracer.enabled:
+                logger.info("Slowest traced items", items=self.tracer.slowest_items())
+                self.tracer.export()
+            self.tracer.deactivate()
+
+    async def _crawl(
+        self,
+        db: SupabaseClient,
+        source: str,
+        crawl: Callable[[], Awaitable[List[Dict[str, Any]]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Run one crawler as a tracked pipeline stage, starting a trace for each sampled item.
+
+        The duplicate lookup for its items starts in the background, so it
+        overlaps with the next crawler.
+        """
+        with self.tracer.trace(f"crawl.{source}") as crawl_context, \
+                self.metrics.track(f"crawl_{source}") as call, \
+                profiling.stage(f"crawl_{source}"):
+            items = await crawl()
+            call["items"] = len(items)
+        for item in items:
+            self.tracer.start_item(item, crawl_context)
+        self._existing_lookups.append(asyncio.create_task(self._find_existing(db, items)))
+        return items
+
+    async def _cancel_existing_lookups(self):
+        """Cancel duplicate lookups still running and collect their results and errors"""
+        for task in self._existing_lookups:
+            task.cancel()
+        await asyncio.gather(*self._existing_lookups, return_exceptions=True)
+        self._existing_lookups.clear()
+
+    def _item_written(self, item: Dict[str, Any], outcome: UpsertOutcome):
+        """Count an item once the gallery writer has stored or spooled it"""
+        if outcome.outcome == INSERTED:
+            self.stats["items_added"] += 1
+        elif outcome.outcome == SPOOLED:
+            # Not in the gallery yet; written when the next run replays the spool
+            self.stats["items_failed"] += 1
+        else:
+            # Added by a concurrent run, or refreshed (storage.on_conflict: merge)
+            self.stats["items_skipped"] += 1
+        self.tracer.finish_item(item, "added" if outcome.outcome == INSERTED else outcome.outcome)
+
+    async def _find_existing(self, db: SupabaseClient, items: List[Dict[str, Any]]) -> Set[Tuple[str, str]]:
+        """Keys of crawled items already in the gallery, as a tracked dedup call"""
+        with self.metrics.track("dedup", items=len(items)), \
+                tracing.items_span(items, "db.find_existing_items"):
+            return await db.find_existing_items(items)
+
+    async def _record_usage(self, db: SupabaseClient):
+        """Log and store the run's API usage, warning about budget overruns"""
+        summary = self.ledger.summary(self.stats["items_added"])
+        logger.info("API usage",
+                   run_id=self.run_id,
+                   estimated_cost_usd=summary["estimated_cost_usd"],
+                   cost_per_added_item_usd=summary["cost_per_added_item_usd"],
+                   providers=summary["providers"])
+        summary["budget_overruns"] = self.ledger.check_budgets(self.stats["items_added"])
+        await db.record_run_usage(self.run_id, self.ledger.rows(), summary)
+
 
 async def main():
     """Main entry point"""
     import argparse
 
-    parser = argparse.ArgumentParser(description="RSIP Application Gallery Crawler")
+    parser = argparse.ArgumentParser(
+        description="RSIP Application Gallery Crawler",
+        epilog="Profiling: add --profile [--profile-dir DIR] [--slow-callback-ms N] "
+               "to write a report directory (see processors/profiling.py)"
+    )
     parser.add_argument(
         "--sources",
         nargs="+",
@@ -223,4 +356,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    profiling.run(main, "main")
@@ -0,0 +1,81 @@
+"""
+Measure Gemini Cost and Latency per Batch Size
+
+Classifies the same sample of gallery items with several batch sizes and reports
+input/output tokens per item and latency per item, to help choose
+classifier.batch_size in config/sources.yaml.
+
+Usage:
+    python src/measure_batch_sizes.py [--sample N] [--batch-sizes 1 2 5 8]
+
+Options:
+    --sample N           Number of approved items to classify (default: 20)
+    --batch-sizes N ...  Batch sizes to compare (default: 1 2 5 8)
+
+Nothing is written to the database.
+"""
+import asyncio
+import argparse
+import time
+import structlog
+
+from config import get_config
+from processors.ai_classifier import RSIPClassifier
+from storage.supabase_client import SupabaseClient
+
+logger = structlog.get_logger()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Compare classifier batch sizes')
+    parser.add_argument('--sample', type=int, default=20, help='Items to classify per batch size')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 2, 5, 8], help='Batch sizes to compare')
+    args = parser.parse_args()
+
+    config = get_config()
+    db = SupabaseClient(config)
+
+    # Every batch size must reach Gemini, so bypass the result cache
+    config.classifier.cache_enabled = False
+
+    items = await db.get_items_for_reclassification(limit=args.sample)
+    if not items:
+        logger.error("No items available for measurement")
+        return
+
+    logger.info("Measuring batch sizes", sample=len(items), batch_sizes=args.batch_sizes)
+
+    rows = []
+    for batch_size in args.batch_sizes:
+        # Fresh classifier so usage stats only cover this batch size
+        classifier = RSIPClassifier(config)
+
+        started = time.perf_counter()
+        await classifier.classify_batch(items, batch_size=batch_size)
+        elapsed = time.perf_counter() - started
+
+        report = classifier.get_usage_report()
+        calls = sum(r["calls"] for r in report.values())
+        input_tokens = sum(r["input_tokens_per_item"] * r["items"] for r in report.values())
+        output_tokens = sum(r["output_tokens_per_item"] * r["items"] for r in report.values())
+        rows.append((
+            batch_size,
+            calls,
+            input_tokens / len(items),
+            output_tokens / len(items),
+            elapsed / len(items),
+            # More calls than this means batches were split after bad responses
+            -(-len(items) // batch_size),
+        ))
+
+    print("\n" + "="*78)
+    print("BATCH SIZE COMPARISON")
+    print("="*78)
+    print(f"{'batch':>6} {'calls':>6} {'in tok/item':>12} {'out tok/item':>13} {'sec/item':>9} {'min calls':>10}")
+    print("-"*78)
+    for batch_size, calls, in_tokens, out_tokens, latency, min_calls in rows:
+        print(f"{batch_size:>6} {calls:>6} {in_tokens:>12.1f} {out_tokens:>13.1f} {latency:>9.3f} {min_calls:>10}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
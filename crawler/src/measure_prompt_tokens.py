@@ -0,0 +1,96 @@
+"""
+Measure Classification Prompt Size
+
+Counts Gemini input tokens per item for the original all-in-one prompt and for
+the compact prompts (static instructions as system instruction, cleaned and
+truncated item text), with and without the instructions in a context cache.
+Uses the Gemini token counting endpoint, so no classification calls are made.
+
+Usage:
+    python src/measure_prompt_tokens.py [--sample N] [--batch-sizes 1 5]
+
+Options:
+    --sample N           Number of approved items to measure (default: 50)
+    --batch-sizes N ...  Batch sizes to include (default: 1 and classifier.batch_size)
+
+Nothing is written to the database.
+"""
+import asyncio
+import argparse
+import structlog
+import google.generativeai as genai
+
+from config import get_config
+from processors.prompts import CLASSIFICATION_PROMPT_V2, PromptBuilder
+from storage.supabase_client import SupabaseClient
+
+logger = structlog.get_logger()
+
+
+async def count_tokens(model: genai.GenerativeModel, text: str) -> int:
+    response = await model.count_tokens_async(text)
+    return response.total_tokens
+
+
+async def main():
+    config = get_config()
+
+    parser = argparse.ArgumentParser(description='Compare classification prompt sizes')
+    parser.add_argument('--sample', type=int, default=50, help='Items to measure')
+    parser.add_argument('--batch-sizes', type=int, nargs='+',
+                        default=sorted({1, config.classifier.batch_size}), help='Batch sizes to include')
+    args = parser.parse_args()
+
+    genai.configure(api_key=config.gemini_api_key)
+    model = genai.GenerativeModel(config.classifier.model)
+    db = SupabaseClient(config)
+
+    items = await db.get_items_for_reclassification(limit=args.sample)
+    if not items:
+        logger.error("No items available for measurement")
+        return
+
+    prompts = PromptBuilder(config.classifier.title_token_budget, config.classifier.description_token_budget)
+    logger.info("Counting prompt tokens", sample=len(items), batch_sizes=args.batch_sizes)
+
+    # Original prompt: instructions and item text in every request
+    legacy = 0
+    for item in items:
+        legacy += await count_tokens(model, CLASSIFICATION_PROMPT_V2.format(
+            title=(item.get('title') or '')[:500],
+            description=(item.get('description') or '')[:2000],
+            source_name=item.get('source_name', 'Unknown'),
+            media_type=item.get('media_type', 'video'),
+        ))
+    legacy_per_item = legacy / len(items)
+
+    instruction_tokens = await count_tokens(model, prompts.system_instruction)
+
+    rows = [('original prompt', 1, legacy_per_item, legacy_per_item)]
+    for batch_size in args.batch_sizes:
+        item_tokens = 0
+        calls = 0
+        for start in range(0, len(items), batch_size):
+            chunk = items[start:start + batch_size]
+            text = prompts.single(chunk[0]) if len(chunk) == 1 else prompts.batch(chunk)
+            item_tokens += await count_tokens(model, text)
+            calls += 1
+        # Without a context cache the instructions are billed on every call
+        uncached = (item_tokens + calls * instruction_tokens) / len(items)
+        cached = item_tokens / len(items)
+        rows.append(('compact prompt', batch_size, uncached, cached))
+
+    print("\n" + "="*74)
+    print("PROMPT TOKENS PER ITEM")
+    print("="*74)
+    print(f"Items: {len(items)}   System instruction: {instruction_tokens} tokens")
+    print(f"{'prompt':<16} {'batch':>6} {'input tok/item':>15} {'vs original':>12} {'uncached w/ cache':>18}")
+    print("-"*74)
+    for name, batch_size, uncached, cached in rows:
+        print(f"{name:<16} {batch_size:>6} {uncached:>15.1f} {uncached / legacy_per_item:>11.2f}x {cached:>18.1f}")
+    print("\n'uncached w/ cache' is the input billed at the full rate when the system")
+    print("instruction is served from a context cache (classifier.context_cache_enabled).")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -4,251 +4,550 @@ AI Classifier V2 for RSIP Application Gallery
 Uses Google Gemini to classify content with enhanced distinction between
 real-world applications and tech demos.
 """
+import asyncio
+import contextlib
+import copy
 import json
-from typing import Any, Dict, Optional
+import time
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
 import structlog
 import google.generativeai as genai
+from google.generativeai import caching
 
 from config import Config, get_config
+from processors.classification_cache import ClassificationCache
+from processors.classification_schema import BATCH_RESULT_SCHEMA, RESULT_SCHEMA, ClassificationValidator
+from processors.local_model import LocalClassifier
+from processors import profiling, tracing
+from processors.pipeline_metrics import PipelineMetrics
+from processors.pre_classifier import PreClassifier
+from processors.prompts import PROMPT_VARIANTS, PromptBuilder
+from processors.rate_controller import AdaptiveRateController, is_transient_error
+from processors.usage_ledger import GEMINI, UsageLedger
 
 
 logger = structlog.get_logger()
 
 
-# V2 Classification prompt - stricter about real applications vs demos
-CLASSIFICATION_PROMPT_V2 = """
-Analyze this robotics content and classify it for the RSIP Application Gallery.
-
-CONTENT:
-Title: {title}
-Description: {description}
-Source: {source_name}
-Media Type: {media_type}
-
-CLASSIFICATION TASKS:
-
-1. CONTENT_TYPE (most important - choose one):
-   - real_application: Robot deployed in actual business, solving real problems
-   - pilot_poc: Trial deployment, proof of concept, evaluation phase
-   - case_study: Documented deployment with results/metrics
-   - tech_demo: Capability demonstration, trade show, lab demo, controlled environment
-   - product_announcement: New product reveal, features showcase
-   - tutorial: How-to, integration guide, training content
-
-   INDICATORS for real_application:
-   - Named customer or facility
-   - Production environment visible (not a lab/showroom)
-   - Multiple units working together
-   - Integration with existing systems visible
-   - Workers interacting naturally (not staged)
-
-   INDICATORS for tech_demo:
-   - Trade show booth visible
-   - Lab/showroom environment
-   - Narrator explaining features
-   - "Demo", "showcase", "capability" in title
-   - No business context
-   - Robot performing tricks or dance moves
-   - Controlled/staged environment
-
-2. DEPLOYMENT_MATURITY:
-   - production: Running in real operations, customer named
-   - pilot: Limited/trial deployment
-   - prototype: R&D, lab stage
-   - concept: Simulation, rendering, future capability
-   - unknown: Cannot determine
-
-3. APPLICATION_CATEGORY (choose one):
-   - industrial_automation: Factory, warehouse, manufacturing, logistics
-   - service_robotics: Hospitality, healthcare, delivery, cleaning
-   - surveillance_security: Patrol, monitoring, inspection, access control
-
-4. SPECIFIC_TASKS (be specific, choose 1-3):
-   Industrial: pallet_transport, tote_transport, cart_towing, dock_to_stock,
-              machine_tending, assembly_insertion, case_palletizing, depalletizing,
-              visual_inspection, weld_inspection, screw_driving, material_handling,
-              bin_picking, kitting, quality_control, packaging, welding, painting
-   Service: room_delivery, medication_delivery, food_delivery, floor_scrubbing,
-           vacuum_cleaning, disinfection, reception_greeting, wayfinding,
-           telepresence, inventory_scanning, companion, concierge
-   Security: perimeter_patrol, intrusion_detection, access_verification,
-            remote_monitoring, threat_detection, facility_inspection
-
-5. SCENE_TYPE: warehouse, manufacturing, retail, hospital, office, hotel,
-               outdoor, laboratory, construction, logistics_center, airport,
-               restaurant, residential, campus
-
-6. APPLICATION_CONTEXT:
-   - problem_solved: What business problem? (labor_shortage, safety_hazard,
-     quality_consistency, cost_reduction, throughput, 24x7_operation, hazardous_environment)
-   - deployment_scale: single_unit | small_fleet | large_fleet | facility_wide | multi_site
-   - customer_identified: true if specific company/facility named
-   - has_metrics: true if ROI, efficiency numbers, or results mentioned
-
-7. EDUCATIONAL_VALUE (1-5):
-   5 = Full case study with metrics, integration details, lessons learned
-   4 = Real deployment with good technical details visible
-   3 = Real application but limited context
-   2 = Demo with some application relevance
-   1 = Pure marketing, entertainment, no practical value for users
-
-8. FUNCTIONAL_REQUIREMENTS (capabilities demonstrated):
-   Navigation: autonomous_navigation, obstacle_avoidance, slam, path_planning,
-              fleet_management, multi_floor, outdoor_navigation
-   Manipulation: pick_and_place, bin_picking_3d, force_control, vision_guided,
-                gripper_control, dual_arm, high_precision
-   Perception: object_detection, barcode_scanning, ai_inference, 3d_vision,
-              defect_detection, ocr, thermal_imaging
-   Safety: human_detection, safety_rated, collaborative, collision_avoidance,
-          emergency_stop, zone_monitoring
-   Integration: wms_integration, erp_integration, mes_integration, api_connectivity
-
-Return ONLY valid JSON (no markdown):
-{{
-  "content_type": "real_application",
-  "deployment_maturity": "production",
-  "application_category": "industrial_automation",
-  "specific_tasks": ["pallet_transport", "dock_to_stock"],
-  "task_types": ["transportation"],
-  "scene_type": "warehouse",
-  "application_context": {{
-    "problem_solved": "labor_shortage",
-    "deployment_scale": "large_fleet",
-    "customer_identified": true,
-    "has_metrics": true
-  }},
-  "educational_value": 4,
-  "functional_requirements": ["autonomous_navigation", "fleet_management", "wms_integration"],
-  "environment": {{
-    "setting": "indoor",
-    "human_presence": "collaborative",
-    "floor_type": "smooth",
-    "lighting": "artificial"
-  }},
-  "summary": "Fleet of 50 AMRs handling pallet transport at BMW Leipzig plant, integrated with WMS for 24/7 operation",
-  "relevance_score": 0.95
-}}
-
-CRITICAL RULES:
-- Be STRICT about content_type. Most YouTube videos are tech_demo, not real_application
-- real_application requires EVIDENCE of actual business deployment
-- Trade show demos are ALWAYS tech_demo, even if impressive
-- Lab/showroom/studio environments = tech_demo
-- Robot dancing/doing tricks = tech_demo with educational_value 1
-- If uncertain between real_application and tech_demo, choose tech_demo
-- Relevance score should reflect practical value for someone planning a deployment
-- educational_value 4-5 requires real deployment evidence
-"""
-
-
 class RSIPClassifier:
     """Classifies content according to RSIP platform taxonomy using Gemini V2"""
 
-    def __init__(self, config: Optional[Config] = None):
+    def __init__(
+        self,
+        config: Optional[Config] = None,
+        ledger: Optional[UsageLedger] = None,
+        metrics: Optional[PipelineMetrics] = None
+    ):
         self.config = config or get_config()
+        self.ledger = ledger
+        self.metrics = metrics
 
         # Configure Gemini
         genai.configure(api_key=self.config.gemini_api_key)
-        self.model = genai.GenerativeModel("gemini-2.0-flash")
+        self.model_name = self.config.classifier.model
+
+        # Prompt builder and model per prompt variant (see processors/prompts.py),
+        # created on first use. Static instructions go in the system instruction;
+        # requests carry only item text
+        self._prompts: Dict[str, Tuple[PromptBuilder, genai.GenerativeModel]] = {}
+
+        # Token and latency usage per batch size (see get_usage_report)
+        self.usage_stats: Dict[int, Dict[str, float]] = {}
+
+        # Local rules that settle obvious items without Gemini
+        self.pre_classifier: Optional[PreClassifier] = None
+        if self.config.pre_classification.enabled:
+            self.pre_classifier = PreClassifier(self.config.pre_classification)
+
+        # Learned local model; only uncertain items go on to Gemini
+        self.local_model: Optional[LocalClassifier] = None
+        self.local_stats = {"evaluated": 0, "accepted": 0, "deferred": 0}
+        if self.config.classifier.local_model_enabled:
+            try:
+                self.local_model = LocalClassifier.load(self.config.classifier.local_model_path)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning("Local classifier unavailable, using Gemini only",
+                              path=self.config.classifier.local_model_path,
+                              error=str(e))
+
+        # Retries, backoff and adaptive concurrency for Gemini calls
+        self.rate_controller = AdaptiveRateController(self.config.rate_limits)
+
+        # Persistent result cache and requests currently waiting on Gemini
+        self.cache: Optional[ClassificationCache] = None
+        if self.config.classifier.cache_enabled:
+            self.cache = ClassificationCache(self.config.classifier.cache_path)
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.cache_stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+        # Taxonomy validation of parsed results, and parse failure counts
+        self.validator = ClassificationValidator()
+        self.parse_stats = {"responses": 0, "parse_failures": 0}
+
+    def _prompt(self, variant: str) -> Tuple[PromptBuilder, genai.GenerativeModel]:
+        """Prompt builder and model for a registered prompt variant"""
+        if variant not in self._prompts:
+            if variant not in PROMPT_VARIANTS:
+                raise ValueError(f"Unknown prompt variant: {variant}")
+            prompts = PromptBuilder(
+                title_token_budget=self.config.classifier.title_token_budget,
+                description_token_budget=self.config.classifier.description_token_budget,
+                variant=PROMPT_VARIANTS[variant],
+            )
+            self._prompts[variant] = (prompts, self._create_model(prompts))
+        return self._prompts[variant]
 
-        # Valid values for validation
-        self.valid_content_types = [
-            "real_application", "pilot_poc", "case_study",
-            "tech_demo", "product_announcement", "tutorial", "unknown"
-        ]
-        self.valid_deployment_maturity = [
-            "production", "pilot", "prototype", "concept", "unknown"
-        ]
-        self.valid_categories = [
-            "industrial_automation", "service_robotics", "surveillance_security"
-        ]
-        self.valid_task_types = [
-            # Legacy broad types (for backward compatibility)
-            "transportation", "inspection", "manipulation", "palletizing", "welding",
-            "assembly", "quality_control", "packaging", "delivery_service",
-            "human_interaction", "healthcare_assist", "cleaning", "reception",
-            "perimeter_patrol", "threat_detection", "access_monitoring"
-        ]
-        self.valid_specific_tasks = [
-            # Industrial specific
-            "pallet_transport", "tote_transport", "cart_towing", "dock_to_stock",
-            "machine_tending", "assembly_insertion", "case_palletizing", "depalletizing",
-            "visual_inspection", "weld_inspection", "screw_driving", "material_handling",
-            "bin_picking", "kitting", "quality_control", "packaging", "welding", "painting",
-            # Service specific
-            "room_delivery", "medication_delivery", "food_delivery", "floor_scrubbing",
-            "vacuum_cleaning", "disinfection", "reception_greeting", "wayfinding",
-            "telepresence", "inventory_scanning", "companion", "concierge",
-            # Security specific
-            "perimeter_patrol", "intrusion_detection", "access_verification",
-            "remote_monitoring", "threat_detection", "facility_inspection"
-        ]
-        self.valid_scene_types = [
-            "warehouse", "manufacturing", "retail", "hospital", "office",
-            "hotel", "outdoor", "laboratory", "construction", "logistics_center",
-            "airport", "restaurant", "residential", "campus"
-        ]
+    def version(self, variant: str = "default") -> str:
+        """
+        Classifier version recorded on the rows Gemini labels: <variant>/<prompt>/<model>.
 
-    async def classify(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        Reclassification jobs select rows of their own variant whose version
+        differs from this one (SupabaseClient.stream_stale_items), so only a
+        prompt or model change makes rows stale, and jobs using different
+        variants leave each other's rows alone. Rows the rules or the local
+        model labelled carry their own versions and are stale to every job.
+        """
+        prompts = self._prompt(variant)[0]
+        return f"{prompts.variant.name}/{prompts.version}/{self.model_name}"
+
+    def _create_model(self, prompts: PromptBuilder) -> genai.GenerativeModel:
+        """Gemini model carrying the static instructions, from a context cache if enabled"""
+        if self.config.classifier.context_cache_enabled:
+            try:
+                cached = caching.CachedContent.create(
+                    model=f"models/{self.model_name}",
+                    display_name=f"rsip-classifier-{prompts.version}",
+                    system_instruction=prompts.system_instruction,
+                    ttl=timedelta(minutes=self.config.classifier.context_cache_ttl_minutes),
+                )
+                logger.info("Using cached classification instructions", cache=cached.name)
+                return genai.GenerativeModel.from_cached_content(cached_content=cached)
+            except Exception as e:
+                # Explicit caching needs a supported model and a minimum prompt size
+                logger.warning("Context cache unavailable, sending instructions with each request",
+                              model=self.model_name,
+                              error=str(e))
+
+        return genai.GenerativeModel(self.model_name, system_instruction=prompts.system_instruction)
+
+    async def classify(self, item: Dict[str, Any], variant: str = "default") -> Dict[str, Any]:
         """
         Classify an item according to RSIP taxonomy V2.
 
         Args:
             item: Content item with title, description, source_name, media_type
+            variant: Prompt variant from PROMPT_VARIANTS (e.g. "linkedin", "strict")
 
         Returns:
             Classification result with enhanced RSIP taxonomy tags
         """
+        return (await self.classify_batch([item], batch_size=1, variant=variant))[0]
+
+    async def classify_batch(
+        self,
+        items: List[Dict[str, Any]],
+        batch_size: Optional[int] = None,
+        variant: str = "default",
+        local: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Classify several items, sending up to batch_size items per Gemini call.
+
+        Items the pre-classification rules reject or tag, and items the local
+        model predicts confidently, are classified without Gemini.
+        Cached results are reused, and items identical to one already being
+        classified (in this call or a concurrent one) share that request.
+
+        Each result records the classifier that produced it: the prompt
+        version (see version), or rules/<hash> and local/<hash> for the
+        pre-classification rules and the local model, which never see the
+        prompt.
+
+        Args:
+            items: Content items with title, description, source_name, media_type
+            batch_size: Items per call (default: classifier.batch_size from config)
+            variant: Prompt variant from PROMPT_VARIANTS (e.g. "linkedin", "strict")
+            local: Settle items with the rules and local model where possible;
+                reclassification jobs pass False so every item gets the prompt's label
+
+        Returns:
+            Classification results in the same order as items
+
+        Raises:
+            ValueError: If the prompt variant is not registered
+        """
+        with profiling.stage("classify"):
+            return await self._classify_batch(items, batch_size, variant, local)
+
+    async def _classify_batch(
+        self,
+        items: List[Dict[str, Any]],
+        batch_size: Optional[int],
+        variant: str,
+        local: bool
+    ) -> List[Dict[str, Any]]:
+        """Classify items locally where possible and with Gemini otherwise (see classify_batch)"""
+        batch_size = max(1, batch_size or self.config.classifier.batch_size)
+        prompts, _ = self._prompt(variant)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        versions: List[Optional[str]] = [None] * len(items)
+        llm_indexes = []
+        for index, item in enumerate(items):
+            if local and self.pre_classifier:
+                result = self.pre_classifier.evaluate(item)
+                if result is not None:
+                    results[index] = self._finalize_result(result, item)
+                    versions[index] = self.pre_classifier.version
+                    continue
+            if local and self.local_model:
+                result = self._predict_locally(item)
+                if result is not None:
+                    results[index] = self._finalize_result(result, item)
+                    versions[index] = self.local_model.version
+                    continue
+            llm_indexes.append(index)
+
+        llm_results = await self._classify_with_llm(
+            [items[index] for index in llm_indexes], batch_size, prompts.variant.name
+        )
+        for index, result in zip(llm_indexes, llm_results):
+            results[index] = result
+
+        # Failed results stay unversioned, so they are picked up again
+        version = self.version(prompts.variant.name)
+        for index in llm_indexes:
+            versions[index] = version
+        for result, result_version in zip(results, versions):
+            if not result.get("classification_failed"):
+                result["classifier_version"] = result_version
+
+        return results
+
+    def _predict_locally(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Local model prediction if it clears the confidence threshold, else None"""
+        self.local_stats["evaluated"] += 1
+        result, confidence = self.local_model.predict(item)
+
+        if confidence >= self.config.classifier.local_model_threshold:
+            self.local_stats["accepted"] += 1
+            return result
+
+        self.local_stats["deferred"] += 1
+        return None
+
+    async def _classify_with_llm(
+        self,
+        items: List[Dict[str, Any]],
+        batch_size: int,
+        variant: str
+    ) -> List[Dict[str, Any]]:
+        """Classify items with Gemini, via the cache and in-flight coalescing"""
+        prompt_version = self._prompt(variant)[0].version
+        keys = [ClassificationCache.make_key(prompt_version, self.model_name, item) for item in items]
+
+        raw: Dict[str, Optional[Dict[str, Any]]] = {}
+        pending: Dict[str, Dict[str, Any]] = {}
+        waiting: Dict[str, asyncio.Future] = {}
+
+        for key, item in zip(keys, items):
+            if key in raw or key in pending or key in waiting:
+                self.cache_stats["coalesced"] += 1
+                continue
+
+            cached = self.cache.get(key) if self.cache else None
+            if cached is not None:
+                self.cache_stats["hits"] += 1
+                raw[key] = cached
+            elif key in self._in_flight:
+                self.cache_stats["coalesced"] += 1
+                waiting[key] = self._in_flight[key]
+            else:
+                self.cache_stats["misses"] += 1
+                pending[key] = item
+                self._in_flight[key] = asyncio.get_running_loop().create_future()
+
+        async def run_chunk(chunk_keys: List[str]):
+            results = await self._classify_chunk([pending[key] for key in chunk_keys], variant)
+
+            for key, result in zip(chunk_keys, results):
+                raw[key] = result
+                self._in_flight.pop(key).set_result(result)
+
+            if self.cache:
+                # Incomplete results are used for this run but requested again next time
+                self.cache.set_many(prompt_version, self.model_name, [
+                    (key, result) for key, result in zip(chunk_keys, results)
+                    if self.validator.is_complete(result)
+                ])
+
+        try:
+            # Chunks run concurrently; the rate controller decides how many at once
+            pending_keys = list(pending)
+            await asyncio.gather(*(
+                run_chunk(pending_keys[start:start + batch_size])
+                for start in range(0, len(pending_keys), batch_size)
+            ))
+        finally:
+            # Release anyone waiting on requests this call did not finish
+            for key in pending:
+                future = self._in_flight.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_result(None)
+
+        for key, future in waiting.items():
+            raw[key] = await future
+
+        return [
+            self._finalize_result(copy.deepcopy(raw[key]), item)
+            if raw[key] is not None else self._get_default_classification(item)
+            for key, item in zip(keys, items)
+        ]
+
+    async def _classify_single(self, item: Dict[str, Any], variant: str) -> Optional[Dict[str, Any]]:
+        """Classify one item with the single-item prompt, returning the raw response or None"""
+        prompts, model = self._prompt(variant)
         try:
             # Build prompt
-            prompt = CLASSIFICATION_PROMPT_V2.format(
-                title=item.get("title", "")[:500],
-                description=item.get("description", "")[:2000],
-                source_name=item.get("source_name", "Unknown"),
-                media_type=item.get("media_type", "video")
-            )
+            prompt = prompts.single(item)
 
             # Call Gemini
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.GenerationConfig(
-                    temperature=0.1,  # Lower temperature for more consistent classification
-                    max_output_tokens=1024,
-                )
+            started = time.perf_counter()
+            with self._track_request([item], variant):
+                response = await self.rate_controller.call(lambda: model.generate_content_async(
+                    prompt,
+                    generation_config=self._generation_config(1)
+                ))
+            self._record_usage([item], response, time.perf_counter() - started)
+
+            # Parse response; an unusable response counts as a failed classification
+            parsed = self._parse_response(response.text)
+            if not isinstance(parsed, dict):
+                self.parse_stats["parse_failures"] += 1
+                logger.warning("Response is not a JSON object", type=type(parsed).__name__)
+                return None
+            return parsed or None
+
+        except Exception as e:
+            logger.error("Classification failed",
+                        title=item.get("title", "")[:50],
+                        error=str(e) or type(e).__name__)
+            return None
+
+    async def _classify_chunk(
+        self,
+        items: List[Dict[str, Any]],
+        variant: str
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Classify one batch, splitting it when the response cannot be used"""
+        if not items:
+            return []
+        if len(items) == 1:
+            return [await self._classify_single(items[0], variant)]
+
+        prompts, model = self._prompt(variant)
+        parsed: Dict[int, Dict[str, Any]] = {}
+        try:
+            prompt = prompts.batch(items)
+
+            started = time.perf_counter()
+            with self._track_request(items, variant):
+                response = await self.rate_controller.call(lambda: model.generate_content_async(
+                    prompt,
+                    generation_config=self._generation_config(len(items))
+                ))
+            self._record_usage(items, response, time.perf_counter() - started)
+
+            parsed = self._parse_batch_response(response.text, len(items))
+
+        except Exception as e:
+            if is_transient_error(e):
+                # Retries are exhausted - splitting would only add load
+                logger.error("Batch classification unavailable",
+                            batch_size=len(items),
+                            error=str(e) or type(e).__name__)
+                return [None] * len(items)
+            logger.warning("Batch classification failed",
+                          batch_size=len(items),
+                          error=str(e))
+
+        if not parsed:
+            # Nothing usable - split the batch and retry the halves
+            middle = len(items) // 2
+            logger.info("Splitting batch after unusable response", batch_size=len(items))
+            return (
+                await self._classify_chunk(items[:middle], variant)
+                + await self._classify_chunk(items[middle:], variant)
             )
 
-            # Parse response
-            result = self._parse_response(response.text)
+        # Retry only the items the response left out
+        missing = [index for index in range(len(items)) if index not in parsed]
+        if missing:
+            logger.info("Batch response missing items", batch_size=len(items), missing=len(missing))
+            retried = await self._classify_chunk([items[index] for index in missing], variant)
+            parsed.update(zip(missing, retried))
 
-            # Apply defaults from item if available
-            if not result.get("application_category") and item.get("default_category"):
-                result["application_category"] = item["default_category"]
+        return [parsed[index] for index in range(len(items))]
 
-            if not result.get("task_types") and item.get("default_tasks"):
-                result["task_types"] = item["default_tasks"]
+    def _generation_config(self, batch_size: int) -> genai.GenerationConfig:
+        """Generation settings for a call classifying batch_size items"""
+        options = {
+            "temperature": 0.1,  # Lower temperature for more consistent classification
+            "max_output_tokens": min(8192, 1024 * batch_size),
+        }
+        if self.config.classifier.structured_output:
+            # Constrain the response to the taxonomy so it always parses
+            options["response_mime_type"] = "application/json"
+            options["response_schema"] = RESULT_SCHEMA if batch_size == 1 else BATCH_RESULT_SCHEMA
+        return genai.GenerationConfig(**options)
+
+    def _finalize_result(self, result: Dict[str, Any], item: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply item defaults to a parsed response and validate it"""
+        # Apply defaults from item if available
+        if not result.get("application_category") and item.get("default_category"):
+            result["application_category"] = item["default_category"]
+
+        if not result.get("task_types") and item.get("default_tasks"):
+            result["task_types"] = item["default_tasks"]
+
+        # Validate and clean result
+        result = self.validator.validate(result)
+
+        logger.debug("Classification complete",
+                    title=item.get("title", "")[:50],
+                    content_type=result.get("content_type"),
+                    category=result.get("application_category"),
+                    educational_value=result.get("educational_value"),
+                    score=result.get("relevance_score"))
 
-            # Validate and clean result
-            result = self._validate_result(result)
+        return result
 
-            logger.debug("Classification complete",
-                        title=item.get("title", "")[:50],
-                        content_type=result.get("content_type"),
-                        category=result.get("application_category"),
-                        educational_value=result.get("educational_value"),
-                        score=result.get("relevance_score"))
+    @contextlib.contextmanager
+    def _track_request(self, items: List[Dict[str, Any]], variant: str):
+        """Pipeline metrics and item trace spans for one Gemini request, including its retries"""
+        with tracing.items_span(items, "gemini.generate_content", model=self.model_name, variant=variant):
+            if self.metrics:
+                with self.metrics.track("gemini_request", items=len(items)):
+                    yield
+            else:
+                yield
+
+    def _record_usage(self, items: List[Dict[str, Any]], response: Any, latency: float):
+        """Accumulate token counts and latency for a Gemini call"""
+        batch_size = len(items)
+        usage = getattr(response, "usage_metadata", None)
+        input_tokens = getattr(usage, "prompt_token_count", 0) or 0
+        # Part of the input served from the context cache (billed at a reduced rate)
+        cached_tokens = getattr(usage, "cached_content_token_count", 0) or 0
+        output_tokens = getattr(usage, "candidates_token_count", 0) or 0
+        stats = self.usage_stats.setdefault(batch_size, {
+            "calls": 0,
+            "items": 0,
+            "input_tokens": 0,
+            "cached_tokens": 0,
+            "output_tokens": 0,
+            "latency_seconds": 0.0,
+        })
+        stats["calls"] += 1
+        stats["items"] += batch_size
+        stats["input_tokens"] += input_tokens
+        stats["cached_tokens"] += cached_tokens
+        stats["output_tokens"] += output_tokens
+        stats["latency_seconds"] += latency
+
+        if self.ledger:
+            # A batch can mix sources; split the call between them by item count
+            sources: Dict[str, int] = {}
+            for item in items:
+                source = item.get("source_type") or "unknown"
+                sources[source] = sources.get(source, 0) + 1
+            for source, count in sources.items():
+                share = count / batch_size
+                self.ledger.record(
+                    GEMINI, source,
+                    requests=share,
+                    input_tokens=input_tokens * share,
+                    cached_tokens=cached_tokens * share,
+                    output_tokens=output_tokens * share,
+                    latency_seconds=latency * share,
+                )
 
-            return result
+    def get_usage_report(self) -> Dict[int, Dict[str, float]]:
+        """
+        Summarise Gemini usage per batch size.
 
-        except Exception as e:
-            logger.error("Classification failed",
-                        title=item.get("title", "")[:50],
-                        error=str(e))
+        Returns:
+            Mapping of batch size to calls, items, tokens-per-item (input tokens
+            include any cached tokens) and latency-per-item
+        """
+        report = {}
+        for batch_size, stats in sorted(self.usage_stats.items()):
+            items = stats["items"] or 1
+            report[batch_size] = {
+                "calls": stats["calls"],
+                "items": stats["items"],
+                "input_tokens_per_item": round(stats["input_tokens"] / items, 1),
+                "cached_tokens_per_item": round(stats["cached_tokens"] / items, 1),
+                "output_tokens_per_item": round(stats["output_tokens"] / items, 1),
+                "latency_per_item_seconds": round(stats["latency_seconds"] / items, 3),
+            }
+        return report
+
+    def get_gate_report(self) -> Dict[str, Any]:
+        """Pre-classification decisions and the Gemini calls they saved"""
+        if not self.pre_classifier:
+            return {"enabled": False}
+        return self.pre_classifier.get_report(self.config.classifier.batch_size)
+
+    def get_local_model_report(self) -> Dict[str, Any]:
+        """Local model decisions and the Gemini calls they saved"""
+        if not self.local_model:
+            return {"enabled": False}
+        accepted = self.local_stats["accepted"]
+        return {
+            **self.local_stats,
+            "llm_calls_saved": -(-accepted // max(1, self.config.classifier.batch_size)),
+        }
+
+    def get_validation_report(self) -> Dict[str, Any]:
+        """Response parse failures and validation cost per result"""
+        return {
+            "structured_output": self.config.classifier.structured_output,
+            **self.parse_stats,
+            **self.validator.get_report(),
+        }
+
+    def get_rate_report(self) -> Dict[str, Any]:
+        """Gemini request, retry and throttling counters"""
+        return self.rate_controller.get_report()
+
+    def get_cache_report(self) -> Dict[str, Any]:
+        """
+        Summarise cache effectiveness for this classifier.
+
+        Returns:
+            Hits, misses, coalesced duplicates and the share of items that
+            did not need a new Gemini request
+        """
+        lookups = sum(self.cache_stats.values())
+        saved = self.cache_stats["hits"] + self.cache_stats["coalesced"]
+        return {
+            **self.cache_stats,
+            "hit_rate": round(saved / lookups, 3) if lookups else 0.0,
+            "cached_entries": self.cache.size() if self.cache else 0,
+        }
 
-            # Return default classification on error
-            return self._get_default_classification(item)
+    def _parse_response(self, response_text: str) -> Any:
+        """Parse JSON response from Gemini (any JSON value; {} if it does not parse)"""
+        self.parse_stats["responses"] += 1
+
+        # Structured output is plain JSON; only free-form responses need cleaning up
+        try:
+            return json.loads(response_text)
+        except json.JSONDecodeError:
+            pass
 
-    def _parse_response(self, response_text: str) -> Dict[str, Any]:
-        """Parse JSON response from Gemini"""
         text = response_text.strip()
 
         # Remove markdown code blocks if present
@@ -264,131 +563,39 @@ class RSIPClassifier:
         try:
             return json.loads(text)
         except json.JSONDecodeError as e:
+            self.parse_stats["parse_failures"] += 1
             logger.warning("Failed to parse JSON response", error=str(e), text=text[:200])
             return {}
 
-    def _validate_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
-        """Validate and clean classification result"""
-
-        # Validate content_type (new V2 field)
-        if result.get("content_type") not in self.valid_content_types:
-            result["content_type"] = "tech_demo"  # Default to tech_demo if unknown
-
-        # Validate deployment_maturity (new V2 field)
-        if result.get("deployment_maturity") not in self.valid_deployment_maturity:
-            result["deployment_maturity"] = "unknown"
-
-        # Validate category
-        if result.get("application_category") not in self.valid_categories:
-            result["application_category"] = "industrial_automation"
-
-        # Validate and map specific_tasks to task_types for backward compatibility
-        specific_tasks = [
-            t for t in result.get("specific_tasks", [])
-            if t in self.valid_specific_tasks
-        ][:3]
-        result["specific_tasks"] = specific_tasks
-
-        # Map specific tasks to broad task_types
-        result["task_types"] = self._map_to_broad_tasks(specific_tasks)
-
-        # Validate scene type
-        if result.get("scene_type") not in self.valid_scene_types:
-            result["scene_type"] = None
-
-        # Validate educational_value (1-5)
-        try:
-            edu_value = int(result.get("educational_value", 2))
-            result["educational_value"] = max(1, min(5, edu_value))
-        except (TypeError, ValueError):
-            result["educational_value"] = 2
-
-        # Validate relevance score
-        try:
-            score = float(result.get("relevance_score", 0.5))
-            result["relevance_score"] = max(0.0, min(1.0, score))
-        except (TypeError, ValueError):
-            result["relevance_score"] = 0.5
-
-        # Adjust relevance score based on content_type
-        if result["content_type"] == "tech_demo":
-            result["relevance_score"] = min(result["relevance_score"], 0.6)
-        elif result["content_type"] in ["real_application", "case_study"]:
-            result["relevance_score"] = max(result["relevance_score"], 0.7)
-
-        # Validate application_context
-        if not isinstance(result.get("application_context"), dict):
-            result["application_context"] = {}
-
-        # Ensure confidence is dict
-        if not isinstance(result.get("confidence"), dict):
-            result["confidence"] = {
-                "category": 0.7,
-                "tasks": 0.7,
-                "requirements": 0.7,
-                "content_type": 0.7
-            }
-
-        return result
-
-    def _map_to_broad_tasks(self, specific_tasks: list) -> list:
-        """Map specific tasks to broad task categories for backward compatibility"""
-        task_mapping = {
-            # Industrial transport
-            "pallet_transport": "transportation",
-            "tote_transport": "transportation",
-            "cart_towing": "transportation",
-            "dock_to_stock": "transportation",
-            "material_handling": "transportation",
-            # Industrial manipulation
-            "machine_tending": "manipulation",
-            "assembly_insertion": "assembly",
-            "screw_driving": "assembly",
-            "bin_picking": "manipulation",
-            "kitting": "manipulation",
-            "painting": "manipulation",
-            # Industrial palletizing
-            "case_palletizing": "palletizing",
-            "depalletizing": "palletizing",
-            # Industrial inspection
-            "visual_inspection": "inspection",
-            "weld_inspection": "inspection",
-            "quality_control": "quality_control",
-            # Service delivery
-            "room_delivery": "delivery_service",
-            "medication_delivery": "delivery_service",
-            "food_delivery": "delivery_service",
-            # Service cleaning
-            "floor_scrubbing": "cleaning",
-            "vacuum_cleaning": "cleaning",
-            "disinfection": "cleaning",
-            # Service interaction
-            "reception_greeting": "human_interaction",
-            "wayfinding": "human_interaction",
-            "telepresence": "human_interaction",
-            "companion": "human_interaction",
-            "concierge": "human_interaction",
-            "inventory_scanning": "inspection",
-            # Security
-            "perimeter_patrol": "perimeter_patrol",
-            "intrusion_detection": "threat_detection",
-            "access_verification": "access_monitoring",
-            "remote_monitoring": "perimeter_patrol",
-            "facility_inspection": "inspection",
-        }
+    def _parse_batch_response(self, response_text: str, count: int) -> Dict[int, Dict[str, Any]]:
+        """Parse a batch JSON array from Gemini into results keyed by item index"""
+        parsed = self._parse_response(response_text)
+        if not isinstance(parsed, list):
+            logger.warning("Batch response is not a JSON array", count=count)
+            return {}
 
-        broad_tasks = set()
-        for task in specific_tasks:
-            if task in task_mapping:
-                broad_tasks.add(task_mapping[task])
-            elif task in self.valid_task_types:
-                broad_tasks.add(task)
+        results = {}
+        for entry in parsed:
+            if not isinstance(entry, dict):
+                continue
+            try:
+                index = int(entry.pop("index"))
+            except (KeyError, TypeError, ValueError):
+                continue
+            if 0 <= index < count and index not in results:
+                results[index] = entry
 
-        return list(broad_tasks)[:3]
+        return results
 
     def _get_default_classification(self, item: Dict[str, Any]) -> Dict[str, Any]:
-        """Get default classification when AI fails"""
+        """
+        Get default classification when AI fails.
+
+        The result is marked with classification_failed so callers can retry the
+        item later instead of storing or dropping it on placeholder values.
+        """
         return {
+            "classification_failed": True,
             "content_type": "tech_demo",  # Conservative default
             "deployment_maturity": "unknown",
             "application_category": item.get("default_category", "industrial_automation"),
@@ -0,0 +1,111 @@
+"""
+Classification Cache for RSIP Application Gallery
+
+Persistent, content-addressed store of Gemini classification responses, so
+re-runs and the same story crawled from several sources are only classified once.
+"""
+import hashlib
+import json
+import re
+import sqlite3
+import unicodedata
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+import structlog
+
+
+logger = structlog.get_logger()
+
+
+def _normalise(text: Optional[str]) -> str:
+    """Normalise free text so trivial formatting differences share a cache entry"""
+    text = unicodedata.normalize("NFKC", text or "")
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+class ClassificationCache:
+    """SQLite-backed cache of raw classification results"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS classifications (
+                key TEXT PRIMARY KEY,
+                prompt_version TEXT NOT NULL,
+                model TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(prompt_version: str, model: str, item: Dict[str, Any]) -> str:
+        """
+        Build the content address for an item.
+
+        The key covers the prompt version, model and the normalised title,
+        description and media type - not the source, so syndicated copies of the
+        same story hit the same entry.
+        """
+        payload = json.dumps([
+            prompt_version,
+            model,
+            _normalise(item.get("title")),
+            _normalise(item.get("description")),
+            _normalise(item.get("media_type")),
+        ], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached result, or None on a miss"""
+        row = self.conn.execute(
+            "SELECT result FROM classifications WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        try:
+            result = json.loads(row[0])
+        except json.JSONDecodeError:
+            result = None
+        if not isinstance(result, dict):
+            logger.warning("Discarding corrupt cache entry", key=key[:12])
+            return None
+        return result
+
+    def set_many(
+        self,
+        prompt_version: str,
+        model: str,
+        entries: Iterable[Tuple[str, Dict[str, Any]]]
+    ):
+        """Store several results in one transaction"""
+        now = datetime.utcnow().isoformat()
+        rows = [
+            (key, prompt_version, model, json.dumps(result, ensure_ascii=False), now)
+            for key, result in entries
+        ]
+        if not rows:
+            return
+
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO classifications "
+            "(key, prompt_version, model, result, created_at) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+        self.conn.commit()
+
+    def size(self) -> int:
+        """Number of cached results"""
+        return self.conn.execute("SELECT COUNT(*) FROM classifications").fetchone()[0]
+
+    def close(self):
+        """Close the underlying database"""
+        self.conn.close()
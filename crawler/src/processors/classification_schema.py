@@ -0,0 +1,264 @@
+"""
+Classification Schema for RSIP Application Gallery
+
+Allowed values of the V2 taxonomy, the Gemini response schema derived from
+them (structured JSON output), and a validator that checks and cleans parsed
+results in place against precompiled frozensets.
+"""
+import time
+from typing import Any, Dict, List
+
+# Allowed values (tuples keep the order used in the response schema enums)
+CONTENT_TYPES = (
+    "real_application", "pilot_poc", "case_study",
+    "tech_demo", "product_announcement", "tutorial", "unknown"
+)
+DEPLOYMENT_MATURITIES = (
+    "production", "pilot", "prototype", "concept", "unknown"
+)
+APPLICATION_CATEGORIES = (
+    "industrial_automation", "service_robotics", "surveillance_security"
+)
+TASK_TYPES = (
+    # Legacy broad types (for backward compatibility)
+    "transportation", "inspection", "manipulation", "palletizing", "welding",
+    "assembly", "quality_control", "packaging", "delivery_service",
+    "human_interaction", "healthcare_assist", "cleaning", "reception",
+    "perimeter_patrol", "threat_detection", "access_monitoring"
+)
+SPECIFIC_TASKS = (
+    # Industrial specific
+    "pallet_transport", "tote_transport", "cart_towing", "dock_to_stock",
+    "machine_tending", "assembly_insertion", "case_palletizing", "depalletizing",
+    "visual_inspection", "weld_inspection", "screw_driving", "material_handling",
+    "bin_picking", "kitting", "quality_control", "packaging", "welding", "painting",
+    # Service specific
+    "room_delivery", "medication_delivery", "food_delivery", "floor_scrubbing",
+    "vacuum_cleaning", "disinfection", "reception_greeting", "wayfinding",
+    "telepresence", "inventory_scanning", "companion", "concierge",
+    # Security specific
+    "perimeter_patrol", "intrusion_detection", "access_verification",
+    "remote_monitoring", "threat_detection", "facility_inspection"
+)
+SCENE_TYPES = (
+    "warehouse", "manufacturing", "retail", "hospital", "office",
+    "hotel", "outdoor", "laboratory", "construction", "logistics_center",
+    "airport", "restaurant", "residential", "campus"
+)
+DEPLOYMENT_SCALES = (
+    "single_unit", "small_fleet", "large_fleet", "facility_wide", "multi_site"
+)
+
+# Specific tasks -> broad task types, for backward compatibility
+TASK_TYPE_MAPPING = {
+    # Industrial transport
+    "pallet_transport": "transportation",
+    "tote_transport": "transportation",
+    "cart_towing": "transportation",
+    "dock_to_stock": "transportation",
+    "material_handling": "transportation",
+    # Industrial manipulation
+    "machine_tending": "manipulation",
+    "assembly_insertion": "assembly",
+    "screw_driving": "assembly",
+    "bin_picking": "manipulation",
+    "kitting": "manipulation",
+    "painting": "manipulation",
+    # Industrial palletizing
+    "case_palletizing": "palletizing",
+    "depalletizing": "palletizing",
+    # Industrial inspection
+    "visual_inspection": "inspection",
+    "weld_inspection": "inspection",
+    "quality_control": "quality_control",
+    # Service delivery
+    "room_delivery": "delivery_service",
+    "medication_delivery": "delivery_service",
+    "food_delivery": "delivery_service",
+    # Service cleaning
+    "floor_scrubbing": "cleaning",
+    "vacuum_cleaning": "cleaning",
+    "disinfection": "cleaning",
+    # Service interaction
+    "reception_greeting": "human_interaction",
+    "wayfinding": "human_interaction",
+    "telepresence": "human_interaction",
+    "companion": "human_interaction",
+    "concierge": "human_interaction",
+    "inventory_scanning": "inspection",
+    # Security
+    "perimeter_patrol": "perimeter_patrol",
+    "intrusion_detection": "threat_detection",
+    "access_verification": "access_monitoring",
+    "remote_monitoring": "perimeter_patrol",
+    "facility_inspection": "inspection",
+}
+
+
+def _enum(values, nullable: bool = False) -> Dict[str, Any]:
+    schema = {"type": "STRING", "enum": list(values)}
+    if nullable:
+        schema["nullable"] = True
+    return schema
+
+
+def _string_array(values=None) -> Dict[str, Any]:
+    return {"type": "ARRAY", "items": _enum(values) if values else {"type": "STRING"}}
+
+
+# One classification object, as requested by the prompt's output example
+RESULT_SCHEMA: Dict[str, Any] = {
+    "type": "OBJECT",
+    "properties": {
+        "content_type": _enum(CONTENT_TYPES),
+        "deployment_maturity": _enum(DEPLOYMENT_MATURITIES),
+        "application_category": _enum(APPLICATION_CATEGORIES),
+        "specific_tasks": _string_array(SPECIFIC_TASKS),
+        "task_types": _string_array(TASK_TYPES),
+        "scene_type": _enum(SCENE_TYPES, nullable=True),
+        "application_context": {
+            "type": "OBJECT",
+            "properties": {
+                "problem_solved": {"type": "STRING"},
+                "deployment_scale": _enum(DEPLOYMENT_SCALES),
+                "customer_identified": {"type": "BOOLEAN"},
+                "has_metrics": {"type": "BOOLEAN"},
+            },
+        },
+        "educational_value": {"type": "INTEGER"},
+        "functional_requirements": _string_array(),
+        "environment": {
+            "type": "OBJECT",
+            "properties": {
+                "setting": {"type": "STRING"},
+                "human_presence": {"type": "STRING"},
+                "floor_type": {"type": "STRING"},
+                "lighting": {"type": "STRING"},
+            },
+        },
+        "summary": {"type": "STRING"},
+        "relevance_score": {"type": "NUMBER"},
+    },
+    "required": [
+        "content_type", "deployment_maturity", "application_category",
+        "specific_tasks", "educational_value", "summary", "relevance_score",
+    ],
+}
+
+# Batch responses: one object per item, tagged with the item's index
+BATCH_RESULT_SCHEMA: Dict[str, Any] = {
+    "type": "ARRAY",
+    "items": {
+        **RESULT_SCHEMA,
+        "properties": {"index": {"type": "INTEGER"}, **RESULT_SCHEMA["properties"]},
+        "required": ["index", *RESULT_SCHEMA["required"]],
+    },
+}
+
+
+def _is_member(value: Any, allowed: frozenset) -> bool:
+    """Membership test that treats unhashable values (lists, objects) as invalid"""
+    return isinstance(value, str) and value in allowed
+
+
+class ClassificationValidator:
+    """Validates and cleans parsed classification results in place"""
+
+    def __init__(self):
+        self.content_types = frozenset(CONTENT_TYPES)
+        self.deployment_maturities = frozenset(DEPLOYMENT_MATURITIES)
+        self.categories = frozenset(APPLICATION_CATEGORIES)
+        self.task_types = frozenset(TASK_TYPES)
+        self.specific_tasks = frozenset(SPECIFIC_TASKS)
+        self.scene_types = frozenset(SCENE_TYPES)
+        self.task_mapping = dict(TASK_TYPE_MAPPING)
+
+        self.stats = {"validated": 0, "seconds": 0.0}
+
+    def validate(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate and clean classification result (modifies and returns result)"""
+        started = time.perf_counter()
+
+        # Validate content_type (new V2 field)
+        if not _is_member(result.get("content_type"), self.content_types):
+            result["content_type"] = "tech_demo"  # Default to tech_demo if unknown
+
+        # Validate deployment_maturity (new V2 field)
+        if not _is_member(result.get("deployment_maturity"), self.deployment_maturities):
+            result["deployment_maturity"] = "unknown"
+
+        # Validate category
+        if not _is_member(result.get("application_category"), self.categories):
+            result["application_category"] = "industrial_automation"
+
+        # Validate and map specific_tasks to task_types for backward compatibility
+        specific_tasks = result.get("specific_tasks")
+        if not isinstance(specific_tasks, list):
+            specific_tasks = []
+        specific_tasks = [t for t in specific_tasks if _is_member(t, self.specific_tasks)][:3]
+        result["specific_tasks"] = specific_tasks
+
+        # Map specific tasks to broad task_types
+        result["task_types"] = self.map_to_broad_tasks(specific_tasks)
+
+        # Validate scene type
+        if not _is_member(result.get("scene_type"), self.scene_types):
+            result["scene_type"] = None
+
+        # Validate educational_value (1-5)
+        try:
+            edu_value = int(result.get("educational_value", 2))
+            result["educational_value"] = max(1, min(5, edu_value))
+        except (TypeError, ValueError):
+            result["educational_value"] = 2
+
+        # Validate relevance score
+        try:
+            score = float(result.get("relevance_score", 0.5))
+            result["relevance_score"] = max(0.0, min(1.0, score))
+        except (TypeError, ValueError):
+            result["relevance_score"] = 0.5
+
+        # Adjust relevance score based on content_type
+        if result["content_type"] == "tech_demo":
+            result["relevance_score"] = min(result["relevance_score"], 0.6)
+        elif result["content_type"] in ("real_application", "case_study"):
+            result["relevance_score"] = max(result["relevance_score"], 0.7)
+
+        # Validate application_context
+        if not isinstance(result.get("application_context"), dict):
+            result["application_context"] = {}
+
+        # Ensure confidence is dict
+        if not isinstance(result.get("confidence"), dict):
+            result["confidence"] = {
+                "category": 0.7,
+                "tasks": 0.7,
+                "requirements": 0.7,
+                "content_type": 0.7
+            }
+
+        self.stats["validated"] += 1
+        self.stats["seconds"] += time.perf_counter() - started
+        return result
+
+    def is_complete(self, result: Any) -> bool:
+        """Whether a raw result is an object with every field the response schema requires"""
+        return isinstance(result, dict) and all(field in result for field in RESULT_SCHEMA["required"])
+
+    def map_to_broad_tasks(self, specific_tasks: List[str]) -> List[str]:
+        """Map specific tasks to broad task categories for backward compatibility"""
+        broad_tasks = []
+        for task in specific_tasks:
+            broad = self.task_mapping.get(task) or (task if task in self.task_types else None)
+            if broad and broad not in broad_tasks:
+                broad_tasks.append(broad)
+        return broad_tasks[:3]
+
+    def get_report(self) -> Dict[str, Any]:
+        """Number of validated results and the time spent per result"""
+        validated = self.stats["validated"]
+        return {
+            "validated": validated,
+            "microseconds_per_item": round(self.stats["seconds"] * 1e6 / validated, 2) if validated else 0.0,
+        }
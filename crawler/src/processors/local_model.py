@@ -0,0 +1,242 @@
+"""
+Local Classifier for RSIP Application Gallery
+
+Lightweight model trained offline on already-labelled gallery rows
+(see train_local_classifier.py). Text is turned into hashed word n-gram
+features, and each taxonomy field gets its own linear head. Confident
+predictions are used directly; uncertain items go on to Gemini.
+"""
+import hashlib
+import json
+import math
+import random
+import re
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import structlog
+
+
+logger = structlog.get_logger()
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:['\-][a-z0-9]+)*")
+
+# Relevance implied by each educational value (the model does not predict relevance directly)
+EDUCATIONAL_VALUE_RELEVANCE = {1: 0.2, 2: 0.4, 3: 0.65, 4: 0.8, 5: 0.9}
+
+
+class HashedFeaturizer:
+    """Maps an item to sparse, L2-normalised hashed n-gram features"""
+
+    def __init__(self, n_features: int = 2 ** 18, ngram_range: Tuple[int, int] = (1, 2)):
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+
+    def _ngrams(self, prefix: str, text: str) -> Iterable[str]:
+        tokens = TOKEN_PATTERN.findall((text or "").casefold())
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            for i in range(len(tokens) - n + 1):
+                yield prefix + " ".join(tokens[i:i + n])
+
+    def transform(self, item: Dict[str, Any]) -> Dict[int, float]:
+        """Feature index -> value for one item"""
+        counts: Dict[int, float] = {}
+        terms = [
+            *self._ngrams("t:", item.get("title")),
+            *self._ngrams("d:", (item.get("description") or "")[:2000]),
+            "m:" + (item.get("media_type") or ""),
+            "s:" + (item.get("source_name") or "").casefold(),
+        ]
+        for term in terms:
+            # crc32 is stable across processes, unlike hash()
+            index = zlib.crc32(term.encode("utf-8")) % self.n_features
+            counts[index] = counts.get(index, 0.0) + 1.0
+
+        norm = math.sqrt(sum(v * v for v in counts.values())) or 1.0
+        return {k: v / norm for k, v in counts.items()}
+
+
+class LinearHead:
+    """Linear classifier over sparse features (softmax or one-vs-rest sigmoid)"""
+
+    def __init__(self, labels: List[str], multilabel: bool = False):
+        self.labels = list(labels)
+        self.multilabel = multilabel
+        self.bias: Dict[str, float] = {label: 0.0 for label in self.labels}
+        self.weights: Dict[str, Dict[int, float]] = {label: {} for label in self.labels}
+
+    def _logits(self, features: Dict[int, float]) -> Dict[str, float]:
+        logits = {}
+        for label in self.labels:
+            w = self.weights[label]
+            logits[label] = self.bias[label] + sum(w.get(k, 0.0) * v for k, v in features.items())
+        return logits
+
+    def predict_proba(self, features: Dict[int, float]) -> Dict[str, float]:
+        """Probability per label"""
+        logits = self._logits(features)
+        if self.multilabel:
+            return {label: 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, z)))) for label, z in logits.items()}
+
+        top = max(logits.values())
+        exp = {label: math.exp(z - top) for label, z in logits.items()}
+        total = sum(exp.values())
+        return {label: e / total for label, e in exp.items()}
+
+    def update(self, features: Dict[int, float], targets: Iterable[str], lr: float, l2: float):
+        """One SGD step on cross-entropy loss"""
+        targets = set(targets)
+        probs = self.predict_proba(features)
+        for label in self.labels:
+            gradient = probs[label] - (1.0 if label in targets else 0.0)
+            if abs(gradient) < 1e-6:
+                continue
+            w = self.weights[label]
+            for k, v in features.items():
+                current = w.get(k, 0.0)
+                w[k] = current - lr * (gradient * v + l2 * current)
+            self.bias[label] -= lr * gradient
+
+    def to_dict(self, prune: float = 1e-4) -> Dict[str, Any]:
+        return {
+            "labels": self.labels,
+            "multilabel": self.multilabel,
+            "bias": self.bias,
+            "weights": {
+                label: {str(k): round(v, 6) for k, v in w.items() if abs(v) >= prune}
+                for label, w in self.weights.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LinearHead":
+        head = cls(data["labels"], data.get("multilabel", False))
+        head.bias = {label: float(b) for label, b in data["bias"].items()}
+        head.weights = {
+            label: {int(k): float(v) for k, v in w.items()}
+            for label, w in data["weights"].items()
+        }
+        return head
+
+
+class LocalClassifier:
+    """Hashed n-gram features with one linear head per taxonomy field"""
+
+    # Single-label heads whose probabilities make up the overall confidence
+    CONFIDENCE_HEADS = ("content_type", "application_category", "educational_value")
+
+    def __init__(self, featurizer: Optional[HashedFeaturizer] = None):
+        self.featurizer = featurizer or HashedFeaturizer()
+        self.heads: Dict[str, LinearHead] = {}
+        self.metadata: Dict[str, Any] = {}
+        # Classifier version recorded on the items it labels: local/<hash of the model file>
+        self.version = "local/unsaved"
+
+    @staticmethod
+    def labels_for(row: Dict[str, Any]) -> Dict[str, List[str]]:
+        """Training targets for a labelled gallery row"""
+        return {
+            "content_type": [row.get("content_type") or "unknown"],
+            "application_category": [row.get("application_category") or "industrial_automation"],
+            "scene_type": [row.get("scene_type") or "none"],
+            "educational_value": [str(row.get("educational_value") or 3)],
+            "specific_tasks": list(row.get("specific_tasks") or []),
+        }
+
+    def fit(
+        self,
+        rows: List[Dict[str, Any]],
+        epochs: int = 5,
+        learning_rate: float = 0.5,
+        l2: float = 1e-6,
+        seed: int = 13
+    ):
+        """Train all heads on labelled rows"""
+        examples = [(self.featurizer.transform(row), self.labels_for(row)) for row in rows]
+
+        label_sets: Dict[str, set] = {}
+        for _, targets in examples:
+            for head, values in targets.items():
+                label_sets.setdefault(head, set()).update(values)
+        self.heads = {
+            head: LinearHead(sorted(labels), multilabel=(head == "specific_tasks"))
+            for head, labels in label_sets.items()
+        }
+
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(examples)
+            lr = learning_rate / (1 + epoch)
+            for features, targets in examples:
+                for head_name, head in self.heads.items():
+                    head.update(features, targets[head_name], lr, l2)
+
+            logger.info("Local classifier epoch complete", epoch=epoch + 1, examples=len(examples))
+
+    def predict(self, item: Dict[str, Any]) -> Tuple[Dict[str, Any], float]:
+        """
+        Predict taxonomy fields for an item.
+
+        Returns:
+            Raw classification (same shape as a Gemini response) and the overall
+            confidence, i.e. the lowest top probability among the main heads
+        """
+        features = self.featurizer.transform(item)
+        top: Dict[str, Tuple[str, float]] = {}
+        tasks: List[str] = []
+
+        for name, head in self.heads.items():
+            probs = head.predict_proba(features)
+            if head.multilabel:
+                tasks = [label for label, p in sorted(probs.items(), key=lambda x: -x[1]) if p >= 0.5][:3]
+            else:
+                top[name] = max(probs.items(), key=lambda x: x[1])
+
+        confidence = min((top[name][1] for name in self.CONFIDENCE_HEADS if name in top), default=0.0)
+        educational_value = int(top["educational_value"][0]) if "educational_value" in top else 2
+        scene_type = top.get("scene_type", ("none", 0.0))[0]
+
+        result = {
+            "content_type": top.get("content_type", ("unknown", 0.0))[0],
+            "application_category": top.get("application_category", (None, 0.0))[0],
+            "scene_type": None if scene_type == "none" else scene_type,
+            "specific_tasks": tasks,
+            "educational_value": educational_value,
+            "relevance_score": EDUCATIONAL_VALUE_RELEVANCE.get(educational_value, 0.5),
+            "summary": item.get("title"),
+            "confidence": {
+                "category": round(top.get("application_category", (None, 0.0))[1], 3),
+                "content_type": round(top.get("content_type", (None, 0.0))[1], 3),
+                "educational_value": round(top.get("educational_value", (None, 0.0))[1], 3),
+            },
+            "classified_by": "local_model",
+        }
+        return result, confidence
+
+    def save(self, path: str):
+        """Write the model as JSON"""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "format": 1,
+                "saved_at": datetime.utcnow().isoformat(),
+                "n_features": self.featurizer.n_features,
+                "ngram_range": list(self.featurizer.ngram_range),
+                "metadata": self.metadata,
+                "heads": {name: head.to_dict() for name, head in self.heads.items()},
+            }, f)
+
+    @classmethod
+    def load(cls, path: str) -> "LocalClassifier":
+        """Read a model written by save()"""
+        with open(path, "rb") as f:
+            content = f.read()
+        data = json.loads(content)
+
+        model = cls(HashedFeaturizer(data["n_features"], tuple(data["ngram_range"])))
+        model.heads = {name: LinearHead.from_dict(head) for name, head in data["heads"].items()}
+        model.metadata = data.get("metadata", {})
+        model.version = "local/" + hashlib.sha256(content).hexdigest()[:12]
+        return model
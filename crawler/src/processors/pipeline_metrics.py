@@ -0,0 +1,221 @@
+"""
+Pipeline Metrics for crawler runs
+
+Latency histograms, throughput, in-flight gauges and error counts (by
+exception type) for each pipeline stage: crawl, dedup, classify, store and the
+Gemini requests inside classify. Can be exported in the Prometheus text format,
+either written to a file (node_exporter textfile collector) or served over
+HTTP. A summary is stored on gallery_crawler_runs when the run completes.
+"""
+import bisect
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+import structlog
+from aiohttp import web
+
+
+logger = structlog.get_logger()
+
+# Histogram bucket upper bounds in seconds (+Inf is implicit)
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+
+METRIC_PREFIX = "rsip_crawler"
+
+
+class StageMetrics:
+    """Counters for one pipeline stage"""
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.items = 0
+        self.in_flight = 0
+        self.errors: Dict[str, int] = {}
+        self.first_started: Optional[float] = None
+        self.last_finished: Optional[float] = None
+
+    def observe(self, seconds: float, items: int, started: float):
+        self.bucket_counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.items += items
+        if self.first_started is None or started < self.first_started:
+            self.first_started = started
+        self.last_finished = max(self.last_finished or 0.0, started + seconds)
+
+    @property
+    def wall_seconds(self) -> float:
+        """Time from the first call starting to the last one finishing"""
+        if self.first_started is None:
+            return 0.0
+        return self.last_finished - self.first_started
+
+    def quantile(self, q: float) -> float:
+        """Latency quantile estimated from the histogram (bucket upper bound, capped at the maximum)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.bucket_counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, round(self.max_seconds, 3))
+        return round(self.max_seconds, 3)
+
+
+class PipelineMetrics:
+    """Per-stage latency, throughput, in-flight and error metrics for one run"""
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.stages: Dict[str, StageMetrics] = {}
+        self._runner: Optional[web.AppRunner] = None
+
+    def _stage(self, stage: str) -> StageMetrics:
+        if stage not in self.stages:
+            self.stages[stage] = StageMetrics()
+        return self.stages[stage]
+
+    @contextmanager
+    def track(self, stage: str, items: int = 1) -> Iterator[Dict[str, int]]:
+        """
+        Time a block as one call of a stage.
+
+        The stage's in-flight gauge is raised while the block runs. Exceptions
+        are counted by type and re-raised.
+
+        Args:
+            stage: Stage name (e.g. crawl_youtube, dedup, classify, store)
+            items: Items the call handles, for items/sec
+
+        Yields:
+            Dict whose "items" can be set once the block knows its item count
+        """
+        metrics = self._stage(stage)
+        call = {"items": items}
+        metrics.in_flight += 1
+        started = time.monotonic()
+        try:
+            yield call
+        except Exception as e:
+            self.record_error(stage, e)
+            raise
+        finally:
+            metrics.in_flight -= 1
+            metrics.observe(time.monotonic() - started, call["items"], started)
+
+    def record_error(self, stage: str, error: BaseException):
+        """Count an error for a stage by exception type"""
+        errors = self._stage(stage).errors
+        name = type(error).__name__
+        errors[name] = errors.get(name, 0) + 1
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Summarise each stage.
+
+        Returns:
+            Mapping of stage to calls, items, total/p50/p95/max latency,
+            items per second of stage wall time and errors by type
+        """
+        report = {}
+        for stage, metrics in self.stages.items():
+            wall = metrics.wall_seconds
+            report[stage] = {
+                "calls": metrics.count,
+                "items": metrics.items,
+                "seconds": round(metrics.seconds, 3),
+                "p50_seconds": metrics.quantile(0.5),
+                "p95_seconds": metrics.quantile(0.95),
+                "max_seconds": round(metrics.max_seconds, 3),
+                "items_per_second": round(metrics.items / wall, 2) if wall else 0.0,
+                "errors": dict(metrics.errors),
+            }
+        return report
+
+    def to_prometheus(self) -> str:
+        """
+        Render all stages in the Prometheus text exposition format.
+
+        Stage series are labelled by stage only, so their number stays fixed
+        from run to run; the run they belong to is exported once, as the
+        run_id label of an info metric.
+        """
+        name = f"{METRIC_PREFIX}_stage"
+        lines: List[str] = [
+            f"# HELP {METRIC_PREFIX}_run_info Crawler run the metrics belong to",
+            f"# TYPE {METRIC_PREFIX}_run_info gauge",
+            f'{METRIC_PREFIX}_run_info{{run_id="{self.run_id}"}} 1',
+            f"# HELP {name}_duration_seconds Latency of one pipeline stage call",
+            f"# TYPE {name}_duration_seconds histogram",
+        ]
+        for stage, metrics in sorted(self.stages.items()):
+            labels = f'stage="{stage}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, metrics.bucket_counts):
+                cumulative += count
+                lines.append(f'{name}_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_duration_seconds_bucket{{{labels},le="+Inf"}} {metrics.count}')
+            lines.append(f"{name}_duration_seconds_sum{{{labels}}} {metrics.seconds:.6f}")
+            lines.append(f"{name}_duration_seconds_count{{{labels}}} {metrics.count}")
+
+        for metric, kind, help_text, value in (
+            ("items_total", "counter", "Items handled by a stage", lambda m: m.items),
+            ("in_flight", "gauge", "Stage calls currently running", lambda m: m.in_flight),
+            ("items_per_second", "gauge", "Items per second of stage wall time",
+             lambda m: round(m.items / m.wall_seconds, 3) if m.wall_seconds else 0.0),
+        ):
+            lines.append(f"# HELP {name}_{metric} {help_text}")
+            lines.append(f"# TYPE {name}_{metric} {kind}")
+            for stage, metrics in sorted(self.stages.items()):
+                lines.append(f'{name}_{metric}{{stage="{stage}"}} {value(metrics)}')
+
+        lines.append(f"# HELP {name}_errors_total Stage errors by exception type")
+        lines.append(f"# TYPE {name}_errors_total counter")
+        for stage, metrics in sorted(self.stages.items()):
+            for error_type, count in sorted(metrics.errors.items()):
+                lines.append(
+                    f'{name}_errors_total{{stage="{stage}",error_type="{error_type}"}} {count}'
+                )
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Write the metrics to a text file, replacing it atomically"""
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(self.to_prometheus())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Failed to write metrics file", path=path, error=str(e))
+
+    async def serve(self, port: int):
+        """Serve /metrics over HTTP until stop() is called"""
+        async def handle(request: web.Request) -> web.Response:
+            return web.Response(text=self.to_prometheus(), content_type="text/plain")
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        try:
+            await web.TCPSite(self._runner, port=port).start()
+            logger.info("Serving pipeline metrics", port=port, path="/metrics")
+        except OSError as e:
+            logger.warning("Metrics endpoint unavailable", port=port, error=str(e))
+            await self.stop()
+
+    async def stop(self):
+        """Stop the HTTP endpoint, if running"""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,180 @@
+"""
+Rule-based Pre-Classifier for RSIP Application Gallery
+
+Cheap local scoring in front of the Gemini classifier. Items that the configured
+rules reject with confidence, or tag outright (e.g. dancing/holiday demos with
+no positive signals), are classified locally and never reach the LLM.
+"""
+import hashlib
+import json
+import re
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+import structlog
+
+from config import PreClassificationConfig
+
+
+logger = structlog.get_logger()
+
+
+class PreClassifier:
+    """Scores items with keyword, source, title and media type rules"""
+
+    def __init__(self, config: PreClassificationConfig):
+        self.config = config
+
+        # One alternation per keyword table so each item is scanned once
+        self.keyword_weights = {k.casefold(): float(w) for k, w in config.keywords.items()}
+        self.keyword_pattern = self._compile_keywords(self.keyword_weights)
+
+        self.source_reputation = {k.casefold(): float(w) for k, w in config.source_reputation.items()}
+        self.media_type_scores = {k: float(w) for k, w in config.media_type.items()}
+        self.title_rules = [
+            (
+                rule["name"],
+                re.compile(rule["pattern"], re.IGNORECASE),
+                float(rule.get("score", 0.0)),
+                rule.get("assign"),
+            )
+            for rule in config.title_rules
+        ]
+
+        # Classifier version recorded on the items the rules settle; changes with the rules
+        rules = json.dumps(asdict(config), sort_keys=True)
+        self.version = "rules/" + hashlib.sha256(rules.encode("utf-8")).hexdigest()[:12]
+
+        self.stats = {"evaluated": 0, "rejected": 0, "tagged": 0, "passed": 0}
+
+    @staticmethod
+    def _compile_keywords(weights: Dict[str, float]) -> Optional[re.Pattern]:
+        if not weights:
+            return None
+        alternation = "|".join(re.escape(k) for k in sorted(weights, key=len, reverse=True))
+        return re.compile(rf"\b({alternation})\b", re.IGNORECASE)
+
+    def score(self, item: Dict[str, Any]) -> Tuple[float, List[str], Optional[Dict[str, Any]]]:
+        """
+        Score an item against all rules.
+
+        Returns:
+            Total score, names of the rules that fired, and the fields assigned
+            by the first matching title rule with an assignment (if any)
+        """
+        total = 0.0
+        fired: List[str] = []
+        assigned: Optional[Dict[str, Any]] = None
+
+        title = item.get("title") or ""
+        text = f"{title} {item.get('description') or ''}"
+
+        # Keyword hits (each distinct keyword counts once)
+        if self.keyword_pattern:
+            for keyword in {m.casefold() for m in self.keyword_pattern.findall(text)}:
+                total += self.keyword_weights[keyword]
+                fired.append(f"keyword:{keyword}")
+
+        # Source reputation by source name or URL domain
+        reputation = self._source_reputation(item)
+        if reputation is not None:
+            name, weight = reputation
+            total += weight
+            fired.append(f"source:{name}")
+
+        # Title heuristics
+        for name, pattern, weight, assign in self.title_rules:
+            if pattern.search(title):
+                total += weight
+                fired.append(f"title:{name}")
+                if assign and assigned is None:
+                    assigned = dict(assign)
+
+        # Media type
+        media_type = item.get("media_type")
+        if media_type in self.media_type_scores:
+            total += self.media_type_scores[media_type]
+            fired.append(f"media:{media_type}")
+
+        return total, fired, assigned
+
+    def evaluate(self, item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Decide whether an item needs the LLM.
+
+        Returns:
+            A raw classification for confident rejects and for items a title
+            rule tags that score no higher than tag_threshold, or None if the
+            item should go to Gemini
+        """
+        self.stats["evaluated"] += 1
+        total, fired, assigned = self.score(item)
+        details = {"score": round(total, 2), "rules": fired}
+
+        if total <= self.config.reject_threshold:
+            self.stats["rejected"] += 1
+            logger.debug("Pre-classification reject", title=item.get("title", "")[:50], **details)
+            return {
+                "content_type": "tech_demo",
+                "deployment_maturity": "unknown",
+                "educational_value": 1,
+                "relevance_score": 0.1,
+                **(assigned or {}),
+                "summary": f"Rejected by pre-classification rules ({', '.join(fired)})",
+                "classified_by": "rules",
+                "pre_classification": {**details, "decision": "reject"},
+            }
+
+        # Positive evidence (keywords, sources) outweighing the title rule
+        # leaves the decision to Gemini
+        if assigned is not None and total <= self.config.tag_threshold:
+            self.stats["tagged"] += 1
+            logger.debug("Pre-classification tag", title=item.get("title", "")[:50], **details)
+            return {
+                "summary": item.get("title"),
+                **assigned,
+                "classified_by": "rules",
+                "pre_classification": {**details, "decision": "tag"},
+            }
+
+        self.stats["passed"] += 1
+        return None
+
+    def _source_reputation(self, item: Dict[str, Any]) -> Optional[Tuple[str, float]]:
+        """Find the reputation entry for an item's source name or URL domain"""
+        if not self.source_reputation:
+            return None
+
+        candidates = [(item.get("source_name") or "").casefold()]
+        for url_field in ("source_url", "content_url"):
+            domain = urlparse(item.get(url_field) or "").netloc.casefold()
+            if domain:
+                candidates.append(domain[4:] if domain.startswith("www.") else domain)
+
+        for candidate in candidates:
+            if not candidate:
+                continue
+            if candidate in self.source_reputation:
+                return candidate, self.source_reputation[candidate]
+            # Sub-domains inherit the reputation of their parent domain
+            for name, weight in self.source_reputation.items():
+                if candidate.endswith("." + name):
+                    return name, weight
+
+        return None
+
+    def get_report(self, batch_size: int = 1) -> Dict[str, Any]:
+        """
+        Summarise the gate's decisions for this run.
+
+        Args:
+            batch_size: Items per Gemini call, to convert skipped items into calls
+        """
+        skipped = self.stats["rejected"] + self.stats["tagged"]
+        evaluated = self.stats["evaluated"]
+        return {
+            **self.stats,
+            "llm_items_saved": skipped,
+            "llm_calls_saved": -(-skipped // max(1, batch_size)),
+            "saved_share": round(skipped / evaluated, 3) if evaluated else 0.0,
+        }
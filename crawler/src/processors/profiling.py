@@ -0,0 +1,440 @@
+"""
+Profiling Mode for the crawler entry points
+
+Run any entry point with --profile to write a report directory
+(profiles/<name>_<timestamp>/ by default) with:
+- cpu.prof / cpu_top.txt: cProfile of the whole run (open cpu.prof with
+  snakeviz or pstats)
+- stages.json / memory_<stage>.txt: wall and CPU time, traced memory growth
+  and peak per pipeline stage, and top allocation sites per top-level stage
+  (tracemalloc; stages nested in another are not snapshotted, so per-item
+  stages stay cheap)
+- blocking.txt: stacks sampled while the event loop was blocked for longer
+  than --slow-callback-ms, grouped by call site (feedparser.parse,
+  requests.get, sync Supabase calls...)
+- slow_callbacks.txt: asyncio debug-mode slow callback warnings
+- summary.txt: the highlights of all of the above
+
+Entry points call run(main, name) instead of asyncio.run(main()); it removes
+the profiling options from the command line before main() parses it. Code
+marks pipeline stages with stage(name), which does nothing when profiling is off.
+"""
+import argparse
+import asyncio
+import cProfile
+import io
+import json
+import logging
+import pstats
+import re
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+import structlog
+
+
+logger = structlog.get_logger()
+
+DEFAULT_PROFILE_DIR = Path(__file__).parent.parent.parent / "profiles"
+SRC_DIR = str(Path(__file__).parent.parent)
+
+TRACEMALLOC_FRAMES = 10
+TOP_ALLOCATIONS = 25
+TOP_FUNCTIONS = 40
+
+# Task name in a task's repr, as slow callback warnings show it
+TASK_NAME = re.compile(r"<Task \w+ name='([^']*)'")
+
+# Profiler for the current run (see Profiler.run)
+_active: Optional["Profiler"] = None
+
+# Stage the current task is in; tasks start in the stage they were created in
+_current_stage: ContextVar[Optional["_StageEntry"]] = ContextVar("current_stage", default=None)
+
+
+class _StageEntry:
+    """One pass through a stage"""
+
+    def __init__(self, name: str, parent: Optional["_StageEntry"]):
+        self.name = name
+        self.parent = parent
+        self.peak = 0
+
+
+class _SlowCallbackHandler(logging.Handler):
+    """Collects asyncio's 'Executing <handle> took N seconds' debug warnings"""
+
+    def __init__(self, profiler: "Profiler"):
+        super().__init__(level=logging.WARNING)
+        self.profiler = profiler
+
+    def emit(self, record: logging.LogRecord):
+        if isinstance(record.msg, str) and record.msg.startswith("Executing") and len(record.args or ()) == 2:
+            handle, seconds = record.args
+            self.profiler.slow_callbacks.append({
+                "handle": str(handle)[:300],
+                "seconds": float(seconds),
+                "stage": self.profiler.handle_stage(str(handle)),
+            })
+
+
+class _LoopWatchdog(threading.Thread):
+    """Samples the event loop thread's stack while the loop is blocked"""
+
+    def __init__(self, profiler: "Profiler", loop: asyncio.AbstractEventLoop, threshold: float):
+        super().__init__(name="profiling-loop-watchdog", daemon=True)
+        self.profiler = profiler
+        self.loop = loop
+        self.threshold = threshold
+        self.loop_thread_id = threading.get_ident()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            responded = threading.Event()
+            try:
+                self.loop.call_soon_threadsafe(responded.set)
+            except RuntimeError:
+                return  # Loop closed
+            started = time.monotonic()
+            if responded.wait(self.threshold):
+                self.stopped.wait(self.threshold / 2)
+                continue
+
+            # Sample the stack until the loop responds; long blocks get many samples
+            stage = self.profiler.task_stage(asyncio.current_task(self.loop))
+            samples = []
+            while True:
+                frame = sys._current_frames().get(self.loop_thread_id)
+                samples.append(traceback.extract_stack(frame) if frame else [])
+                if responded.wait(0.05) or self.stopped.is_set():
+                    break
+            self.profiler.record_block(samples, time.monotonic() - started, stage)
+
+    def stop(self):
+        self.stopped.set()
+
+
+class Profiler:
+    """cProfile, per-stage tracemalloc and event-loop blocking report for one run"""
+
+    def __init__(self, name: str, output_dir: Optional[str] = None, slow_callback_ms: float = 100.0):
+        self.name = name
+        self.slow_callback_seconds = slow_callback_ms / 1000
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.report_dir = Path(output_dir or DEFAULT_PROFILE_DIR) / f"{name}_{timestamp}"
+        self.info: Dict[str, Any] = {"name": name, "started_at": datetime.now().isoformat()}
+
+        self.cpu_profile = cProfile.Profile()
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.stage_allocations: Dict[str, List[tracemalloc.StatisticDiff]] = {}
+        self.blocks: Dict[str, Dict[str, Any]] = {}
+        self.slow_callbacks: List[Dict[str, Any]] = []
+        # Stage of each task, for the watchdog thread (which cannot read the
+        # tasks' context variables)
+        self._task_stages: "weakref.WeakKeyDictionary[asyncio.Task, Optional[_StageEntry]]" = \
+            weakref.WeakKeyDictionary()
+
+        self._watchdog: Optional[_LoopWatchdog] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._previous_task_factory = None
+        self._slow_callback_handler = _SlowCallbackHandler(self)
+        self._started = 0.0
+        self._started_cpu = 0.0
+
+    async def run(self, main: Callable[[], Awaitable[Any]]) -> Any:
+        """Await main() with profiling active, then write the report"""
+        self._start(asyncio.get_running_loop())
+        try:
+            return await main()
+        finally:
+            self._finish()
+
+    def _start(self, loop: asyncio.AbstractEventLoop):
+        global _active
+        _active = self
+        self._started = time.monotonic()
+        self._started_cpu = time.process_time()
+
+        # Record the stage each task starts in
+        self._loop = loop
+        self._previous_task_factory = loop.get_task_factory()
+        loop.set_task_factory(self._create_task)
+
+        # Slow callback warnings from asyncio debug mode
+        loop.set_debug(True)
+        loop.slow_callback_duration = self.slow_callback_seconds
+        logging.getLogger("asyncio").addHandler(self._slow_callback_handler)
+
+        self._watchdog = _LoopWatchdog(self, loop, self.slow_callback_seconds)
+        self._watchdog.start()
+
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        self.cpu_profile.enable()
+        logger.info("Profiling enabled",
+                   report_dir=str(self.report_dir),
+                   slow_callback_ms=self.slow_callback_seconds * 1000)
+
+    def _finish(self):
+        global _active
+        self.cpu_profile.disable()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        # Let the watchdog record a block still in progress before the report is written
+        self._watchdog.stop()
+        self._watchdog.join(timeout=1.0)
+        logging.getLogger("asyncio").removeHandler(self._slow_callback_handler)
+        self._loop.set_task_factory(self._previous_task_factory)
+        _active = None
+
+        self.info.update({
+            "wall_seconds": round(time.monotonic() - self._started, 3),
+            "cpu_seconds": round(time.process_time() - self._started_cpu, 3),
+            "peak_traced_mb": round(peak / 1e6, 2),
+            "slow_callback_ms": self.slow_callback_seconds * 1000,
+        })
+        try:
+            self._write_report()
+            logger.info("Profile report written", report_dir=str(self.report_dir))
+        except OSError as e:
+            logger.error("Failed to write profile report", report_dir=str(self.report_dir), error=str(e))
+
+    def _create_task(self, loop: asyncio.AbstractEventLoop, coro, context=None) -> asyncio.Task:
+        """Task factory: create the task and note the stage it inherits"""
+        if self._previous_task_factory is None:
+            task = asyncio.Task(coro, loop=loop, context=context)
+        elif context is None:
+            task = self._previous_task_factory(loop, coro)
+        else:
+            task = self._previous_task_factory(loop, coro, context=context)
+        entry = context.get(_current_stage) if context is not None else _current_stage.get()
+        if entry is not None:
+            self._task_stages[task] = entry
+        return task
+
+    def task_stage(self, task: Optional[asyncio.Task]) -> str:
+        """Name of the stage a task is in ("run" outside any stage)"""
+        return _stage_name(self._task_stages.get(task) if task is not None else None)
+
+    def handle_stage(self, handle: str) -> str:
+        """Stage of the task a slow callback warning names (asyncio logs the task's repr)"""
+        match = TASK_NAME.match(handle)
+        if match:
+            for task, entry in list(self._task_stages.items()):
+                if task.get_name() == match.group(1):
+                    return _stage_name(entry)
+        return "run"
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Measure time, CPU and traced memory for one pass through a stage.
+
+        Allocation sites are compared only for top-level stages: two
+        tracemalloc snapshots cost far more than a per-item stage itself.
+        """
+        parent = _current_stage.get()
+        entry = _StageEntry(name, parent)
+        token = _current_stage.set(entry)
+        task = asyncio.current_task() if _loop_running() else None
+        if task is not None:
+            self._task_stages[task] = entry
+
+        before = self._snapshot() if parent is None else None
+        memory_before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        started = time.monotonic()
+        started_cpu = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.monotonic() - started
+            cpu = time.process_time() - started_cpu
+            memory_after, peak = tracemalloc.get_traced_memory()
+            entry.peak = max(entry.peak, peak)
+            if parent:
+                parent.peak = max(parent.peak, entry.peak)
+            allocations = self._snapshot().compare_to(before, "lineno") if before else None
+
+            _current_stage.reset(token)
+            if task is not None:
+                self._task_stages[task] = parent
+
+            stats = self.stages.setdefault(name, {
+                "calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0,
+                "memory_growth_mb": 0.0, "peak_traced_mb": 0.0,
+            })
+            stats["calls"] += 1
+            stats["wall_seconds"] += wall
+            stats["cpu_seconds"] += cpu
+            growth = (memory_after - memory_before) / 1e6
+            stats["memory_growth_mb"] += growth
+            stats["peak_traced_mb"] = max(stats["peak_traced_mb"], entry.peak / 1e6)
+            # Keep the allocation sites of the pass that grew memory the most
+            if allocations is not None and growth >= stats.get("_largest_growth", float("-inf")):
+                stats["_largest_growth"] = growth
+                self.stage_allocations[name] = allocations[:TOP_ALLOCATIONS]
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        """Take a tracemalloc snapshot without charging it to the CPU profile"""
+        self.cpu_profile.disable()
+        try:
+            return tracemalloc.take_snapshot()
+        finally:
+            self.cpu_profile.enable()
+
+    def record_block(self, samples: List[List[traceback.FrameSummary]], seconds: float, stage: str):
+        """Add one period of event-loop blocking to the report, under its most sampled call site"""
+        sites = [_blocking_site(stack) for stack in samples]
+        site = max(set(sites), key=sites.count)
+        stack = samples[sites.index(site)]
+        block = self.blocks.setdefault(site, {
+            "count": 0, "seconds": 0.0, "max_seconds": 0.0, "stages": set(), "stack": stack,
+        })
+        block["count"] += 1
+        block["seconds"] += seconds
+        block["stages"].add(stage)
+        if seconds > block["max_seconds"]:
+            block["max_seconds"] = seconds
+            block["stack"] = stack
+
+    def _write_report(self):
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+
+        self.cpu_profile.dump_stats(str(self.report_dir / "cpu.prof"))
+        cpu_top = io.StringIO()
+        cpu_stats = pstats.Stats(self.cpu_profile, stream=cpu_top)
+        cpu_stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+        cpu_stats.sort_stats("tottime").print_stats(TOP_FUNCTIONS)
+        (self.report_dir / "cpu_top.txt").write_text(cpu_top.getvalue())
+
+        stages = {}
+        for name, stats in self.stages.items():
+            stages[name] = {key: round(value, 3) if isinstance(value, float) else value
+                            for key, value in stats.items() if not key.startswith("_")}
+        (self.report_dir / "stages.json").write_text(json.dumps({**self.info, "stages": stages}, indent=2))
+        for name, allocations in self.stage_allocations.items():
+            lines = [f"Top allocation growth in stage '{name}' (largest pass)", ""]
+            lines.extend(str(stat) for stat in allocations)
+            (self.report_dir / f"memory_{name}.txt").write_text("\n".join(lines) + "\n")
+
+        blocks = sorted(self.blocks.items(), key=lambda kv: kv[1]["seconds"], reverse=True)
+        lines = [f"Event loop blocked for more than {self.info['slow_callback_ms']:.0f} ms", ""]
+        for site, block in blocks:
+            lines.append(f"{block['seconds']:.2f}s total, {block['count']}x, max {block['max_seconds']:.2f}s "
+                         f"[{', '.join(sorted(block['stages']))}] {site}")
+            lines.extend("    " + line.rstrip() for line in traceback.format_list(block["stack"][-12:]))
+            lines.append("")
+        (self.report_dir / "blocking.txt").write_text("\n".join(lines) + "\n")
+
+        callbacks = sorted(self.slow_callbacks, key=lambda c: c["seconds"], reverse=True)
+        (self.report_dir / "slow_callbacks.txt").write_text("\n".join(
+            f"{c['seconds']:.3f}s [{c['stage']}] {c['handle']}" for c in callbacks
+        ) + "\n")
+
+        self._write_summary(stages, blocks, cpu_stats)
+
+    def _write_summary(self, stages: Dict[str, Dict[str, Any]], blocks: list, cpu_stats: pstats.Stats):
+        lines = [
+            f"PROFILE: {self.name}",
+            *(f"  {key}: {value}" for key, value in self.info.items() if key != "name"),
+            "",
+            "STAGES",
+            f"  {'stage':<24} {'calls':>6} {'wall s':>9} {'cpu s':>9} {'mem +MB':>9} {'peak MB':>9}",
+        ]
+        for name, stats in sorted(stages.items(), key=lambda kv: kv[1]["wall_seconds"], reverse=True):
+            lines.append(f"  {name:<24} {stats['calls']:>6} {stats['wall_seconds']:>9.2f} "
+                         f"{stats['cpu_seconds']:>9.2f} {stats['memory_growth_mb']:>9.2f} "
+                         f"{stats['peak_traced_mb']:>9.2f}")
+
+        lines += ["", "EVENT LOOP BLOCKED BY (see blocking.txt)"]
+        for site, block in blocks[:10]:
+            lines.append(f"  {block['seconds']:>8.2f}s {block['count']:>5}x  {site}")
+        if not blocks:
+            lines.append("  (none)")
+
+        callbacks = sorted(self.slow_callbacks, key=lambda c: c["seconds"], reverse=True)
+        lines += ["", f"SLOW CALLBACKS: {len(callbacks)} (see slow_callbacks.txt)"]
+        for callback in callbacks[:5]:
+            lines.append(f"  {callback['seconds']:>8.3f}s  {callback['handle'][:100]}")
+
+        lines += ["", "TOP FUNCTIONS BY CUMULATIVE TIME (see cpu_top.txt)"]
+        top = sorted(cpu_stats.stats.items(), key=lambda kv: kv[1][3], reverse=True)
+        for (filename, line, function), (_, calls, _, cumulative, _) in top[:15]:
+            lines.append(f"  {cumulative:>8.2f}s {calls:>8}  {function} ({Path(filename).name}:{line})")
+
+        (self.report_dir / "summary.txt").write_text("\n".join(lines) + "\n")
+
+
+def _stage_name(entry: Optional[_StageEntry]) -> str:
+    return entry.name if entry is not None else "run"
+
+
+def _loop_running() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _blocking_site(stack: List[traceback.FrameSummary]) -> str:
+    """Describe a blocked stack as '<our frame> -> <call it made>'"""
+    if not stack:
+        return "unknown"
+    for index in range(len(stack) - 1, -1, -1):
+        frame = stack[index]
+        if frame.filename.startswith(SRC_DIR) and not frame.filename.endswith("profiling.py"):
+            site = f"{frame.name} ({Path(frame.filename).name}:{frame.lineno})"
+            if index + 1 < len(stack):
+                callee = stack[index + 1]
+                site += f" -> {callee.name} ({Path(callee.filename).name})"
+            return site
+    frame = stack[-1]
+    return f"{frame.name} ({Path(frame.filename).name}:{frame.lineno})"
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Profile a pipeline stage, if profiling is on"""
+    if _active is None:
+        yield
+        return
+    with _active.stage(name):
+        yield
+
+
+def annotate(**info):
+    """Add details (e.g. the crawler run_id) to the active profile report"""
+    if _active is not None:
+        _active.info.update(info)
+
+
+def run(main: Callable[[], Awaitable[Any]], name: str) -> Any:
+    """
+    asyncio.run(main()), profiled when --profile is on the command line.
+
+    Options (removed from sys.argv before main() runs):
+        --profile               Write a profiling report for this run
+        --profile-dir DIR       Parent directory for report directories (default: crawler/profiles)
+        --slow-callback-ms N    Report event-loop blocking longer than N ms (default: 100)
+    """
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--profile-dir", default=None)
+    parser.add_argument("--slow-callback-ms", type=float, default=100.0)
+    options, remaining = parser.parse_known_args(sys.argv[1:])
+    sys.argv[1:] = remaining
+
+    if not options.profile:
+        return asyncio.run(main())
+    profiler = Profiler(name, options.profile_dir, options.slow_callback_ms)
+    return asyncio.run(profiler.run(main))
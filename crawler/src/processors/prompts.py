@@ -0,0 +1,375 @@
+"""
+Classification Prompts for RSIP Application Gallery
+
+The static taxonomy and rules are sent as the model's system instruction (and
+can be held in a Gemini context cache), so each request only carries the item
+text. Item text is cleaned of URLs, sponsor blocks, timestamps and repeated
+hashtags, then truncated to a token budget before it is sent.
+
+Platform-specific guidance (LinkedIn, TikTok, other social platforms, the
+strict re-check) is layered on the shared instructions as prompt variants,
+so every ingestion path uses the same taxonomy and output format.
+"""
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+
+# Taxonomy instructions (static part of every classification request)
+_CLASSIFICATION_TASKS_V2 = """CLASSIFICATION TASKS:
+
+1. CONTENT_TYPE (most important - choose one):
+   - real_application: Robot deployed in actual business, solving real problems
+   - pilot_poc: Trial deployment, proof of concept, evaluation phase
+   - case_study: Documented deployment with results/metrics
+   - tech_demo: Capability demonstration, trade show, lab demo, controlled environment
+   - product_announcement: New product reveal, features showcase
+   - tutorial: How-to, integration guide, training content
+
+   INDICATORS for real_application:
+   - Named customer or facility
+   - Production environment visible (not a lab/showroom)
+   - Multiple units working together
+   - Integration with existing systems visible
+   - Workers interacting naturally (not staged)
+
+   INDICATORS for tech_demo:
+   - Trade show booth visible
+   - Lab/showroom environment
+   - Narrator explaining features
+   - "Demo", "showcase", "capability" in title
+   - No business context
+   - Robot performing tricks or dance moves
+   - Controlled/staged environment
+
+2. DEPLOYMENT_MATURITY:
+   - production: Running in real operations, customer named
+   - pilot: Limited/trial deployment
+   - prototype: R&D, lab stage
+   - concept: Simulation, rendering, future capability
+   - unknown: Cannot determine
+
+3. APPLICATION_CATEGORY (choose one):
+   - industrial_automation: Factory, warehouse, manufacturing, logistics
+   - service_robotics: Hospitality, healthcare, delivery, cleaning
+   - surveillance_security: Patrol, monitoring, inspection, access control
+
+4. SPECIFIC_TASKS (be specific, choose 1-3):
+   Industrial: pallet_transport, tote_transport, cart_towing, dock_to_stock,
+              machine_tending, assembly_insertion, case_palletizing, depalletizing,
+              visual_inspection, weld_inspection, screw_driving, material_handling,
+              bin_picking, kitting, quality_control, packaging, welding, painting
+   Service: room_delivery, medication_delivery, food_delivery, floor_scrubbing,
+           vacuum_cleaning, disinfection, reception_greeting, wayfinding,
+           telepresence, inventory_scanning, companion, concierge
+   Security: perimeter_patrol, intrusion_detection, access_verification,
+            remote_monitoring, threat_detection, facility_inspection
+
+5. SCENE_TYPE: warehouse, manufacturing, retail, hospital, office, hotel,
+               outdoor, laboratory, construction, logistics_center, airport,
+               restaurant, residential, campus
+
+6. APPLICATION_CONTEXT:
+   - problem_solved: What business problem? (labor_shortage, safety_hazard,
+     quality_consistency, cost_reduction, throughput, 24x7_operation, hazardous_environment)
+   - deployment_scale: single_unit | small_fleet | large_fleet | facility_wide | multi_site
+   - customer_identified: true if specific company/facility named
+   - has_metrics: true if ROI, efficiency numbers, or results mentioned
+
+7. EDUCATIONAL_VALUE (1-5):
+   5 = Full case study with metrics, integration details, lessons learned
+   4 = Real deployment with good technical details visible
+   3 = Real application but limited context
+   2 = Demo with some application relevance
+   1 = Pure marketing, entertainment, no practical value for users
+
+8. FUNCTIONAL_REQUIREMENTS (capabilities demonstrated):
+   Navigation: autonomous_navigation, obstacle_avoidance, slam, path_planning,
+              fleet_management, multi_floor, outdoor_navigation
+   Manipulation: pick_and_place, bin_picking_3d, force_control, vision_guided,
+                gripper_control, dual_arm, high_precision
+   Perception: object_detection, barcode_scanning, ai_inference, 3d_vision,
+              defect_detection, ocr, thermal_imaging
+   Safety: human_detection, safety_rated, collaborative, collision_avoidance,
+          emergency_stop, zone_monitoring
+   Integration: wms_integration, erp_integration, mes_integration, api_connectivity
+"""
+
+# Example classification object (braces escaped for str.format)
+_RESULT_EXAMPLE_V2 = """{{
+  "content_type": "real_application",
+  "deployment_maturity": "production",
+  "application_category": "industrial_automation",
+  "specific_tasks": ["pallet_transport", "dock_to_stock"],
+  "task_types": ["transportation"],
+  "scene_type": "warehouse",
+  "application_context": {{
+    "problem_solved": "labor_shortage",
+    "deployment_scale": "large_fleet",
+    "customer_identified": true,
+    "has_metrics": true
+  }},
+  "educational_value": 4,
+  "functional_requirements": ["autonomous_navigation", "fleet_management", "wms_integration"],
+  "environment": {{
+    "setting": "indoor",
+    "human_presence": "collaborative",
+    "floor_type": "smooth",
+    "lighting": "artificial"
+  }},
+  "summary": "Fleet of 50 AMRs handling pallet transport at BMW Leipzig plant, integrated with WMS for 24/7 operation",
+  "relevance_score": 0.95
+}}
+"""
+
+_CRITICAL_RULES_V2 = """CRITICAL RULES:
+- Be STRICT about content_type. Most YouTube videos are tech_demo, not real_application
+- real_application requires EVIDENCE of actual business deployment
+- Trade show demos are ALWAYS tech_demo, even if impressive
+- Lab/showroom/studio environments = tech_demo
+- Robot dancing/doing tricks = tech_demo with educational_value 1
+- If uncertain between real_application and tech_demo, choose tech_demo
+- Relevance score should reflect practical value for someone planning a deployment
+- educational_value 4-5 requires real deployment evidence
+"""
+
+# Original all-in-one V2 prompt with the instructions inline. No longer sent -
+# kept to compare token counts against the compact prompts below
+CLASSIFICATION_PROMPT_V2 = """
+Analyze this robotics content and classify it for the RSIP Application Gallery.
+
+CONTENT:
+Title: {title}
+Description: {description}
+Source: {source_name}
+Media Type: {media_type}
+
+""" + _CLASSIFICATION_TASKS_V2 + """
+Return ONLY valid JSON (no markdown):
+""" + _RESULT_EXAMPLE_V2 + """
+""" + _CRITICAL_RULES_V2
+
+# System instruction: everything that does not depend on the item
+SYSTEM_INSTRUCTION_V2 = (
+    "You classify robotics content for the RSIP Application Gallery.\n\n"
+    + _CLASSIFICATION_TASKS_V2
+    + """
+OUTPUT FORMAT:
+Return ONLY valid JSON (no markdown). For a single content item return one object:
+""" + _RESULT_EXAMPLE_V2 + """
+When several numbered content items are given, return a JSON array with exactly
+one such object per item, each including an "index" field with the item number
+shown in [brackets]. Classify every item independently.
+
+""" + _CRITICAL_RULES_V2
+).format()
+
+ITEM_PROMPT_V2 = """Classify this content item.
+
+Title: {title}
+Description: {description}
+Source: {source_name}
+Media Type: {media_type}
+"""
+
+BATCH_PROMPT_V2 = """Classify each of these {count} content items.
+
+{items}"""
+
+BATCH_ITEM_TEMPLATE = """[{index}]
+Title: {title}
+Description: {description}
+Source: {source_name}
+Media Type: {media_type}
+"""
+
+
+
+@dataclass(frozen=True)
+class PromptVariant:
+    """Extra guidance appended to the shared instructions for one kind of content"""
+    name: str
+    guidance: str = ""
+
+    @property
+    def system_instruction(self) -> str:
+        if not self.guidance:
+            return SYSTEM_INSTRUCTION_V2
+        return SYSTEM_INSTRUCTION_V2 + "\nADDITIONAL GUIDANCE:\n" + self.guidance
+
+    @property
+    def version(self) -> str:
+        """Identifies the prompt wording; changing the prompt invalidates cached results"""
+        text = self.system_instruction + ITEM_PROMPT_V2 + BATCH_PROMPT_V2 + BATCH_ITEM_TEMPLATE
+        return "v2-" + hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+
+
+PROMPT_VARIANTS: Dict[str, PromptVariant] = {
+    variant.name: variant for variant in (
+        PromptVariant("default"),
+        # LinkedIn and TikTok results from crawl_social.py
+        PromptVariant("social", """- Social media content is often promotional. Be strict
+- Most LinkedIn posts are product_announcement or tech_demo
+- Most TikTok videos are tech_demo (capability demonstrations)
+- Only real_application if showing actual customer deployment
+"""),
+        PromptVariant("linkedin", """- LinkedIn content is often promotional - be strict about content_type
+- product_announcement: New product reveals, feature announcements
+- real_application: ONLY if clearly showing actual customer deployment
+- case_study: Must show results, metrics, or detailed implementation
+- Videos showing robot capabilities without customer context = tech_demo
+- Images of robots at trade shows or labs = tech_demo
+"""),
+        PromptVariant("tiktok", """- Most TikTok videos are tech_demo or tutorial
+- Dancing/entertainment robots = tech_demo, educational_value 1-2
+- Factory tours showing real operations = real_application
+- Product showcases = product_announcement
+"""),
+        # X/Twitter, Facebook and Instagram
+        PromptVariant("social_platforms", """- Social media content is often promotional - be strict about content_type
+- tech_demo also covers viral videos
+- real_application: ONLY if clearly showing actual customer deployment
+- case_study: Must show results, metrics, or detailed implementation
+- Videos of robots dancing or doing stunts = tech_demo (educational_value 1-2)
+- Factory/warehouse deployment footage with context = real_application
+"""),
+        # Re-check of already approved items (reclassify_v3.py)
+        PromptVariant("strict", """Be STRICT: distinguish REAL WORLD DEPLOYMENTS from demos, marketing and promotion.
+- real_application ONLY if ALL are true: actual customer/business environment (not a
+  lab, trade show or company HQ); REAL work tasks (not just walking around or a demo);
+  clear evidence of production deployment (uniforms, real products, actual facility);
+  customer/location identifiable or implied
+- pilot_poc: trial deployment at a customer site, testing phase, "pilot program" or
+  "proof of concept" language
+- case_study: detailed documentation with specific results, metrics, ROI, or a
+  customer testimonial/interview
+- tech_demo (be aggressive): capability demonstrations (walking, running, dancing,
+  stunts), trade show or conference footage, lab/R&D or company HQ demos, feature
+  showcases without real deployment, "look what our robot can do", holiday or
+  entertainment videos, no clear customer or business use case, generic promotional imagery
+- product_announcement: new product launch, feature updates, press release style
+- tutorial: how-to content, training material, setup guides
+- IMAGES from search results: most promotional/stock images are tech_demo; product
+  shots, renders and marketing images are tech_demo or product_announcement
+- VIDEOS: holiday videos (Christmas, Halloween) = tech_demo with educational_value 1;
+  "day in the life" at a customer site = real_application; customer testimonials = case_study
+"""),
+    )
+}
+
+DEFAULT_PROMPT_VARIANT = PROMPT_VARIANTS["default"]
+
+PROMPT_VERSION = DEFAULT_PROMPT_VARIANT.version
+
+# Rough Gemini tokenisation of English text, used for budgets and estimates
+CHARS_PER_TOKEN = 4
+
+URL_PATTERN = re.compile(r"(?:https?://|www\.)\S+", re.IGNORECASE)
+TIMESTAMP_PATTERN = re.compile(r"[(\[]?\b(?:\d{1,2}:)?\d{1,2}:\d{2}\b[)\]]?")
+HASHTAG_PATTERN = re.compile(r"#\w+")
+# Lines that are calls to action or sponsorship rather than content
+SPONSOR_LINE_PATTERN = re.compile(
+    r"\b(?:sponsor(?:ed)?|use (?:my |our )?code|promo code|discount code|affiliate|"
+    r"subscribe|follow us|patreon|merch|links? (?:below|in bio))\b|#ad\b",
+    re.IGNORECASE
+)
+# What is left of "Website: <url>" style lines once the URL is gone
+LABEL_ONLY_PATTERN = re.compile(r"^[\W_]*(?:\w+[\s\-]*){0,3}[:\-|>\u2192]*[\W_]*$")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a piece of text"""
+    return -(-len(text or "") // CHARS_PER_TOKEN)
+
+
+def clean_text(text: str, max_hashtags: int = 5) -> str:
+    """
+    Remove text that costs tokens without helping classification.
+
+    Drops sponsor/call-to-action lines and lines that were only a labelled link,
+    strips URLs and video timestamps, keeps the first few distinct hashtags and
+    collapses whitespace.
+    """
+    seen_hashtags = set()
+
+    def keep_hashtag(match: re.Match) -> str:
+        tag = match.group(0).casefold()
+        if tag in seen_hashtags or len(seen_hashtags) >= max_hashtags:
+            return ""
+        seen_hashtags.add(tag)
+        return match.group(0)
+
+    lines = []
+    for line in (text or "").splitlines():
+        if SPONSOR_LINE_PATTERN.search(line):
+            continue
+        had_url = bool(URL_PATTERN.search(line))
+        line = URL_PATTERN.sub("", line)
+        line = TIMESTAMP_PATTERN.sub("", line)
+        line = HASHTAG_PATTERN.sub(keep_hashtag, line)
+        line = re.sub(r"[ \t]+", " ", line).strip(" -|\u2022")
+        if not line or (had_url and LABEL_ONLY_PATTERN.match(line)):
+            continue
+        lines.append(line)
+
+    return "\n".join(lines)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to roughly max_tokens, at a word boundary"""
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    space = cut.rfind(" ")
+    if space > limit * 0.8:
+        cut = cut[:space]
+    return cut.rstrip() + " ..."
+
+
+class PromptBuilder:
+    """Builds the per-request part of classification prompts within a token budget"""
+
+    def __init__(
+        self,
+        title_token_budget: int = 64,
+        description_token_budget: int = 300,
+        variant: PromptVariant = DEFAULT_PROMPT_VARIANT
+    ):
+        self.title_token_budget = title_token_budget
+        self.description_token_budget = description_token_budget
+        self.variant = variant
+
+    @property
+    def system_instruction(self) -> str:
+        return self.variant.system_instruction
+
+    @property
+    def version(self) -> str:
+        """Prompt version including the budgets, since truncation changes what Gemini sees"""
+        return f"{self.variant.version}-t{self.title_token_budget}-d{self.description_token_budget}"
+
+    def item_fields(self, item: Dict[str, Any]) -> Dict[str, str]:
+        """Cleaned and truncated item fields for the prompt templates"""
+        title = re.sub(r"\s+", " ", item.get("title") or "").strip()
+        return {
+            "title": truncate_to_tokens(title, self.title_token_budget),
+            "description": truncate_to_tokens(
+                clean_text(item.get("description") or ""), self.description_token_budget
+            ),
+            "source_name": item.get("source_name") or "Unknown",
+            "media_type": item.get("media_type") or "video",
+        }
+
+    def single(self, item: Dict[str, Any]) -> str:
+        """Request text for one item"""
+        return ITEM_PROMPT_V2.format(**self.item_fields(item))
+
+    def batch(self, items: List[Dict[str, Any]]) -> str:
+        """Request text for several items, numbered from 0"""
+        blocks = "\n".join(
+            BATCH_ITEM_TEMPLATE.format(index=index, **self.item_fields(item))
+            for index, item in enumerate(items)
+        )
+        return BATCH_PROMPT_V2.format(count=len(items), items=blocks)
@@ -0,0 +1,192 @@
+"""
+Adaptive Rate Controller for Gemini requests
+
+Retries transient failures (429s, timeouts, 5xx) with jittered exponential
+backoff, adjusts concurrency AIMD-style from throttling and latency, and stops
+all requests for a cooldown when failures keep coming (circuit breaker).
+"""
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+import structlog
+from google.api_core import exceptions as google_exceptions
+
+from config import RateLimitConfig
+
+
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+# Errors worth retrying - the request may succeed once the API recovers
+THROTTLING_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+)
+TRANSIENT_ERRORS = THROTTLING_ERRORS + (
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+    asyncio.TimeoutError,
+    TimeoutError,
+    ConnectionError,
+)
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Check if an error is transient (throttling, timeout or temporary outage)"""
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+class AdaptiveRateController:
+    """AIMD concurrency limiter with retries and a circuit breaker"""
+
+    def __init__(self, rate_limits: RateLimitConfig):
+        self.max_retries = rate_limits.max_retries
+        self.base_delay = rate_limits.retry_delay_seconds
+        self.max_delay = rate_limits.max_retry_delay_seconds
+        self.timeout = rate_limits.gemini_request_timeout_seconds
+        self.latency_target = rate_limits.gemini_latency_target_seconds
+
+        self.min_limit = 1.0
+        self.max_limit = float(rate_limits.gemini_max_concurrency)
+        self.limit = min(float(rate_limits.gemini_initial_concurrency), self.max_limit)
+
+        self.breaker_threshold = rate_limits.circuit_breaker_threshold
+        self.breaker_cooldown = rate_limits.circuit_breaker_cooldown_seconds
+
+        self._in_flight = 0
+        self._condition = asyncio.Condition()
+        self._consecutive_failures = 0
+        self._open_until = 0.0
+        self._last_decrease = 0.0
+
+        self.stats = {
+            "requests": 0,
+            "throttled": 0,
+            "timeouts": 0,
+            "retries": 0,
+            "errors": 0,
+            "breaker_trips": 0,
+        }
+
+    async def call(self, request: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run a request under the concurrency limit, retrying transient failures.
+
+        Args:
+            request: Zero-argument coroutine function performing one API call
+
+        Returns:
+            The request's result
+
+        Raises:
+            The last error if it is not transient or retries are exhausted
+        """
+        attempt = 0
+        while True:
+            await self._acquire()
+            started = time.monotonic()
+            self.stats["requests"] += 1
+
+            try:
+                result = await asyncio.wait_for(request(), timeout=self.timeout)
+            except asyncio.CancelledError:
+                # Cancelled by the caller (e.g. a gather being torn down); free the
+                # slot even if the caller is cancelled again while it is released
+                await asyncio.shield(self._release(
+                    success=False, latency=time.monotonic() - started, transient=False
+                ))
+                raise
+            except Exception as e:
+                latency = time.monotonic() - started
+                if not is_transient_error(e):
+                    self.stats["errors"] += 1
+                    await self._release(success=False, latency=latency, transient=False)
+                    raise
+
+                if isinstance(e, THROTTLING_ERRORS):
+                    self.stats["throttled"] += 1
+                else:
+                    self.stats["timeouts"] += 1
+                await self._release(success=False, latency=latency, transient=True)
+
+                if attempt >= self.max_retries:
+                    logger.error("Gemini request failed after retries",
+                                attempts=attempt + 1,
+                                error=str(e) or type(e).__name__)
+                    raise
+
+                # Exponential backoff with jitter so throttled callers spread out
+                delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+                delay = delay / 2 + random.uniform(0, delay / 2)
+                attempt += 1
+                self.stats["retries"] += 1
+                logger.warning("Transient Gemini error, retrying",
+                              attempt=attempt,
+                              delay=round(delay, 1),
+                              concurrency=int(self.limit),
+                              error=str(e) or type(e).__name__)
+                await asyncio.sleep(delay)
+                continue
+
+            await self._release(success=True, latency=time.monotonic() - started)
+            return result
+
+    async def _acquire(self):
+        """Wait for the circuit to close and a concurrency slot to free up"""
+        while True:
+            wait = self._open_until - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+
+            async with self._condition:
+                await self._condition.wait_for(lambda: self._in_flight < int(self.limit))
+                if self._open_until > time.monotonic():
+                    continue
+                self._in_flight += 1
+                return
+
+    async def _release(self, success: bool, latency: float, transient: bool = False):
+        """Free a slot and adapt the concurrency limit to the outcome"""
+        async with self._condition:
+            self._in_flight -= 1
+            now = time.monotonic()
+
+            if success:
+                self._consecutive_failures = 0
+                if latency > self.latency_target:
+                    self._decrease(now, factor=0.75)
+                else:
+                    # Additive increase: roughly +1 slot per window of successes
+                    self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            elif transient:
+                self._consecutive_failures += 1
+                self._decrease(now, factor=0.5)
+
+                if self._consecutive_failures >= self.breaker_threshold:
+                    # Stop sending for a while, then probe with a single request
+                    self._open_until = now + self.breaker_cooldown
+                    self.limit = self.min_limit
+                    self._consecutive_failures = 0
+                    self.stats["breaker_trips"] += 1
+                    logger.warning("Gemini circuit breaker open",
+                                  cooldown_seconds=self.breaker_cooldown)
+
+            self._condition.notify_all()
+
+    def _decrease(self, now: float, factor: float):
+        """Multiplicative decrease, at most once per retry delay so a burst of 429s counts once"""
+        if now - self._last_decrease < self.base_delay:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * factor)
+
+    def get_report(self) -> Dict[str, Any]:
+        """Request counters and the current concurrency limit"""
+        return {
+            **self.stats,
+            "concurrency_limit": round(self.limit, 2),
+        }
@@ -0,0 +1,336 @@
+"""
+Per-item Tracing for the crawler pipeline
+
+Sampled items carry a trace from the moment a crawler emits them through
+find_existing_items, classification and upsert_gallery_items. Spans for HTTP, Gemini and
+database calls are recorded with their timings. Each crawler also gets a trace
+for its own HTTP calls, which the item traces link to. Spans are exported at the
+end of the run as OTLP/JSON or Chrome trace events (Perfetto, chrome://tracing)
+for flame-graph style inspection.
+
+Instrumented code uses the module functions (span, item_span, items_span). They
+do nothing unless a Tracer is active and the item or task is being traced.
+"""
+import json
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import structlog
+
+from config import TracingConfig
+
+
+logger = structlog.get_logger()
+
+SERVICE_NAME = "rsip-gallery-crawler"
+
+# Key under which a sampled item carries its trace
+TRACE_KEY = "_trace"
+
+# (trace_id, span_id) of the span the current task is inside
+_current_span: ContextVar[Optional[Tuple[str, str]]] = ContextVar("current_span", default=None)
+
+# Tracer for the current run (see Tracer.activate)
+_active: Optional["Tracer"] = None
+
+
+@dataclass
+class ItemTrace:
+    """Trace carried by an item through the pipeline"""
+    trace_id: str
+    span_id: str
+    started_ns: int
+    parent_id: str = ""  # Span new child spans attach to
+    links: List[Tuple[str, str]] = field(default_factory=list)
+
+
+def _new_id(n_bytes: int) -> str:
+    return random.getrandbits(n_bytes * 8).to_bytes(n_bytes, "big").hex()
+
+
+class Tracer:
+    """Collects sampled spans for one run and exports them to a file"""
+
+    def __init__(self, run_id: str, tracing_config: TracingConfig):
+        self.run_id = run_id
+        self.config = tracing_config
+        self.enabled = tracing_config.enabled
+        self.spans: List[Dict[str, Any]] = []
+        self.dropped = 0
+        self._sampler = random.Random()
+
+    def activate(self):
+        """Make this the tracer the module functions record into (if enabled)"""
+        global _active
+        if self.enabled:
+            _active = self
+
+    def deactivate(self):
+        global _active
+        if _active is self:
+            _active = None
+
+    def record(
+        self,
+        trace_id: str,
+        span_id: str,
+        parent_id: str,
+        name: str,
+        started_ns: int,
+        ended_ns: int,
+        attributes: Optional[Dict[str, Any]] = None,
+        error: Optional[BaseException] = None,
+        links: Optional[List[Tuple[str, str]]] = None
+    ):
+        """Store one finished span"""
+        if len(self.spans) >= self.config.max_spans:
+            self.dropped += 1
+            return
+        span = {
+            "trace_id": trace_id,
+            "span_id": span_id,
+            "parent_id": parent_id,
+            "name": name,
+            "start_ns": started_ns,
+            "end_ns": ended_ns,
+            "attributes": attributes or {},
+        }
+        if error is not None:
+            span["error"] = f"{type(error).__name__}: {error}"
+        if links:
+            span["links"] = links
+        self.spans.append(span)
+
+    @contextmanager
+    def trace(self, name: str, **attributes) -> Iterator[Tuple[str, str]]:
+        """
+        Start a new trace rooted at this block (used for each crawler).
+
+        Crawl traces are not sampled; there is one per crawler per run.
+
+        Yields:
+            (trace_id, span_id) of the root span, or None when tracing is off
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        context = (_new_id(16), _new_id(8))
+        token = _current_span.set(context)
+        started = time.time_ns()
+        error = None
+        try:
+            yield context
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            _current_span.reset(token)
+            self.record(context[0], context[1], "", name, started, time.time_ns(), attributes, error)
+
+    def start_item(self, item: Dict[str, Any], crawl_context: Optional[Tuple[str, str]] = None):
+        """Start a trace for an emitted item, if it is sampled"""
+        if not self.enabled or self._sampler.random() >= self.config.sample_rate:
+            return
+        span_id = _new_id(8)
+        item[TRACE_KEY] = ItemTrace(
+            trace_id=_new_id(16),
+            span_id=span_id,
+            started_ns=time.time_ns(),
+            parent_id=span_id,
+            links=[crawl_context] if crawl_context else [],
+        )
+
+    def finish_item(self, item: Dict[str, Any], outcome: str):
+        """End an item's trace with its outcome (added, skipped, failed, ...)"""
+        trace: Optional[ItemTrace] = item.pop(TRACE_KEY, None)
+        if not trace:
+            return
+        self.record(trace.trace_id, trace.span_id, "", "item", trace.started_ns, time.time_ns(), {
+            "outcome": outcome,
+            "source_type": item.get("source_type"),
+            "external_id": item.get("external_id"),
+            "title": (item.get("title") or "")[:100],
+        }, links=trace.links)
+
+    def slowest_items(self, limit: int = 5) -> List[Dict[str, Any]]:
+        """Slowest finished item traces with their slowest leaf span (where the time went)"""
+        roots = sorted(
+            (span for span in self.spans if span["name"] == "item"),
+            key=lambda span: span["end_ns"] - span["start_ns"],
+            reverse=True,
+        )[:limit]
+        report = []
+        for root in roots:
+            in_trace = [span for span in self.spans
+                        if span["trace_id"] == root["trace_id"] and span is not root]
+            parents = {span["parent_id"] for span in in_trace}
+            leaves = [span for span in in_trace if span["span_id"] not in parents]
+            slowest = max(leaves, key=lambda span: span["end_ns"] - span["start_ns"], default=None)
+            report.append({
+                "trace_id": root["trace_id"],
+                "title": root["attributes"].get("title"),
+                "seconds": round((root["end_ns"] - root["start_ns"]) / 1e9, 3),
+                "slowest_span": slowest["name"] if slowest else None,
+                "slowest_span_seconds": round((slowest["end_ns"] - slowest["start_ns"]) / 1e9, 3) if slowest else 0.0,
+            })
+        return report
+
+    def export(self, path: Optional[str] = None) -> Optional[str]:
+        """
+        Write the recorded spans to a file.
+
+        Args:
+            path: Output file (default: tracing.export_path with {run_id} filled in)
+
+        Returns:
+            Path written, or None when there was nothing to export or writing failed
+        """
+        if not self.spans:
+            return None
+        path = path or self.config.export_path.format(run_id=self.run_id)
+        document = self._chrome_document() if self.config.format == "chrome" else self._otlp_document()
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(document, f)
+        except OSError as e:
+            logger.warning("Failed to export traces", path=path, error=str(e))
+            return None
+        logger.info("Exported traces",
+                   path=path,
+                   format=self.config.format,
+                   spans=len(self.spans),
+                   dropped=self.dropped)
+        return path
+
+    def _otlp_document(self) -> Dict[str, Any]:
+        """Spans as an OTLP/JSON ExportTraceServiceRequest"""
+        def attributes(values: Dict[str, Any]) -> List[Dict[str, Any]]:
+            converted = []
+            for key, value in values.items():
+                if value is None:
+                    continue
+                if isinstance(value, bool):
+                    typed = {"boolValue": value}
+                elif isinstance(value, int):
+                    typed = {"intValue": str(value)}
+                elif isinstance(value, float):
+                    typed = {"doubleValue": value}
+                else:
+                    typed = {"stringValue": str(value)}
+                converted.append({"key": key, "value": typed})
+            return converted
+
+        spans = []
+        for span in self.spans:
+            otlp_span = {
+                "traceId": span["trace_id"],
+                "spanId": span["span_id"],
+                "name": span["name"],
+                "kind": 1,  # SPAN_KIND_INTERNAL
+                "startTimeUnixNano": str(span["start_ns"]),
+                "endTimeUnixNano": str(span["end_ns"]),
+                "attributes": attributes(span["attributes"]),
+                "status": {"code": 2, "message": span["error"]} if "error" in span else {"code": 1},
+            }
+            if span["parent_id"]:
+                otlp_span["parentSpanId"] = span["parent_id"]
+            if span.get("links"):
+                otlp_span["links"] = [{"traceId": t, "spanId": s} for t, s in span["links"]]
+            spans.append(otlp_span)
+
+        return {"resourceSpans": [{
+            "resource": {"attributes": attributes({"service.name": SERVICE_NAME, "run_id": self.run_id})},
+            "scopeSpans": [{"scope": {"name": "rsip.crawler"}, "spans": spans}],
+        }]}
+
+    def _chrome_document(self) -> Dict[str, Any]:
+        """Spans as Chrome trace events, one thread lane per trace"""
+        lanes: Dict[str, int] = {}
+        events = []
+        for span in sorted(self.spans, key=lambda span: span["start_ns"]):
+            lane = lanes.setdefault(span["trace_id"], len(lanes) + 1)
+            args = dict(span["attributes"])
+            if "error" in span:
+                args["error"] = span["error"]
+            events.append({
+                "name": span["name"],
+                "cat": span["name"].split(".")[0],
+                "ph": "X",
+                "ts": span["start_ns"] / 1000,
+                "dur": (span["end_ns"] - span["start_ns"]) / 1000,
+                "pid": 1,
+                "tid": lane,
+                "args": args,
+            })
+        return {"traceEvents": events, "otherData": {"run_id": self.run_id}}
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[None]:
+    """Record a child span of the current span, if the current task is traced"""
+    parent = _current_span.get()
+    tracer = _active
+    if tracer is None or parent is None:
+        yield
+        return
+
+    context = (parent[0], _new_id(8))
+    token = _current_span.set(context)
+    started = time.time_ns()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        _current_span.reset(token)
+        tracer.record(context[0], context[1], parent[1], name, started, time.time_ns(), attributes, error)
+
+
+@contextmanager
+def items_span(items: List[Dict[str, Any]], name: str, **attributes) -> Iterator[None]:
+    """
+    Record the block as a span in the trace of every sampled item it handles.
+
+    Spans opened inside the block by the same items nest under it. When the
+    block handles one traced item, span() calls inside it (e.g. HTTP requests)
+    nest under it as well.
+    """
+    tracer = _active
+    traces = [item[TRACE_KEY] for item in items if TRACE_KEY in item] if tracer else []
+    if not traces:
+        yield
+        return
+
+    parents = [trace.parent_id for trace in traces]
+    span_ids = [_new_id(8) for _ in traces]
+    for trace, span_id in zip(traces, span_ids):
+        trace.parent_id = span_id
+    token = _current_span.set((traces[0].trace_id, span_ids[0])) if len(traces) == 1 else None
+    started = time.time_ns()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        ended = time.time_ns()
+        if token is not None:
+            _current_span.reset(token)
+        for trace, span_id, parent_id in zip(traces, span_ids, parents):
+            trace.parent_id = parent_id
+            tracer.record(trace.trace_id, span_id, parent_id, name, started, ended,
+                          {**attributes, "batch_items": len(items)}, error)
+
+
+def item_span(item: Dict[str, Any], name: str, **attributes):
+    """Record the block as a span in the item's trace, if it is sampled"""
+    return items_span([item], name, **attributes)
@@ -0,0 +1,172 @@
+"""
+API Usage Ledger for crawler runs
+
+Records what each run spends per provider and source: YouTube Data API quota
+units, Custom Search queries, SerpAPI searches and Gemini tokens, with request
+counts, errors and latency. Prices and per-run budgets come from the usage
+section of config/sources.yaml. The ledger is stored in
+gallery_crawler_run_usage, with a summary on gallery_crawler_runs.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import structlog
+
+from config import UsageConfig
+
+
+logger = structlog.get_logger()
+
+# Provider names as stored in gallery_crawler_run_usage.provider
+YOUTUBE = "youtube"
+GOOGLE_CSE = "google_cse"
+SERPAPI = "serpapi"
+GEMINI = "gemini"
+
+USAGE_FIELDS = (
+    "requests", "errors", "units",
+    "input_tokens", "cached_tokens", "output_tokens",
+    "latency_seconds",
+)
+
+
+class UsageLedger:
+    """Per-run API usage, keyed by provider and source"""
+
+    def __init__(self, run_id: str, usage_config: Optional[UsageConfig] = None):
+        self.run_id = run_id
+        self.config = usage_config or UsageConfig()
+        self.entries: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+    def record(
+        self,
+        provider: str,
+        source: str,
+        requests: float = 1,
+        errors: int = 0,
+        units: int = 0,
+        input_tokens: float = 0,
+        cached_tokens: float = 0,
+        output_tokens: float = 0,
+        latency_seconds: float = 0.0
+    ):
+        """
+        Add usage for one provider and source.
+
+        Args:
+            provider: API provider (youtube, google_cse, serpapi, gemini)
+            source: Content source the usage was spent on (an item source_type)
+            requests: API requests made
+            errors: Requests that failed or returned an error status
+            units: Quota units or billable searches
+            input_tokens: Gemini input tokens, including cached tokens
+            cached_tokens: Gemini input tokens served from a context cache
+            output_tokens: Gemini output tokens
+            latency_seconds: Time spent waiting on the requests
+        """
+        entry = self.entries.setdefault((provider, source), dict.fromkeys(USAGE_FIELDS, 0))
+        entry["requests"] += requests
+        entry["errors"] += errors
+        entry["units"] += units
+        entry["input_tokens"] += input_tokens
+        entry["cached_tokens"] += cached_tokens
+        entry["output_tokens"] += output_tokens
+        entry["latency_seconds"] += latency_seconds
+
+    def estimated_cost(self, provider: str, entry: Dict[str, float]) -> float:
+        """Estimated USD cost of a usage entry at the configured prices"""
+        prices = self.config.prices.get(provider, {})
+        # Gemini reports cached tokens as part of the input
+        billed_input = entry["input_tokens"] - entry["cached_tokens"]
+        return (
+            entry["units"] * prices.get("units", 0.0)
+            + billed_input * prices.get("input_tokens", 0.0)
+            + entry["cached_tokens"] * prices.get("cached_tokens", 0.0)
+            + entry["output_tokens"] * prices.get("output_tokens", 0.0)
+        )
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Ledger entries as gallery_crawler_run_usage rows"""
+        rows = []
+        for (provider, source), entry in sorted(self.entries.items()):
+            rows.append({
+                "run_id": self.run_id,
+                "provider": provider,
+                "source": source,
+                "requests": round(entry["requests"], 2),
+                "errors": int(entry["errors"]),
+                "units": int(entry["units"]),
+                "input_tokens": round(entry["input_tokens"]),
+                "cached_tokens": round(entry["cached_tokens"]),
+                "output_tokens": round(entry["output_tokens"]),
+                "latency_seconds": round(entry["latency_seconds"], 3),
+                "estimated_cost_usd": round(self.estimated_cost(provider, entry), 6),
+            })
+        return rows
+
+    def totals(self) -> Dict[str, Dict[str, float]]:
+        """Usage summed over sources, per provider"""
+        totals: Dict[str, Dict[str, float]] = {}
+        for (provider, _), entry in self.entries.items():
+            total = totals.setdefault(provider, dict.fromkeys(USAGE_FIELDS, 0))
+            for name in USAGE_FIELDS:
+                total[name] += entry[name]
+        return totals
+
+    def summary(self, items_added: int) -> Dict[str, Any]:
+        """
+        Summarise the run's usage and cost.
+
+        Args:
+            items_added: Items the run added to the gallery
+
+        Returns:
+            Per-provider requests, units, tokens, mean latency and cost, the
+            estimated total cost and the cost per added item
+        """
+        providers = {}
+        total_cost = 0.0
+        for provider, total in sorted(self.totals().items()):
+            cost = self.estimated_cost(provider, total)
+            total_cost += cost
+            requests = total["requests"] or 1
+            providers[provider] = {
+                "requests": round(total["requests"], 2),
+                "errors": int(total["errors"]),
+                "units": int(total["units"]),
+                "input_tokens": round(total["input_tokens"]),
+                "cached_tokens": round(total["cached_tokens"]),
+                "output_tokens": round(total["output_tokens"]),
+                "mean_latency_seconds": round(total["latency_seconds"] / requests, 3),
+                "estimated_cost_usd": round(cost, 6),
+            }
+        return {
+            "providers": providers,
+            "items_added": items_added,
+            "estimated_cost_usd": round(total_cost, 6),
+            "cost_per_added_item_usd": round(total_cost / items_added, 6) if items_added else None,
+        }
+
+    def check_budgets(self, items_added: int) -> List[str]:
+        """
+        Compare the run against the configured budgets, logging each overrun.
+
+        Returns:
+            One message per exceeded budget (empty when within budget)
+        """
+        overruns = []
+        totals = self.totals()
+        for provider, limits in self.config.run_budgets.items():
+            total = totals.get(provider)
+            if not total:
+                continue
+            for name, limit in limits.items():
+                if name in total and total[name] > limit:
+                    overruns.append(f"{provider} {name} {total[name]:.0f} > {limit}")
+
+        max_cost = self.config.max_cost_per_added_item_usd
+        cost_per_item = self.summary(items_added)["cost_per_added_item_usd"]
+        if max_cost and cost_per_item is not None and cost_per_item > max_cost:
+            overruns.append(f"cost per added item ${cost_per_item:.4f} > ${max_cost}")
+
+        for overrun in overruns:
+            logger.warning("Usage budget exceeded", run_id=self.run_id, budget=overrun)
+        return overruns
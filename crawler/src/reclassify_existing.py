@@ -1,81 +1,45 @@
 """
 Re-classify Existing Gallery Items with V2 Classification System
 
-This script fetches all existing items from the database and re-classifies them
+This script fetches existing items from the database and re-classifies them
 using the enhanced V2 classifier that distinguishes real applications from demos.
+Only unversioned items, items the pre-classification rules or local model
+labelled, and items labelled by an older version (prompt or model) of the
+default prompt are read, so a rerun after an interruption continues where it
+stopped and a prompt change costs only the items it affects. Items labelled
+with another prompt variant are left to their own jobs.
 
 Usage:
-    python src/reclassify_existing.py [--dry-run] [--limit N] [--batch-size N]
+    python src/reclassify_existing.py [--dry-run] [--all] [--limit N] [--batch-size N]
 
 Options:
     --dry-run       Preview changes without updating database
+    --all           Re-classify every approved item, whichever classifier labelled it
     --limit N       Only process N items (for testing)
     --batch-size N  Process N items per batch (default: 10)
+    --page-size N   Rows read from the database per page (default: storage.scan_page_size)
+    --profile       Write a profiling report (see processors/profiling.py)
 """
-import asyncio
 import argparse
 import json
 from typing import Dict, Any, List
 import structlog
-from supabase import create_client, Client
 
 from config import get_config
+from processors import profiling
 from processors.ai_classifier import RSIPClassifier
+from storage.supabase_client import SupabaseClient, RECLASSIFY_COLUMNS, classification_fields
 
 logger = structlog.get_logger()
 
 
-async def fetch_all_items(supabase: Client, limit: int = None) -> List[Dict[str, Any]]:
-    """Fetch all approved items from the database"""
-    query = supabase.table('application_gallery').select('*').eq('status', 'approved')
-
-    if limit:
-        query = query.limit(limit)
-
-    response = query.execute()
-    return response.data
-
-
-async def update_item(supabase: Client, item_id: str, classification: Dict[str, Any], dry_run: bool = False) -> bool:
-    """Update an item with new V2 classification"""
-    update_data = {
-        'content_type': classification.get('content_type', 'unknown'),
-        'deployment_maturity': classification.get('deployment_maturity', 'unknown'),
-        'educational_value': classification.get('educational_value', 3),
-        'specific_tasks': classification.get('specific_tasks', []),
-        'application_context': classification.get('application_context', {}),
-        'task_types': classification.get('task_types', []),
-        'functional_requirements': classification.get('functional_requirements', []),
-        'ai_summary': classification.get('summary'),
-        'ai_classification': classification,
-    }
-
-    # Also update scene_type if provided
-    if classification.get('scene_type'):
-        update_data['scene_type'] = classification['scene_type']
-
-    if dry_run:
-        logger.info("DRY RUN - Would update item",
-                   item_id=item_id,
-                   content_type=update_data['content_type'],
-                   educational_value=update_data['educational_value'])
-        return True
-
-    try:
-        supabase.table('application_gallery').update(update_data).eq('id', item_id).execute()
-        return True
-    except Exception as e:
-        logger.error("Failed to update item", item_id=item_id, error=str(e))
-        return False
-
-
 async def reclassify_batch(
     classifier: RSIPClassifier,
-    supabase: Client,
+    db: SupabaseClient,
     items: List[Dict[str, Any]],
     dry_run: bool = False
 ) -> Dict[str, int]:
-    """Re-classify a batch of items"""
+    """Re-classify a batch of items, queueing their updates for bulk writes"""
     stats = {
         'real_application': 0,
         'pilot_poc': 0,
@@ -87,68 +51,84 @@ async def reclassify_batch(
         'errors': 0,
         'updated': 0,
     }
+    updates = []
 
-    for item in items:
-        try:
-            # Prepare item for classification
-            classify_input = {
+    # Classify the whole batch at once; the classifier's rate controller paces
+    # the Gemini requests, and cached items need none. The rules and local
+    # model are skipped: their labels are what makes these rows stale
+    try:
+        classifications = await classifier.classify_batch([
+            {
                 'title': item.get('title', ''),
                 'description': item.get('description', ''),
                 'source_name': item.get('source_name', 'Unknown'),
                 'media_type': item.get('media_type', 'video'),
             }
-
-            # Classify with V2 classifier
-            classification = await classifier.classify(classify_input)
-
-            content_type = classification.get('content_type', 'unknown')
-            stats[content_type] = stats.get(content_type, 0) + 1
-
-            # Update in database
-            if await update_item(supabase, item['id'], classification, dry_run):
-                stats['updated'] += 1
-
-            logger.info("Classified item",
-                       title=item['title'][:50],
-                       content_type=content_type,
-                       educational_value=classification.get('educational_value'),
-                       deployment_maturity=classification.get('deployment_maturity'))
-
-            # Rate limiting - be nice to the API
-            await asyncio.sleep(0.5)
-
-        except Exception as e:
-            logger.error("Classification error", title=item.get('title', '')[:50], error=str(e))
+            for item in items
+        ], local=False)
+    except Exception as e:
+        logger.error("Classification error", items=len(items), error=str(e))
+        stats['errors'] += len(items)
+        return stats
+
+    for item, classification in zip(items, classifications):
+        # Keep the existing classification rather than overwrite it with defaults
+        if classification.get('classification_failed'):
+            logger.warning("Classification unavailable, keeping existing values",
+                          title=item['title'][:50])
             stats['errors'] += 1
-
+            continue
+
+        content_type = classification.get('content_type', 'unknown')
+        stats[content_type] = stats.get(content_type, 0) + 1
+
+        # Queue the update (written in bulk)
+        update_data = classification_fields(classification)
+        if dry_run:
+            logger.info("DRY RUN - Would update item",
+                       item_id=item['id'],
+                       content_type=update_data['content_type'],
+                       educational_value=update_data['educational_value'])
+            stats['updated'] += 1
+        else:
+            updates.append((item['id'], update_data))
+
+        logger.info("Classified item",
+                   title=item['title'][:50],
+                   content_type=content_type,
+                   educational_value=classification.get('educational_value'),
+                   deployment_maturity=classification.get('deployment_maturity'))
+
+    # Full chunks are written now, the rest with the next batch or the final flush
+    stats['updated'] += await db.bulk_update_classifications(updates)
     return stats
 
 
 async def main():
     parser = argparse.ArgumentParser(description='Re-classify gallery items with V2 system')
     parser.add_argument('--dry-run', action='store_true', help='Preview without updating')
+    parser.add_argument('--all', action='store_true', help='Include items labelled by other classifiers or already current')
     parser.add_argument('--limit', type=int, default=None, help='Limit items to process')
     parser.add_argument('--batch-size', type=int, default=10, help='Batch size')
+    parser.add_argument('--page-size', type=int, default=None, help='Rows read per database page')
     args = parser.parse_args()
 
     config = get_config()
 
     # Initialize Supabase
-    supabase = create_client(config.supabase_url, config.supabase_service_key)
+    db = SupabaseClient(config)
 
     # Initialize classifier
     classifier = RSIPClassifier(config)
 
+    version = classifier.version()
     logger.info("Starting V2 re-classification",
+               classifier_version=version,
+               only_stale=not args.all,
                dry_run=args.dry_run,
                limit=args.limit,
                batch_size=args.batch_size)
 
-    # Fetch all items
-    items = await fetch_all_items(supabase, args.limit)
-    total_items = len(items)
-    logger.info(f"Found {total_items} items to re-classify")
-
     # Process in batches
     total_stats = {
         'real_application': 0,
@@ -162,19 +142,30 @@ async def main():
         'updated': 0,
     }
 
-    for i in range(0, total_items, args.batch_size):
-        batch = items[i:i + args.batch_size]
-        logger.info(f"Processing batch {i // args.batch_size + 1}/{(total_items + args.batch_size - 1) // args.batch_size}")
+    # Stream approved items page by page, so memory stays flat however large the
+    # gallery is; the next page is read while this one is classified
+    if args.all:
+        pages = db.stream_gallery_pages(columns=RECLASSIFY_COLUMNS, page_size=args.page_size, limit=args.limit)
+    else:
+        pages = db.stream_stale_items(version, page_size=args.page_size, limit=args.limit)
+
+    total_items = 0
+    with profiling.stage("reclassify"):
+        async for page in pages:
+            for i in range(0, len(page), args.batch_size):
+                batch = page[i:i + args.batch_size]
+                batch_stats = await reclassify_batch(classifier, db, batch, args.dry_run)
 
-        batch_stats = await reclassify_batch(classifier, supabase, batch, args.dry_run)
+                # Aggregate stats
+                for key in total_stats:
+                    total_stats[key] += batch_stats.get(key, 0)
 
-        # Aggregate stats
-        for key in total_stats:
-            total_stats[key] += batch_stats.get(key, 0)
+                # Log progress
+                total_items += len(batch)
+                logger.info(f"Progress: {total_items} items processed")
 
-        # Log progress
-        processed = min(i + args.batch_size, total_items)
-        logger.info(f"Progress: {processed}/{total_items} ({processed * 100 // total_items}%)")
+        # Write the updates still buffered
+        total_stats['updated'] += await db.bulk_update_classifications(flush=True)
 
     # Final report
     print("\n" + "="*60)
@@ -198,10 +189,27 @@ async def main():
     # Quality content summary
     quality_count = total_stats['real_application'] + total_stats['case_study'] + total_stats['pilot_poc']
     demo_count = total_stats['tech_demo'] + total_stats['product_announcement']
+    quality_pct = quality_count * 100 / total_items if total_items > 0 else 0
+    demo_pct = demo_count * 100 / total_items if total_items > 0 else 0
 
     print("\n" + "-"*40)
-    print(f"Quality content (real apps + case studies + pilots): {quality_count} ({quality_count * 100 / total_items:.1f}%)")
-    print(f"Demo/Marketing content: {demo_count} ({demo_count * 100 / total_items:.1f}%)")
+    print(f"Quality content (real apps + case studies + pilots): {quality_count} ({quality_pct:.1f}%)")
+    print(f"Demo/Marketing content: {demo_count} ({demo_pct:.1f}%)")
+
+    gate = classifier.get_gate_report()
+    if gate.get('enabled', True):
+        print(f"Pre-classification rules: {gate['rejected']} rejected, {gate['tagged']} tagged locally, "
+              f"{gate['llm_calls_saved']} Gemini calls saved ({gate['saved_share'] * 100:.1f}% of items)")
+    local = classifier.get_local_model_report()
+    if local.get('enabled', True):
+        print(f"Local classifier: {local['accepted']}/{local['evaluated']} accepted, "
+              f"{local['llm_calls_saved']} Gemini calls saved")
+    cache = classifier.get_cache_report()
+    print(f"Classification cache: {cache['hits']} hits, {cache['coalesced']} coalesced, "
+          f"{cache['misses']} Gemini requests (hit rate {cache['hit_rate'] * 100:.1f}%)")
+    validation = classifier.get_validation_report()
+    print(f"Responses: {validation['parse_failures']}/{validation['responses']} unparseable, "
+          f"validation {validation['microseconds_per_item']} µs/item")
 
     if args.dry_run:
         print("\n⚠️  DRY RUN - No changes were made to the database")
@@ -210,4 +218,4 @@ async def main():
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    profiling.run(main, "reclassify_existing")
@@ -1,11 +1,21 @@
 """
 Reprocess saved SerpAPI raw results from log files.
 This avoids calling the API again - uses cached responses.
+
+Usage:
+    python src/reprocess_serpapi_logs.py [--copy] [--profile]
+
+Options:
+    --copy     Write through a direct Postgres connection with COPY
+               (storage/bulk_loader.py; needs psycopg and DATABASE_URL),
+               for large backfills
+    --profile  Write a profiling report (see processors/profiling.py)
 """
-import asyncio
+import argparse
 import hashlib
 import json
 import sys
+from dataclasses import replace
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 from urllib.parse import urlparse
@@ -14,8 +24,11 @@ from urllib.parse import urlparse
 sys.path.insert(0, str(Path(__file__).parent))
 
 from config import get_config
+from processors import profiling
 from processors.ai_classifier import RSIPClassifier
-from storage.supabase_client import SupabaseClient
+from storage.bulk_loader import PostgresBulkLoader
+from storage.gallery_writer import GalleryWriter, SPOOLED
+from storage.supabase_client import SupabaseClient, UpsertOutcome, INSERTED
 import structlog
 
 # Configure logging
@@ -110,7 +123,13 @@ def parse_image_result(result: Dict, query: str, category_hint: str, config) ->
     }
 
 
-async def reprocess_log_file(filepath: str, config, db: SupabaseClient, classifier: RSIPClassifier) -> Dict:
+async def reprocess_log_file(
+    filepath: str,
+    config,
+    db: SupabaseClient,
+    classifier: RSIPClassifier,
+    writer: GalleryWriter
+) -> Dict:
     """Reprocess a single log file"""
     stats = {"found": 0, "added": 0, "skipped": 0, "failed": 0}
 
@@ -142,17 +161,25 @@ async def reprocess_log_file(filepath: str, config, db: SupabaseClient, classifi
     stats["found"] = len(items)
     logger.info(f"Parsed {len(items)} items from log file")
 
+    # Skip items already in the database
+    existing = await db.find_existing_items(items)
+
     # Process and classify items
     for item in items:
         try:
-            # Check for duplicates
-            if await db.item_exists(item["source_type"], item["external_id"]):
+            if (item["source_type"], item["external_id"]) in existing:
                 stats["skipped"] += 1
                 continue
 
             # Classify with AI
             classification = await classifier.classify(item)
 
+            # Leave unclassified items for the next reprocessing run
+            if classification.get("classification_failed"):
+                stats["failed"] += 1
+                logger.warning("Classification unavailable", title=item.get("title", "")[:50])
+                continue
+
             # Skip if relevance too low
             if classification.get("relevance_score", 0) < config.crawler.min_relevance_score:
                 stats["skipped"] += 1
@@ -173,11 +200,8 @@ async def reprocess_log_file(filepath: str, config, db: SupabaseClient, classifi
                 "crawler_run_id": "reprocess_logs",
                 "status": "pending",
             })
-
-            # Save to database
-            await db.insert_gallery_item(item)
-            stats["added"] += 1
-            logger.info("Added item", title=item.get("title", "")[:50], type=item["media_type"])
+            # Written in the background; counted as added by the writer callback
+            writer.add(item)
 
         except Exception as e:
             stats["failed"] += 1
@@ -187,6 +211,10 @@ async def reprocess_log_file(filepath: str, config, db: SupabaseClient, classifi
 
 
 async def main():
+    parser = argparse.ArgumentParser(description='Reprocess saved SerpAPI results')
+    parser.add_argument('--copy', action='store_true', help='Load through Postgres COPY (needs psycopg and DATABASE_URL)')
+    args = parser.parse_args()
+
     config = get_config()
     db = SupabaseClient(config)
     classifier = RSIPClassifier(config)
@@ -204,15 +232,50 @@ async def main():
 
     total_stats = {"found": 0, "added": 0, "skipped": 0, "failed": 0}
 
-    for log_file in log_files:
-        logger.info(f"Processing: {log_file.name}")
-        stats = await reprocess_log_file(str(log_file), config, db, classifier)
-
-        for key in total_stats:
-            total_stats[key] += stats[key]
+    def item_written(item: Dict[str, Any], outcome: UpsertOutcome):
+        if outcome.outcome == INSERTED:
+            total_stats["added"] += 1
+            logger.info("Added item", title=item.get("title", "")[:50], type=item["media_type"])
+        elif outcome.outcome == SPOOLED:
+            total_stats["failed"] += 1
+        else:
+            total_stats["skipped"] += 1
+
+    if args.copy:
+        # Buffer a full COPY batch before each write
+        loader = PostgresBulkLoader(config)
+        writer = GalleryWriter(
+            loader,
+            storage_config=replace(config.storage, upsert_chunk_size=config.storage.bulk_load_batch_size),
+            on_written=item_written
+        )
+    else:
+        loader = None
+        writer = GalleryWriter(db, on_written=item_written)
+    await writer.replay_spool()
+
+    try:
+        for log_file in log_files:
+            logger.info(f"Processing: {log_file.name}")
+            # One stage per file, so the per-item classify stages nest in it
+            with profiling.stage("reprocess"):
+                stats = await reprocess_log_file(str(log_file), config, db, classifier, writer)
+
+            for key in total_stats:
+                total_stats[key] += stats[key]
+    finally:
+        # Write what is still buffered; anything that fails is spooled
+        await writer.close()
+        if loader:
+            loader.close()
 
     logger.info("Reprocessing complete", **total_stats)
+    logger.info("Pre-classification gate", **classifier.get_gate_report())
+    logger.info("Local classifier", **classifier.get_local_model_report())
+    logger.info("Classification cache", **classifier.get_cache_report())
+    logger.info("Gemini requests", **classifier.get_rate_report())
+    logger.info("Response validation", **classifier.get_validation_report())
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    profiling.run(main, "reprocess_serpapi_logs")
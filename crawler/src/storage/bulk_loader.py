@@ -0,0 +1,231 @@
+"""
+Direct Postgres Bulk Loader for Gallery Items
+
+For backfills (replaying months of archived crawl logs, importing a partner
+dataset) where PostgREST requests are too slow. Each batch is streamed into a
+temporary table with COPY and merged into application_gallery with
+INSERT ... ON CONFLICT (source_type, external_id), one statement per set of
+columns the rows carry, inside one transaction.
+If the merge is rejected (e.g. a row breaks a CHECK constraint), the batch is
+bisected so only the offending rows fail.
+
+Needs psycopg 3 (pip install "psycopg[binary]") and DATABASE_URL, a direct
+connection string for the project's database. The crawler keeps writing
+through SupabaseClient; scripts opt in to this loader.
+"""
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+import structlog
+
+from config import Config, get_config
+from storage.supabase_client import (
+    UpsertOutcome, INSERTED, UPDATED, DUPLICATE, FAILED,
+    MERGE_PRESERVED_FIELDS, conflict_keys, gallery_row,
+)
+
+try:
+    import psycopg
+    from psycopg import sql
+    from psycopg.types.json import Jsonb
+except ImportError:  # Optional dependency (see requirements.txt)
+    psycopg = None
+
+
+logger = structlog.get_logger()
+
+STAGE_TABLE = "gallery_bulk_stage"
+CONFLICT_COLUMNS = ("source_type", "external_id")
+
+
+class PostgresBulkLoader:
+    """Writes gallery items to Postgres with COPY and one merge per batch"""
+
+    def __init__(self, config: Optional[Config] = None, database_url: Optional[str] = None):
+        """
+        Args:
+            config: Crawler config (batch size from storage.bulk_load_batch_size)
+            database_url: Postgres connection string (default: DATABASE_URL)
+
+        Raises:
+            RuntimeError: If psycopg is not installed or no database URL is set
+        """
+        if psycopg is None:
+            raise RuntimeError('Bulk loading needs psycopg: pip install "psycopg[binary]"')
+        self.config = config or get_config()
+        self.database_url = database_url or self.config.database_url
+        if not self.database_url:
+            raise RuntimeError("Bulk loading needs DATABASE_URL (a direct Postgres connection string)")
+        self._conn: Optional["psycopg.Connection"] = None
+        self._jsonb_columns: Set[str] = set()
+        # One connection: batches are loaded one after another
+        self._lock = asyncio.Lock()
+
+    def _connect(self) -> "psycopg.Connection":
+        if self._conn is None or self._conn.closed:
+            self._conn = psycopg.connect(self.database_url)
+            # Dicts and lists bound for JSONB columns are sent as JSON, other lists as arrays
+            with self._conn.transaction(), self._conn.cursor() as cur:
+                cur.execute(
+                    "SELECT column_name FROM information_schema.columns "
+                    "WHERE table_name = 'application_gallery' AND data_type = 'jsonb'"
+                )
+                self._jsonb_columns = {row[0] for row in cur.fetchall()}
+        return self._conn
+
+    def close(self):
+        """Close the database connection"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    async def upsert_gallery_items(
+        self,
+        items: List[Dict[str, Any]],
+        on_conflict: Optional[str] = None,
+        chunk_size: Optional[int] = None
+    ) -> List[UpsertOutcome]:
+        """
+        Insert gallery items in batches, resolving duplicates in the database.
+
+        Same contract as SupabaseClient.upsert_gallery_items. With "merge",
+        moderation and engagement fields are set on new rows but kept on
+        existing ones.
+
+        Args:
+            items: Gallery items including V2 classification
+            on_conflict: "ignore" or "merge" (default: storage.on_conflict)
+            chunk_size: Rows per COPY and merge (default: storage.bulk_load_batch_size)
+
+        Returns:
+            One outcome per item, in order
+        """
+        merge = (on_conflict or self.config.storage.on_conflict) == "merge"
+        chunk_size = chunk_size or self.config.storage.bulk_load_batch_size
+        pending, outcomes = conflict_keys(items)
+
+        keys = list(pending)
+        async with self._lock:
+            for i in range(0, len(keys), chunk_size):
+                batch = keys[i:i + chunk_size]
+                rows = [gallery_row(items[pending[key]]) for key in batch]
+                try:
+                    batch_outcomes = await asyncio.to_thread(self._load_batch, rows, merge)
+                except Exception as e:
+                    logger.error("Bulk load batch failed", rows=len(rows), error=str(e))
+                    batch_outcomes = [UpsertOutcome(FAILED, error=str(e)) for _ in rows]
+                for key, outcome in zip(batch, batch_outcomes):
+                    outcomes[pending[key]] = outcome
+
+        counts: Dict[str, int] = {}
+        for outcome in outcomes:
+            counts[outcome.outcome] = counts.get(outcome.outcome, 0) + 1
+        logger.info("Bulk loaded gallery items", items=len(items), mode="merge" if merge else "ignore", **counts)
+        return outcomes
+
+    def _load_batch(self, rows: List[Dict[str, Any]], merge: bool) -> List[UpsertOutcome]:
+        """COPY one batch into the staging table and merge it (runs on a worker thread)"""
+        conn = self._connect()
+        columns = list(dict.fromkeys(k for row in rows for k in row))
+        column_list = sql.SQL(", ").join(map(sql.Identifier, columns))
+        written: Dict[Tuple[str, str], Tuple[str, bool]] = {}
+        errors: Dict[int, str] = {}
+
+        # Rows leave out fields they have no value for. Merging a missing
+        # column as NULL would overwrite the stored value (or skip the column
+        # default), so each set of columns is merged by its own statement;
+        # rows are staged grouped by column set, each group one range of seq.
+        groups: Dict[frozenset, List[int]] = {}
+        for index, row in enumerate(rows):
+            groups.setdefault(frozenset(row), []).append(index)
+        order = [index for indexes in groups.values() for index in indexes]
+
+        try:
+            with conn.transaction(), conn.cursor() as cur:
+                # Same column types as the gallery, no constraints: those apply in the merge
+                cur.execute(sql.SQL(
+                    "CREATE TEMP TABLE {stage} ON COMMIT DROP AS "
+                    "SELECT 0 AS seq, {columns} FROM application_gallery WITH NO DATA"
+                ).format(stage=sql.Identifier(STAGE_TABLE), columns=column_list))
+
+                with cur.copy(sql.SQL("COPY {stage} (seq, {columns}) FROM STDIN").format(
+                    stage=sql.Identifier(STAGE_TABLE), columns=column_list
+                )) as copy:
+                    for seq, index in enumerate(order):
+                        row = rows[index]
+                        copy.write_row([seq, *(self._adapt(column, row.get(column)) for column in columns)])
+                # Merges select ranges of seq (many small ones when bisecting)
+                cur.execute(sql.SQL("CREATE INDEX ON {stage} (seq)").format(stage=sql.Identifier(STAGE_TABLE)))
+
+                low = 0
+                for shape, indexes in groups.items():
+                    group_columns = [column for column in columns if column in shape]
+                    self._merge_range(cur, self._merge_query(group_columns, merge),
+                                      low, low + len(indexes) - 1, written, errors)
+                    low += len(indexes)
+        except psycopg.Error:
+            if not conn.closed:
+                conn.rollback()
+            raise
+
+        outcomes: List[Optional[UpsertOutcome]] = [None] * len(rows)
+        for seq, index in enumerate(order):
+            row = rows[index]
+            result = written.get((row.get("source_type"), row.get("external_id")))
+            if seq in errors:
+                outcomes[index] = UpsertOutcome(FAILED, error=errors[seq])
+            elif result is None:
+                outcomes[index] = UpsertOutcome(DUPLICATE)
+            else:
+                row_id, inserted = result
+                outcomes[index] = UpsertOutcome(INSERTED if inserted else UPDATED, id=str(row_id))
+        return outcomes
+
+    def _merge_query(self, columns: List[str], merge: bool) -> "sql.Composed":
+        """INSERT ... SELECT of the given columns from the staging table for one range of rows"""
+        column_list = sql.SQL(", ").join(map(sql.Identifier, columns))
+        updated = [column for column in columns
+                   if column not in CONFLICT_COLUMNS and column not in MERGE_PRESERVED_FIELDS]
+        if merge and updated:
+            action = sql.SQL("DO UPDATE SET {}").format(sql.SQL(", ").join(
+                sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(column)) for column in updated
+            ))
+        else:
+            action = sql.SQL("DO NOTHING")
+
+        # xmax is 0 only on rows this statement inserted
+        return sql.SQL(
+            "INSERT INTO application_gallery ({columns}) "
+            "SELECT {columns} FROM {stage} WHERE seq BETWEEN %s AND %s "
+            "ON CONFLICT (source_type, external_id) {action} "
+            "RETURNING source_type, external_id, id, (xmax = 0) AS inserted"
+        ).format(columns=column_list, stage=sql.Identifier(STAGE_TABLE), action=action)
+
+    def _merge_range(
+        self,
+        cur: "psycopg.Cursor",
+        query: "sql.Composed",
+        low: int,
+        high: int,
+        written: Dict[Tuple[str, str], Tuple[str, bool]],
+        errors: Dict[int, str]
+    ):
+        """Merge staged rows low..high, bisecting around rows the database rejects"""
+        try:
+            # Savepoint: a rejected range is undone without losing the rest of the batch
+            with cur.connection.transaction():
+                cur.execute(query, (low, high))
+                for source_type, external_id, row_id, inserted in cur.fetchall():
+                    written[(source_type, external_id)] = (row_id, inserted)
+        except (psycopg.errors.IntegrityError, psycopg.errors.DataError) as e:
+            if low == high:
+                logger.warning("Bulk load rejected row", seq=low, error=str(e).strip())
+                errors[low] = str(e).strip()
+                return
+            middle = (low + high) // 2
+            self._merge_range(cur, query, low, middle, written, errors)
+            self._merge_range(cur, query, middle + 1, high, written, errors)
+
+    def _adapt(self, column: str, value: Any) -> Any:
+        if value is not None and column in self._jsonb_columns:
+            return Jsonb(value)
+        return value
@@ -0,0 +1,246 @@
+"""
+Write-behind Buffer for Gallery Items
+
+Classified items are added to a buffer and upserted in the background, when
+the buffer reaches storage.upsert_chunk_size items or every
+storage.flush_interval_seconds, so crawling and classification never wait on
+the database. Items that cannot be written (Supabase slow or down) are
+appended to a local spool file, one JSON line each and synced to disk, and
+replayed at the start of the next run. Replays are safe to repeat because the
+upsert skips rows that already exist.
+"""
+import asyncio
+import json
+import os
+import uuid
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+import structlog
+
+from config import StorageConfig
+from processors import tracing
+from processors.pipeline_metrics import PipelineMetrics
+from storage.bulk_loader import PostgresBulkLoader
+from storage.supabase_client import SupabaseClient, UpsertOutcome, FAILED
+
+
+logger = structlog.get_logger()
+
+# Outcome reported for items that were spooled instead of written
+SPOOLED = "spooled"
+
+
+class GalleryWriter:
+    """Buffers gallery items and writes them in the background, spooling what fails"""
+
+    def __init__(
+        self,
+        db: Union[SupabaseClient, PostgresBulkLoader],
+        storage_config: Optional[StorageConfig] = None,
+        run_id: str = "",
+        on_written: Optional[Callable[[Dict[str, Any], UpsertOutcome], None]] = None,
+        metrics: Optional[PipelineMetrics] = None
+    ):
+        """
+        Args:
+            db: Database client, or a bulk loader for backfills
+            storage_config: Flush and spool settings (default: the client's config)
+            run_id: Recorded with spooled items
+            on_written: Called with each item and its outcome once it is written
+                        or spooled (outcome SPOOLED)
+            metrics: Flushes are tracked as the "store" stage
+        """
+        self.db = db
+        self.config = storage_config or db.config.storage
+        self.run_id = run_id
+        self.on_written = on_written
+        self.metrics = metrics
+        self.counts: Dict[str, int] = {}
+        self._buffer: List[Dict[str, Any]] = []
+        self._flushes: Set[asyncio.Task] = set()
+        # Suffix of the spool files this writer is replaying: <pid>-<writer>
+        self._claim_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._timer: Optional[asyncio.Task] = None
+
+    def add(self, item: Dict[str, Any]):
+        """Queue an item for writing; never waits on the database"""
+        self._buffer.append(item)
+        if self._timer is None:
+            self._timer = asyncio.create_task(self._flush_periodically())
+        if len(self._buffer) >= self.config.upsert_chunk_size:
+            self._flush_in_background()
+
+    async def close(self):
+        """Write everything still buffered and wait for in-flight flushes"""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if self._buffer:
+            self._flush_in_background()
+        while self._flushes:
+            await asyncio.gather(*self._flushes)
+        if self.counts:
+            logger.info("Gallery writes", **self.counts)
+
+    def _flush_in_background(self):
+        items, self._buffer = self._buffer, []
+        task = asyncio.create_task(self._flush(items))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.config.flush_interval_seconds)
+            if self._buffer:
+                self._flush_in_background()
+
+    async def _flush(self, items: List[Dict[str, Any]]):
+        """Write buffered items and report their outcomes"""
+        with self.metrics.track("store", items=len(items)) if self.metrics else nullcontext(), \
+                tracing.items_span(items, "db.upsert_gallery_items"):
+            outcomes = await self._write(items, [0] * len(items))
+        for item, outcome in zip(items, outcomes):
+            self.counts[outcome.outcome] = self.counts.get(outcome.outcome, 0) + 1
+            if self.on_written:
+                self.on_written(item, outcome)
+
+    async def _write(self, items: List[Dict[str, Any]], attempts: List[int]) -> List[UpsertOutcome]:
+        """Upsert items, spooling the ones that fail (reported as SPOOLED)"""
+        try:
+            outcomes = await self.db.upsert_gallery_items(items)
+        except Exception as e:
+            logger.error("Gallery flush failed", items=len(items), error=str(e))
+            outcomes = [UpsertOutcome(FAILED, error=str(e)) for _ in items]
+
+        failed = [(item, outcome, tries) for item, outcome, tries in zip(items, outcomes, attempts)
+                  if outcome.outcome == FAILED]
+        if failed:
+            self._spool(failed)
+        return [UpsertOutcome(SPOOLED, error=o.error) if o.outcome == FAILED else o for o in outcomes]
+
+    def _spool(self, failed: List[Tuple[Dict[str, Any], UpsertOutcome, int]]):
+        """Append failed items to the spool (or the rejected file once out of attempts)"""
+        retry, rejected = [], []
+        for item, outcome, tries in failed:
+            line = json.dumps({
+                "spooled_at": datetime.utcnow().isoformat(),
+                "run_id": self.run_id,
+                "attempts": tries + 1,
+                "error": outcome.error,
+                # Keys starting with "_" are in-process state (e.g. traces)
+                "item": {k: v for k, v in item.items() if not k.startswith("_")},
+            }, ensure_ascii=False, default=str)
+            (rejected if tries + 1 >= self.config.spool_max_attempts else retry).append(line)
+
+        for path, lines in ((self.config.spool_path, retry), (self._rejected_path(), rejected)):
+            if not lines:
+                continue
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+            except OSError as e:
+                logger.error("Failed to spool gallery items", path=path, items=len(lines), error=str(e))
+                continue
+            if path == self.config.spool_path:
+                logger.warning("Spooled gallery items for the next run", path=path, items=len(lines))
+            else:
+                logger.error("Gallery items rejected after repeated attempts", path=path, items=len(lines))
+
+    def _claim(self, path: str) -> Optional[str]:
+        """
+        Rename a spool file waiting for replay to <file>.claimed-<pid>-<writer>.
+
+        Returns:
+            The claimed path, or None if a writer in a running process holds
+            the file or another writer took it first
+        """
+        base, _, owner = path.partition(".claimed-")
+        pid = owner.split("-", 1)[0]
+        if pid.isdigit() and _process_alive(int(pid)):
+            return None
+
+        claimed = f"{base}.claimed-{self._claim_id}"
+        try:
+            os.replace(path, claimed)
+        except FileNotFoundError:
+            # Taken by a writer replaying at the same time
+            return None
+        return claimed
+
+    def _rejected_path(self) -> str:
+        root, _ = os.path.splitext(self.config.spool_path)
+        return f"{root}.rejected.jsonl"
+
+    async def replay_spool(self) -> Dict[str, int]:
+        """
+        Write items spooled by earlier runs.
+
+        The spool is moved aside first, so items that fail again are appended
+        to a fresh spool. Files left by a replay that was interrupted are
+        picked up as well. Each file is claimed (renamed with this process
+        and writer) before it is read, so runs replaying at the same time
+        never write the same items twice.
+
+        Returns:
+            Count of replayed items by outcome
+        """
+        spool_path = self.config.spool_path
+        directory = os.path.dirname(spool_path) or "."
+        name = os.path.basename(spool_path)
+        if not os.path.isdir(directory):
+            return {}
+
+        if os.path.exists(spool_path):
+            stamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+            os.replace(spool_path, f"{spool_path}.replay-{stamp}-{os.getpid()}")
+        pending = sorted(os.path.join(directory, f) for f in os.listdir(directory)
+                         if f.startswith(f"{name}.replay-"))
+
+        counts: Dict[str, int] = {}
+        for path in pending:
+            claimed = self._claim(path)
+            if claimed is None:
+                continue
+
+            items, attempts = [], []
+            with open(claimed, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+            for line in lines:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Last line of a spool cut off by a crash
+                    logger.warning("Skipping unreadable spool line", path=claimed)
+                    continue
+                items.append(entry["item"])
+                attempts.append(entry.get("attempts", 1))
+
+            for i in range(0, len(items), self.config.upsert_chunk_size):
+                outcomes = await self._write(items[i:i + self.config.upsert_chunk_size],
+                                             attempts[i:i + self.config.upsert_chunk_size])
+                for outcome in outcomes:
+                    counts[outcome.outcome] = counts.get(outcome.outcome, 0) + 1
+            try:
+                os.remove(claimed)
+            except FileNotFoundError:
+                pass
+
+        if counts:
+            logger.info("Replayed gallery spool", **counts)
+        return counts
+
+
+def _process_alive(pid: int) -> bool:
+    """Whether a process with this id is running (spool files it claimed are in use)"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Running under another user
+        return True
+    return True
@@ -2,10 +2,19 @@
 Supabase Client V2 for RSIP Application Gallery
 
 Handles all database operations for the crawler with V2 classification support.
+
+supabase-py's client is synchronous, so requests run on a small dedicated
+thread pool (storage.db_pool_size) and the methods are awaitable without
+blocking the event loop. The client's HTTP session keeps connections open
+between requests.
 """
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 import structlog
+from postgrest.exceptions import APIError
 from supabase import create_client, Client
 
 from config import Config, get_config
@@ -13,6 +22,148 @@ from config import Config, get_config
 
 logger = structlog.get_logger()
 
+# Outcomes of upsert_gallery_items
+INSERTED = "inserted"
+UPDATED = "updated"      # Existing row refreshed (merge)
+DUPLICATE = "duplicate"  # Existing row left as it is (ignore), or repeated in the call
+FAILED = "failed"
+
+# Kept on existing rows when merging: set by moderators and visitors, not the crawler
+MERGE_PRESERVED_FIELDS = ("status", "view_count", "featured")
+
+# external_ids per existence query (keeps the request URL short)
+EXISTS_QUERY_CHUNK = 100
+
+# What a classifier needs from a stored row, plus the current labels
+RECLASSIFY_COLUMNS = (
+    "title", "description", "source_name", "media_type",
+    "content_type", "educational_value",
+)
+
+
+def classification_fields(classification: Dict[str, Any]) -> Dict[str, Any]:
+    """application_gallery columns to update from a V2 classifier result"""
+    data = {
+        "content_type": classification.get("content_type", "unknown"),
+        "deployment_maturity": classification.get("deployment_maturity", "unknown"),
+        "educational_value": classification.get("educational_value", 3),
+        "specific_tasks": classification.get("specific_tasks", []),
+        "application_context": classification.get("application_context", {}),
+        "task_types": classification.get("task_types", []),
+        "functional_requirements": classification.get("functional_requirements", []),
+        "ai_classification": classification,
+        "ai_confidence": classification.get("confidence", {}),
+        "ai_summary": classification.get("summary"),
+    }
+
+    if classification.get("scene_type"):
+        data["scene_type"] = classification["scene_type"]
+
+    if classification.get("application_category"):
+        data["application_category"] = classification["application_category"]
+
+    if classification.get("environment"):
+        data["environment_features"] = classification["environment"]
+        if classification["environment"].get("setting"):
+            data["environment_setting"] = classification["environment"]["setting"]
+
+    if classification.get("classifier_version"):
+        data["classifier_version"] = classification["classifier_version"]
+
+    return data
+
+
+def gallery_row(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Build an application_gallery row from a crawled, classified item"""
+    # Extract V2 classification data
+    classification = item.get("ai_classification", {})
+
+    data = {
+        # Core fields
+        "external_id": item.get("external_id"),
+        "source_type": item.get("source_type"),
+        "source_url": item.get("source_url"),
+        "source_name": item.get("source_name"),
+        "title": item.get("title"),
+        "title_zh": item.get("title_zh"),
+        "description": item.get("description"),
+        "description_zh": item.get("description_zh"),
+        "media_type": item.get("media_type"),
+        "thumbnail_url": item.get("thumbnail_url"),
+        "content_url": item.get("content_url"),
+        "duration_seconds": item.get("duration_seconds"),
+        "published_at": item.get("published_at"),
+
+        # V2 Classification fields
+        "content_type": item.get("content_type") or classification.get("content_type", "unknown"),
+        "deployment_maturity": item.get("deployment_maturity") or classification.get("deployment_maturity", "unknown"),
+        "educational_value": item.get("educational_value") or classification.get("educational_value", 3),
+        "specific_tasks": item.get("specific_tasks") or classification.get("specific_tasks", []),
+        "application_context": item.get("application_context") or classification.get("application_context", {}),
+
+        # Existing classification fields
+        "application_category": item.get("application_category") or classification.get("application_category"),
+        "task_types": item.get("task_types") or classification.get("task_types", []),
+        "functional_requirements": item.get("functional_requirements") or classification.get("functional_requirements", []),
+        "scene_type": item.get("scene_type") or classification.get("scene_type"),
+        "environment_setting": item.get("environment_setting"),
+        "environment_features": item.get("environment_features") or classification.get("environment", {}),
+
+        # Robot info
+        "robot_names": item.get("robot_names", []),
+        "robot_types": item.get("robot_types", []),
+        "manufacturers": item.get("manufacturers", []),
+
+        # AI analysis
+        "ai_classification": classification,
+        "ai_confidence": item.get("ai_confidence") or classification.get("confidence", {}),
+        "ai_summary": item.get("ai_summary") or classification.get("summary"),
+        "ai_summary_zh": item.get("ai_summary_zh"),
+        "classifier_version": item.get("classifier_version") or classification.get("classifier_version"),
+
+        # Status
+        "status": item.get("status", "pending"),
+        "crawler_source": item.get("crawler_source", "automated"),
+        "crawler_run_id": item.get("crawler_run_id"),
+        "view_count": item.get("view_count", 0),
+        "featured": False,
+    }
+
+    # Remove None values
+    return {k: v for k, v in data.items() if v is not None}
+
+
+@dataclass
+class UpsertOutcome:
+    """What happened to one item in upsert_gallery_items"""
+    outcome: str
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+
+def conflict_keys(
+    items: List[Dict[str, Any]]
+) -> Tuple[Dict[Tuple[str, str], int], List[Optional[UpsertOutcome]]]:
+    """
+    Index of the item to write for each (source_type, external_id).
+
+    Returns:
+        (key -> item index, outcomes) where outcomes is already set for
+        items without a key (FAILED) and repeats of an earlier item
+        (DUPLICATE), and None for the items to write
+    """
+    outcomes: List[Optional[UpsertOutcome]] = [None] * len(items)
+    pending: Dict[Tuple[str, str], int] = {}
+    for index, item in enumerate(items):
+        key = (item.get("source_type"), item.get("external_id"))
+        if not all(key):
+            outcomes[index] = UpsertOutcome(FAILED, error="missing source_type or external_id")
+        elif key in pending:
+            outcomes[index] = UpsertOutcome(DUPLICATE)
+        else:
+            pending[key] = index
+    return pending, outcomes
+
 
 class SupabaseClient:
     """Supabase database client for Application Gallery V2"""
@@ -23,15 +174,29 @@ class SupabaseClient:
             self.config.supabase_url,
             self.config.supabase_service_key
         )
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.config.storage.db_pool_size,
+            thread_name_prefix="supabase"
+        )
+        # Buffered for bulk_update_classifications
+        self._classification_updates: List[Dict[str, Any]] = []
+
+    async def _execute(self, query) -> Any:
+        """Run a PostgREST request on the database thread pool"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, query.execute)
+
+    def close(self):
+        """Release the database threads once in-flight requests finish"""
+        self._executor.shutdown(wait=False)
 
     async def item_exists(self, source_type: str, external_id: str) -> bool:
         """Check if an item already exists in the database"""
         try:
-            result = self.client.table("application_gallery").select("id").eq(
+            result = await self._execute(self.client.table("application_gallery").select("id").eq(
                 "source_type", source_type
             ).eq(
                 "external_id", external_id
-            ).execute()
+            ))
 
             return len(result.data) > 0
 
@@ -39,6 +204,39 @@ class SupabaseClient:
             logger.error("Failed to check item existence", error=str(e))
             return False
 
+    async def find_existing_items(self, items: List[Dict[str, Any]]) -> Set[Tuple[str, str]]:
+        """
+        Look up which items are already in the gallery, a few queries per source type.
+
+        Returns:
+            (source_type, external_id) keys found; empty on failure, in which case
+            upsert_gallery_items still skips the duplicates
+        """
+        ids_by_source: Dict[str, List[str]] = {}
+        for item in items:
+            if item.get("source_type") and item.get("external_id"):
+                ids_by_source.setdefault(item["source_type"], []).append(item["external_id"])
+
+        queries = []
+        for source_type, external_ids in ids_by_source.items():
+            unique_ids = list(dict.fromkeys(external_ids))
+            for i in range(0, len(unique_ids), EXISTS_QUERY_CHUNK):
+                queries.append(self._execute(self.client.table("application_gallery").select(
+                    "source_type", "external_id"
+                ).eq(
+                    "source_type", source_type
+                ).in_(
+                    "external_id", unique_ids[i:i + EXISTS_QUERY_CHUNK]
+                )))
+
+        try:
+            results = await asyncio.gather(*queries)
+            return {(row["source_type"], row["external_id"]) for result in results for row in result.data}
+
+        except Exception as e:
+            logger.error("Failed to check existing items", error=str(e))
+            return set()
+
     async def insert_gallery_item(self, item: Dict[str, Any]) -> Optional[str]:
         """
         Insert a new gallery item with V2 classification fields.
@@ -50,64 +248,9 @@ class SupabaseClient:
             ID of inserted item or None on failure
         """
         try:
-            # Extract V2 classification data
-            classification = item.get("ai_classification", {})
-
-            # Prepare data for insert
-            data = {
-                # Core fields
-                "external_id": item.get("external_id"),
-                "source_type": item.get("source_type"),
-                "source_url": item.get("source_url"),
-                "source_name": item.get("source_name"),
-                "title": item.get("title"),
-                "title_zh": item.get("title_zh"),
-                "description": item.get("description"),
-                "description_zh": item.get("description_zh"),
-                "media_type": item.get("media_type"),
-                "thumbnail_url": item.get("thumbnail_url"),
-                "content_url": item.get("content_url"),
-                "duration_seconds": item.get("duration_seconds"),
-                "published_at": item.get("published_at"),
-
-                # V2 Classification fields
-                "content_type": item.get("content_type") or classification.get("content_type", "unknown"),
-                "deployment_maturity": item.get("deployment_maturity") or classification.get("deployment_maturity", "unknown"),
-                "educational_value": item.get("educational_value") or classification.get("educational_value", 3),
-                "specific_tasks": item.get("specific_tasks") or classification.get("specific_tasks", []),
-                "application_context": item.get("application_context") or classification.get("application_context", {}),
-
-                # Existing classification fields
-                "application_category": item.get("application_category") or classification.get("application_category"),
-                "task_types": item.get("task_types") or classification.get("task_types", []),
-                "functional_requirements": item.get("functional_requirements") or classification.get("functional_requirements", []),
-                "scene_type": item.get("scene_type") or classification.get("scene_type"),
-                "environment_setting": item.get("environment_setting"),
-                "environment_features": item.get("environment_features") or classification.get("environment", {}),
-
-                # Robot info
-                "robot_names": item.get("robot_names", []),
-                "robot_types": item.get("robot_types", []),
-                "manufacturers": item.get("manufacturers", []),
-
-                # AI analysis
-                "ai_classification": classification,
-                "ai_confidence": item.get("ai_confidence") or classification.get("confidence", {}),
-                "ai_summary": item.get("ai_summary") or classification.get("summary"),
-                "ai_summary_zh": item.get("ai_summary_zh"),
-
-                # Status
-                "status": item.get("status", "pending"),
-                "crawler_source": item.get("crawler_source", "automated"),
-                "crawler_run_id": item.get("crawler_run_id"),
-                "view_count": item.get("view_count", 0),
-                "featured": False,
-            }
-
-            # Remove None values
-            data = {k: v for k, v in data.items() if v is not None}
+            data = gallery_row(item)
 
-            result = self.client.table("application_gallery").insert(data).execute()
+            result = await self._execute(self.client.table("application_gallery").insert(data))
 
             if result.data:
                 inserted = result.data[0]
@@ -126,6 +269,113 @@ class SupabaseClient:
                         error=str(e))
             return None
 
+    async def upsert_gallery_items(
+        self,
+        items: List[Dict[str, Any]],
+        on_conflict: Optional[str] = None,
+        chunk_size: Optional[int] = None
+    ) -> List[UpsertOutcome]:
+        """
+        Insert gallery items in chunks, resolving duplicates in the database.
+
+        Rows conflicting on (source_type, external_id) are skipped ("ignore") or
+        have their crawled and classification fields refreshed ("merge"; status,
+        moderation and engagement fields are kept). A chunk the database rejects
+        is retried row by row so one bad row does not lose the others.
+
+        Args:
+            items: Gallery items including V2 classification
+            on_conflict: "ignore" or "merge" (default: storage.on_conflict)
+            chunk_size: Rows per request (default: storage.upsert_chunk_size)
+
+        Returns:
+            One outcome per item, in order
+        """
+        merge = (on_conflict or self.config.storage.on_conflict) == "merge"
+        chunk_size = chunk_size or self.config.storage.upsert_chunk_size
+        pending, outcomes = conflict_keys(items)
+
+        # Chunks are sent concurrently, up to the database pool size
+        keys = list(pending)
+        chunks = [{key: pending[key] for key in keys[i:i + chunk_size]}
+                  for i in range(0, len(keys), chunk_size)]
+        for chunk_outcomes in await asyncio.gather(*(self._upsert_or_split(items, chunk, merge) for chunk in chunks)):
+            for index, outcome in chunk_outcomes.items():
+                outcomes[index] = outcome
+
+        counts: Dict[str, int] = {}
+        for outcome in outcomes:
+            counts[outcome.outcome] = counts.get(outcome.outcome, 0) + 1
+        logger.info("Upserted gallery items", items=len(items), mode="merge" if merge else "ignore", **counts)
+        return outcomes
+
+    async def _upsert_or_split(
+        self,
+        items: List[Dict[str, Any]],
+        chunk: Dict[Tuple[str, str], int],
+        merge: bool
+    ) -> Dict[int, UpsertOutcome]:
+        """Upsert one chunk, retrying row by row if the chunk fails"""
+        rows = [gallery_row(items[index]) for index in chunk.values()]
+        if merge:
+            rows = [{k: v for k, v in row.items() if k not in MERGE_PRESERVED_FIELDS} for row in rows]
+        try:
+            return await self._upsert_chunk(chunk, rows, merge)
+        except APIError as e:
+            logger.warning("Gallery upsert chunk failed, retrying row by row",
+                         rows=len(rows),
+                         error=str(e))
+        except Exception as e:
+            # Not a rejected row (e.g. connection error): retrying each row would not help
+            logger.error("Gallery upsert chunk failed", rows=len(rows), error=str(e))
+            return {index: UpsertOutcome(FAILED, error=str(e)) for index in chunk.values()}
+
+        outcomes = {}
+        for (key, index), row in zip(chunk.items(), rows):
+            try:
+                outcomes.update(await self._upsert_chunk({key: index}, [row], merge))
+            except Exception as e:
+                logger.error("Failed to upsert gallery item",
+                            title=(items[index].get("title") or "")[:50],
+                            error=str(e))
+                outcomes[index] = UpsertOutcome(FAILED, error=str(e))
+        return outcomes
+
+    async def _upsert_chunk(
+        self,
+        chunk: Dict[Tuple[str, str], int],
+        rows: List[Dict[str, Any]],
+        merge: bool
+    ) -> Dict[int, UpsertOutcome]:
+        """Upsert one chunk of rows and map the returned rows back to item indexes"""
+        # PostgREST needs the same keys in every object of a bulk request.
+        # Padding rows with nulls would overwrite stored values when merging
+        # (and bypass column defaults), so each set of keys is its own request.
+        groups: Dict[frozenset, List[Dict[str, Any]]] = {}
+        for row in rows:
+            groups.setdefault(frozenset(row), []).append(row)
+
+        # Only rows written come back: new rows when ignoring, all rows when merging
+        written = {}
+        for group in groups.values():
+            result = await self._execute(self.client.table("application_gallery").upsert(
+                group,
+                on_conflict="source_type,external_id",
+                ignore_duplicates=not merge
+            ))
+            written.update({(row["source_type"], row["external_id"]): row for row in result.data or []})
+        outcomes = {}
+        for key, index in chunk.items():
+            row = written.get(key)
+            if row is None:
+                outcomes[index] = UpsertOutcome(DUPLICATE)
+            elif row.get("created_at") != row.get("updated_at"):
+                # gallery_updated_at moves updated_at when an existing row is merged
+                outcomes[index] = UpsertOutcome(UPDATED, id=row.get("id"))
+            else:
+                outcomes[index] = UpsertOutcome(INSERTED, id=row.get("id"))
+        return outcomes
+
     async def update_item_classification(
         self,
         item_id: str,
@@ -134,6 +384,9 @@ class SupabaseClient:
         """
         Update an existing item's classification with V2 fields.
 
+        One request per item; jobs updating many items should use
+        bulk_update_classifications.
+
         Args:
             item_id: ID of the item to update
             classification: New classification data from V2 classifier
@@ -142,31 +395,9 @@ class SupabaseClient:
             True if update succeeded
         """
         try:
-            data = {
-                "content_type": classification.get("content_type", "unknown"),
-                "deployment_maturity": classification.get("deployment_maturity", "unknown"),
-                "educational_value": classification.get("educational_value", 3),
-                "specific_tasks": classification.get("specific_tasks", []),
-                "application_context": classification.get("application_context", {}),
-                "task_types": classification.get("task_types", []),
-                "functional_requirements": classification.get("functional_requirements", []),
-                "ai_classification": classification,
-                "ai_confidence": classification.get("confidence", {}),
-                "ai_summary": classification.get("summary"),
-            }
-
-            if classification.get("scene_type"):
-                data["scene_type"] = classification["scene_type"]
-
-            if classification.get("application_category"):
-                data["application_category"] = classification["application_category"]
+            data = classification_fields(classification)
 
-            if classification.get("environment"):
-                data["environment_features"] = classification["environment"]
-                if classification["environment"].get("setting"):
-                    data["environment_setting"] = classification["environment"]["setting"]
-
-            self.client.table("application_gallery").update(data).eq("id", item_id).execute()
+            await self._execute(self.client.table("application_gallery").update(data).eq("id", item_id))
 
             logger.info("Updated item classification",
                        id=item_id,
@@ -180,6 +411,51 @@ class SupabaseClient:
                         error=str(e))
             return False
 
+    async def bulk_update_classifications(
+        self,
+        updates: Iterable[Tuple[str, Dict[str, Any]]] = (),
+        flush: bool = False
+    ) -> int:
+        """
+        Queue classification updates and apply them in bulk.
+
+        Updates are buffered and sent through the bulk_update_gallery_classifications
+        database function, storage.upsert_chunk_size rows per request. Full chunks
+        are sent as soon as they fill; call with flush=True at the end to send
+        the rest.
+
+        Args:
+            updates: (item id, fields) pairs; fields are classification columns,
+                     e.g. from classification_fields() (other keys are ignored)
+            flush: Also send a partly filled chunk
+
+        Returns:
+            Rows updated by the requests this call sent
+        """
+        self._classification_updates.extend(
+            {"id": item_id, "fields": fields} for item_id, fields in updates
+        )
+        chunk_size = self.config.storage.upsert_chunk_size
+        chunks = []
+        while len(self._classification_updates) >= chunk_size or (flush and self._classification_updates):
+            chunks.append(self._classification_updates[:chunk_size])
+            del self._classification_updates[:chunk_size]
+
+        updated = await asyncio.gather(*(self._apply_classification_updates(chunk) for chunk in chunks))
+        return sum(updated)
+
+    async def _apply_classification_updates(self, chunk: List[Dict[str, Any]]) -> int:
+        try:
+            result = await self._execute(self.client.rpc(
+                "bulk_update_gallery_classifications", {"p_updates": chunk}
+            ))
+            logger.info("Applied classification updates", rows=len(chunk), updated=result.data)
+            return result.data or 0
+
+        except Exception as e:
+            logger.error("Failed to apply classification updates", rows=len(chunk), error=str(e))
+            return 0
+
     async def start_crawler_run(self, run_id: str, crawler_type: str) -> bool:
         """Record the start of a crawler run"""
         try:
@@ -190,7 +466,7 @@ class SupabaseClient:
                 "started_at": datetime.utcnow().isoformat(),
             }
 
-            self.client.table("gallery_crawler_runs").insert(data).execute()
+            await self._execute(self.client.table("gallery_crawler_runs").insert(data))
             logger.info("Started crawler run", run_id=run_id, type=crawler_type)
             return True
 
@@ -203,9 +479,10 @@ class SupabaseClient:
         run_id: str,
         status: str,
         stats: Dict[str, int],
-        error: Optional[str] = None
+        error: Optional[str] = None,
+        metrics: Optional[Dict[str, Any]] = None
     ) -> bool:
-        """Record completion of a crawler run"""
+        """Record completion of a crawler run, with its per-stage metrics summary"""
         try:
             data = {
                 "status": status,
@@ -218,10 +495,12 @@ class SupabaseClient:
 
             if error:
                 data["error_message"] = error
+            if metrics is not None:
+                data["metrics"] = metrics
 
-            self.client.table("gallery_crawler_runs").update(data).eq(
+            await self._execute(self.client.table("gallery_crawler_runs").update(data).eq(
                 "run_id", run_id
-            ).execute()
+            ))
 
             logger.info("Completed crawler run",
                        run_id=run_id,
@@ -233,14 +512,42 @@ class SupabaseClient:
             logger.error("Failed to complete crawler run", error=str(e))
             return False
 
+    async def record_run_usage(
+        self,
+        run_id: str,
+        rows: List[Dict[str, Any]],
+        summary: Dict[str, Any]
+    ) -> bool:
+        """Store a run's API usage ledger and its cost summary"""
+        try:
+            if rows:
+                await self._execute(self.client.table("gallery_crawler_run_usage").upsert(
+                    rows, on_conflict="run_id,provider,source"
+                ))
+
+            await self._execute(self.client.table("gallery_crawler_runs").update({
+                "usage": summary,
+                "estimated_cost_usd": summary.get("estimated_cost_usd"),
+            }).eq("run_id", run_id))
+
+            logger.info("Recorded crawler run usage",
+                       run_id=run_id,
+                       entries=len(rows),
+                       estimated_cost_usd=summary.get("estimated_cost_usd"))
+            return True
+
+        except Exception as e:
+            logger.error("Failed to record crawler run usage", run_id=run_id, error=str(e))
+            return False
+
     async def get_pending_items(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get pending items for moderation"""
         try:
-            result = self.client.table("application_gallery").select("*").eq(
+            result = await self._execute(self.client.table("application_gallery").select("*").eq(
                 "status", "pending"
             ).order(
                 "created_at", desc=True
-            ).limit(limit).execute()
+            ).limit(limit))
 
             return result.data
 
@@ -270,9 +577,9 @@ class SupabaseClient:
             if rejection_reason:
                 data["rejection_reason"] = rejection_reason
 
-            self.client.table("application_gallery").update(data).eq(
+            await self._execute(self.client.table("application_gallery").update(data).eq(
                 "id", item_id
-            ).execute()
+            ))
 
             logger.info("Updated item status", id=item_id, status=status)
             return True
@@ -282,65 +589,177 @@ class SupabaseClient:
             return False
 
     async def get_gallery_stats(self) -> Dict[str, Any]:
-        """Get gallery statistics including V2 content type breakdown"""
+        """
+        Get gallery statistics including V2 content type breakdown.
+
+        All counts come from one get_gallery_stats() call (counters kept by
+        triggers, see migration 097).
+        """
         try:
-            # Count by status
-            approved = self.client.table("application_gallery").select(
-                "id", count="exact"
-            ).eq("status", "approved").execute()
-
-            pending = self.client.table("application_gallery").select(
-                "id", count="exact"
-            ).eq("status", "pending").execute()
-
-            # V2: Count by content type
-            content_type_stats = {}
-            for ct in ["real_application", "pilot_poc", "case_study", "tech_demo",
-                       "product_announcement", "tutorial", "unknown"]:
-                try:
-                    result = self.client.table("application_gallery").select(
-                        "id", count="exact"
-                    ).eq("status", "approved").eq("content_type", ct).execute()
-                    content_type_stats[ct] = result.count or 0
-                except:
-                    content_type_stats[ct] = 0
-
-            # V2: Count quality content
-            quality_result = self.client.table("application_gallery").select(
-                "id", count="exact"
-            ).eq("status", "approved").in_(
-                "content_type", ["real_application", "case_study", "pilot_poc"]
-            ).gte("educational_value", 3).execute()
+            result = await self._execute(self.client.rpc("get_gallery_stats", {}))
+
+            status_counts: Dict[str, int] = {}
+            category_stats: Dict[str, int] = {}
+            content_type_stats = {ct: 0 for ct in [
+                "real_application", "pilot_poc", "case_study", "tech_demo",
+                "product_announcement", "tutorial", "interview_comment", "unknown"
+            ]}
+            quality = 0
+            for row in result.data or []:
+                count = row["item_count"]
+                status_counts[row["status"]] = status_counts.get(row["status"], 0) + count
+                if row["status"] != "approved":
+                    continue
+                category = row["application_category"]
+                category_stats[category] = category_stats.get(category, 0) + count
+                content_type_stats[row["content_type"]] = content_type_stats.get(row["content_type"], 0) + count
+                if row["is_quality"]:
+                    quality += count
 
             return {
-                "approved_count": approved.count or 0,
-                "pending_count": pending.count or 0,
+                "approved_count": status_counts.get("approved", 0),
+                "pending_count": status_counts.get("pending", 0),
+                "status_counts": status_counts,
+                "category_stats": category_stats,
                 "content_type_stats": content_type_stats,
-                "quality_content_count": quality_result.count or 0,
+                "quality_content_count": quality,
             }
 
         except Exception as e:
             logger.error("Failed to get gallery stats", error=str(e))
             return {}
 
-    async def get_items_for_reclassification(
+    async def stream_gallery_pages(
         self,
-        limit: int = 100,
-        offset: int = 0
-    ) -> List[Dict[str, Any]]:
-        """Get approved items for V2 re-classification"""
+        columns: Sequence[str] = ("id",),
+        status: Optional[str] = "approved",
+        where: Optional[Callable[[Any], Any]] = None,
+        page_size: Optional[int] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[str, str]] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Stream gallery rows in (created_at, id) order, one page at a time.
+
+        Pages are read by keyset rather than OFFSET, so every page costs the
+        same however deep the scan is, and only the requested columns are
+        fetched. The next page is requested while the caller works on the
+        current one; at most two pages are held in memory.
+
+        Args:
+            columns: Columns to fetch (created_at and id are always included)
+            status: Only rows with this status (None for all rows)
+            where: Extra filters, e.g. lambda q: q.neq("content_type", "unknown")
+            page_size: Rows per page (default: storage.scan_page_size)
+            limit: Stop after this many rows
+            after: (created_at, id) of the last row already processed
+
+        Yields:
+            Lists of rows; the scan ends early (logged) if a page cannot be read
+        """
+        page_size = page_size or self.config.storage.scan_page_size
+        projection = list(dict.fromkeys(["id", "created_at", *columns]))
+
+        def page_query(cursor: Optional[Tuple[str, str]], size: int):
+            query = self.client.table("application_gallery").select(",".join(projection))
+            if status:
+                query = query.eq("status", status)
+            if where:
+                query = where(query)
+            if cursor:
+                created_at, row_id = cursor
+                query = query.or_(
+                    f'created_at.gt."{created_at}",'
+                    f'and(created_at.eq."{created_at}",id.gt.{row_id})'
+                )
+            return query.order("created_at").order("id").limit(size)
+
+        def fetch(cursor: Optional[Tuple[str, str]], remaining: Optional[int]) -> asyncio.Future:
+            size = min(page_size, remaining) if remaining is not None else page_size
+            return asyncio.ensure_future(self._execute(page_query(cursor, size)))
+
+        remaining = limit
+        cursor = after
+        next_page = fetch(cursor, remaining)
         try:
-            result = self.client.table("application_gallery").select(
-                "id", "title", "description", "source_name", "media_type",
-                "content_type", "educational_value"
-            ).eq(
-                "status", "approved"
-            ).order(
-                "created_at", desc=False
-            ).range(offset, offset + limit - 1).execute()
+            while next_page is not None:
+                try:
+                    rows = (await next_page).data
+                except Exception as e:
+                    logger.error("Failed to read gallery page", after=cursor, error=str(e))
+                    return
+
+                if remaining is not None:
+                    remaining -= len(rows)
+                next_page = None
+                if len(rows) == page_size and remaining != 0:
+                    cursor = (rows[-1]["created_at"], rows[-1]["id"])
+                    next_page = fetch(cursor, remaining)
+                if rows:
+                    yield rows
+        finally:
+            # Caller stopped early: drop the prefetched page
+            if next_page is not None and not next_page.done():
+                next_page.cancel()
+
+    def stream_stale_items(
+        self,
+        version: str,
+        columns: Sequence[str] = RECLASSIFY_COLUMNS,
+        page_size: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Stream approved rows not yet classified by this classifier version.
 
-            return result.data
+        Stale rows are unversioned ones, those the pre-classification rules
+        or the local model labelled (rules/*, local/*; Gemini never saw them),
+        and those labelled by another version of the same prompt variant. Rows
+        another variant labelled belong to that variant's jobs, so two jobs
+        cannot keep relabelling each other's rows. Jobs classify with Gemini
+        only (RSIPClassifier.classify_batch with local=False), so a row they
+        label is not selected again.
 
-        except Exception as e:
-            logger.error("Failed to get items for reclassification", error=str(e))
-            return []
+        Rows leave the selection as their updates are written, so a job that
+        is stopped and restarted carries on with the rows it had not reached
+        (plus any whose updates were still buffered) instead of starting over.
+
+        Args:
+            version: Current classifier version (RSIPClassifier.version)
+            columns: Columns to fetch
+            page_size: Rows per page (default: storage.scan_page_size)
+            limit: Stop after this many rows
+
+        Yields:
+            Lists of rows, as stream_gallery_pages
+        """
+        variant = version.split("/", 1)[0]
+        # Two ranges instead of neq, so idx_gallery_status_classifier_version
+        # can serve the filter once most rows are current
+        return self.stream_gallery_pages(
+            columns=columns,
+            where=lambda q: q.or_(
+                f'classifier_version.is.null,'
+                f'classifier_version.like."rules/*",'
+                f'classifier_version.like."local/*",'
+                f'and(classifier_version.like."{variant}/*",'
+                f'or(classifier_version.lt."{version}",classifier_version.gt."{version}"))'
+            ),
+            page_size=page_size,
+            limit=limit
+        )
+
+    async def get_items_for_reclassification(
+        self,
+        limit: int = 100,
+        after: Optional[Tuple[str, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Get approved items for V2 re-classification, oldest first"""
+        items = []
+        async for page in self.stream_gallery_pages(
+            columns=RECLASSIFY_COLUMNS,
+            limit=limit,
+            after=after
+        ):
+            items.extend(page)
+        return items
@@ -0,0 +1,164 @@
+"""
+Train the Local Classifier on Labelled Gallery Rows
+
+Fits the hashed n-gram model in processors/local_model.py on approved
+application_gallery rows (labelled by Gemini and moderators), reports agreement
+with those labels on a holdout set, and saves the model for RSIPClassifier
+(classifier.local_model_path in config/sources.yaml).
+
+Usage:
+    python src/train_local_classifier.py [--holdout 0.2] [--epochs 5] [--threshold 0.9]
+
+Options:
+    --holdout F     Share of rows held out for evaluation (default: 0.2)
+    --epochs N      Training passes over the data (default: 5)
+    --threshold F   Confidence threshold to evaluate (default: classifier.local_model_threshold)
+    --output PATH   Where to save the model (default: classifier.local_model_path)
+    --profile       Write a profiling report (see processors/profiling.py)
+"""
+import argparse
+import random
+import time
+from typing import Any, Dict, List
+import structlog
+from config import get_config
+from processors import profiling
+from processors.local_model import LocalClassifier
+from processors.prompts import PromptBuilder, estimate_tokens
+from storage.supabase_client import SupabaseClient
+
+logger = structlog.get_logger()
+
+TRAINING_COLUMNS = (
+    'title', 'description', 'source_name', 'media_type', 'content_type',
+    'application_category', 'scene_type', 'specific_tasks', 'educational_value', 'moderated_by',
+)
+
+
+async def fetch_labelled_rows(db: SupabaseClient) -> List[Dict[str, Any]]:
+    """Fetch approved rows that carry a content_type label"""
+    rows = []
+    async for page in db.stream_gallery_pages(
+        columns=TRAINING_COLUMNS,
+        where=lambda query: query.neq('content_type', 'unknown')
+    ):
+        rows.extend(page)
+    return rows
+
+
+def evaluate(model: LocalClassifier, rows: List[Dict[str, Any]], threshold: float) -> Dict[str, Any]:
+    """Agreement with the stored labels, overall and for confidently predicted rows"""
+    heads = ('content_type', 'application_category', 'scene_type', 'educational_value')
+    agree = {head: 0 for head in heads}
+    accepted = 0
+    accepted_agree = {head: 0 for head in heads}
+
+    started = time.perf_counter()
+    for row in rows:
+        prediction, confidence = model.predict(row)
+        expected = LocalClassifier.labels_for(row)
+        predicted = {
+            'content_type': prediction['content_type'],
+            'application_category': prediction['application_category'],
+            'scene_type': prediction['scene_type'] or 'none',
+            'educational_value': str(prediction['educational_value']),
+        }
+        is_accepted = confidence >= threshold
+        accepted += is_accepted
+        for head in heads:
+            if predicted[head] == expected[head][0]:
+                agree[head] += 1
+                accepted_agree[head] += is_accepted
+    elapsed = time.perf_counter() - started
+
+    total = len(rows) or 1
+    return {
+        'rows': len(rows),
+        'agreement': {head: round(agree[head] / total, 3) for head in heads},
+        'accepted': accepted,
+        'coverage': round(accepted / total, 3),
+        'accepted_agreement': {
+            head: round(accepted_agree[head] / accepted, 3) if accepted else 0.0
+            for head in heads
+        },
+        'latency_ms_per_item': round(elapsed * 1000 / total, 3),
+    }
+
+
+def print_report(title: str, report: Dict[str, Any]):
+    print(f"\n{title} ({report['rows']} rows)")
+    print("-"*60)
+    for head, value in report['agreement'].items():
+        accepted_value = report['accepted_agreement'][head]
+        print(f"  {head:22} all: {value * 100:5.1f}%   accepted: {accepted_value * 100:5.1f}%")
+    print(f"  Accepted at threshold: {report['accepted']} ({report['coverage'] * 100:.1f}%)")
+    print(f"  Local latency: {report['latency_ms_per_item']:.3f} ms/item")
+
+
+async def main():
+    config = get_config()
+
+    parser = argparse.ArgumentParser(description='Train the local gallery classifier')
+    parser.add_argument('--holdout', type=float, default=0.2, help='Holdout share')
+    parser.add_argument('--epochs', type=int, default=5, help='Training epochs')
+    parser.add_argument('--threshold', type=float, default=config.classifier.local_model_threshold,
+                        help='Confidence threshold to evaluate')
+    parser.add_argument('--output', default=config.classifier.local_model_path, help='Model output path')
+    args = parser.parse_args()
+
+    with profiling.stage("fetch"):
+        rows = await fetch_labelled_rows(SupabaseClient(config))
+    if len(rows) < 50:
+        logger.error("Not enough labelled rows to train", rows=len(rows))
+        return
+
+    random.Random(7).shuffle(rows)
+    split = int(len(rows) * (1 - args.holdout))
+    train_rows, holdout_rows = rows[:split], rows[split:]
+    logger.info("Training local classifier", train=len(train_rows), holdout=len(holdout_rows))
+
+    model = LocalClassifier()
+    started = time.perf_counter()
+    with profiling.stage("train"):
+        model.fit(train_rows, epochs=args.epochs)
+    training_seconds = time.perf_counter() - started
+
+    overall = evaluate(model, holdout_rows, args.threshold)
+    # Rows nobody moderated still carry Gemini's labels
+    gemini_rows = [row for row in holdout_rows if not row.get('moderated_by')]
+    gemini = evaluate(model, gemini_rows, args.threshold)
+
+    # Rough Gemini input cost of the rows the model would have handled
+    prompts = PromptBuilder(config.classifier.title_token_budget, config.classifier.description_token_budget)
+    instruction_tokens = estimate_tokens(prompts.system_instruction)
+    prompt_tokens = instruction_tokens + sum(
+        estimate_tokens(prompts.single(row)) for row in holdout_rows
+    ) / max(1, len(holdout_rows))
+
+    model.metadata = {
+        'train_rows': len(train_rows),
+        'holdout': overall,
+        'holdout_gemini_labelled': gemini,
+        'threshold': args.threshold,
+        'training_seconds': round(training_seconds, 1),
+    }
+    model.save(args.output)
+
+    print("\n" + "="*60)
+    print("LOCAL CLASSIFIER TRAINING COMPLETE")
+    print("="*60)
+    print(f"Train rows: {len(train_rows)}   Holdout rows: {len(holdout_rows)}   "
+          f"Training time: {training_seconds:.1f}s")
+    print_report("Holdout agreement with stored labels", overall)
+    print_report("Holdout agreement with Gemini labels (unmoderated rows)", gemini)
+
+    print("\nEstimated savings at this threshold")
+    print("-"*60)
+    print(f"  Gemini calls avoided: {overall['coverage'] * 100:.1f}% of items")
+    print(f"  Input tokens avoided: ~{overall['coverage'] * prompt_tokens:.0f} per item "
+          f"(single-item prompt ~{prompt_tokens:.0f} tokens)")
+    print(f"\nModel saved to: {args.output}")
+
+
+if __name__ == '__main__':
+    profiling.run(main, "train_local_classifier")
@@ -0,0 +1,182 @@
+"""
+Shared fixtures for crawler tests
+
+Modules under crawler/src use flat imports (from config import ...), as when
+run from that directory, so it is put on the import path here.
+"""
+import asyncio
+import re
+import sys
+from dataclasses import replace
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from config import Config  # noqa: E402
+
+
+def _split(filters: str) -> List[str]:
+    """Top-level comma-separated terms of a PostgREST logic filter"""
+    terms, depth, quoted, start = [], 0, False, 0
+    for index, char in enumerate(filters):
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            terms.append(filters[start:index])
+            start = index + 1
+    terms.append(filters[start:])
+    return terms
+
+
+def _matches(row: Dict[str, Any], term: str) -> bool:
+    """Evaluate one PostgREST filter term (the operators the client uses)"""
+    logic = re.fullmatch(r"(and|or)\((.*)\)", term)
+    if logic:
+        results = [_matches(row, part) for part in _split(logic.group(2))]
+        return all(results) if logic.group(1) == "and" else any(results)
+
+    column, op, value = term.split(".", 2)
+    value = value.strip('"')
+    actual = row.get(column)
+    if op == "is":
+        return actual is None
+    if actual is None:
+        return False
+    if op == "eq":
+        return str(actual) == value
+    if op == "neq":
+        return str(actual) != value
+    if op == "lt":
+        return str(actual) < value
+    if op == "gt":
+        return str(actual) > value
+    if op == "like":
+        return re.fullmatch(re.escape(value).replace(r"\*", ".*"), str(actual)) is not None
+    raise AssertionError(f"unsupported operator {op}")
+
+
+class FakeQuery:
+    """The part of the PostgREST query builder stream_gallery_pages uses, over a list of rows"""
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.rows = rows
+        self.filters: List[str] = []
+        self.orders: List[str] = []
+        self.size = None
+
+    def select(self, columns):
+        self.columns = columns.split(",")
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(f"{column}.eq.{value}")
+        return self
+
+    def neq(self, column, value):
+        self.filters.append(f"{column}.neq.{value}")
+        return self
+
+    def or_(self, filters):
+        self.filters.append(f"or({filters})")
+        return self
+
+    def order(self, column):
+        self.orders.append(column)
+        return self
+
+    def limit(self, size):
+        self.size = size
+        return self
+
+    def execute(self):
+        rows = [row for row in self.rows if all(_matches(row, term) for term in self.filters)]
+        rows.sort(key=lambda row: tuple(row[column] for column in self.orders))
+        return SimpleNamespace(data=[
+            {column: row.get(column) for column in self.columns} for row in rows[:self.size]
+        ])
+
+
+class ScriptedModel:
+    """Stands in for a Gemini model, answering each request with the next scripted text
+
+    A scripted exception is raised instead, as a failed request would.
+    """
+
+    def __init__(self, responses: List[str], delay: float = 0.0):
+        self.responses = list(responses)
+        self.prompts: List[str] = []
+        # Seconds each request takes, so concurrent callers overlap
+        self.delay = delay
+
+    async def generate_content_async(self, prompt, generation_config=None):
+        self.prompts.append(prompt)
+        await asyncio.sleep(self.delay)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return SimpleNamespace(text=response, usage_metadata=None)
+
+
+@pytest.fixture
+def config(tmp_path) -> Config:
+    """Crawler config with the classification cache in a temporary directory"""
+    config = Config()
+    config.classifier = replace(
+        config.classifier,
+        cache_path=str(tmp_path / "classifications.sqlite3"),
+        local_model_enabled=False,
+        context_cache_enabled=False,
+    )
+    config.pre_classification = replace(config.pre_classification, enabled=False)
+    return config
+
+
+@pytest.fixture
+def classifier_with(config):
+    """Build an RSIPClassifier whose default prompt variant answers with scripted responses"""
+    from processors.ai_classifier import RSIPClassifier
+
+    def build(responses: List[str]):
+        classifier = RSIPClassifier(config)
+        prompts, _ = classifier._prompt("default")
+        model = ScriptedModel(responses)
+        classifier._prompts["default"] = (prompts, model)
+        return classifier, model
+
+    return build
+
+
+@pytest.fixture
+def gallery_client(config):
+    """Build a SupabaseClient that reads application_gallery from a list of rows
+
+    The client's queries attribute lists the queries it ran, in order.
+    """
+    from storage.supabase_client import SupabaseClient
+
+    def build(rows: List[Dict[str, Any]]) -> SupabaseClient:
+        db = SupabaseClient.__new__(SupabaseClient)
+        db.config = config
+        db.queries = []
+
+        def table(name):
+            db.queries.append(FakeQuery(rows))
+            return db.queries[-1]
+
+        db.client = SimpleNamespace(table=table)
+
+        async def execute(query):
+            return query.execute()
+
+        db._execute = execute
+        return db
+
+    return build
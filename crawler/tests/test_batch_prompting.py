@@ -0,0 +1,79 @@
+"""
+Tests for classifying several items per Gemini call
+
+A batch response is matched to its items by index. A response that cannot be
+used is split and retried in halves; items a response leaves out are retried
+on their own.
+"""
+import json
+from dataclasses import replace
+from typing import Any, Dict, List
+
+import pytest
+
+
+RESULT = {
+    "content_type": "real_application",
+    "deployment_maturity": "production",
+    "application_category": "industrial_automation",
+    "specific_tasks": ["case_palletizing"],
+    "educational_value": 4,
+    "relevance_score": 0.9,
+}
+
+
+def items(count: int) -> List[Dict[str, Any]]:
+    return [
+        {"title": f"Cobots palletize cartons, line {index}", "description": "", "media_type": "video"}
+        for index in range(count)
+    ]
+
+
+def answer(*indexes: int) -> str:
+    """Batch response classifying the given item indexes"""
+    return json.dumps([{**RESULT, "index": index, "summary": f"Line {index}"} for index in indexes])
+
+
+def single(index: int) -> str:
+    return json.dumps({**RESULT, "summary": f"Line {index}"})
+
+
+@pytest.fixture
+def config(config):
+    """Two items per Gemini call"""
+    config.classifier = replace(config.classifier, batch_size=2)
+    return config
+
+
+@pytest.mark.asyncio
+async def test_each_batch_is_one_call_answered_by_index(classifier_with):
+    classifier, model = classifier_with([answer(1, 0), answer(0, 1)])
+
+    results = await classifier.classify_batch(items(4))
+
+    assert len(model.prompts) == 2
+    assert [result["summary"] for result in results] == ["Line 0", "Line 1", "Line 0", "Line 1"]
+    assert classifier.get_usage_report()[2]["calls"] == 2
+    assert classifier.get_usage_report()[2]["items"] == 4
+
+
+@pytest.mark.asyncio
+async def test_unusable_batch_response_is_split_and_retried(classifier_with):
+    classifier, model = classifier_with(["Sorry, I cannot help with that.", single(0), single(1)])
+
+    results = await classifier.classify_batch(items(2))
+
+    assert len(model.prompts) == 3
+    assert [result["summary"] for result in results] == ["Line 0", "Line 1"]
+    assert not any(result.get("classification_failed") for result in results)
+
+
+@pytest.mark.asyncio
+async def test_items_missing_from_the_response_are_retried_alone(classifier_with):
+    classifier, model = classifier_with([answer(0, 2), single(1)])
+
+    results = await classifier.classify_batch(items(3), batch_size=3)
+
+    assert len(model.prompts) == 2
+    assert "line 1" in model.prompts[1] and "line 0" not in model.prompts[1]
+    assert [result["summary"] for result in results] == ["Line 0", "Line 1", "Line 2"]
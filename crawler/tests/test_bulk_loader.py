@@ -0,0 +1,91 @@
+"""
+Tests for bisecting bulk-load merges around rows the database rejects
+
+A rejected merge is retried on each half of its range, so one bad row fails
+alone and the rest of the batch is still written.
+"""
+from contextlib import nullcontext
+from types import SimpleNamespace
+from typing import List, Set, Tuple
+
+import pytest
+
+psycopg = pytest.importorskip("psycopg")
+
+from storage.bulk_loader import PostgresBulkLoader  # noqa: E402
+
+
+class FakeMergeCursor:
+    """Cursor whose merge of staged rows low..high fails if the range holds a rejected row"""
+
+    def __init__(self, rejected: Set[int], error=psycopg.errors.CheckViolation):
+        self.rejected = rejected
+        self.error = error
+        self.ranges: List[Tuple[int, int]] = []
+        self.connection = SimpleNamespace(transaction=nullcontext)
+        self._rows = []
+
+    def execute(self, query, params):
+        low, high = params
+        self.ranges.append((low, high))
+        bad = [seq for seq in range(low, high + 1) if seq in self.rejected]
+        if bad:
+            raise self.error(f"row {bad[0]} violates check constraint")
+        self._rows = [("youtube", f"v{seq}", f"id-{seq}", True) for seq in range(low, high + 1)]
+
+    def fetchall(self):
+        return self._rows
+
+
+def merge(cur: FakeMergeCursor, rows: int):
+    loader = PostgresBulkLoader.__new__(PostgresBulkLoader)
+    written, errors = {}, {}
+    loader._merge_range(cur, "merge", 0, rows - 1, written, errors)
+    return written, errors
+
+
+def test_clean_range_is_merged_by_one_statement():
+    cur = FakeMergeCursor(rejected=set())
+
+    written, errors = merge(cur, 8)
+
+    assert cur.ranges == [(0, 7)]
+    assert len(written) == 8 and errors == {}
+
+
+def test_rejected_rows_fail_alone():
+    cur = FakeMergeCursor(rejected={2, 5})
+
+    written, errors = merge(cur, 8)
+
+    assert sorted(errors) == [2, 5]
+    assert "violates check constraint" in errors[2]
+    assert sorted(external_id for _, external_id in written) == ["v0", "v1", "v3", "v4", "v6", "v7"]
+    assert written[("youtube", "v0")] == ("id-0", True)
+
+
+def test_bisection_needs_fewer_statements_than_rows():
+    cur = FakeMergeCursor(rejected={13})
+
+    written, errors = merge(cur, 64)
+
+    assert list(errors) == [13]
+    assert len(written) == 63
+    # One failing statement per halving down to the bad row, plus its clean siblings
+    assert len(cur.ranges) == 13
+
+
+def test_data_errors_are_bisected_too():
+    cur = FakeMergeCursor(rejected={0}, error=psycopg.errors.InvalidTextRepresentation)
+
+    written, errors = merge(cur, 2)
+
+    assert list(errors) == [0]
+    assert list(written) == [("youtube", "v1")]
+
+
+def test_other_database_errors_fail_the_batch():
+    cur = FakeMergeCursor(rejected={1}, error=psycopg.errors.AdminShutdown)
+
+    with pytest.raises(psycopg.errors.AdminShutdown):
+        merge(cur, 4)
@@ -0,0 +1,131 @@
+"""
+Tests for the classification cache and in-flight request coalescing
+
+Cache keys must not change between runs (a changed key silently drops every
+cached result), and identical items - in one call or in concurrent calls -
+must share a single Gemini request.
+"""
+import asyncio
+import json
+
+import pytest
+
+from processors.classification_cache import ClassificationCache
+
+
+ITEM = {"title": "Cobots palletize cartons", "description": "At a brewery", "media_type": "video"}
+
+RESULT = {
+    "content_type": "real_application",
+    "deployment_maturity": "production",
+    "application_category": "industrial_automation",
+    "specific_tasks": ["case_palletizing"],
+    "educational_value": 4,
+    "summary": "Cobots palletizing in production",
+    "relevance_score": 0.9,
+}
+
+
+class TestCacheKey:
+    def test_key_is_stable_across_runs(self):
+        # Changing this value invalidates every cache in use
+        assert ClassificationCache.make_key("v2-abc", "gemini-2.0-flash", ITEM) == (
+            "34f3b5ef5535a2186dd1dda86a0925b4662a3e61ce152a84c1458516887536d4"
+        )
+
+    def test_formatting_and_source_do_not_change_the_key(self):
+        variant = {
+            "title": "  COBOTS   palletize\ncartons ",
+            "description": "At a brewery",
+            "media_type": "VIDEO",
+            "source_name": "Another syndicating site",
+            "source_url": "https://example.com/copy",
+        }
+
+        assert (ClassificationCache.make_key("v2-abc", "gemini-2.0-flash", variant)
+                == ClassificationCache.make_key("v2-abc", "gemini-2.0-flash", ITEM))
+
+    @pytest.mark.parametrize("prompt_version, model, changes", [
+        ("v2-def", "gemini-2.0-flash", {}),
+        ("v2-abc", "gemini-2.5-flash", {}),
+        ("v2-abc", "gemini-2.0-flash", {"title": "Cobots palletize crates"}),
+        ("v2-abc", "gemini-2.0-flash", {"description": "At a dairy"}),
+        ("v2-abc", "gemini-2.0-flash", {"media_type": "article"}),
+    ])
+    def test_prompt_model_and_content_change_the_key(self, prompt_version, model, changes):
+        assert (ClassificationCache.make_key(prompt_version, model, {**ITEM, **changes})
+                != ClassificationCache.make_key("v2-abc", "gemini-2.0-flash", ITEM))
+
+    def test_missing_fields_match_empty_ones(self):
+        assert (ClassificationCache.make_key("v2-abc", "m", {"title": "Robot", "description": None})
+                == ClassificationCache.make_key("v2-abc", "m", {"title": "Robot", "description": ""}))
+
+
+class TestCacheStore:
+    def test_results_persist_across_connections(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite3")
+        cache = ClassificationCache(path)
+        cache.set_many("v2-abc", "m", [("key-1", RESULT)])
+        cache.close()
+
+        reopened = ClassificationCache(path)
+        assert reopened.get("key-1") == RESULT
+        assert reopened.get("key-2") is None
+        assert reopened.size() == 1
+
+    def test_corrupt_entries_are_misses(self, tmp_path):
+        cache = ClassificationCache(str(tmp_path / "cache.sqlite3"))
+        cache.conn.executemany(
+            "INSERT INTO classifications VALUES (?, 'v2-abc', 'm', ?, '2026-10-19')",
+            [("truncated", '{"content_type": "real_'), ("not-an-object", "[1, 2]")]
+        )
+
+        assert cache.get("truncated") is None
+        assert cache.get("not-an-object") is None
+
+
+class TestCoalescing:
+    @pytest.mark.asyncio
+    async def test_identical_items_in_one_batch_share_a_request(self, classifier_with):
+        classifier, model = classifier_with([json.dumps(RESULT)])
+
+        results = await classifier.classify_batch([ITEM, dict(ITEM)], batch_size=1)
+
+        assert len(model.prompts) == 1
+        assert [result["content_type"] for result in results] == ["real_application"] * 2
+        assert classifier.cache_stats == {"hits": 0, "misses": 1, "coalesced": 1}
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_a_request(self, classifier_with):
+        classifier, model = classifier_with([json.dumps(RESULT)])
+        model.delay = 0.05
+
+        first, second = await asyncio.gather(classifier.classify(ITEM), classifier.classify(dict(ITEM)))
+
+        assert len(model.prompts) == 1
+        assert first["content_type"] == second["content_type"] == "real_application"
+        assert first is not second
+        assert classifier.cache_stats["coalesced"] == 1
+        assert classifier._in_flight == {}
+
+    @pytest.mark.asyncio
+    async def test_waiters_get_the_default_when_the_request_fails(self, classifier_with):
+        classifier, model = classifier_with([ValueError("unsupported request")])
+        model.delay = 0.05
+
+        first, second = await asyncio.gather(classifier.classify(ITEM), classifier.classify(dict(ITEM)))
+
+        assert len(model.prompts) == 1
+        assert first.get("classification_failed") and second.get("classification_failed")
+        assert classifier._in_flight == {}
+
+    @pytest.mark.asyncio
+    async def test_cached_results_skip_gemini(self, classifier_with):
+        classifier, model = classifier_with([json.dumps(RESULT)])
+
+        await classifier.classify(ITEM)
+        again = await classifier.classify(dict(ITEM, title="cobots  PALLETIZE cartons"))
+
+        assert len(model.prompts) == 1
+        assert again["content_type"] == "real_application"
+        assert classifier.cache_stats["hits"] == 1
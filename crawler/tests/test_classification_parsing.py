@@ -0,0 +1,130 @@
+"""
+Tests for response parsing and validation in the RSIP classifier
+
+Gemini can return valid JSON that is not a classification object, or a
+truncated response. Either must fall back to the default classification
+without being cached.
+"""
+import json
+
+import pytest
+
+from processors.classification_cache import ClassificationCache
+from processors.classification_schema import RESULT_SCHEMA, ClassificationValidator
+
+
+ITEM = {"title": "Cobots palletize cartons at a beverage plant", "description": "", "media_type": "video"}
+
+COMPLETE_RESULT = {
+    "content_type": "real_application",
+    "deployment_maturity": "production",
+    "application_category": "industrial_automation",
+    "specific_tasks": ["case_palletizing"],
+    "educational_value": 4,
+    "summary": "Cobots palletizing in production",
+    "relevance_score": 0.9,
+}
+
+
+class TestClassificationValidator:
+    def test_unhashable_enum_values_fall_back_to_defaults(self):
+        result = ClassificationValidator().validate({
+            "content_type": ["real_application"],
+            "deployment_maturity": {"value": "pilot"},
+            "application_category": ["service_robotics"],
+            "scene_type": ["warehouse"],
+        })
+
+        assert result["content_type"] == "tech_demo"
+        assert result["deployment_maturity"] == "unknown"
+        assert result["application_category"] == "industrial_automation"
+        assert result["scene_type"] is None
+
+    def test_non_string_specific_tasks_are_dropped(self):
+        result = ClassificationValidator().validate({"specific_tasks": [{"task": "x"}, ["y"], 3, "case_palletizing"]})
+
+        assert result["specific_tasks"] == ["case_palletizing"]
+
+    def test_bad_scores_are_replaced(self):
+        result = ClassificationValidator().validate({"educational_value": "high", "relevance_score": [1]})
+
+        assert result["educational_value"] == 2
+        assert result["relevance_score"] == 0.5
+
+    def test_is_complete_requires_an_object_with_the_schema_fields(self):
+        validator = ClassificationValidator()
+
+        assert validator.is_complete(COMPLETE_RESULT)
+        assert not validator.is_complete([COMPLETE_RESULT])
+        assert not validator.is_complete("ok")
+        assert not validator.is_complete(None)
+        missing = dict(COMPLETE_RESULT)
+        del missing[RESULT_SCHEMA["required"][0]]
+        assert not validator.is_complete(missing)
+
+
+class TestParseResponse:
+    def test_fenced_json_is_unwrapped(self, classifier_with):
+        classifier, _ = classifier_with([])
+
+        assert classifier._parse_response('```json\n{"content_type": "tutorial"}\n```') == {"content_type": "tutorial"}
+
+    def test_truncated_json_counts_as_a_parse_failure(self, classifier_with):
+        classifier, _ = classifier_with([])
+
+        assert classifier._parse_response('{"content_type": "real_appl') == {}
+        assert classifier.parse_stats["parse_failures"] == 1
+
+    def test_batch_response_skips_entries_that_are_not_objects(self, classifier_with):
+        classifier, _ = classifier_with([])
+        text = json.dumps([{"index": 0, "summary": "a"}, "ok", 7, [1], {"index": 1, "summary": "b"}])
+
+        parsed = classifier._parse_batch_response(text, 2)
+
+        assert parsed == {0: {"summary": "a"}, 1: {"summary": "b"}}
+
+
+@pytest.mark.asyncio
+class TestClassifyUnusableResponses:
+    @pytest.mark.parametrize("text", [
+        json.dumps([COMPLETE_RESULT]),
+        json.dumps("ok"),
+        "42",
+        '{"content_type": "real_appl',
+    ])
+    async def test_falls_back_to_default_and_caches_nothing(self, classifier_with, text):
+        classifier, _ = classifier_with([text])
+
+        result = await classifier.classify(dict(ITEM))
+
+        assert result["classification_failed"] is True
+        assert "classifier_version" not in result
+        assert classifier.cache.size() == 0
+
+    async def test_incomplete_object_is_used_but_not_cached(self, classifier_with):
+        classifier, _ = classifier_with([json.dumps({"content_type": "case_study"})])
+
+        result = await classifier.classify(dict(ITEM))
+
+        assert result["content_type"] == "case_study"
+        assert not result.get("classification_failed")
+        assert classifier.cache.size() == 0
+
+    async def test_complete_object_is_cached(self, classifier_with):
+        classifier, model = classifier_with([json.dumps(COMPLETE_RESULT)])
+
+        first = await classifier.classify(dict(ITEM))
+        second = await classifier.classify(dict(ITEM))
+
+        assert first == second
+        assert len(model.prompts) == 1
+        assert classifier.cache.size() == 1
+
+
+def test_cache_discards_entries_that_are_not_objects(tmp_path):
+    cache = ClassificationCache(str(tmp_path / "cache.sqlite3"))
+    cache.set_many("v1", "model", [("list", [COMPLETE_RESULT]), ("text", "ok"), ("object", COMPLETE_RESULT)])
+
+    assert cache.get("list") is None
+    assert cache.get("text") is None
+    assert cache.get("object") == COMPLETE_RESULT
@@ -0,0 +1,130 @@
+"""
+Tests for the keyset scan of application_gallery (stream_gallery_pages)
+
+Pages follow (created_at, id), so rows sharing a timestamp are neither skipped
+nor repeated at page boundaries, and a scan can resume after the last row it
+processed.
+"""
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+
+
+def rows_at(*timestamps: str) -> List[Dict[str, Any]]:
+    """Approved gallery rows with the given creation days, ids in insertion order"""
+    return [
+        {
+            "id": f"00000000-0000-0000-0000-{index:012d}",
+            "created_at": f"2026-10-{day}T00:00:00+00:00",
+            "status": "approved",
+            "title": f"Item {index}",
+        }
+        for index, day in enumerate(timestamps)
+    ]
+
+
+async def scan(db, **kwargs) -> List[List[str]]:
+    """Titles of the rows in each page"""
+    return [[row["title"] for row in page] async for page in db.stream_gallery_pages(columns=("title",), **kwargs)]
+
+
+@pytest.mark.asyncio
+async def test_rows_sharing_a_timestamp_cross_page_boundaries(gallery_client):
+    db = gallery_client(rows_at("01", "02", "02", "02", "02", "03"))
+
+    pages = await scan(db, page_size=2)
+
+    assert pages == [["Item 0", "Item 1"], ["Item 2", "Item 3"], ["Item 4", "Item 5"]]
+
+
+@pytest.mark.asyncio
+async def test_pages_are_ordered_by_created_at_then_id(gallery_client):
+    rows = rows_at("02", "01", "02", "01")
+
+    pages = await scan(gallery_client(rows), page_size=3)
+
+    assert pages == [["Item 1", "Item 3", "Item 0"], ["Item 2"]]
+
+
+@pytest.mark.asyncio
+async def test_scan_resumes_after_the_given_row(gallery_client):
+    rows = rows_at("01", "02", "02", "03")
+    after = (rows[1]["created_at"], rows[1]["id"])
+
+    assert await scan(gallery_client(rows), page_size=2, after=after) == [["Item 2", "Item 3"]]
+
+
+@pytest.mark.asyncio
+async def test_limit_shrinks_the_last_page(gallery_client):
+    db = gallery_client(rows_at("01", "02", "03", "04", "05"))
+
+    assert await scan(db, page_size=2, limit=3) == [["Item 0", "Item 1"], ["Item 2"]]
+    assert [query.size for query in db.queries] == [2, 1]
+
+
+@pytest.mark.asyncio
+async def test_only_requested_columns_and_status_are_read(gallery_client):
+    rows = rows_at("01", "02", "03")
+    rows[1]["status"] = "pending"
+    db = gallery_client(rows)
+
+    pages = [page async for page in db.stream_gallery_pages(columns=("title",), page_size=5)]
+
+    assert pages == [[
+        {"id": rows[index]["id"], "created_at": rows[index]["created_at"], "title": f"Item {index}"}
+        for index in (0, 2)
+    ]]
+    assert [page async for page in db.stream_gallery_pages(status=None, page_size=5)][0][1]["id"] == rows[1]["id"]
+
+
+@pytest.mark.asyncio
+async def test_extra_filters_apply_to_every_page(gallery_client):
+    rows = rows_at("01", "02", "03", "04")
+    rows[2]["title"] = "Skipped"
+
+    pages = await scan(gallery_client(rows), page_size=2, where=lambda query: query.neq("title", "Skipped"))
+
+    assert pages == [["Item 0", "Item 1"], ["Item 3"]]
+
+
+@pytest.mark.asyncio
+async def test_a_failed_page_ends_the_scan(gallery_client):
+    db = gallery_client(rows_at("01", "02", "03", "04"))
+    execute = db._execute
+    calls = 0
+
+    async def fail_second_page(query):
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            raise ConnectionError("timeout")
+        return await execute(query)
+
+    db._execute = fail_second_page
+
+    assert await scan(db, page_size=2) == [["Item 0", "Item 1"]]
+
+
+@pytest.mark.asyncio
+async def test_stopping_early_cancels_the_prefetched_page(gallery_client):
+    db = gallery_client(rows_at("01", "02", "03", "04"))
+    requests = []
+    execute = db._execute
+
+    async def second_page_never_answers(query):
+        requests.append(asyncio.current_task())
+        if len(requests) == 2:
+            await asyncio.Event().wait()
+        return await execute(query)
+
+    db._execute = second_page_never_answers
+    pages = db.stream_gallery_pages(page_size=2)
+    await pages.__anext__()
+    # The second page is requested while the caller works on the first
+    await asyncio.sleep(0)
+    await pages.aclose()
+    await asyncio.sleep(0)
+
+    assert len(requests) == 2
+    assert requests[1].cancelled()
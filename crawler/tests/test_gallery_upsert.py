@@ -0,0 +1,76 @@
+"""
+Tests for SupabaseClient.upsert_gallery_items request building
+
+Crawled items leave out the fields they have no value for. Sending those as
+nulls would overwrite stored values when merging, so each bulk request only
+holds rows with the same columns.
+"""
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import pytest
+
+from storage.supabase_client import INSERTED, SupabaseClient
+
+
+class RecordingTable:
+    """application_gallery upserts, answered with the rows sent as if all were new"""
+
+    def __init__(self, requests: List[List[Dict[str, Any]]]):
+        self.requests = requests
+
+    def upsert(self, rows, on_conflict, ignore_duplicates):
+        self.requests.append(rows)
+        self.rows = rows
+        return self
+
+    def execute(self):
+        return SimpleNamespace(data=[
+            {**row, "id": f"id-{row['external_id']}", "created_at": "t", "updated_at": "t"}
+            for row in self.rows
+        ])
+
+
+def recording_client(config) -> SupabaseClient:
+    db = SupabaseClient.__new__(SupabaseClient)
+    db.config = config
+    db.requests = []
+    db.client = SimpleNamespace(table=lambda name: RecordingTable(db.requests))
+
+    async def execute(query):
+        return query.execute()
+
+    db._execute = execute
+    return db
+
+
+def crawled_item(external_id: str, **fields) -> Dict[str, Any]:
+    return {"source_type": "youtube", "external_id": external_id, "title": external_id, **fields}
+
+
+@pytest.mark.asyncio
+async def test_rows_with_different_columns_are_sent_separately(config):
+    db = recording_client(config)
+    items = [
+        crawled_item("a", thumbnail_url="https://example.com/a.jpg"),
+        crawled_item("b"),
+        crawled_item("c", thumbnail_url="https://example.com/c.jpg"),
+    ]
+
+    outcomes = await db.upsert_gallery_items(items, on_conflict="merge")
+
+    assert [outcome.outcome for outcome in outcomes] == [INSERTED] * 3
+    assert [outcome.id for outcome in outcomes] == ["id-a", "id-b", "id-c"]
+    assert sorted(len(request) for request in db.requests) == [1, 2]
+    for request in db.requests:
+        assert len({frozenset(row) for row in request}) == 1
+        assert all(value is not None for row in request for value in row.values())
+
+
+@pytest.mark.asyncio
+async def test_rows_with_the_same_columns_share_a_request(config):
+    db = recording_client(config)
+
+    await db.upsert_gallery_items([crawled_item(name) for name in "abcd"], on_conflict="merge")
+
+    assert [len(request) for request in db.requests] == [4]
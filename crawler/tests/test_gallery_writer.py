@@ -0,0 +1,290 @@
+"""
+Tests for the GalleryWriter write-behind buffer, its spool and replay
+
+Items the database does not take must survive the run in the spool, be
+written by the next run's replay, and be set aside once they keep failing.
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+from typing import Any, Dict, List, Set
+
+import pytest
+
+from config import StorageConfig
+from storage.gallery_writer import SPOOLED, GalleryWriter
+from storage.supabase_client import FAILED, INSERTED, UpsertOutcome
+
+
+class FakeGalleryDb:
+    """upsert_gallery_items that inserts items unless their external_id is rejected"""
+
+    def __init__(self, storage: StorageConfig):
+        self.config = SimpleNamespace(storage=storage)
+        self.rejected: Set[str] = set()
+        self.down = False
+        self.calls: List[List[Dict[str, Any]]] = []
+
+    async def upsert_gallery_items(self, items):
+        self.calls.append(items)
+        # Let other tasks run, as a request would
+        await asyncio.sleep(0)
+        if self.down:
+            raise ConnectionError("database unavailable")
+        return [
+            UpsertOutcome(FAILED, error="rejected") if item["external_id"] in self.rejected
+            else UpsertOutcome(INSERTED, id=f"id-{item['external_id']}")
+            for item in items
+        ]
+
+    @property
+    def written(self) -> List[str]:
+        return [item["external_id"] for call in self.calls for item in call]
+
+
+@pytest.fixture
+def storage(tmp_path) -> StorageConfig:
+    return StorageConfig(
+        upsert_chunk_size=3,
+        flush_interval_seconds=60,
+        spool_path=str(tmp_path / "spool" / "gallery_items.jsonl"),
+        spool_max_attempts=2,
+    )
+
+
+def item(external_id: str) -> Dict[str, Any]:
+    return {"source_type": "youtube", "external_id": external_id, "title": external_id}
+
+
+def spooled(path: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def rejected_path(storage: StorageConfig) -> str:
+    return storage.spool_path.replace(".jsonl", ".rejected.jsonl")
+
+
+class TestBuffer:
+    @pytest.mark.asyncio
+    async def test_items_are_written_on_close(self, storage):
+        db = FakeGalleryDb(storage)
+        writer = GalleryWriter(db, storage)
+
+        writer.add(item("a"))
+        writer.add(item("b"))
+        assert db.calls == []
+
+        await writer.close()
+        assert db.written == ["a", "b"]
+        assert writer.counts == {INSERTED: 2}
+
+    @pytest.mark.asyncio
+    async def test_full_buffer_is_flushed_without_waiting(self, storage):
+        db = FakeGalleryDb(storage)
+        writer = GalleryWriter(db, storage)
+
+        for name in "abcd":
+            writer.add(item(name))
+        await asyncio.sleep(0)
+
+        assert db.written == ["a", "b", "c"]
+        await writer.close()
+        assert db.written == ["a", "b", "c", "d"]
+
+    @pytest.mark.asyncio
+    async def test_buffer_is_flushed_periodically(self, storage):
+        storage.flush_interval_seconds = 0.01
+        db = FakeGalleryDb(storage)
+        writer = GalleryWriter(db, storage)
+
+        writer.add(item("a"))
+        await asyncio.sleep(0.05)
+
+        assert db.written == ["a"]
+        await writer.close()
+
+
+class TestSpool:
+    @pytest.mark.asyncio
+    async def test_rejected_items_are_spooled_and_reported(self, storage):
+        db = FakeGalleryDb(storage)
+        db.rejected = {"b"}
+        reported = []
+        writer = GalleryWriter(db, storage, run_id="run-1",
+                               on_written=lambda written, outcome: reported.append((written["external_id"], outcome.outcome)))
+
+        writer.add(item("a"))
+        writer.add({**item("b"), "_trace": object()})
+        await writer.close()
+
+        assert reported == [("a", INSERTED), ("b", SPOOLED)]
+        entries = spooled(storage.spool_path)
+        assert len(entries) == 1
+        assert entries[0]["item"] == item("b")
+        assert entries[0]["attempts"] == 1
+        assert entries[0]["run_id"] == "run-1"
+
+    @pytest.mark.asyncio
+    async def test_everything_is_spooled_when_the_database_is_down(self, storage):
+        db = FakeGalleryDb(storage)
+        db.down = True
+        writer = GalleryWriter(db, storage)
+
+        writer.add(item("a"))
+        writer.add(item("b"))
+        await writer.close()
+
+        assert writer.counts == {SPOOLED: 2}
+        assert [entry["item"]["external_id"] for entry in spooled(storage.spool_path)] == ["a", "b"]
+
+
+class TestReplay:
+    @pytest.mark.asyncio
+    async def test_spooled_items_are_written_by_the_next_run(self, storage):
+        db = FakeGalleryDb(storage)
+        db.down = True
+        first = GalleryWriter(db, storage)
+        for name in "abcd":
+            first.add(item(name))
+        await first.close()
+
+        db.down = False
+        db.calls.clear()
+        counts = await GalleryWriter(db, storage).replay_spool()
+
+        assert counts == {INSERTED: 4}
+        assert db.written == ["a", "b", "c", "d"]
+        assert [len(call) for call in db.calls] == [3, 1]
+        assert os.listdir(os.path.dirname(storage.spool_path)) == []
+        assert await GalleryWriter(db, storage).replay_spool() == {}
+
+    @pytest.mark.asyncio
+    async def test_items_failing_again_are_respooled_then_set_aside(self, storage):
+        db = FakeGalleryDb(storage)
+        db.rejected = {"b"}
+        writer = GalleryWriter(db, storage)
+        writer.add(item("a"))
+        writer.add(item("b"))
+        await writer.close()
+
+        # Second attempt (the last one allowed) fails as well
+        counts = await GalleryWriter(db, storage).replay_spool()
+
+        assert counts == {SPOOLED: 1}
+        assert spooled(storage.spool_path) == []
+        rejected = spooled(rejected_path(storage))
+        assert [entry["item"]["external_id"] for entry in rejected] == ["b"]
+        assert rejected[0]["attempts"] == 2
+        assert await GalleryWriter(db, storage).replay_spool() == {}
+
+    @pytest.mark.asyncio
+    async def test_respooled_items_keep_their_attempt_count(self, storage):
+        storage.spool_max_attempts = 5
+        db = FakeGalleryDb(storage)
+        db.down = True
+        writer = GalleryWriter(db, storage)
+        writer.add(item("a"))
+        await writer.close()
+
+        await GalleryWriter(db, storage).replay_spool()
+
+        assert [entry["attempts"] for entry in spooled(storage.spool_path)] == [2]
+
+    @pytest.mark.asyncio
+    async def test_truncated_last_line_is_skipped(self, storage):
+        os.makedirs(os.path.dirname(storage.spool_path))
+        with open(storage.spool_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"attempts": 1, "item": item("a")}) + "\n")
+            f.write('{"attempts": 1, "item": {"source_type": "you')
+        db = FakeGalleryDb(storage)
+
+        counts = await GalleryWriter(db, storage).replay_spool()
+
+        assert counts == {INSERTED: 1}
+        assert db.written == ["a"]
+
+    @pytest.mark.asyncio
+    async def test_interrupted_replays_are_picked_up(self, storage):
+        os.makedirs(os.path.dirname(storage.spool_path))
+        with open(f"{storage.spool_path}.replay-20000101000000-123", "w", encoding="utf-8") as f:
+            f.write(json.dumps({"attempts": 1, "item": item("left-over")}) + "\n")
+        with open(storage.spool_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"attempts": 1, "item": item("new")}) + "\n")
+        db = FakeGalleryDb(storage)
+
+        counts = await GalleryWriter(db, storage).replay_spool()
+
+        assert counts == {INSERTED: 2}
+        assert db.written == ["left-over", "new"]
+        assert os.listdir(os.path.dirname(storage.spool_path)) == []
+
+    @pytest.mark.asyncio
+    async def test_concurrent_replays_write_each_item_once(self, storage):
+        db = FakeGalleryDb(storage)
+        db.down = True
+        writer = GalleryWriter(db, storage)
+        for name in "abcd":
+            writer.add(item(name))
+        await writer.close()
+
+        db.down = False
+        db.calls.clear()
+        first, second = await asyncio.gather(
+            GalleryWriter(db, storage).replay_spool(),
+            GalleryWriter(db, storage).replay_spool(),
+        )
+
+        assert sorted(db.written) == ["a", "b", "c", "d"]
+        assert first.get(INSERTED, 0) + second.get(INSERTED, 0) == 4
+
+    @pytest.mark.asyncio
+    async def test_files_claimed_by_a_running_process_are_left_alone(self, storage):
+        os.makedirs(os.path.dirname(storage.spool_path))
+        claimed = f"{storage.spool_path}.replay-20000101000000-123.claimed-{os.getppid()}"
+        with open(claimed, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"attempts": 1, "item": item("in-use")}) + "\n")
+        db = FakeGalleryDb(storage)
+
+        assert await GalleryWriter(db, storage).replay_spool() == {}
+        assert db.written == []
+        assert os.path.exists(claimed)
+
+    @pytest.mark.asyncio
+    async def test_files_claimed_by_a_finished_process_are_replayed(self, storage):
+        finished = subprocess.Popen([sys.executable, "-c", "pass"])
+        finished.wait()
+        os.makedirs(os.path.dirname(storage.spool_path))
+        with open(f"{storage.spool_path}.replay-20000101000000-123.claimed-{finished.pid}", "w", encoding="utf-8") as f:
+            f.write(json.dumps({"attempts": 1, "item": item("abandoned")}) + "\n")
+        db = FakeGalleryDb(storage)
+
+        assert await GalleryWriter(db, storage).replay_spool() == {INSERTED: 1}
+        assert db.written == ["abandoned"]
+        assert os.listdir(os.path.dirname(storage.spool_path)) == []
+
+    @pytest.mark.asyncio
+    async def test_file_removed_during_replay_is_not_an_error(self, storage):
+        directory = os.path.dirname(storage.spool_path)
+        db = FakeGalleryDb(storage)
+        db.down = True
+        writer = GalleryWriter(db, storage)
+        writer.add(item("a"))
+        await writer.close()
+        db.down = False
+
+        upsert = db.upsert_gallery_items
+
+        async def upsert_and_clean_up(items):
+            for name in os.listdir(directory):
+                os.remove(os.path.join(directory, name))
+            return await upsert(items)
+
+        db.upsert_gallery_items = upsert_and_clean_up
+
+        assert await GalleryWriter(db, storage).replay_spool() == {INSERTED: 1}
@@ -0,0 +1,87 @@
+"""
+Tests for the local classifier cascade in front of Gemini
+
+Items the local model predicts at or above local_model_threshold are labelled
+without Gemini; the rest go on to Gemini.
+"""
+import json
+from dataclasses import replace
+
+import pytest
+
+from processors.local_model import LocalClassifier
+
+
+ROWS = [
+    {"title": "Cobots palletize cartons at a brewery", "content_type": "real_application",
+     "application_category": "industrial_automation", "educational_value": 4},
+    {"title": "Humanoid robot dances at a trade show", "content_type": "tech_demo",
+     "application_category": "humanoid", "educational_value": 1},
+]
+
+ITEM = {"title": "Cobots palletize cartons at a brewery", "media_type": "video"}
+
+
+@pytest.fixture
+def local_model(config, tmp_path):
+    """Enables a local model trained on ROWS at a given threshold; .confidence is its confidence for ITEM"""
+    path = str(tmp_path / "local_classifier.json")
+    model = LocalClassifier()
+    model.fit(ROWS, epochs=20)
+    model.save(path)
+
+    def enable(threshold: float):
+        config.classifier = replace(
+            config.classifier, local_model_enabled=True, local_model_path=path, local_model_threshold=threshold
+        )
+
+    enable.confidence = LocalClassifier.load(path).predict(ITEM)[1]
+    return enable
+
+
+@pytest.mark.asyncio
+async def test_confident_predictions_skip_gemini(local_model, classifier_with):
+    local_model(threshold=local_model.confidence)
+    classifier, model = classifier_with([])
+
+    result = await classifier.classify(ITEM)
+
+    assert model.prompts == []
+    assert result["classified_by"] == "local_model"
+    assert result["content_type"] == "real_application"
+    assert classifier.local_stats == {"evaluated": 1, "accepted": 1, "deferred": 0}
+
+
+@pytest.mark.asyncio
+async def test_uncertain_predictions_go_to_gemini(local_model, classifier_with):
+    local_model(threshold=local_model.confidence + 0.001)
+    classifier, model = classifier_with([json.dumps({"content_type": "tech_demo"})])
+
+    result = await classifier.classify(ITEM)
+
+    assert len(model.prompts) == 1
+    assert result["content_type"] == "tech_demo"
+    assert result.get("classified_by") != "local_model"
+    assert classifier.local_stats == {"evaluated": 1, "accepted": 0, "deferred": 1}
+
+
+@pytest.mark.asyncio
+async def test_missing_model_file_falls_back_to_gemini(config, tmp_path, classifier_with):
+    config.classifier = replace(
+        config.classifier, local_model_enabled=True, local_model_path=str(tmp_path / "missing.json")
+    )
+    classifier, model = classifier_with([json.dumps({"content_type": "tech_demo"})])
+
+    await classifier.classify(ITEM)
+
+    assert classifier.local_model is None
+    assert len(model.prompts) == 1
+
+
+def test_saved_model_predicts_the_same_after_loading(tmp_path):
+    path = str(tmp_path / "local_classifier.json")
+    model = LocalClassifier()
+    model.fit(ROWS, epochs=20)
+    model.save(path)
+
+    assert LocalClassifier.load(path).predict(ITEM)[0]["content_type"] == model.predict(ITEM)[0]["content_type"]
@@ -0,0 +1,82 @@
+"""
+Tests for CrawlerOrchestrator.run failure handling
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import main
+from main import CrawlerOrchestrator
+
+
+class FakeDb:
+    """Supabase client whose duplicate lookups never finish"""
+
+    def __init__(self, config):
+        self.config = config
+        self.lookups = []
+        self.runs = []
+
+    async def start_crawler_run(self, run_id, crawler_types):
+        pass
+
+    async def complete_crawler_run(self, run_id, status, **fields):
+        self.runs.append(status)
+
+    async def record_run_usage(self, run_id, rows, summary):
+        pass
+
+    async def find_existing_items(self, items):
+        self.lookups.append(asyncio.current_task())
+        await asyncio.sleep(60)
+        return set()
+
+    def close(self):
+        pass
+
+
+class FakeWriter:
+    def __init__(self, db, **kwargs):
+        pass
+
+    async def replay_spool(self):
+        return {}
+
+    async def close(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_failed_run_cancels_the_duplicate_lookups(config, monkeypatch):
+    db = None
+
+    def make_db(config):
+        nonlocal db
+        db = FakeDb(config)
+        return db
+
+    async def crawl_youtube(self):
+        return [{"source_type": "youtube", "external_id": "a", "title": "Cobots palletize cartons"}]
+
+    async def crawl_news(self):
+        # The YouTube lookup is under way by the time the feeds fail
+        await asyncio.sleep(0)
+        raise RuntimeError("feed unavailable")
+
+    monkeypatch.setattr(main, "SupabaseClient", make_db)
+    monkeypatch.setattr(main, "GalleryWriter", FakeWriter)
+    monkeypatch.setattr(main, "RSIPClassifier", lambda config, **kwargs: SimpleNamespace())
+    monkeypatch.setattr(main.YouTubeCrawler, "__init__", lambda self, config, ledger=None: None)
+    monkeypatch.setattr(main.YouTubeCrawler, "crawl", crawl_youtube)
+    monkeypatch.setattr(main.NewsCrawler, "__init__", lambda self, config: None)
+    monkeypatch.setattr(main.NewsCrawler, "crawl", crawl_news)
+    monkeypatch.setattr(config, "validate", lambda: [])
+    orchestrator = CrawlerOrchestrator(config)
+
+    with pytest.raises(RuntimeError):
+        await orchestrator.run(["youtube", "news"])
+
+    assert db.runs == ["failed"]
+    assert len(db.lookups) == 1 and db.lookups[0].cancelled()
+    assert orchestrator._existing_lookups == []
@@ -0,0 +1,34 @@
+"""
+Tests for the Prometheus export of PipelineMetrics
+"""
+import pytest
+
+from processors.pipeline_metrics import PipelineMetrics
+
+
+def test_run_id_is_exported_once_as_an_info_metric():
+    metrics = PipelineMetrics("run-42")
+    with metrics.track("classify", items=3):
+        pass
+    with pytest.raises(ValueError):
+        with metrics.track("store"):
+            raise ValueError("rejected")
+
+    lines = metrics.to_prometheus().splitlines()
+    series = [line for line in lines if not line.startswith("#")]
+
+    assert [line for line in series if "run_id" in line] == ['rsip_crawler_run_info{run_id="run-42"} 1']
+    assert 'rsip_crawler_stage_items_total{stage="classify"} 3' in series
+    assert 'rsip_crawler_stage_errors_total{stage="store",error_type="ValueError"} 1' in series
+    assert 'rsip_crawler_stage_duration_seconds_count{stage="classify"} 1' in series
+
+
+def test_stage_series_are_the_same_for_every_run():
+    def series_names(run_id):
+        metrics = PipelineMetrics(run_id)
+        with metrics.track("crawl_youtube"):
+            pass
+        return [line.rsplit(" ", 1)[0] for line in metrics.to_prometheus().splitlines()
+                if line.startswith("rsip_crawler_stage")]
+
+    assert series_names("first") == series_names("second")
@@ -0,0 +1,89 @@
+"""
+Tests for the rule-based pre-classification gate, using the shipped rules
+"""
+from dataclasses import replace
+
+import pytest
+
+from processors.pre_classifier import PreClassifier
+
+
+@pytest.fixture
+def gate(config) -> PreClassifier:
+    return PreClassifier(replace(config.pre_classification, enabled=True))
+
+
+class TestEvaluate:
+    def test_stock_images_are_rejected(self, gate):
+        result = gate.evaluate({
+            "title": "Robot arm vector illustration",
+            "source_url": "https://www.shutterstock.com/image-vector/robot-arm",
+            "media_type": "image",
+        })
+
+        assert result["content_type"] == "tech_demo"
+        assert result["classified_by"] == "rules"
+        assert result["pre_classification"]["decision"] == "reject"
+        assert "source:shutterstock.com" in result["pre_classification"]["rules"]
+        assert gate.stats["rejected"] == 1
+
+    def test_holiday_demos_are_tagged(self, gate):
+        result = gate.evaluate({"title": "Robots dance to Christmas songs"})
+
+        assert result["pre_classification"]["decision"] == "tag"
+        assert result["content_type"] == "tech_demo"
+        assert result["educational_value"] == 1
+        assert result["summary"] == "Robots dance to Christmas songs"
+        assert gate.stats["tagged"] == 1
+
+    def test_title_rules_do_not_tag_items_with_positive_signals(self, gate):
+        item = {
+            "title": "Robots handle holiday rush at DHL warehouse",
+            "description": "Customer deployment across the fulfillment network",
+        }
+
+        assert gate.score(item)[2] is not None
+        assert gate.evaluate(item) is None
+        assert gate.stats["passed"] == 1
+
+    def test_ordinary_items_go_to_gemini(self, gate):
+        assert gate.evaluate({"title": "Mobile robots move totes in a factory"}) is None
+        assert gate.stats == {"evaluated": 1, "rejected": 0, "tagged": 0, "passed": 1}
+
+    def test_rejects_keep_the_title_rule_assignment(self, gate):
+        result = gate.evaluate({"title": "Lego robot toy dancing for kids"})
+
+        assert result["pre_classification"]["decision"] == "reject"
+        assert result["relevance_score"] == 0.2
+
+
+class TestScore:
+    def test_each_keyword_counts_once(self, gate):
+        total, fired, _ = gate.score({"title": "Deployment", "description": "deployment DEPLOYMENT"})
+
+        assert total == 1.0
+        assert fired == ["keyword:deployment"]
+
+    def test_sub_domains_inherit_the_source_reputation(self, gate):
+        total, fired, _ = gate.score({"title": "Robots", "source_url": "https://news.therobotreport.com/a"})
+
+        assert total == 1.5
+        assert fired == ["source:therobotreport.com"]
+
+    def test_first_assignment_wins(self, gate):
+        _, fired, assigned = gate.score({"title": "Dancing robot does backflips"})
+
+        assert fired == ["title:dance_holiday_demo", "title:stunt_demo"]
+        assert assigned["relevance_score"] == 0.2
+
+
+def test_report_counts_the_gemini_calls_saved(gate):
+    gate.evaluate({"title": "Robots dance to Christmas songs"})
+    gate.evaluate({"title": "Stock photo of a robot", "media_type": "image"})
+    gate.evaluate({"title": "Mobile robots move totes in a factory"})
+
+    report = gate.get_report(batch_size=5)
+
+    assert report["llm_items_saved"] == 2
+    assert report["llm_calls_saved"] == 1
+    assert report["saved_share"] == 0.667
@@ -0,0 +1,86 @@
+"""
+Tests for profiling stages: per-task attribution and snapshot cost
+"""
+import asyncio
+import time
+
+import pytest
+
+from processors import profiling
+from processors.profiling import Profiler
+
+
+def profile(tmp_path, main, slow_callback_ms: float = 1000.0) -> Profiler:
+    """Run main() under a profiler writing its report to tmp_path"""
+    profiler = Profiler("test", str(tmp_path), slow_callback_ms)
+    asyncio.run(profiler.run(main))
+    return profiler
+
+
+def test_only_top_level_stages_take_snapshots(tmp_path, monkeypatch):
+    snapshots = []
+    take_snapshot = Profiler._snapshot
+
+    def counting_snapshot(self):
+        snapshots.append(1)
+        return take_snapshot(self)
+
+    monkeypatch.setattr(Profiler, "_snapshot", counting_snapshot)
+
+    async def main():
+        with profiling.stage("reclassify"):
+            for _ in range(5):
+                with profiling.stage("classify"):
+                    await asyncio.sleep(0)
+
+    profiler = profile(tmp_path, main)
+
+    assert len(snapshots) == 2
+    assert profiler.stages["classify"]["calls"] == 5
+    assert set(profiler.stage_allocations) == {"reclassify"}
+    assert (profiler.report_dir / "memory_reclassify.txt").exists()
+
+
+def test_concurrent_stages_are_kept_per_task(tmp_path):
+    seen = {}
+
+    async def crawl(source: str, delay: float):
+        with profiling.stage(f"crawl_{source}"):
+            await asyncio.sleep(delay)
+            seen[source] = profiling._active.task_stage(asyncio.current_task())
+
+    async def main():
+        # The first stage ends while the second is still open, and vice versa
+        await asyncio.gather(crawl("news", 0.02), crawl("youtube", 0.01))
+        seen["main"] = profiling._active.task_stage(asyncio.current_task())
+
+    profile(tmp_path, main)
+
+    assert seen == {"news": "crawl_news", "youtube": "crawl_youtube", "main": "run"}
+
+
+def test_blocking_is_charged_to_the_stage_of_the_blocked_task(tmp_path):
+    async def blocking_fetch():
+        time.sleep(0.6)
+
+    async def crawl(source: str, block: bool):
+        with profiling.stage(f"crawl_{source}"):
+            await asyncio.sleep(0.01)
+            if block:
+                # A task started inside the stage belongs to it
+                await asyncio.create_task(blocking_fetch())
+
+    async def main():
+        await asyncio.gather(crawl("news", True), crawl("youtube", False))
+
+    profiler = profile(tmp_path, main, slow_callback_ms=300)
+
+    assert {stage for block in profiler.blocks.values() for stage in block["stages"]} == {"crawl_news"}
+    assert {callback["stage"] for callback in profiler.slow_callbacks} == {"crawl_news"}
+
+
+def test_stage_does_nothing_without_a_profiler():
+    with profiling.stage("crawl"):
+        pass
+
+    assert profiling._active is None
@@ -0,0 +1,216 @@
+"""
+Tests for AdaptiveRateController: AIMD concurrency, retries and the circuit breaker
+"""
+import asyncio
+import time
+
+import pytest
+from google.api_core import exceptions as google_exceptions
+
+from config import RateLimitConfig
+from processors.rate_controller import AdaptiveRateController
+
+
+def controller(**overrides) -> AdaptiveRateController:
+    """Controller that retries without waiting"""
+    settings = dict(
+        retry_delay_seconds=0,
+        max_retry_delay_seconds=0,
+        max_retries=3,
+        gemini_initial_concurrency=4,
+        gemini_max_concurrency=8,
+        gemini_latency_target_seconds=30.0,
+        gemini_request_timeout_seconds=5.0,
+        circuit_breaker_threshold=3,
+        circuit_breaker_cooldown_seconds=60,
+    )
+    settings.update(overrides)
+    return AdaptiveRateController(RateLimitConfig(**settings))
+
+
+def failing(*errors, result="ok"):
+    """Request raising the given errors on successive attempts, then returning result"""
+    remaining = list(errors)
+
+    async def request():
+        if remaining:
+            raise remaining.pop(0)
+        return result
+
+    return request
+
+
+class TestConcurrencyLimit:
+    @pytest.mark.asyncio
+    async def test_success_increases_the_limit_additively(self):
+        rate = controller()
+
+        assert await rate.call(failing()) == "ok"
+
+        assert rate.limit == pytest.approx(4.25)
+
+    @pytest.mark.asyncio
+    async def test_limit_stops_at_the_maximum(self):
+        rate = controller(gemini_initial_concurrency=8)
+
+        await rate.call(failing())
+
+        assert rate.limit == 8
+
+    @pytest.mark.asyncio
+    async def test_slow_success_decreases_the_limit(self):
+        rate = controller(gemini_latency_target_seconds=0.0)
+
+        await rate.call(failing())
+
+        assert rate.limit == pytest.approx(3.0)
+
+    @pytest.mark.asyncio
+    async def test_throttling_halves_the_limit_and_retries(self):
+        rate = controller()
+
+        assert await rate.call(failing(google_exceptions.ResourceExhausted("quota"))) == "ok"
+
+        # Halved by the 429, then +1/limit for the successful retry
+        assert rate.limit == pytest.approx(2.5)
+        assert rate.stats["throttled"] == 1
+        assert rate.stats["retries"] == 1
+        assert rate.stats["requests"] == 2
+
+    def test_burst_of_throttling_counts_as_one_decrease(self):
+        rate = controller(retry_delay_seconds=60)
+        rate._last_decrease = time.monotonic() - 120
+        now = time.monotonic()
+
+        rate._decrease(now, factor=0.5)
+        rate._decrease(now + 1, factor=0.5)
+
+        assert rate.limit == pytest.approx(2.0)
+
+    @pytest.mark.asyncio
+    async def test_limit_never_drops_below_one(self):
+        rate = controller(gemini_initial_concurrency=1, circuit_breaker_threshold=10)
+
+        await rate.call(failing(google_exceptions.ServiceUnavailable("down"), TimeoutError()))
+
+        assert rate.limit >= 1.0
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_stay_within_the_limit(self):
+        rate = controller(gemini_initial_concurrency=2, gemini_max_concurrency=2)
+        active = peak = 0
+
+        async def request():
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return "ok"
+
+        await asyncio.gather(*(rate.call(request) for _ in range(6)))
+
+        assert peak == 2
+        assert rate._in_flight == 0
+
+
+    @pytest.mark.asyncio
+    async def test_cancelled_requests_free_their_slot(self):
+        rate = controller(gemini_initial_concurrency=1, gemini_max_concurrency=1)
+        started = asyncio.Event()
+
+        async def hanging():
+            started.set()
+            await asyncio.sleep(60)
+
+        call = asyncio.create_task(rate.call(hanging))
+        await started.wait()
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+
+        assert rate._in_flight == 0
+        assert await asyncio.wait_for(rate.call(failing()), timeout=1) == "ok"
+        assert rate.stats["errors"] == 0
+
+
+class TestRetries:
+    @pytest.mark.asyncio
+    async def test_non_transient_errors_are_raised_without_retrying(self):
+        rate = controller()
+
+        with pytest.raises(ValueError):
+            await rate.call(failing(ValueError("bad request")))
+
+        assert rate.stats["errors"] == 1
+        assert rate.stats["retries"] == 0
+        assert rate.limit == 4
+        assert rate._in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_last_error_is_raised_once_retries_are_exhausted(self):
+        rate = controller(max_retries=2, circuit_breaker_threshold=10)
+
+        with pytest.raises(google_exceptions.ServiceUnavailable):
+            await rate.call(failing(*(google_exceptions.ServiceUnavailable("down") for _ in range(5))))
+
+        assert rate.stats["requests"] == 3
+        assert rate.stats["retries"] == 2
+        assert rate.stats["timeouts"] == 3
+
+    @pytest.mark.asyncio
+    async def test_slow_requests_time_out_and_are_retried(self):
+        rate = controller(gemini_request_timeout_seconds=0.01)
+        attempts = 0
+
+        async def request():
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                await asyncio.sleep(1)
+            return "ok"
+
+        assert await rate.call(request) == "ok"
+        assert rate.stats["timeouts"] == 1
+
+
+class TestCircuitBreaker:
+    @pytest.mark.asyncio
+    async def test_consecutive_transient_failures_open_the_breaker(self):
+        rate = controller(max_retries=0)
+
+        for _ in range(3):
+            with pytest.raises(google_exceptions.TooManyRequests):
+                await rate.call(failing(google_exceptions.TooManyRequests("slow down")))
+
+        assert rate.stats["breaker_trips"] == 1
+        assert rate.limit == 1.0
+        assert rate._open_until > time.monotonic()
+
+    @pytest.mark.asyncio
+    async def test_success_resets_the_failure_count(self):
+        rate = controller(max_retries=0)
+
+        for _ in range(2):
+            with pytest.raises(google_exceptions.TooManyRequests):
+                await rate.call(failing(google_exceptions.TooManyRequests("slow down")))
+        await rate.call(failing())
+        with pytest.raises(google_exceptions.TooManyRequests):
+            await rate.call(failing(google_exceptions.TooManyRequests("slow down")))
+
+        assert rate.stats["breaker_trips"] == 0
+
+    @pytest.mark.asyncio
+    async def test_requests_wait_for_the_cooldown_then_probe(self):
+        rate = controller(max_retries=0, circuit_breaker_cooldown_seconds=0.05)
+
+        for _ in range(3):
+            with pytest.raises(google_exceptions.TooManyRequests):
+                await rate.call(failing(google_exceptions.TooManyRequests("slow down")))
+        opened = time.monotonic()
+
+        assert await rate.call(failing()) == "ok"
+
+        assert time.monotonic() - opened >= 0.04
+        assert rate.limit == pytest.approx(2.0)
+        assert rate._consecutive_failures == 0
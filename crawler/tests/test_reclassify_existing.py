@@ -0,0 +1,93 @@
+"""
+Tests for reclassify_existing.reclassify_batch
+"""
+import json
+from dataclasses import replace
+from types import SimpleNamespace
+
+import pytest
+
+from reclassify_existing import reclassify_batch
+
+
+RESULT = {
+    "content_type": "real_application",
+    "deployment_maturity": "production",
+    "application_category": "industrial_automation",
+    "specific_tasks": ["case_palletizing"],
+    "educational_value": 4,
+    "summary": "Cobots palletizing in production",
+    "relevance_score": 0.9,
+    "environment": {"setting": "factory"},
+    "confidence": {"content_type": 0.9},
+}
+
+
+def batch_response(count: int) -> str:
+    """Gemini answer classifying items 0..count-1 of a batch"""
+    return json.dumps([{**RESULT, "index": index} for index in range(count)])
+
+
+def recording_db():
+    """Database stand-in recording the queued classification updates"""
+    writes = []
+
+    async def bulk_update_classifications(updates=(), flush=False):
+        writes.extend(updates)
+        return len(updates)
+
+    return SimpleNamespace(bulk_update_classifications=bulk_update_classifications, writes=writes)
+
+
+def gallery_item(index: int):
+    return {"id": f"item-{index}", "title": f"Cobots palletize cartons, line {index}", "description": ""}
+
+
+@pytest.fixture
+def config(config):
+    """Up to five items per Gemini call"""
+    config.classifier = replace(config.classifier, batch_size=5)
+    return config
+
+
+@pytest.mark.asyncio
+async def test_batch_is_classified_together_and_written_in_bulk(classifier_with):
+    classifier, model = classifier_with([batch_response(3)])
+    db = recording_db()
+
+    stats = await reclassify_batch(classifier, db, [gallery_item(i) for i in range(3)])
+
+    assert len(model.prompts) == 1
+    assert stats["real_application"] == 3
+    assert stats["updated"] == 3
+    assert [item_id for item_id, _ in db.writes] == ["item-0", "item-1", "item-2"]
+
+    fields = db.writes[0][1]
+    assert fields["application_category"] == "industrial_automation"
+    assert fields["environment_setting"] == "factory"
+    assert fields["ai_confidence"] == {"content_type": 0.9}
+    assert fields["classifier_version"] == classifier.version()
+
+
+@pytest.mark.asyncio
+async def test_failed_classifications_keep_the_existing_values(classifier_with):
+    # Item 1 is missing from the batch answer, and its retry cannot be parsed
+    classifier, _ = classifier_with([batch_response(1), "not json"])
+    db = recording_db()
+
+    stats = await reclassify_batch(classifier, db, [gallery_item(0), gallery_item(1)])
+
+    assert stats["errors"] == 1
+    assert stats["updated"] == 1
+    assert len(db.writes) == 1
+
+
+@pytest.mark.asyncio
+async def test_dry_run_writes_nothing(classifier_with):
+    classifier, _ = classifier_with([json.dumps(RESULT)])
+    db = recording_db()
+
+    stats = await reclassify_batch(classifier, db, [gallery_item(0)], dry_run=True)
+
+    assert stats["updated"] == 1
+    assert db.writes == []
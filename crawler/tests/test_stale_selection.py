@@ -0,0 +1,173 @@
+"""
+Tests for choosing the rows a reclassification job relabels
+
+Each prompt variant versions its own rows, so a job never selects rows that a
+job with another variant labelled, and two jobs cannot relabel each other's
+rows forever. Rows the pre-classification rules or the local model labelled
+never saw a prompt, so they are stale to every job.
+"""
+from dataclasses import replace
+from typing import Any, Dict, List
+
+import pytest
+
+from storage.supabase_client import SupabaseClient
+
+
+def gallery_rows(*versions) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": f"00000000-0000-0000-0000-{index:012d}",
+            "created_at": f"2026-10-{index + 1:02d}T00:00:00+00:00",
+            "status": "approved",
+            "classifier_version": version,
+        }
+        for index, version in enumerate(versions)
+    ]
+
+
+async def stale_versions(db: SupabaseClient, version: str, page_size: int = 2) -> List[Any]:
+    return [
+        row["classifier_version"]
+        async for page in db.stream_stale_items(version, columns=("classifier_version",), page_size=page_size)
+        for row in page
+    ]
+
+
+class TestClassifierVersion:
+    def test_version_names_the_prompt_variant(self, classifier_with):
+        classifier, _ = classifier_with([])
+
+        default = classifier.version()
+        strict = classifier.version("strict")
+
+        assert default.startswith("default/")
+        assert strict.startswith("strict/")
+        assert default.endswith(f"/{classifier.model_name}")
+        assert classifier.version("default") == default
+
+    @pytest.mark.asyncio
+    async def test_results_record_the_version_of_their_variant(self, classifier_with):
+        classifier, _ = classifier_with(['{"content_type": "real_application"}'])
+
+        result = await classifier.classify({"title": "Cobots palletize cartons"})
+
+        assert result["classifier_version"] == classifier.version()
+
+    @pytest.mark.asyncio
+    async def test_rule_gated_results_record_the_rules_version(self, config, classifier_with):
+        holiday_rule(config)
+        classifier, model = classifier_with([])
+
+        result = await classifier.classify({"title": "Robots dance to Christmas songs"})
+
+        assert model.prompts == []
+        assert result["classifier_version"] == classifier.pre_classifier.version
+        assert result["classifier_version"].startswith("rules/")
+
+    @pytest.mark.asyncio
+    async def test_rule_gated_rows_are_stale_for_the_gemini_version(self, config, classifier_with, gallery_client):
+        holiday_rule(config)
+        classifier, _ = classifier_with(['{"content_type": "tech_demo"}'])
+        gated = await classifier.classify({"title": "Robots dance to Christmas songs"})
+        rows = gallery_rows(gated["classifier_version"])
+        db = gallery_client(rows)
+
+        assert await stale_versions(db, classifier.version()) == [gated["classifier_version"]]
+        assert await stale_versions(db, classifier.version("strict")) == [gated["classifier_version"]]
+
+        # A reclassification job skips the rules, so the row is current afterwards
+        relabelled = await classifier.classify_batch([{"title": "Robots dance to Christmas songs"}], local=False)
+        rows[0]["classifier_version"] = relabelled[0]["classifier_version"]
+        assert await stale_versions(db, classifier.version()) == []
+
+    def test_rules_version_changes_with_the_rules(self, config):
+        from processors.pre_classifier import PreClassifier
+
+        before = PreClassifier(holiday_rule(config).pre_classification)
+        config.pre_classification.reject_threshold -= 1
+
+        assert PreClassifier(config.pre_classification).version != before.version
+
+    def test_local_model_version_is_the_model_file_hash(self, tmp_path):
+        from processors.local_model import LocalClassifier
+
+        path = str(tmp_path / "model.json")
+        model = LocalClassifier()
+        model.fit([{"title": "Cobots palletize cartons", "content_type": "real_application"}], epochs=1)
+        model.save(path)
+        first = LocalClassifier.load(path)
+
+        assert first.version.startswith("local/")
+        assert LocalClassifier.load(path).version == first.version
+
+        # Saving again records a new timestamp, so the file and version change
+        model.save(path)
+        assert LocalClassifier.load(path).version != first.version
+
+
+def holiday_rule(config):
+    """Config whose pre-classification rules tag holiday demos without Gemini"""
+    config.pre_classification = replace(
+        config.pre_classification,
+        enabled=True,
+        title_rules=[{
+            "name": "holiday",
+            "pattern": r"\bchristmas\b",
+            "score": -2.0,
+            "assign": {"content_type": "tech_demo", "educational_value": 1},
+        }],
+    )
+    return config
+
+
+class TestStaleSelection:
+    DEFAULT = "default/v2-aaaaaaaaaaaa-t64-d512/gemini-2.0-flash"
+    OLD_DEFAULT = "default/v2-000000000000-t64-d512/gemini-2.0-flash"
+    STRICT = "strict/v2-bbbbbbbbbbbb-t64-d512/gemini-2.0-flash"
+    OLD_STRICT = "strict/v2-111111111111-t64-d512/gemini-2.0-flash"
+
+    @pytest.mark.asyncio
+    async def test_selects_unversioned_and_older_rows_of_the_same_variant(self, gallery_client):
+        db = gallery_client(gallery_rows(
+            None, self.DEFAULT, self.OLD_DEFAULT, self.STRICT, self.OLD_STRICT, None
+        ))
+
+        assert await stale_versions(db, self.DEFAULT) == [None, self.OLD_DEFAULT, None]
+        assert await stale_versions(db, self.STRICT) == [None, self.OLD_STRICT, None]
+
+    @pytest.mark.asyncio
+    async def test_jobs_with_different_variants_leave_each_others_rows_alone(self, gallery_client):
+        rows = gallery_rows(None, None, None)
+        db = gallery_client(rows)
+
+        # The strict job labels everything, then the default job has nothing to do
+        for row in rows:
+            row["classifier_version"] = self.STRICT
+        assert await stale_versions(db, self.DEFAULT) == []
+        assert await stale_versions(db, self.STRICT) == []
+
+    @pytest.mark.asyncio
+    async def test_variant_names_sharing_a_prefix_are_kept_apart(self, gallery_client):
+        platforms = "social_platforms/v2-cccccccccccc-t64-d512/gemini-2.0-flash"
+        social = "social/v2-dddddddddddd-t64-d512/gemini-2.0-flash"
+        db = gallery_client(gallery_rows(platforms))
+
+        assert await stale_versions(db, social) == []
+
+    @pytest.mark.asyncio
+    async def test_rows_labelled_without_gemini_are_stale_for_every_variant(self, gallery_client):
+        rules = "rules/eeeeeeeeeeee"
+        local = "local/ffffffffffff"
+        db = gallery_client(gallery_rows(rules, self.DEFAULT, local, self.STRICT))
+
+        assert await stale_versions(db, self.DEFAULT) == [rules, local]
+        assert await stale_versions(db, self.STRICT) == [rules, local]
+
+    @pytest.mark.asyncio
+    async def test_other_statuses_are_not_selected(self, gallery_client):
+        rows = gallery_rows(None, self.OLD_DEFAULT)
+        rows[0]["status"] = "pending"
+        db = gallery_client(rows)
+
+        assert await stale_versions(db, self.DEFAULT) == [self.OLD_DEFAULT]
@@ -1,8 +1,8 @@
 import { useState, useEffect, useCallback } from 'react';
 import { Search, X, Factory, Bot, Shield, ChevronRight, Play, FileText, ArrowUpDown, Clock, TrendingUp, Calendar, Eye, ExternalLink, ToggleLeft, ToggleRight, MapPin, Wrench } from 'lucide-react';
-import type { GalleryItem, GalleryFilters, ApplicationCategory } from '../types/gallery';
+import type { GalleryItem, GalleryFilters, GalleryCursor, GalleryItemsPage, ApplicationCategory } from '../types/gallery';
 import { CATEGORY_INFO, CONTENT_TYPE_INFO, EDUCATIONAL_VALUE_INFO, SCENE_INFO } from '../types/gallery';
-import { getGalleryItems, getFeaturedItems, SortOption } from '../services/gallery-service';
+import { listGalleryItems, countGalleryItems, getFeaturedItems, SortOption } from '../services/gallery-service';
 import HeroCarousel from './discovery/HeroCarousel';
 import MasonryGrid from './discovery/MasonryGrid';
 import LightboxViewer from './discovery/LightboxViewer';
@@ -61,6 +61,10 @@ export default function DiscoveryHomePage({
   const [loadingMore, setLoadingMore] = useState(false);
   const [totalVisualCount, setTotalVisualCount] = useState(0);
   const [totalArticleCount, setTotalArticleCount] = useState(0);
+  // Where the next page starts in each listing (null: no more items)
+  const [videoCursor, setVideoCursor] = useState<GalleryCursor | null>(null);
+  const [imageCursor, setImageCursor] = useState<GalleryCursor | null>(null);
+  const [articleCursor, setArticleCursor] = useState<GalleryCursor | null>(null);
 
   const [viewMode, setViewMode] = useState<ViewMode>('visual');
   const [activeCategory, setActiveCategory] = useState<ApplicationCategory | null>(
@@ -102,31 +106,36 @@ export default function DiscoveryHomePage({
     getFeaturedItems(5).then(setFeaturedItems);
   }, []);
 
-  // Fetch visual items (videos + images) - with proper pagination
+  // Fetch visual items (videos + images), each listing continuing from its cursor
   const fetchVisualItems = useCallback(async (append = false) => {
     const filters = buildFilters(false);
-    const currentCount = append ? visualItems.length : 0;
     const batchSize = 24;
 
     if (!append) setLoading(true);
     else setLoadingMore(true);
 
-    // Calculate how many of each to fetch based on current position
-    // Fetch more than needed to allow for proper sorting/mixing
-    const fetchLimit = batchSize + 12; // Fetch extra for sorting
-
-    // Fetch videos with offset
-    const videoOffset = Math.floor(currentCount / 2);
     const videoFilters = { ...filters, media_type: 'video' as const };
-    const videoResponse = await getGalleryItems(videoFilters, fetchLimit, videoOffset, sortBy);
-
-    // Fetch images with offset
-    const imageOffset = Math.floor(currentCount / 2);
     const imageFilters = { ...filters, media_type: 'image' as const };
-    const imageResponse = await getGalleryItems(imageFilters, fetchLimit, imageOffset, sortBy);
+    const noMore: GalleryItemsPage = { data: [], nextCursor: null };
+
+    // Half a batch from each listing that still has items
+    const [videoPage, imagePage] = await Promise.all([
+      append && !videoCursor
+        ? noMore
+        : listGalleryItems(videoFilters, sortBy, append ? videoCursor : null, batchSize / 2),
+      append && !imageCursor
+        ? noMore
+        : listGalleryItems(imageFilters, sortBy, append ? imageCursor : null, batchSize / 2),
+    ]);
+
+    // Counts only change with the filters
+    if (!append) {
+      Promise.all([countGalleryItems(videoFilters), countGalleryItems(imageFilters)])
+        .then(([videoCount, imageCount]) => setTotalVisualCount(videoCount + imageCount));
+    }
 
     // Combine and sort
-    const combined = [...videoResponse.data, ...imageResponse.data];
+    const combined = [...videoPage.data, ...imagePage.data];
     combined.sort((a, b) => {
       if (sortBy === 'quality') {
         return (b.educational_value || 0) - (a.educational_value || 0);
@@ -138,40 +147,38 @@ export default function DiscoveryHomePage({
       return new Date(a.published_at || 0).getTime() - new Date(b.published_at || 0).getTime();
     });
 
-    // Take only what we need for this batch
-    const newItems = combined.slice(0, batchSize);
-
     if (append) {
-      setVisualItems(prev => [...prev, ...newItems]);
+      setVisualItems(prev => [...prev, ...combined]);
     } else {
-      setVisualItems(newItems);
+      setVisualItems(combined);
     }
 
-    setTotalVisualCount(videoResponse.count + imageResponse.count);
+    setVideoCursor(videoPage.nextCursor);
+    setImageCursor(imagePage.nextCursor);
     setLoading(false);
     setLoadingMore(false);
-  }, [buildFilters, visualItems.length, sortBy]);
+  }, [buildFilters, videoCursor, imageCursor, sortBy]);
 
   // Fetch article items
   const fetchArticleItems = useCallback(async (append = false) => {
     const filters = buildFilters(true);
-    const offset = append ? articleItems.length : 0;
 
     if (!append) setLoading(true);
     else setLoadingMore(true);
 
-    const response = await getGalleryItems(filters, 20, offset, sortBy);
+    const page = await listGalleryItems(filters, sortBy, append ? articleCursor : null, 20);
 
     if (append) {
-      setArticleItems(prev => [...prev, ...response.data]);
+      setArticleItems(prev => [...prev, ...page.data]);
     } else {
-      setArticleItems(response.data);
+      setArticleItems(page.data);
+      countGalleryItems(filters).then(setTotalArticleCount);
     }
 
-    setTotalArticleCount(response.count);
+    setArticleCursor(page.nextCursor);
     setLoading(false);
     setLoadingMore(false);
-  }, [buildFilters, articleItems.length, sortBy]);
+  }, [buildFilters, articleCursor, sortBy]);
 
   // Refetch when filters change
   useEffect(() => {
@@ -617,7 +624,7 @@ export default function DiscoveryHomePage({
               items={visualItems}
               onItemClick={setSelectedItem}
               onLoadMore={() => fetchVisualItems(true)}
-              hasMore={visualItems.length < totalVisualCount}
+              hasMore={videoCursor !== null || imageCursor !== null}
               loading={loadingMore}
             />
           ) : (
@@ -627,7 +634,7 @@ export default function DiscoveryHomePage({
               ))}
 
               {/* Load More */}
-              {articleItems.length < totalArticleCount && (
+              {articleCursor !== null && (
                 <div className="text-center pt-4">
                   <button
                     onClick={() => fetchArticleItems(true)}
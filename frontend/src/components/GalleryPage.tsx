@@ -1,8 +1,8 @@
 import { useState, useEffect, useCallback } from 'react';
 import { Search, Plus, Factory, Bot, Shield } from 'lucide-react';
-import type { GalleryItem, GalleryFilters, ApplicationCategory } from '../types/gallery';
+import type { GalleryItem, GalleryFilters, GalleryCursor, ApplicationCategory } from '../types/gallery';
 import { CATEGORY_INFO } from '../types/gallery';
-import { getGalleryItems, getGalleryStats } from '../services/gallery-service';
+import { listGalleryItems, countGalleryItems, getGalleryStats } from '../services/gallery-service';
 import GalleryCard from './GalleryCard';
 import GalleryDetailModal from './GalleryDetailModal';
 
@@ -15,6 +15,7 @@ export default function GalleryPage({ filters, onFiltersChange }: GalleryPagePro
   const [items, setItems] = useState<GalleryItem[]>([]);
   const [loading, setLoading] = useState(true);
   const [totalCount, setTotalCount] = useState(0);
+  const [nextCursor, setNextCursor] = useState<GalleryCursor | null>(null);
   const [searchQuery, setSearchQuery] = useState(filters.search || '');
   const [selectedItem, setSelectedItem] = useState<GalleryItem | null>(null);
   const [stats, setStats] = useState<{ total: number; byCategory: Record<ApplicationCategory, number> } | null>(null);
@@ -22,9 +23,10 @@ export default function GalleryPage({ filters, onFiltersChange }: GalleryPagePro
   // Fetch items
   const fetchItems = useCallback(async () => {
     setLoading(true);
-    const response = await getGalleryItems(filters, 24);
-    setItems(response.data);
-    setTotalCount(response.count);
+    countGalleryItems(filters).then(setTotalCount);
+    const page = await listGalleryItems(filters);
+    setItems(page.data);
+    setNextCursor(page.nextCursor);
     setLoading(false);
   }, [filters]);
 
@@ -196,13 +198,14 @@ export default function GalleryPage({ filters, onFiltersChange }: GalleryPagePro
       )}
 
       {/* Load More */}
-      {items.length > 0 && items.length < totalCount && (
+      {items.length > 0 && nextCursor !== null && (
         <div className="text-center mt-8">
           <button
             onClick={() => {
               // Load more items
-              getGalleryItems(filters, 24, items.length).then((response) => {
-                setItems([...items, ...response.data]);
+              listGalleryItems(filters, 'recent', nextCursor).then((page) => {
+                setItems([...items, ...page.data]);
+                setNextCursor(page.nextCursor);
               });
             }}
             className="px-6 py-2 border border-gray-300 rounded-lg hover:bg-gray-50"
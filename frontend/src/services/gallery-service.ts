@@ -7,7 +7,10 @@ import type {
   GalleryItem,
   GalleryFilters,
   GalleryResponse,
+  GalleryCursor,
+  GalleryItemsPage,
   FilterOptions,
+  FacetField,
   ApplicationCategory,
   ContentType,
 } from '../types/gallery';
@@ -25,6 +28,9 @@ export const supabase: SupabaseClient = createClient(supabaseUrl, supabaseAnonKe
 
 export type SortOption = 'recent' | 'popular' | 'oldest' | 'quality';
 
+// Columns of GalleryItem (the table also holds search_vector and moderation fields)
+const GALLERY_ITEM_COLUMNS = 'id,external_id,source_type,source_url,source_name,title,title_zh,description,description_zh,media_type,thumbnail_url,content_url,duration_seconds,published_at,content_type,deployment_maturity,educational_value,application_context,application_category,task_types,specific_tasks,functional_requirements,scene_type,environment_setting,environment_features,robot_names,robot_types,manufacturers,ai_summary,ai_summary_zh,view_count,featured,status,created_at,updated_at';
+
 /**
  * Get gallery items with optional filtering (V2 enhanced)
  */
@@ -40,10 +46,22 @@ export async function getGalleryItems(
       ? filters
       : { ...getDefaultFilters(), ...filters };
 
+    if (effectiveFilters.search && effectiveFilters.search_mode !== 'fulltext') {
+      return searchGalleryFuzzy(effectiveFilters, limit, offset);
+    }
+
     let query = supabase
       .from('application_gallery')
-      .select('*', { count: 'exact' })
-      .eq('status', 'approved');
+      .select(GALLERY_ITEM_COLUMNS, { count: 'exact' });
+
+    if (effectiveFilters.search) {
+      // search_gallery returns the GalleryItem columns of whole-word matches,
+      // best first (ts_rank_cd over the indexed search_vector); the filters
+      // below apply to them
+      query = supabase.rpc('search_gallery', { p_query: effectiveFilters.search }, { count: 'exact' });
+    }
+
+    query = query.eq('status', 'approved');
 
     // V2: Filter by content types
     if (effectiveFilters.content_types && effectiveFilters.content_types.length > 0) {
@@ -85,27 +103,23 @@ export async function getGalleryItems(
       query = query.eq('featured', effectiveFilters.featured);
     }
 
-    if (effectiveFilters.search) {
-      // Use ilike for partial matching since textSearch may not work on all setups
-      query = query.or(`title.ilike.%${effectiveFilters.search}%,description.ilike.%${effectiveFilters.search}%,ai_summary.ilike.%${effectiveFilters.search}%`);
-    }
-
-    // Apply sorting
-    if (sortBy === 'quality') {
+    // Apply sorting (search results keep their relevance order)
+    const sort = effectiveFilters.search ? undefined : sortBy;
+    if (sort === 'quality') {
       // V2: Sort by educational value first
       query = query
         .order('educational_value', { ascending: false })
         .order('featured', { ascending: false })
         .order('created_at', { ascending: false });
-    } else if (sortBy === 'recent') {
+    } else if (sort === 'recent') {
       query = query
         .order('featured', { ascending: false })
         .order('published_at', { ascending: false, nullsFirst: false });
-    } else if (sortBy === 'popular') {
+    } else if (sort === 'popular') {
       query = query
         .order('featured', { ascending: false })
         .order('view_count', { ascending: false });
-    } else if (sortBy === 'oldest') {
+    } else if (sort === 'oldest') {
       query = query
         .order('published_at', { ascending: true, nullsFirst: false });
     }
@@ -126,6 +140,163 @@ export async function getGalleryItems(
   }
 }
 
+/**
+ * One page of fuzzy search results, best match first
+ *
+ * search_gallery_fuzzy also matches substrings and typos through trigram
+ * indexes. It takes the listing filters and the page itself, so they apply
+ * inside its single ranked scan; count_gallery_fuzzy counts the matches.
+ */
+async function searchGalleryFuzzy(
+  filters: GalleryFilters,
+  limit: number,
+  offset: number
+): Promise<GalleryResponse> {
+  const params = { p_query: filters.search, ...listingParams(filters) };
+  const [page, total] = await Promise.all([
+    supabase
+      .rpc('search_gallery_fuzzy', { ...params, p_limit: limit, p_offset: offset })
+      .select(GALLERY_ITEM_COLUMNS),
+    supabase.rpc('count_gallery_fuzzy', params),
+  ]);
+
+  const error = page.error || total.error;
+  if (error) {
+    console.error('Error searching gallery items:', error);
+    return { data: [], count: 0, error: error.message };
+  }
+
+  return { data: page.data as GalleryItem[], count: Number(total.data) || 0 };
+}
+
+// Sorts with a keyset listing function (list_gallery_<sort>)
+type KeysetSort = Exclude<SortOption, 'oldest'>;
+
+/**
+ * Listing filters as arguments of list_gallery_* and count_gallery_items
+ */
+function listingParams(filters: GalleryFilters): Record<string, unknown> {
+  const nonEmpty = <T>(values?: T[]) => (values && values.length > 0 ? values : undefined);
+  return {
+    p_content_types: nonEmpty(filters.content_types),
+    p_min_educational_value: filters.min_educational_value,
+    p_category: filters.category,
+    p_task_types: nonEmpty(filters.task_types),
+    p_specific_tasks: nonEmpty(filters.specific_tasks),
+    p_requirements: nonEmpty(filters.requirements),
+    p_scene_type: filters.scene_type,
+    p_media_type: filters.media_type,
+    p_featured: filters.featured,
+  };
+}
+
+/**
+ * Cursor after an item: its sort key, with NULLs coalesced as the SQL functions do
+ */
+function cursorAfter(item: GalleryItem, sortBy: KeysetSort): GalleryCursor {
+  const featured = item.featured ?? false;
+  if (sortBy === 'quality') {
+    return {
+      p_after_educational_value: item.educational_value ?? 0,
+      p_after_featured: featured,
+      p_after_created_at: item.created_at ?? '-infinity',
+      p_after_id: item.id,
+    };
+  }
+  if (sortBy === 'popular') {
+    return {
+      p_after_featured: featured,
+      p_after_view_count: item.view_count ?? 0,
+      p_after_id: item.id,
+    };
+  }
+  return {
+    p_after_featured: featured,
+    p_after_published_at: item.published_at ?? '-infinity',
+    p_after_id: item.id,
+  };
+}
+
+/**
+ * Get the page of gallery items after a cursor (null for the first page)
+ *
+ * Recent, quality and popular listings continue from the last item's sort
+ * key over an index, so deep pages cost the same as the first, and take no
+ * count (see countGalleryItems). Searches and 'oldest' page by offset.
+ */
+export async function listGalleryItems(
+  filters: GalleryFilters = {},
+  sortBy: SortOption = 'recent',
+  cursor: GalleryCursor | null = null,
+  limit: number = 24
+): Promise<GalleryItemsPage> {
+  const effectiveFilters = filters.include_demos
+    ? filters
+    : { ...getDefaultFilters(), ...filters };
+
+  if (effectiveFilters.search || sortBy === 'oldest') {
+    const offset = cursor ? Number(cursor.offset) : 0;
+    const response = await getGalleryItems(filters, limit, offset, sortBy);
+    const next = offset + response.data.length;
+    return {
+      data: response.data,
+      nextCursor: next < response.count ? { offset: next } : null,
+      error: response.error,
+    };
+  }
+
+  try {
+    const { data, error } = await supabase
+      .rpc(`list_gallery_${sortBy}`, {
+        ...listingParams(effectiveFilters),
+        ...cursor,
+        p_limit: limit,
+      })
+      .select(GALLERY_ITEM_COLUMNS);
+
+    if (error) {
+      console.error('Error listing gallery items:', error);
+      return { data: [], nextCursor: null, error: error.message };
+    }
+
+    const items = data as GalleryItem[];
+    return {
+      data: items,
+      nextCursor: items.length === limit ? cursorAfter(items[items.length - 1], sortBy) : null,
+    };
+  } catch (err) {
+    console.error('Gallery service error:', err);
+    return { data: [], nextCursor: null, error: 'Failed to fetch gallery items' };
+  }
+}
+
+/**
+ * Count the gallery items matching filters (once per filter change, not per page)
+ */
+export async function countGalleryItems(filters: GalleryFilters = {}): Promise<number> {
+  const effectiveFilters = filters.include_demos
+    ? filters
+    : { ...getDefaultFilters(), ...filters };
+
+  if (effectiveFilters.search) {
+    return (await getGalleryItems(filters, 1, 0)).count;
+  }
+
+  try {
+    const { data, error } = await supabase.rpc('count_gallery_items', listingParams(effectiveFilters));
+
+    if (error) {
+      console.error('Error counting gallery items:', error);
+      return 0;
+    }
+
+    return Number(data) || 0;
+  } catch (err) {
+    console.error('Gallery service error:', err);
+    return 0;
+  }
+}
+
 /**
  * Get a single gallery item by ID
  */
@@ -133,7 +304,7 @@ export async function getGalleryItem(id: string): Promise<GalleryItem | null> {
   try {
     const { data, error } = await supabase
       .from('application_gallery')
-      .select('*')
+      .select(GALLERY_ITEM_COLUMNS)
       .eq('id', id)
       .eq('status', 'approved')
       .single();
@@ -195,7 +366,7 @@ export async function getRelatedItems(
   try {
     const { data, error } = await supabase
       .from('application_gallery')
-      .select('*')
+      .select(GALLERY_ITEM_COLUMNS)
       .eq('status', 'approved')
       .eq('application_category', item.application_category)
       .neq('id', item.id)
@@ -210,7 +381,7 @@ export async function getRelatedItems(
       // Fallback without content_type filter if column doesn't exist yet
       const { data: fallbackData, error: fallbackError } = await supabase
         .from('application_gallery')
-        .select('*')
+        .select(GALLERY_ITEM_COLUMNS)
         .eq('status', 'approved')
         .eq('application_category', item.application_category)
         .neq('id', item.id)
@@ -243,21 +414,42 @@ export async function incrementViewCount(itemId: string): Promise<void> {
   }
 }
 
+// get_gallery_facets facet names to FilterOptions fields
+const FACET_FIELDS: Record<string, FacetField> = {
+  category: 'categories',
+  content_type: 'content_types',
+  scene_type: 'scene_types',
+  task_type: 'task_types',
+  specific_task: 'specific_tasks',
+  manufacturer: 'manufacturers',
+};
+
 /**
- * Get filter options (available values)
+ * Get filter options (values present in approved items, most common first, with counts)
  */
 export async function getFilterOptions(): Promise<FilterOptions> {
   try {
-    const { data, error } = await supabase.rpc('get_gallery_filter_options');
+    // One read of the trigger-maintained facet counts (gallery_facet_counts)
+    const { data, error } = await supabase.rpc('get_gallery_facets');
 
     if (error) {
       console.error('Error fetching filter options:', error);
       return getDefaultFilterOptions();
     }
 
+    const values: Partial<Record<FacetField, string[]>> = {};
+    const counts: FilterOptions['counts'] = {};
+    for (const row of (data || []) as { facet: string; value: string; item_count: number }[]) {
+      const field = FACET_FIELDS[row.facet];
+      if (!field) continue;
+      (values[field] = values[field] || []).push(row.value);
+      (counts[field] = counts[field] || {})[row.value] = Number(row.item_count);
+    }
+
     return {
       ...getDefaultFilterOptions(),
-      ...data,
+      ...values,
+      counts,
     } as FilterOptions;
   } catch (err) {
     console.error('Gallery service error:', err);
@@ -273,6 +465,7 @@ function getDefaultFilterOptions(): FilterOptions {
     task_types: [],
     specific_tasks: [],
     manufacturers: [],
+    counts: {},
   };
 }
 
@@ -306,110 +499,88 @@ export async function submitSuggestion(suggestion: {
   }
 }
 
-/**
- * Get gallery statistics (V2 enhanced)
- */
-export async function getGalleryStats(): Promise<{
+export interface GalleryStats {
   total: number;
   byCategory: Record<ApplicationCategory, number>;
   byContentType: Record<ContentType, number>;
   qualityContent: number;  // Items with educational_value >= 3 and real applications
-}> {
-  try {
-    const { count: total } = await supabase
-      .from('application_gallery')
-      .select('*', { count: 'exact', head: true })
-      .eq('status', 'approved');
+}
 
-    // Get counts by category
-    const categories: ApplicationCategory[] = [
-      'industrial_automation',
-      'service_robotics',
-      'surveillance_security',
-    ];
+// Stats change slowly; one request per minute is enough
+const STATS_CACHE_MS = 60_000;
+let statsCache: { expires: number; stats: Promise<GalleryStats> } | null = null;
 
-    const byCategory: Record<ApplicationCategory, number> = {} as Record<ApplicationCategory, number>;
+function emptyGalleryStats(): GalleryStats {
+  return {
+    total: 0,
+    byCategory: {
+      industrial_automation: 0,
+      service_robotics: 0,
+      surveillance_security: 0,
+    },
+    byContentType: {
+      real_application: 0,
+      pilot_poc: 0,
+      case_study: 0,
+      tech_demo: 0,
+      product_announcement: 0,
+      tutorial: 0,
+      interview_comment: 0,
+      unknown: 0,
+    },
+    qualityContent: 0,
+  };
+}
 
-    for (const cat of categories) {
-      const { count: catCount } = await supabase
-        .from('application_gallery')
-        .select('*', { count: 'exact', head: true })
-        .eq('status', 'approved')
-        .eq('application_category', cat);
+/**
+ * Get gallery statistics (V2 enhanced)
+ *
+ * All counts come from one get_gallery_stats call (per-status, category and
+ * content type counters kept by triggers). Results are cached for a minute
+ * and shared by concurrent callers.
+ */
+export async function getGalleryStats(): Promise<GalleryStats> {
+  if (statsCache && statsCache.expires > Date.now()) {
+    return statsCache.stats;
+  }
 
-      byCategory[cat] = catCount || 0;
-    }
+  const stats = fetchGalleryStats().catch((err) => {
+    console.error('Failed to get gallery stats:', err);
+    // Retry on the next call rather than serve zeros for a minute
+    statsCache = null;
+    return emptyGalleryStats();
+  });
+  statsCache = { expires: Date.now() + STATS_CACHE_MS, stats };
+  return stats;
+}
 
-    // V2: Get counts by content type
-    const contentTypes: ContentType[] = [
-      'real_application',
-      'pilot_poc',
-      'case_study',
-      'tech_demo',
-      'product_announcement',
-      'tutorial',
-      'unknown',
-    ];
-
-    const byContentType: Record<ContentType, number> = {} as Record<ContentType, number>;
-
-    for (const ct of contentTypes) {
-      try {
-        const { count: ctCount } = await supabase
-          .from('application_gallery')
-          .select('*', { count: 'exact', head: true })
-          .eq('status', 'approved')
-          .eq('content_type', ct);
-
-        byContentType[ct] = ctCount || 0;
-      } catch {
-        byContentType[ct] = 0;
-      }
-    }
+async function fetchGalleryStats(): Promise<GalleryStats> {
+  const { data, error } = await supabase.rpc('get_gallery_stats');
 
-    // V2: Count quality content
-    let qualityContent = 0;
-    try {
-      const { count: qualityCount } = await supabase
-        .from('application_gallery')
-        .select('*', { count: 'exact', head: true })
-        .eq('status', 'approved')
-        .in('content_type', ['real_application', 'case_study', 'pilot_poc'])
-        .gte('educational_value', 3);
+  if (error) {
+    throw error;
+  }
 
-      qualityContent = qualityCount || 0;
-    } catch {
-      qualityContent = 0;
+  const stats = emptyGalleryStats();
+  const rows = (data || []) as {
+    status: string;
+    application_category: ApplicationCategory;
+    content_type: ContentType;
+    is_quality: boolean;
+    item_count: number;
+  }[];
+
+  for (const row of rows) {
+    if (row.status !== 'approved') continue;
+    stats.total += row.item_count;
+    stats.byCategory[row.application_category] = (stats.byCategory[row.application_category] || 0) + row.item_count;
+    stats.byContentType[row.content_type] = (stats.byContentType[row.content_type] || 0) + row.item_count;
+    if (row.is_quality) {
+      stats.qualityContent += row.item_count;
     }
-
-    return {
-      total: total || 0,
-      byCategory,
-      byContentType,
-      qualityContent,
-    };
-  } catch (err) {
-    console.error('Failed to get gallery stats:', err);
-    return {
-      total: 0,
-      byCategory: {
-        industrial_automation: 0,
-        service_robotics: 0,
-        surveillance_security: 0,
-      },
-      byContentType: {
-        real_application: 0,
-        pilot_poc: 0,
-        case_study: 0,
-        tech_demo: 0,
-        product_announcement: 0,
-        tutorial: 0,
-        interview_comment: 0,
-        unknown: 0,
-      },
-      qualityContent: 0,
-    };
   }
+
+  return stats;
 }
 
 /**
@@ -117,6 +117,9 @@ export interface GalleryItem {
   updated_at: string;
 }
 
+// 'fulltext' matches whole words; 'fuzzy' also matches partial words and typos
+export type SearchMode = 'fulltext' | 'fuzzy';
+
 // V2: Enhanced filters
 export interface GalleryFilters {
   // V2 primary filters
@@ -131,6 +134,7 @@ export interface GalleryFilters {
   scene_type?: string;
   media_type?: MediaType;
   search?: string;
+  search_mode?: SearchMode;       // default 'fuzzy'
   featured?: boolean;
 
   // Show all toggle
@@ -143,6 +147,15 @@ export interface GalleryResponse {
   error?: string;
 }
 
+// Position after the last item of a page; pass it back to get the next page
+export type GalleryCursor = Record<string, string | number | boolean>;
+
+export interface GalleryItemsPage {
+  data: GalleryItem[];
+  nextCursor: GalleryCursor | null;  // null on the last page
+  error?: string;
+}
+
 export interface FilterOptions {
   categories: ApplicationCategory[];
   content_types: ContentType[];
@@ -150,8 +163,12 @@ export interface FilterOptions {
   task_types: string[];
   specific_tasks: string[];
   manufacturers: string[];
+  // Approved items per value, e.g. counts.scene_types.warehouse
+  counts: Partial<Record<FacetField, Record<string, number>>>;
 }
 
+export type FacetField = Exclude<keyof FilterOptions, 'counts'>;
+
 // V2: Content type display info
 export const CONTENT_TYPE_INFO: Record<ContentType, {
   label: string;
@@ -0,0 +1,89 @@
+-- Gallery facet benchmark: the DISTINCT / unnest scans of the old
+-- get_gallery_filter_options() vs get_gallery_facets() (migration 101)
+--
+-- Inserts synthetic approved rows into application_gallery itself, so the
+-- facet triggers run as they would for a crawler upsert, then times the old
+-- scans against the facet table read. Everything runs in one transaction
+-- that is rolled back; run it against a local stack (supabase start), not
+-- production, as the inserts hold row locks until the end. Needs migrations
+-- up to 101 applied.
+--
+-- Usage:
+--   psql "$DATABASE_URL" -f supabase/benchmarks/gallery_facets.sql [-v rows=500000]
+--
+-- Compare the INSERT time with and without the facet triggers to see their
+-- cost per crawler batch.
+
+\if :{?rows}
+\else
+  \set rows 200000
+\endif
+\set ON_ERROR_STOP on
+\timing on
+
+BEGIN;
+
+\echo
+\echo '== Insert with the facet triggers'
+INSERT INTO application_gallery (
+  external_id, source_type, source_url, title, media_type, application_category,
+  content_type, scene_type, task_types, specific_tasks, manufacturers, status
+)
+SELECT
+  'bench-' || n,
+  'other',
+  'https://example.com/bench/' || n,
+  'Bench item ' || n,
+  'article',
+  (ARRAY['industrial_automation', 'service_robotics', 'surveillance_security'])[1 + n % 3],
+  (ARRAY['real_application', 'case_study', 'pilot_poc', 'tech_demo'])[1 + n % 4],
+  'scene_' || n % 40,
+  ARRAY['task_' || n % 60, 'task_' || n % 7],
+  ARRAY['specific_' || n % 300],
+  ARRAY['maker_' || n % 200],
+  'approved'
+FROM generate_series(1, :rows) AS n;
+ROLLBACK;
+
+BEGIN;
+ALTER TABLE application_gallery DISABLE TRIGGER gallery_facet_counts_insert;
+
+\echo
+\echo '== Same insert without them'
+INSERT INTO application_gallery (
+  external_id, source_type, source_url, title, media_type, application_category,
+  content_type, scene_type, task_types, specific_tasks, manufacturers, status
+)
+SELECT
+  'bench-' || n,
+  'other',
+  'https://example.com/bench/' || n,
+  'Bench item ' || n,
+  'article',
+  (ARRAY['industrial_automation', 'service_robotics', 'surveillance_security'])[1 + n % 3],
+  (ARRAY['real_application', 'case_study', 'pilot_poc', 'tech_demo'])[1 + n % 4],
+  'scene_' || n % 40,
+  ARRAY['task_' || n % 60, 'task_' || n % 7],
+  ARRAY['specific_' || n % 300],
+  ARRAY['maker_' || n % 200],
+  'approved'
+FROM generate_series(1, :rows) AS n;
+
+SELECT refresh_gallery_facet_counts();
+ANALYZE application_gallery;
+
+\echo
+\echo '== 1. Old get_gallery_filter_options(): DISTINCT and unnest over approved rows'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT
+  ARRAY(SELECT DISTINCT application_category FROM application_gallery WHERE status = 'approved'),
+  ARRAY(SELECT DISTINCT scene_type FROM application_gallery WHERE status = 'approved' AND scene_type IS NOT NULL),
+  ARRAY(SELECT DISTINCT unnest(task_types) FROM application_gallery WHERE status = 'approved'),
+  ARRAY(SELECT DISTINCT unnest(manufacturers) FROM application_gallery WHERE status = 'approved');
+
+\echo
+\echo '== 2. get_gallery_facets(): every facet with counts'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT * FROM get_gallery_facets();
+
+ROLLBACK;
@@ -0,0 +1,133 @@
+-- Gallery listing benchmark: OFFSET pages with exact counts vs keyset pages
+-- over the partial sort indexes (migration 100)
+--
+-- Builds a synthetic table shaped like application_gallery and prints
+-- EXPLAIN ANALYZE for a deep page ("Load More" pressed :depth times) both
+-- ways, plus the count the old path ran with every page. Everything runs in
+-- one transaction that is rolled back. Needs migrations up to 100 applied.
+--
+-- Usage:
+--   psql "$DATABASE_URL" -f supabase/benchmarks/gallery_listing.sql [-v rows=500000] [-v depth=200]
+--
+-- Expect the OFFSET query to read depth * 24 rows before returning any, and
+-- the keyset query to start its Index Scan at the cursor and read one page.
+
+\if :{?rows}
+\else
+  \set rows 200000
+\endif
+\if :{?depth}
+\else
+  \set depth 200
+\endif
+\set ON_ERROR_STOP on
+\timing on
+
+BEGIN;
+
+CREATE TEMP TABLE bench_gallery
+  (LIKE application_gallery INCLUDING DEFAULTS INCLUDING GENERATED);
+
+INSERT INTO bench_gallery (
+  external_id, source_type, source_url, title, media_type, application_category,
+  content_type, educational_value, featured, view_count, status, published_at, created_at
+)
+SELECT
+  'bench-' || n,
+  'other',
+  'https://example.com/bench/' || n,
+  'Bench item ' || n,
+  (ARRAY['video', 'photo', 'article'])[1 + n % 3],
+  (ARRAY['industrial_automation', 'service_robotics', 'surveillance_security'])[1 + n % 3],
+  (ARRAY['real_application', 'case_study', 'pilot_poc', 'tech_demo'])[1 + n % 4],
+  1 + (n * 7) % 5,
+  n % 500 = 0,
+  (n * 7919) % 10000,
+  CASE WHEN n % 10 = 0 THEN 'pending' ELSE 'approved' END,
+  CASE WHEN n % 50 = 0 THEN NULL ELSE NOW() - ((n * 13) % 100000 || ' minutes')::INTERVAL END,
+  NOW() - (n || ' seconds')::INTERVAL
+FROM generate_series(1, :rows) AS n;
+
+-- Same as the migration 100 indexes
+CREATE INDEX bench_gallery_approved_recent ON bench_gallery(
+  COALESCE(featured, FALSE), COALESCE(published_at, '-infinity'::TIMESTAMPTZ), id
+) WHERE status = 'approved';
+CREATE INDEX bench_gallery_approved_quality ON bench_gallery(
+  COALESCE(educational_value, 0), COALESCE(featured, FALSE),
+  COALESCE(created_at, '-infinity'::TIMESTAMPTZ), id
+) WHERE status = 'approved';
+ANALYZE bench_gallery;
+
+-- Cursor: the sort key of the last row on the page before the deep one
+SELECT COALESCE(featured, FALSE) AS after_featured,
+       COALESCE(published_at, '-infinity'::TIMESTAMPTZ) AS after_published_at,
+       id AS after_id
+FROM bench_gallery
+WHERE status = 'approved' AND media_type = 'video'
+ORDER BY COALESCE(featured, FALSE) DESC, COALESCE(published_at, '-infinity'::TIMESTAMPTZ) DESC, id DESC
+OFFSET :depth * 24 - 1 LIMIT 1 \gset
+
+SELECT COALESCE(educational_value, 0) AS after_educational_value,
+       COALESCE(featured, FALSE) AS after_q_featured,
+       COALESCE(created_at, '-infinity'::TIMESTAMPTZ) AS after_created_at,
+       id AS after_q_id
+FROM bench_gallery
+WHERE status = 'approved' AND content_type IN ('real_application', 'case_study', 'pilot_poc')
+  AND educational_value >= 3
+ORDER BY COALESCE(educational_value, 0) DESC, COALESCE(featured, FALSE) DESC,
+         COALESCE(created_at, '-infinity'::TIMESTAMPTZ) DESC, id DESC
+OFFSET :depth * 24 - 1 LIMIT 1 \gset
+
+\echo
+\echo '== 1. Most recent videos, deep page with OFFSET (old getGalleryItems)'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT id, title
+FROM bench_gallery
+WHERE status = 'approved' AND media_type = 'video'
+ORDER BY featured DESC, published_at DESC NULLS LAST
+OFFSET :depth * 24 LIMIT 24;
+
+\echo
+\echo '== 2. The exact count sent with every page (old getGalleryItems)'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT COUNT(*) FROM bench_gallery WHERE status = 'approved' AND media_type = 'video';
+
+\echo
+\echo '== 3. Most recent videos, same page after a cursor (list_gallery_recent)'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT id, title
+FROM bench_gallery g
+WHERE g.status = 'approved' AND g.media_type = 'video'
+  AND (COALESCE(g.featured, FALSE), COALESCE(g.published_at, '-infinity'::TIMESTAMPTZ), g.id)
+    < (:'after_featured'::BOOLEAN, :'after_published_at'::TIMESTAMPTZ, :'after_id'::UUID)
+ORDER BY COALESCE(g.featured, FALSE) DESC,
+         COALESCE(g.published_at, '-infinity'::TIMESTAMPTZ) DESC,
+         g.id DESC
+LIMIT 24;
+
+\echo
+\echo '== 4. Best quality with the default filters, deep page with OFFSET (old getGalleryItems)'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT id, title
+FROM bench_gallery
+WHERE status = 'approved' AND content_type IN ('real_application', 'case_study', 'pilot_poc')
+  AND educational_value >= 3
+ORDER BY educational_value DESC, featured DESC, created_at DESC
+OFFSET :depth * 24 LIMIT 24;
+
+\echo
+\echo '== 5. Same page after a cursor (list_gallery_quality)'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT id, title
+FROM bench_gallery g
+WHERE g.status = 'approved' AND g.content_type IN ('real_application', 'case_study', 'pilot_poc')
+  AND g.educational_value >= 3
+  AND (COALESCE(g.educational_value, 0), COALESCE(g.featured, FALSE),
+       COALESCE(g.created_at, '-infinity'::TIMESTAMPTZ), g.id)
+    < (:'after_educational_value'::INTEGER, :'after_q_featured'::BOOLEAN,
+       :'after_created_at'::TIMESTAMPTZ, :'after_q_id'::UUID)
+ORDER BY COALESCE(g.educational_value, 0) DESC, COALESCE(g.featured, FALSE) DESC,
+         COALESCE(g.created_at, '-infinity'::TIMESTAMPTZ) DESC, g.id DESC
+LIMIT 24;
+
+ROLLBACK;
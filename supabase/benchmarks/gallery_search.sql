@@ -0,0 +1,139 @@
+-- Gallery search benchmark: ILIKE and per-row to_tsvector vs the stored,
+-- GIN-indexed search_vector (migration 098) and trigram indexes (099)
+--
+-- Builds a synthetic table shaped like application_gallery (including its
+-- generated search_vector) and prints EXPLAIN ANALYZE for each way of
+-- searching it. Everything runs in one transaction that is rolled back, so
+-- the database is left as it was. Needs migrations up to 099 applied.
+--
+-- Usage:
+--   psql "$DATABASE_URL" -f supabase/benchmarks/gallery_search.sql [-v rows=500000]
+--
+-- Expect a Seq Scan for ILIKE, an expression index scan that recomputes
+-- to_tsvector for every candidate row for the old ranked search, and a Bitmap
+-- Index Scan on bench_gallery_search_vector reading the stored vector for
+-- search_gallery. The substring and fuzzy queries should OR bitmap scans of
+-- the trigram indexes.
+
+\if :{?rows}
+\else
+  \set rows 200000
+\endif
+\set ON_ERROR_STOP on
+\timing on
+
+BEGIN;
+
+CREATE TEMP TABLE bench_gallery
+  (LIKE application_gallery INCLUDING DEFAULTS INCLUDING GENERATED);
+
+-- Titles, summaries and descriptions drawn from a small robotics vocabulary,
+-- with a few rarer words so selective and broad queries can be compared
+INSERT INTO bench_gallery (
+  external_id, source_type, source_url, title, description, ai_summary,
+  source_name, media_type, application_category, status, created_at
+)
+SELECT
+  'bench-' || n,
+  'other',
+  'https://example.com/bench/' || n,
+  initcap(w[1 + n % 17] || ' ' || w[1 + (n / 17) % 23] || ' ' || w[1 + (n / 391) % 29])
+    || CASE WHEN n % 997 = 0 THEN ' Cryogenic' ELSE '' END,
+  repeat(w[1 + (n * 7) % 31] || ' ' || w[1 + (n * 11) % 37] || ' in a ' || w[1 + (n * 13) % 41] || '. ', 12),
+  'A ' || w[1 + (n * 3) % 19] || ' deployment of ' || w[1 + (n * 5) % 43] || ' robots.',
+  initcap(w[1 + (n * 17) % 43]) || ' Robotics ' || (n % 500),
+  'article',
+  (ARRAY['industrial_automation', 'service_robotics', 'surveillance_security'])[1 + n % 3],
+  CASE WHEN n % 10 = 0 THEN 'pending' ELSE 'approved' END,
+  NOW() - (n || ' minutes')::INTERVAL
+FROM generate_series(1, :rows) AS n,
+LATERAL (SELECT ARRAY[
+  'warehouse', 'robot', 'picking', 'palletizing', 'welding', 'inspection', 'humanoid',
+  'autonomous', 'mobile', 'cobot', 'arm', 'gripper', 'vision', 'logistics', 'factory',
+  'hospital', 'delivery', 'security', 'patrol', 'drone', 'cleaning', 'kitchen', 'farm',
+  'harvesting', 'sorting', 'packaging', 'assembly', 'automotive', 'semiconductor',
+  'forklift', 'fleet', 'navigation', 'lidar', 'teleoperation', 'exoskeleton', 'quadruped',
+  'shelf', 'tote', 'conveyor', 'pharmacy', 'retail', 'airport', 'mining'
+] AS w) words;
+
+-- The expression index from migration 085, and its replacement
+CREATE INDEX bench_gallery_search_expr ON bench_gallery
+  USING GIN(to_tsvector('english', title || ' ' || COALESCE(description, '')));
+CREATE INDEX bench_gallery_search_vector ON bench_gallery USING GIN(search_vector);
+CREATE INDEX bench_gallery_title_trgm ON bench_gallery USING GIN(title gin_trgm_ops);
+CREATE INDEX bench_gallery_ai_summary_trgm ON bench_gallery USING GIN(ai_summary gin_trgm_ops);
+CREATE INDEX bench_gallery_source_name_trgm ON bench_gallery USING GIN(source_name gin_trgm_ops);
+ANALYZE bench_gallery;
+
+\echo
+\echo '== 1. ILIKE over title, description and ai_summary (old getGalleryItems; search_gallery_v2)'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT id, title
+FROM bench_gallery
+WHERE status = 'approved'
+  AND (title ILIKE '%cryogenic%' OR description ILIKE '%cryogenic%' OR ai_summary ILIKE '%cryogenic%')
+ORDER BY created_at DESC
+LIMIT 24;
+
+\echo
+\echo '== 2. to_tsvector per row, filtered and scored (old search_gallery_by_context)'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT id, title,
+  CASE WHEN to_tsvector('english', title || ' ' || COALESCE(description, ''))
+            @@ plainto_tsquery('english', 'palletizing cobot') THEN 5.0 ELSE 0.0 END AS score
+FROM bench_gallery
+WHERE status = 'approved'
+  AND to_tsvector('english', title || ' ' || COALESCE(description, ''))
+      @@ plainto_tsquery('english', 'palletizing cobot')
+ORDER BY score DESC
+LIMIT 24;
+
+\echo
+\echo '== 3. Stored search_vector, ranked with ts_rank_cd (search_gallery)'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT id, title
+FROM bench_gallery g
+WHERE g.status = 'approved'
+  AND g.search_vector @@ websearch_to_tsquery('english', 'palletizing cobot')
+ORDER BY ts_rank_cd(g.search_vector, websearch_to_tsquery('english', 'palletizing cobot'), 1 | 32) DESC, g.id
+LIMIT 24;
+
+\echo
+\echo '== 4. Same, rare term'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT id, title
+FROM bench_gallery g
+WHERE g.status = 'approved'
+  AND g.search_vector @@ websearch_to_tsquery('english', 'cryogenic')
+ORDER BY ts_rank_cd(g.search_vector, websearch_to_tsquery('english', 'cryogenic'), 1 | 32) DESC, g.id
+LIMIT 24;
+
+\echo
+\echo '== 5. ILIKE substring with trigram indexes (search_gallery_fuzzy, substring branch)'
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT id, title
+FROM bench_gallery
+WHERE status = 'approved'
+  AND (title ILIKE '%ryogen%' OR source_name ILIKE '%ryogen%' OR ai_summary ILIKE '%ryogen%')
+ORDER BY created_at DESC
+LIMIT 24;
+
+\echo
+\echo '== 6. Misspelled query, full-text and trigram branches ranked together (search_gallery_fuzzy)'
+SET LOCAL pg_trgm.word_similarity_threshold = 0.5;
+EXPLAIN (ANALYZE, BUFFERS, COSTS OFF)
+SELECT id, title
+FROM bench_gallery g
+WHERE g.status = 'approved'
+  AND (g.search_vector @@ websearch_to_tsquery('english', 'cryogneic')
+       OR g.title ILIKE '%cryogneic%' OR g.source_name ILIKE '%cryogneic%' OR g.ai_summary ILIKE '%cryogneic%'
+       OR 'cryogneic' <% g.title OR 'cryogneic' <% g.source_name OR 'cryogneic' <% g.ai_summary)
+ORDER BY
+  ts_rank_cd(g.search_vector, websearch_to_tsquery('english', 'cryogneic'), 1 | 32) +
+  GREATEST(word_similarity('cryogneic', g.title),
+           word_similarity('cryogneic', g.source_name) * 0.8,
+           word_similarity('cryogneic', g.ai_summary) * 0.5) DESC,
+  g.id
+LIMIT 24;
+
+ROLLBACK;
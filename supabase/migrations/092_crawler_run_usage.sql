@@ -0,0 +1,76 @@
+-- Migration 092: Per-provider API usage ledger for crawler runs
+-- Date: 2026-10-19
+-- Purpose: Keep YouTube quota units, Custom Search queries, SerpAPI searches and
+--          Gemini tokens per run and source (crawler/src/processors/usage_ledger.py),
+--          so cost per added item can be compared between runs
+
+-- One row per run, provider and source
+CREATE TABLE IF NOT EXISTS gallery_crawler_run_usage (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  run_id VARCHAR(100) NOT NULL REFERENCES gallery_crawler_runs(run_id) ON DELETE CASCADE,
+  provider VARCHAR(50) NOT NULL
+    CHECK (provider IN ('youtube', 'google_cse', 'serpapi', 'gemini')),
+  source VARCHAR(50) NOT NULL,
+
+  -- Gemini batches can mix sources, so their requests are split by item count
+  requests NUMERIC(12, 2) DEFAULT 0,
+  errors INTEGER DEFAULT 0,
+  units INTEGER DEFAULT 0,
+  input_tokens BIGINT DEFAULT 0,
+  cached_tokens BIGINT DEFAULT 0,
+  output_tokens BIGINT DEFAULT 0,
+  latency_seconds NUMERIC(12, 3) DEFAULT 0,
+  estimated_cost_usd NUMERIC(12, 6) DEFAULT 0,
+
+  recorded_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+
+  CONSTRAINT gallery_crawler_run_usage_unique UNIQUE (run_id, provider, source)
+);
+
+CREATE INDEX IF NOT EXISTS idx_crawler_run_usage_provider
+  ON gallery_crawler_run_usage(provider, recorded_at DESC);
+
+ALTER TABLE gallery_crawler_run_usage ENABLE ROW LEVEL SECURITY;
+
+-- Same access as gallery_crawler_runs
+CREATE POLICY "Service role for crawler run usage" ON gallery_crawler_run_usage
+  FOR ALL USING (
+    EXISTS (SELECT 1 FROM users WHERE id = auth.uid()
+            AND role = 'system_admin')
+  );
+
+-- Run-level summary written at the end of each run
+ALTER TABLE gallery_crawler_runs
+  ADD COLUMN IF NOT EXISTS usage JSONB,
+  ADD COLUMN IF NOT EXISTS estimated_cost_usd NUMERIC(12, 6);
+
+COMMENT ON COLUMN gallery_crawler_runs.usage IS
+'API usage summary per provider (requests, errors, units, tokens, mean latency,
+estimated cost) with cost_per_added_item_usd. Details in gallery_crawler_run_usage.';
+
+-- Cost per added item for each run, newest first; use it to spot budget regressions
+CREATE OR REPLACE VIEW gallery_crawler_run_costs
+  WITH (security_invoker = true) AS
+SELECT
+  r.run_id,
+  r.crawler_type,
+  r.started_at,
+  r.status,
+  r.items_found,
+  r.items_added,
+  SUM(u.units) FILTER (WHERE u.provider = 'youtube') AS youtube_quota_units,
+  SUM(u.units) FILTER (WHERE u.provider = 'google_cse') AS cse_queries,
+  SUM(u.units) FILTER (WHERE u.provider = 'serpapi') AS serpapi_searches,
+  SUM(u.requests) FILTER (WHERE u.provider = 'gemini') AS gemini_requests,
+  SUM(u.input_tokens) FILTER (WHERE u.provider = 'gemini') AS gemini_input_tokens,
+  SUM(u.output_tokens) FILTER (WHERE u.provider = 'gemini') AS gemini_output_tokens,
+  SUM(u.errors) AS errors,
+  SUM(u.estimated_cost_usd) AS estimated_cost_usd,
+  SUM(u.estimated_cost_usd) / NULLIF(r.items_added, 0) AS cost_per_added_item_usd
+FROM gallery_crawler_runs r
+JOIN gallery_crawler_run_usage u ON u.run_id = r.run_id
+GROUP BY r.id
+ORDER BY r.started_at DESC;
+
+COMMENT ON VIEW gallery_crawler_run_costs IS
+'API usage and estimated cost per crawler run (from gallery_crawler_run_usage)';
@@ -0,0 +1,11 @@
+-- Migration 093: Per-stage pipeline metrics for crawler runs
+-- Date: 2026-10-19
+-- Purpose: Keep the stage summary from crawler/src/processors/pipeline_metrics.py
+--          (crawl, dedup, classify, store, Gemini requests) with each run
+
+ALTER TABLE gallery_crawler_runs
+  ADD COLUMN IF NOT EXISTS metrics JSONB;
+
+COMMENT ON COLUMN gallery_crawler_runs.metrics IS
+'Per pipeline stage: calls, items, total/p50/p95/max seconds, items_per_second and
+errors by exception type. p50/p95 are histogram bucket upper bounds (capped at max_seconds).';
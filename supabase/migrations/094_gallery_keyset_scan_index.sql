@@ -0,0 +1,9 @@
+-- Migration 094: Index for keyset scans of the gallery
+-- Date: 2026-10-19
+-- Purpose: Batch jobs (reclassify, local classifier training) stream rows with
+--          SupabaseClient.stream_gallery_pages, ordered by (created_at, id) and
+--          resumed after the last row seen instead of using OFFSET. This index
+--          lets each page start at the cursor, however deep the scan is.
+
+CREATE INDEX IF NOT EXISTS idx_gallery_status_created_id
+  ON application_gallery(status, created_at, id);
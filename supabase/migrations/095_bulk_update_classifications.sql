@@ -0,0 +1,66 @@
+-- Migration 095: Bulk classification updates
+-- Date: 2026-10-19
+-- Purpose: Reclassification jobs write new labels for many rows in one request
+--          (SupabaseClient.bulk_update_classifications) instead of one
+--          update per row.
+
+-- Apply classification fields to many gallery rows in one statement.
+--
+-- p_updates is a JSON array of {"id": "<uuid>", "fields": {...}}. Only the
+-- classification columns listed below can be set; a column missing from
+-- "fields" keeps its current value, other keys are ignored. Returns the number
+-- of rows updated (unknown ids are skipped).
+CREATE OR REPLACE FUNCTION bulk_update_gallery_classifications(p_updates JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+  v_updated INTEGER;
+BEGIN
+  UPDATE application_gallery g
+  SET (
+    content_type,
+    deployment_maturity,
+    educational_value,
+    specific_tasks,
+    application_context,
+    application_category,
+    task_types,
+    functional_requirements,
+    scene_type,
+    environment_setting,
+    environment_features,
+    ai_classification,
+    ai_confidence,
+    ai_summary
+  ) = (
+    SELECT
+      r.content_type,
+      r.deployment_maturity,
+      r.educational_value,
+      r.specific_tasks,
+      r.application_context,
+      r.application_category,
+      r.task_types,
+      r.functional_requirements,
+      r.scene_type,
+      r.environment_setting,
+      r.environment_features,
+      r.ai_classification,
+      r.ai_confidence,
+      r.ai_summary
+    -- The row itself, with the supplied fields replaced
+    FROM jsonb_populate_record(g, u.value->'fields') r
+  )
+  FROM jsonb_array_elements(p_updates) u
+  WHERE g.id = (u.value->>'id')::UUID;
+
+  GET DIAGNOSTICS v_updated = ROW_COUNT;
+  RETURN v_updated;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Crawler jobs only (service role)
+REVOKE ALL ON FUNCTION bulk_update_gallery_classifications(JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION bulk_update_gallery_classifications(JSONB) TO service_role;
+
+COMMENT ON FUNCTION bulk_update_gallery_classifications(JSONB) IS
+'Bulk classification update for reclassification jobs: [{"id": uuid, "fields": {...}}, ...]';
@@ -0,0 +1,68 @@
+-- Migration 096: Classifier version on gallery rows
+-- Date: 2026-10-19
+-- Purpose: Record which classifier (prompt variant, prompt hash and model,
+--          see RSIPClassifier.version) labelled each row, so reclassification
+--          jobs only read rows labelled by an older version of their prompt
+--          (SupabaseClient.stream_stale_items).
+
+ALTER TABLE application_gallery
+  ADD COLUMN IF NOT EXISTS classifier_version VARCHAR(100);
+
+COMMENT ON COLUMN application_gallery.classifier_version IS
+'Classifier that produced the classification: <prompt variant>/<prompt version>/<model> for Gemini, rules/<hash> or local/<hash> for the pre-classification rules and local model; NULL for rows labelled before versioning';
+
+-- Stale rows are NULL or outside the current version; once most rows are
+-- current, this finds the remainder without scanning the approved rows
+CREATE INDEX IF NOT EXISTS idx_gallery_status_classifier_version
+  ON application_gallery(status, classifier_version);
+
+-- Bulk updates can set the version along with the labels
+CREATE OR REPLACE FUNCTION bulk_update_gallery_classifications(p_updates JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+  v_updated INTEGER;
+BEGIN
+  UPDATE application_gallery g
+  SET (
+    content_type,
+    deployment_maturity,
+    educational_value,
+    specific_tasks,
+    application_context,
+    application_category,
+    task_types,
+    functional_requirements,
+    scene_type,
+    environment_setting,
+    environment_features,
+    ai_classification,
+    ai_confidence,
+    ai_summary,
+    classifier_version
+  ) = (
+    SELECT
+      r.content_type,
+      r.deployment_maturity,
+      r.educational_value,
+      r.specific_tasks,
+      r.application_context,
+      r.application_category,
+      r.task_types,
+      r.functional_requirements,
+      r.scene_type,
+      r.environment_setting,
+      r.environment_features,
+      r.ai_classification,
+      r.ai_confidence,
+      r.ai_summary,
+      r.classifier_version
+    -- The row itself, with the supplied fields replaced
+    FROM jsonb_populate_record(g, u.value->'fields') r
+  )
+  FROM jsonb_array_elements(p_updates) u
+  WHERE g.id = (u.value->>'id')::UUID;
+
+  GET DIAGNOSTICS v_updated = ROW_COUNT;
+  RETURN v_updated;
+END;
+$$ LANGUAGE plpgsql;
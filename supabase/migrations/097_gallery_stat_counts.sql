@@ -0,0 +1,183 @@
+-- Migration 097: Gallery statistics counters
+-- Date: 2026-10-19
+-- Purpose: Gallery statistics (SupabaseClient.get_gallery_stats, getGalleryStats
+--          in the frontend) took one count query per status, category and
+--          content type. Counts are now kept per (status, category,
+--          content type, quality) in gallery_stat_counts, maintained by
+--          statement-level triggers, and returned by get_gallery_stats() in
+--          one round trip.
+
+-- One row per combination present in the gallery. is_quality matches the
+-- gallery_quality_content view (real applications, case studies and pilots
+-- with educational_value >= 3).
+CREATE TABLE IF NOT EXISTS gallery_stat_counts (
+  status VARCHAR(50) NOT NULL,
+  application_category VARCHAR(50) NOT NULL,
+  content_type VARCHAR(50) NOT NULL,
+  is_quality BOOLEAN NOT NULL,
+  item_count BIGINT NOT NULL DEFAULT 0,
+  PRIMARY KEY (status, application_category, content_type, is_quality)
+);
+
+COMMENT ON TABLE gallery_stat_counts IS
+'application_gallery row counts by status, category, content type and quality; kept current by triggers, rebuilt by refresh_gallery_stat_counts()';
+
+-- Apply one statement's changes to the counters.
+--
+-- Runs once per statement with the changed rows as transition tables, so a
+-- chunked upsert touches each counter once. Updates that leave the counted
+-- columns alone (view counts, moderation notes) net to zero and write
+-- nothing. Counters are locked in key order to avoid deadlocks between
+-- concurrent writers.
+CREATE OR REPLACE FUNCTION apply_gallery_stat_counts()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    INSERT INTO gallery_stat_counts AS c
+      (status, application_category, content_type, is_quality, item_count)
+    SELECT
+      COALESCE(n.status, 'pending'),
+      n.application_category,
+      COALESCE(n.content_type, 'unknown'),
+      COALESCE(n.content_type IN ('real_application', 'case_study', 'pilot_poc')
+               AND n.educational_value >= 3, FALSE),
+      COUNT(*)
+    FROM new_rows n
+    GROUP BY 1, 2, 3, 4
+    ORDER BY 1, 2, 3, 4
+    ON CONFLICT (status, application_category, content_type, is_quality)
+    DO UPDATE SET item_count = c.item_count + EXCLUDED.item_count;
+
+  ELSIF TG_OP = 'DELETE' THEN
+    INSERT INTO gallery_stat_counts AS c
+      (status, application_category, content_type, is_quality, item_count)
+    SELECT
+      COALESCE(o.status, 'pending'),
+      o.application_category,
+      COALESCE(o.content_type, 'unknown'),
+      COALESCE(o.content_type IN ('real_application', 'case_study', 'pilot_poc')
+               AND o.educational_value >= 3, FALSE),
+      -COUNT(*)
+    FROM old_rows o
+    GROUP BY 1, 2, 3, 4
+    ORDER BY 1, 2, 3, 4
+    ON CONFLICT (status, application_category, content_type, is_quality)
+    DO UPDATE SET item_count = c.item_count + EXCLUDED.item_count;
+
+  ELSE
+    INSERT INTO gallery_stat_counts AS c
+      (status, application_category, content_type, is_quality, item_count)
+    SELECT status, application_category, content_type, is_quality, SUM(delta)
+    FROM (
+      SELECT
+        COALESCE(n.status, 'pending') AS status,
+        n.application_category,
+        COALESCE(n.content_type, 'unknown') AS content_type,
+        COALESCE(n.content_type IN ('real_application', 'case_study', 'pilot_poc')
+                 AND n.educational_value >= 3, FALSE) AS is_quality,
+        1 AS delta
+      FROM new_rows n
+      UNION ALL
+      SELECT
+        COALESCE(o.status, 'pending'),
+        o.application_category,
+        COALESCE(o.content_type, 'unknown'),
+        COALESCE(o.content_type IN ('real_application', 'case_study', 'pilot_poc')
+                 AND o.educational_value >= 3, FALSE),
+        -1
+      FROM old_rows o
+    ) changes
+    GROUP BY 1, 2, 3, 4
+    HAVING SUM(delta) <> 0
+    ORDER BY 1, 2, 3, 4
+    ON CONFLICT (status, application_category, content_type, is_quality)
+    DO UPDATE SET item_count = c.item_count + EXCLUDED.item_count;
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS gallery_stat_counts_insert ON application_gallery;
+CREATE TRIGGER gallery_stat_counts_insert
+  AFTER INSERT ON application_gallery
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION apply_gallery_stat_counts();
+
+DROP TRIGGER IF EXISTS gallery_stat_counts_update ON application_gallery;
+CREATE TRIGGER gallery_stat_counts_update
+  AFTER UPDATE ON application_gallery
+  REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION apply_gallery_stat_counts();
+
+DROP TRIGGER IF EXISTS gallery_stat_counts_delete ON application_gallery;
+CREATE TRIGGER gallery_stat_counts_delete
+  AFTER DELETE ON application_gallery
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION apply_gallery_stat_counts();
+
+-- Rebuild the counters from application_gallery (initial fill, or after a
+-- TRUNCATE or bulk change made with triggers disabled). Gallery writes wait
+-- while it runs.
+CREATE OR REPLACE FUNCTION refresh_gallery_stat_counts()
+RETURNS void AS $$
+BEGIN
+  LOCK TABLE application_gallery IN SHARE MODE;
+  DELETE FROM gallery_stat_counts;
+  INSERT INTO gallery_stat_counts
+    (status, application_category, content_type, is_quality, item_count)
+  SELECT
+    COALESCE(status, 'pending'),
+    application_category,
+    COALESCE(content_type, 'unknown'),
+    COALESCE(content_type IN ('real_application', 'case_study', 'pilot_poc')
+             AND educational_value >= 3, FALSE),
+    COUNT(*)
+  FROM application_gallery
+  GROUP BY 1, 2, 3, 4;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE ALL ON FUNCTION refresh_gallery_stat_counts() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION refresh_gallery_stat_counts() TO service_role;
+
+SELECT refresh_gallery_stat_counts();
+
+-- All gallery counts in one query: one row per (status, category, content
+-- type, quality) with a non-zero count. Callers sum the rows they need.
+-- Row level security limits the public to approved counts.
+CREATE OR REPLACE FUNCTION get_gallery_stats()
+RETURNS TABLE (
+  status VARCHAR(50),
+  application_category VARCHAR(50),
+  content_type VARCHAR(50),
+  is_quality BOOLEAN,
+  item_count BIGINT
+) AS $$
+BEGIN
+  RETURN QUERY
+  SELECT c.status, c.application_category, c.content_type, c.is_quality, c.item_count
+  FROM gallery_stat_counts c
+  WHERE c.item_count <> 0;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- ============================================
+-- ROW LEVEL SECURITY
+-- ============================================
+
+ALTER TABLE gallery_stat_counts ENABLE ROW LEVEL SECURITY;
+
+-- Public: approved counts only (as application_gallery)
+CREATE POLICY "Public can view approved gallery counts" ON gallery_stat_counts
+  FOR SELECT USING (status = 'approved');
+
+-- Admins: all counts
+CREATE POLICY "Admins can view all gallery counts" ON gallery_stat_counts
+  FOR SELECT USING (
+    EXISTS (SELECT 1 FROM users WHERE id = auth.uid()
+            AND role IN ('admin', 'system_admin', 'moderator'))
+  );
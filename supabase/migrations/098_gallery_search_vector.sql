@@ -0,0 +1,166 @@
+-- Migration 098: Stored, weighted full-text search vector
+-- Date: 2026-10-19
+-- Purpose: Gallery search computed to_tsvector(title || description) per row at
+--          query time (search_gallery_by_context, twice) or used ILIKE '%q%'
+--          (getGalleryItems), which scans every row. The vector is now a
+--          generated column with a GIN index, weighting title (A) over
+--          ai_summary (B) over description (C), and search_gallery() returns
+--          matches ranked with ts_rank_cd. search_gallery_v2 keeps its
+--          substring matching, so partial words still find items there.
+--          Benchmark: supabase/benchmarks/gallery_search.sql
+
+ALTER TABLE application_gallery
+  ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+  GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', COALESCE(title, '')), 'A') ||
+    setweight(to_tsvector('english', COALESCE(ai_summary, '')), 'B') ||
+    setweight(to_tsvector('english', COALESCE(description, '')), 'C')
+  ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_gallery_search_vector
+  ON application_gallery USING GIN(search_vector);
+
+-- Replaced by idx_gallery_search_vector
+DROP INDEX IF EXISTS idx_gallery_search;
+
+-- Rows matching a search query, best match first.
+--
+-- p_query uses web search syntax: words, "quoted phrases", OR, -excluded.
+-- Returns the gallery item columns (not search_vector or moderation fields),
+-- so PostgREST filters, counts and ranges apply on top
+-- (supabase.rpc('search_gallery', ...).eq('status', 'approved')...); the
+-- function is inlined, so those filters combine with the index scan.
+-- Rank is ts_rank_cd normalised by document length (normalization 1 | 32).
+CREATE OR REPLACE FUNCTION search_gallery(p_query TEXT)
+RETURNS TABLE (
+  id UUID,
+  external_id VARCHAR,
+  source_type VARCHAR,
+  source_url TEXT,
+  source_name VARCHAR,
+  title VARCHAR,
+  title_zh VARCHAR,
+  description TEXT,
+  description_zh TEXT,
+  media_type VARCHAR,
+  thumbnail_url TEXT,
+  content_url TEXT,
+  duration_seconds INTEGER,
+  published_at TIMESTAMPTZ,
+  content_type VARCHAR,
+  deployment_maturity VARCHAR,
+  educational_value INTEGER,
+  application_context JSONB,
+  application_category VARCHAR,
+  task_types TEXT[],
+  specific_tasks TEXT[],
+  functional_requirements TEXT[],
+  scene_type VARCHAR,
+  environment_setting VARCHAR,
+  environment_features JSONB,
+  robot_names TEXT[],
+  robot_types TEXT[],
+  manufacturers TEXT[],
+  ai_summary TEXT,
+  ai_summary_zh TEXT,
+  view_count INTEGER,
+  featured BOOLEAN,
+  status VARCHAR,
+  created_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ
+) AS $$
+  SELECT
+    g.id, g.external_id, g.source_type, g.source_url, g.source_name,
+    g.title, g.title_zh, g.description, g.description_zh,
+    g.media_type, g.thumbnail_url, g.content_url, g.duration_seconds, g.published_at,
+    g.content_type, g.deployment_maturity, g.educational_value, g.application_context,
+    g.application_category, g.task_types, g.specific_tasks, g.functional_requirements,
+    g.scene_type, g.environment_setting, g.environment_features,
+    g.robot_names, g.robot_types, g.manufacturers,
+    g.ai_summary, g.ai_summary_zh, g.view_count, g.featured, g.status,
+    g.created_at, g.updated_at
+  FROM application_gallery g
+  WHERE g.search_vector @@ websearch_to_tsquery('english', p_query)
+  ORDER BY
+    ts_rank_cd(g.search_vector, websearch_to_tsquery('english', p_query), 1 | 32) DESC,
+    g.id
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION search_gallery(TEXT) IS
+'Full-text gallery search ranked by ts_rank_cd (title > ai_summary > description)';
+
+-- Existing search functions use the stored vector instead of computing one per row
+CREATE OR REPLACE FUNCTION search_gallery_by_context(
+  p_category VARCHAR DEFAULT NULL,
+  p_task_types TEXT[] DEFAULT NULL,
+  p_requirements TEXT[] DEFAULT NULL,
+  p_scene_type VARCHAR DEFAULT NULL,
+  p_search_query TEXT DEFAULT NULL,
+  p_limit INTEGER DEFAULT 20,
+  p_offset INTEGER DEFAULT 0
+)
+RETURNS TABLE (
+  id UUID,
+  title VARCHAR,
+  title_zh VARCHAR,
+  description TEXT,
+  thumbnail_url TEXT,
+  content_url TEXT,
+  media_type VARCHAR,
+  application_category VARCHAR,
+  task_types TEXT[],
+  functional_requirements TEXT[],
+  scene_type VARCHAR,
+  environment_setting VARCHAR,
+  source_name VARCHAR,
+  source_type VARCHAR,
+  published_at TIMESTAMP WITH TIME ZONE,
+  view_count INTEGER,
+  featured BOOLEAN,
+  relevance_score FLOAT
+) AS $$
+BEGIN
+  RETURN QUERY
+  SELECT
+    g.id,
+    g.title,
+    g.title_zh,
+    g.description,
+    g.thumbnail_url,
+    g.content_url,
+    g.media_type,
+    g.application_category,
+    g.task_types,
+    g.functional_requirements,
+    g.scene_type,
+    g.environment_setting,
+    g.source_name,
+    g.source_type,
+    g.published_at,
+    g.view_count,
+    g.featured,
+    (
+      CASE WHEN g.featured THEN 10.0 ELSE 0.0 END +
+      -- Shared elements (& is intarray's, for integer arrays only)
+      (SELECT COUNT(*) FROM unnest(g.task_types) t WHERE t = ANY(p_task_types)) * 2.0 +
+      (SELECT COUNT(*) FROM unnest(g.functional_requirements) r WHERE r = ANY(p_requirements)) * 1.5 +
+      -- Only matching rows remain when there is a query
+      CASE WHEN p_search_query IS NOT NULL THEN 5.0 ELSE 0.0 END
+    )::FLOAT AS relevance_score
+  FROM application_gallery g
+  WHERE g.status = 'approved'
+    AND (p_category IS NULL OR g.application_category = p_category)
+    AND (p_task_types IS NULL OR g.task_types && p_task_types)
+    AND (p_requirements IS NULL OR g.functional_requirements && p_requirements)
+    AND (p_scene_type IS NULL OR g.scene_type = p_scene_type)
+    AND (p_search_query IS NULL OR
+         g.search_vector @@ websearch_to_tsquery('english', p_search_query))
+  ORDER BY
+    relevance_score DESC,
+    g.featured DESC,
+    g.view_count DESC,
+    g.published_at DESC
+  LIMIT p_limit
+  OFFSET p_offset;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,130 @@
+-- Migration 099: Trigram indexes for substring and typo-tolerant search
+-- Date: 2026-10-19
+-- Purpose: Full-text search (migration 098) matches whole words only, so
+--          partial or misspelled robot and company names ("Locu", "Agilty")
+--          find nothing, and ILIKE '%q%' has no index to use. pg_trgm GIN
+--          indexes on title, ai_summary and source_name back both ILIKE
+--          and word similarity. search_gallery_fuzzy() returns one page of
+--          approved matches ranked by full-text rank plus trigram
+--          similarity, and count_gallery_fuzzy() counts them.
+--          Benchmark: supabase/benchmarks/gallery_search.sql
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_gallery_title_trgm
+  ON application_gallery USING GIN(title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_gallery_ai_summary_trgm
+  ON application_gallery USING GIN(ai_summary gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_gallery_source_name_trgm
+  ON application_gallery USING GIN(source_name gin_trgm_ops);
+
+-- Approved items matching the listing filters (NULL or empty = no filter)
+-- whose title, summary or source name matches a search query as words,
+-- substrings or near-misses.
+--
+-- A row matches if the full-text query does (as search_gallery), if the
+-- query is a substring of the title, summary or source name (ILIKE, at least
+-- three characters to use the index), or if it is close to a word run in one
+-- of them (word similarity above the threshold). Every branch is
+-- index-backed; the planner ORs the bitmaps.
+--
+-- Inlined into the two functions below, which set the word similarity
+-- threshold to 0.5 (the pg_trgm default of 0.6 misses one-letter typos in
+-- short names such as "Agilty"); called directly it uses the session's.
+-- The SET keeps those two from being inlined themselves, so they take the
+-- filters and page as arguments rather than leaving them to PostgREST, which
+-- would apply them to every ranked match of every status.
+CREATE OR REPLACE FUNCTION gallery_fuzzy_matches(
+  p_query TEXT,
+  p_content_types TEXT[] DEFAULT NULL,
+  p_min_educational_value INTEGER DEFAULT NULL,
+  p_category VARCHAR DEFAULT NULL,
+  p_task_types TEXT[] DEFAULT NULL,
+  p_specific_tasks TEXT[] DEFAULT NULL,
+  p_requirements TEXT[] DEFAULT NULL,
+  p_scene_type VARCHAR DEFAULT NULL,
+  p_media_type VARCHAR DEFAULT NULL,
+  p_featured BOOLEAN DEFAULT NULL
+)
+RETURNS SETOF application_gallery AS $$
+  SELECT g.*
+  FROM application_gallery g
+  WHERE g.status = 'approved'
+    AND (COALESCE(cardinality(p_content_types), 0) = 0 OR g.content_type = ANY(p_content_types))
+    AND (p_min_educational_value IS NULL OR g.educational_value >= p_min_educational_value)
+    AND (p_category IS NULL OR g.application_category = p_category)
+    AND (COALESCE(cardinality(p_task_types), 0) = 0 OR g.task_types && p_task_types)
+    AND (COALESCE(cardinality(p_specific_tasks), 0) = 0 OR g.specific_tasks && p_specific_tasks)
+    AND (COALESCE(cardinality(p_requirements), 0) = 0 OR g.functional_requirements && p_requirements)
+    AND (p_scene_type IS NULL OR g.scene_type = p_scene_type)
+    AND (p_media_type IS NULL OR g.media_type = p_media_type)
+    AND (p_featured IS NULL OR g.featured = p_featured)
+    AND (g.search_vector @@ websearch_to_tsquery('english', p_query)
+      -- ILIKE pattern with the query's own % and _ taken literally
+      OR g.title ILIKE '%' || replace(replace(replace(p_query, '\', '\\'), '%', '\%'), '_', '\_') || '%'
+      OR g.source_name ILIKE '%' || replace(replace(replace(p_query, '\', '\\'), '%', '\%'), '_', '\_') || '%'
+      OR g.ai_summary ILIKE '%' || replace(replace(replace(p_query, '\', '\\'), '%', '\%'), '_', '\_') || '%'
+      OR p_query <% g.title
+      OR p_query <% g.source_name
+      OR p_query <% g.ai_summary)
+$$ LANGUAGE sql STABLE;
+
+-- One page of search results, best match first: ts_rank_cd plus the best
+-- word similarity, with title counting most.
+CREATE OR REPLACE FUNCTION search_gallery_fuzzy(
+  p_query TEXT,
+  p_content_types TEXT[] DEFAULT NULL,
+  p_min_educational_value INTEGER DEFAULT NULL,
+  p_category VARCHAR DEFAULT NULL,
+  p_task_types TEXT[] DEFAULT NULL,
+  p_specific_tasks TEXT[] DEFAULT NULL,
+  p_requirements TEXT[] DEFAULT NULL,
+  p_scene_type VARCHAR DEFAULT NULL,
+  p_media_type VARCHAR DEFAULT NULL,
+  p_featured BOOLEAN DEFAULT NULL,
+  p_limit INTEGER DEFAULT 24,
+  p_offset INTEGER DEFAULT 0
+)
+RETURNS SETOF application_gallery AS $$
+  SELECT g.*
+  FROM gallery_fuzzy_matches(
+    p_query, p_content_types, p_min_educational_value, p_category, p_task_types,
+    p_specific_tasks, p_requirements, p_scene_type, p_media_type, p_featured
+  ) g
+  ORDER BY
+    ts_rank_cd(g.search_vector, websearch_to_tsquery('english', p_query), 1 | 32) +
+    GREATEST(
+      word_similarity(p_query, g.title),
+      word_similarity(p_query, g.source_name) * 0.8,
+      word_similarity(p_query, g.ai_summary) * 0.5
+    ) DESC,
+    g.id
+  LIMIT p_limit
+  OFFSET p_offset
+$$ LANGUAGE sql STABLE
+SET pg_trgm.word_similarity_threshold = 0.5;
+
+COMMENT ON FUNCTION search_gallery_fuzzy(TEXT, TEXT[], INTEGER, VARCHAR, TEXT[], TEXT[], TEXT[], VARCHAR, VARCHAR, BOOLEAN, INTEGER, INTEGER) IS
+'Gallery search tolerating partial words and typos: full-text rank plus trigram word similarity';
+
+-- Number of approved items search_gallery_fuzzy finds for the query and filters
+CREATE OR REPLACE FUNCTION count_gallery_fuzzy(
+  p_query TEXT,
+  p_content_types TEXT[] DEFAULT NULL,
+  p_min_educational_value INTEGER DEFAULT NULL,
+  p_category VARCHAR DEFAULT NULL,
+  p_task_types TEXT[] DEFAULT NULL,
+  p_specific_tasks TEXT[] DEFAULT NULL,
+  p_requirements TEXT[] DEFAULT NULL,
+  p_scene_type VARCHAR DEFAULT NULL,
+  p_media_type VARCHAR DEFAULT NULL,
+  p_featured BOOLEAN DEFAULT NULL
+)
+RETURNS BIGINT AS $$
+  SELECT COUNT(*)
+  FROM gallery_fuzzy_matches(
+    p_query, p_content_types, p_min_educational_value, p_category, p_task_types,
+    p_specific_tasks, p_requirements, p_scene_type, p_media_type, p_featured
+  )
+$$ LANGUAGE sql STABLE
+SET pg_trgm.word_similarity_threshold = 0.5;
@@ -0,0 +1,189 @@
+-- Migration 100: Keyset (cursor) listing of approved gallery items
+-- Date: 2026-10-19
+-- Purpose: Gallery pages were fetched with OFFSET and count: 'exact', so each
+--          "Load More" read and discarded every earlier row and recounted the
+--          whole filtered set. list_gallery_recent/quality/popular return the
+--          page after a cursor (the sort key of the last row seen) and walk
+--          partial indexes in sort order; count_gallery_items() counts
+--          separately, once per filter change.
+--          Benchmark: supabase/benchmarks/gallery_listing.sql
+--
+-- Sort keys are wrapped in COALESCE so rows with NULLs compare (and sort
+-- last) like every other row; the indexes use the same expressions.
+
+-- featured, then published_at (newest first)
+CREATE INDEX IF NOT EXISTS idx_gallery_approved_recent
+  ON application_gallery(
+    COALESCE(featured, FALSE),
+    COALESCE(published_at, '-infinity'::TIMESTAMPTZ),
+    id
+  )
+  WHERE status = 'approved';
+
+-- educational_value, then featured, then created_at
+CREATE INDEX IF NOT EXISTS idx_gallery_approved_quality
+  ON application_gallery(
+    COALESCE(educational_value, 0),
+    COALESCE(featured, FALSE),
+    COALESCE(created_at, '-infinity'::TIMESTAMPTZ),
+    id
+  )
+  WHERE status = 'approved';
+
+-- featured, then view_count
+CREATE INDEX IF NOT EXISTS idx_gallery_approved_popular
+  ON application_gallery(
+    COALESCE(featured, FALSE),
+    COALESCE(view_count, 0),
+    id
+  )
+  WHERE status = 'approved';
+
+-- Approved items matching the listing filters (NULL or empty = no filter).
+-- Inlined into the functions below, so the planner sees one query.
+CREATE OR REPLACE FUNCTION approved_gallery_items(
+  p_content_types TEXT[] DEFAULT NULL,
+  p_min_educational_value INTEGER DEFAULT NULL,
+  p_category VARCHAR DEFAULT NULL,
+  p_task_types TEXT[] DEFAULT NULL,
+  p_specific_tasks TEXT[] DEFAULT NULL,
+  p_requirements TEXT[] DEFAULT NULL,
+  p_scene_type VARCHAR DEFAULT NULL,
+  p_media_type VARCHAR DEFAULT NULL,
+  p_featured BOOLEAN DEFAULT NULL
+)
+RETURNS SETOF application_gallery AS $$
+  SELECT g.*
+  FROM application_gallery g
+  WHERE g.status = 'approved'
+    AND (COALESCE(cardinality(p_content_types), 0) = 0 OR g.content_type = ANY(p_content_types))
+    AND (p_min_educational_value IS NULL OR g.educational_value >= p_min_educational_value)
+    AND (p_category IS NULL OR g.application_category = p_category)
+    AND (COALESCE(cardinality(p_task_types), 0) = 0 OR g.task_types && p_task_types)
+    AND (COALESCE(cardinality(p_specific_tasks), 0) = 0 OR g.specific_tasks && p_specific_tasks)
+    AND (COALESCE(cardinality(p_requirements), 0) = 0 OR g.functional_requirements && p_requirements)
+    AND (p_scene_type IS NULL OR g.scene_type = p_scene_type)
+    AND (p_media_type IS NULL OR g.media_type = p_media_type)
+    AND (p_featured IS NULL OR g.featured = p_featured)
+$$ LANGUAGE sql STABLE;
+
+-- Listing functions: the p_limit items after the cursor, in sort order.
+--
+-- Pass the sort key of the last item of the previous page as p_after_*
+-- (NULLs as the COALESCE defaults above), or leave them NULL for the first
+-- page. The cursor defaults sort before every row, and the row comparison
+-- is an index range condition, so page 100 costs the same as page 1.
+
+CREATE OR REPLACE FUNCTION list_gallery_recent(
+  p_content_types TEXT[] DEFAULT NULL,
+  p_min_educational_value INTEGER DEFAULT NULL,
+  p_category VARCHAR DEFAULT NULL,
+  p_task_types TEXT[] DEFAULT NULL,
+  p_specific_tasks TEXT[] DEFAULT NULL,
+  p_requirements TEXT[] DEFAULT NULL,
+  p_scene_type VARCHAR DEFAULT NULL,
+  p_media_type VARCHAR DEFAULT NULL,
+  p_featured BOOLEAN DEFAULT NULL,
+  p_after_featured BOOLEAN DEFAULT NULL,
+  p_after_published_at TIMESTAMPTZ DEFAULT NULL,
+  p_after_id UUID DEFAULT NULL,
+  p_limit INTEGER DEFAULT 24
+)
+RETURNS SETOF application_gallery AS $$
+  SELECT g.*
+  FROM approved_gallery_items(
+    p_content_types, p_min_educational_value, p_category, p_task_types,
+    p_specific_tasks, p_requirements, p_scene_type, p_media_type, p_featured
+  ) g
+  WHERE (COALESCE(g.featured, FALSE), COALESCE(g.published_at, '-infinity'::TIMESTAMPTZ), g.id)
+      < (COALESCE(p_after_featured, TRUE), COALESCE(p_after_published_at, 'infinity'::TIMESTAMPTZ), p_after_id)
+  ORDER BY
+    COALESCE(g.featured, FALSE) DESC,
+    COALESCE(g.published_at, '-infinity'::TIMESTAMPTZ) DESC,
+    g.id DESC
+  LIMIT p_limit
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION list_gallery_quality(
+  p_content_types TEXT[] DEFAULT NULL,
+  p_min_educational_value INTEGER DEFAULT NULL,
+  p_category VARCHAR DEFAULT NULL,
+  p_task_types TEXT[] DEFAULT NULL,
+  p_specific_tasks TEXT[] DEFAULT NULL,
+  p_requirements TEXT[] DEFAULT NULL,
+  p_scene_type VARCHAR DEFAULT NULL,
+  p_media_type VARCHAR DEFAULT NULL,
+  p_featured BOOLEAN DEFAULT NULL,
+  p_after_educational_value INTEGER DEFAULT NULL,
+  p_after_featured BOOLEAN DEFAULT NULL,
+  p_after_created_at TIMESTAMPTZ DEFAULT NULL,
+  p_after_id UUID DEFAULT NULL,
+  p_limit INTEGER DEFAULT 24
+)
+RETURNS SETOF application_gallery AS $$
+  SELECT g.*
+  FROM approved_gallery_items(
+    p_content_types, p_min_educational_value, p_category, p_task_types,
+    p_specific_tasks, p_requirements, p_scene_type, p_media_type, p_featured
+  ) g
+  WHERE (COALESCE(g.educational_value, 0), COALESCE(g.featured, FALSE),
+         COALESCE(g.created_at, '-infinity'::TIMESTAMPTZ), g.id)
+      < (COALESCE(p_after_educational_value, 2147483647), p_after_featured,
+         p_after_created_at, p_after_id)
+  ORDER BY
+    COALESCE(g.educational_value, 0) DESC,
+    COALESCE(g.featured, FALSE) DESC,
+    COALESCE(g.created_at, '-infinity'::TIMESTAMPTZ) DESC,
+    g.id DESC
+  LIMIT p_limit
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION list_gallery_popular(
+  p_content_types TEXT[] DEFAULT NULL,
+  p_min_educational_value INTEGER DEFAULT NULL,
+  p_category VARCHAR DEFAULT NULL,
+  p_task_types TEXT[] DEFAULT NULL,
+  p_specific_tasks TEXT[] DEFAULT NULL,
+  p_requirements TEXT[] DEFAULT NULL,
+  p_scene_type VARCHAR DEFAULT NULL,
+  p_media_type VARCHAR DEFAULT NULL,
+  p_featured BOOLEAN DEFAULT NULL,
+  p_after_featured BOOLEAN DEFAULT NULL,
+  p_after_view_count INTEGER DEFAULT NULL,
+  p_after_id UUID DEFAULT NULL,
+  p_limit INTEGER DEFAULT 24
+)
+RETURNS SETOF application_gallery AS $$
+  SELECT g.*
+  FROM approved_gallery_items(
+    p_content_types, p_min_educational_value, p_category, p_task_types,
+    p_specific_tasks, p_requirements, p_scene_type, p_media_type, p_featured
+  ) g
+  WHERE (COALESCE(g.featured, FALSE), COALESCE(g.view_count, 0), g.id)
+      < (COALESCE(p_after_featured, TRUE), COALESCE(p_after_view_count, 2147483647), p_after_id)
+  ORDER BY
+    COALESCE(g.featured, FALSE) DESC,
+    COALESCE(g.view_count, 0) DESC,
+    g.id DESC
+  LIMIT p_limit
+$$ LANGUAGE sql STABLE;
+
+-- Number of items the listing filters match (for "N results"; not per page)
+CREATE OR REPLACE FUNCTION count_gallery_items(
+  p_content_types TEXT[] DEFAULT NULL,
+  p_min_educational_value INTEGER DEFAULT NULL,
+  p_category VARCHAR DEFAULT NULL,
+  p_task_types TEXT[] DEFAULT NULL,
+  p_specific_tasks TEXT[] DEFAULT NULL,
+  p_requirements TEXT[] DEFAULT NULL,
+  p_scene_type VARCHAR DEFAULT NULL,
+  p_media_type VARCHAR DEFAULT NULL,
+  p_featured BOOLEAN DEFAULT NULL
+)
+RETURNS BIGINT AS $$
+  SELECT COUNT(*)
+  FROM approved_gallery_items(
+    p_content_types, p_min_educational_value, p_category, p_task_types,
+    p_specific_tasks, p_requirements, p_scene_type, p_media_type, p_featured
+  )
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,187 @@
+-- Migration 101: Gallery facet catalogue
+-- Date: 2026-10-19
+-- Purpose: get_gallery_filter_options() ran four DISTINCT / unnest scans over
+--          every approved row per call and returned no counts. Approved item
+--          counts per facet value (category, content type, scene type, task
+--          type, specific task, manufacturer) are now kept in
+--          gallery_facet_counts by statement-level triggers, so crawler
+--          upserts and moderation updates refresh them as they commit, and
+--          get_gallery_facets() reads the small table.
+
+CREATE TABLE IF NOT EXISTS gallery_facet_counts (
+  facet VARCHAR(50) NOT NULL,
+  value TEXT NOT NULL,
+  item_count BIGINT NOT NULL DEFAULT 0,
+  PRIMARY KEY (facet, value)
+);
+
+COMMENT ON TABLE gallery_facet_counts IS
+'Approved application_gallery items per facet value; kept current by triggers, rebuilt by refresh_gallery_facet_counts()';
+
+-- (facet, value) pairs of the approved rows in a set of gallery rows
+CREATE OR REPLACE FUNCTION gallery_facet_values(
+  p_status VARCHAR,
+  p_category VARCHAR,
+  p_content_type VARCHAR,
+  p_scene_type VARCHAR,
+  p_task_types TEXT[],
+  p_specific_tasks TEXT[],
+  p_manufacturers TEXT[]
+)
+RETURNS TABLE (facet VARCHAR(50), value TEXT) AS $$
+  SELECT f.facet, f.value
+  FROM (
+    SELECT 'category'::VARCHAR(50), p_category::TEXT
+    UNION ALL SELECT 'content_type', p_content_type
+    UNION ALL SELECT 'scene_type', p_scene_type
+    UNION ALL SELECT DISTINCT 'task_type', unnest(p_task_types)
+    UNION ALL SELECT DISTINCT 'specific_task', unnest(p_specific_tasks)
+    UNION ALL SELECT DISTINCT 'manufacturer', unnest(p_manufacturers)
+  ) AS f(facet, value)
+  WHERE p_status = 'approved' AND f.value IS NOT NULL AND f.value <> ''
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Apply one statement's changes to the facet counts.
+--
+-- Same approach as apply_gallery_stat_counts (migration 097): one pass per
+-- statement over the transition tables, deltas netted so updates that leave
+-- status and the facet columns alone write nothing, counters locked in key
+-- order.
+CREATE OR REPLACE FUNCTION apply_gallery_facet_counts()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    INSERT INTO gallery_facet_counts AS c (facet, value, item_count)
+    SELECT f.facet, f.value, COUNT(*)
+    FROM new_rows n,
+         gallery_facet_values(n.status, n.application_category, n.content_type, n.scene_type,
+                              n.task_types, n.specific_tasks, n.manufacturers) f
+    GROUP BY 1, 2
+    ORDER BY 1, 2
+    ON CONFLICT (facet, value)
+    DO UPDATE SET item_count = c.item_count + EXCLUDED.item_count;
+
+  ELSIF TG_OP = 'DELETE' THEN
+    INSERT INTO gallery_facet_counts AS c (facet, value, item_count)
+    SELECT f.facet, f.value, -COUNT(*)
+    FROM old_rows o,
+         gallery_facet_values(o.status, o.application_category, o.content_type, o.scene_type,
+                              o.task_types, o.specific_tasks, o.manufacturers) f
+    GROUP BY 1, 2
+    ORDER BY 1, 2
+    ON CONFLICT (facet, value)
+    DO UPDATE SET item_count = c.item_count + EXCLUDED.item_count;
+
+  ELSE
+    INSERT INTO gallery_facet_counts AS c (facet, value, item_count)
+    SELECT facet, value, SUM(delta)
+    FROM (
+      SELECT f.facet, f.value, 1 AS delta
+      FROM new_rows n,
+           gallery_facet_values(n.status, n.application_category, n.content_type, n.scene_type,
+                                n.task_types, n.specific_tasks, n.manufacturers) f
+      UNION ALL
+      SELECT f.facet, f.value, -1
+      FROM old_rows o,
+           gallery_facet_values(o.status, o.application_category, o.content_type, o.scene_type,
+                                o.task_types, o.specific_tasks, o.manufacturers) f
+    ) changes
+    GROUP BY 1, 2
+    HAVING SUM(delta) <> 0
+    ORDER BY 1, 2
+    ON CONFLICT (facet, value)
+    DO UPDATE SET item_count = c.item_count + EXCLUDED.item_count;
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS gallery_facet_counts_insert ON application_gallery;
+CREATE TRIGGER gallery_facet_counts_insert
+  AFTER INSERT ON application_gallery
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION apply_gallery_facet_counts();
+
+DROP TRIGGER IF EXISTS gallery_facet_counts_update ON application_gallery;
+CREATE TRIGGER gallery_facet_counts_update
+  AFTER UPDATE ON application_gallery
+  REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION apply_gallery_facet_counts();
+
+DROP TRIGGER IF EXISTS gallery_facet_counts_delete ON application_gallery;
+CREATE TRIGGER gallery_facet_counts_delete
+  AFTER DELETE ON application_gallery
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION apply_gallery_facet_counts();
+
+-- Rebuild the facet counts from application_gallery (initial fill, or after
+-- a TRUNCATE or bulk change made with triggers disabled). Gallery writes
+-- wait while it runs.
+CREATE OR REPLACE FUNCTION refresh_gallery_facet_counts()
+RETURNS void AS $$
+BEGIN
+  LOCK TABLE application_gallery IN SHARE MODE;
+  DELETE FROM gallery_facet_counts;
+  INSERT INTO gallery_facet_counts (facet, value, item_count)
+  SELECT f.facet, f.value, COUNT(*)
+  FROM application_gallery g,
+       gallery_facet_values(g.status, g.application_category, g.content_type, g.scene_type,
+                            g.task_types, g.specific_tasks, g.manufacturers) f
+  WHERE g.status = 'approved'
+  GROUP BY 1, 2;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE ALL ON FUNCTION refresh_gallery_facet_counts() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION refresh_gallery_facet_counts() TO service_role;
+
+SELECT refresh_gallery_facet_counts();
+
+-- Every facet value with its approved item count, most common first within
+-- each facet
+CREATE OR REPLACE FUNCTION get_gallery_facets()
+RETURNS TABLE (
+  facet VARCHAR(50),
+  value TEXT,
+  item_count BIGINT
+) AS $$
+BEGIN
+  RETURN QUERY
+  SELECT c.facet, c.value, c.item_count
+  FROM gallery_facet_counts c
+  WHERE c.item_count > 0
+  ORDER BY c.facet, c.item_count DESC, c.value;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Same result as before, read from the facet counts
+CREATE OR REPLACE FUNCTION get_gallery_filter_options()
+RETURNS TABLE (
+  categories TEXT[],
+  scene_types TEXT[],
+  task_types_list TEXT[],
+  manufacturers_list TEXT[]
+) AS $$
+BEGIN
+  RETURN QUERY
+  SELECT
+    ARRAY(SELECT c.value FROM gallery_facet_counts c WHERE c.facet = 'category' AND c.item_count > 0),
+    ARRAY(SELECT c.value FROM gallery_facet_counts c WHERE c.facet = 'scene_type' AND c.item_count > 0),
+    ARRAY(SELECT c.value FROM gallery_facet_counts c WHERE c.facet = 'task_type' AND c.item_count > 0),
+    ARRAY(SELECT c.value FROM gallery_facet_counts c WHERE c.facet = 'manufacturer' AND c.item_count > 0);
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- ============================================
+-- ROW LEVEL SECURITY
+-- ============================================
+
+ALTER TABLE gallery_facet_counts ENABLE ROW LEVEL SECURITY;
+
+-- Public: counts cover approved items only
+CREATE POLICY "Public can view gallery facet counts" ON gallery_facet_counts
+  FOR SELECT USING (true);